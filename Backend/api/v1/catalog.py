@@ -0,0 +1,58 @@
+"""Respuestas de los catálogos geográficos: JSON ya serializado con ETag, 304 condicional y compresión."""
+from typing import Optional
+
+from fastapi import Request, Response, status
+
+from services.geo_catalog import MIN_COMPRESS_BYTES, CatalogPayload, geo_catalog, supported_encodings
+
+# El navegador guarda la respuesta pero la revalida siempre: con el ETag recibe un 304 sin cuerpo
+CACHE_CONTROL = "no-cache"
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match con comparación débil (RFC 9110): acepta `*`, listas y prefijos W/."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = (tag.strip() for tag in if_none_match.split(","))
+    return any(tag.removeprefix("W/") == etag for tag in candidates)
+
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """Primera codificación soportada que el cliente acepta (q > 0), o None para enviar sin comprimir."""
+    if not accept_encoding:
+        return None
+    accepted = {}
+    for part in accept_encoding.split(","):
+        coding, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[coding.strip().lower()] = quality
+    for encoding in supported_encodings():
+        if accepted.get(encoding, accepted.get("*", 0.0)) > 0:
+            return encoding
+    return None
+
+
+def payload_response(request: Request, payload: CatalogPayload) -> Response:
+    headers = {"Cache-Control": CACHE_CONTROL, "Vary": "Accept-Encoding"}
+    encoding = None
+    if len(payload.body) >= MIN_COMPRESS_BYTES:
+        encoding = negotiate_encoding(request.headers.get("accept-encoding"))
+    headers["ETag"] = payload.encoded_etag(encoding) if encoding else payload.etag
+    if etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    if encoding is None:
+        return Response(payload.body, media_type="application/json", headers=headers)
+    headers["Content-Encoding"] = encoding
+    return Response(payload.encoded(encoding), media_type="application/json", headers=headers)
+
+
+async def catalog_response(request: Request, name: str, parent_id: Optional[int] = None) -> Response:
+    return payload_response(request, (await geo_catalog.get(name)).payload(parent_id))
@@ -0,0 +1,87 @@
+import hmac
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, status
+
+from core.config import settings
+from core.query_profiler import query_profiler
+from services.analytics import analytics_refresher
+from services.model_experiments import model_experiments
+from services.model_manager import model_manager
+from services.recommendation_cache import recommendation_cache
+
+
+router = APIRouter()
+
+
+def require_admin(x_admin_token: Optional[str] = Header(None)) -> None:
+    """Protege los endpoints de administración con el token configurado en ADMIN_TOKEN."""
+    if not settings.admin_token:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Endpoints de administración deshabilitados (configura ADMIN_TOKEN)"
+        )
+    if not x_admin_token or not hmac.compare_digest(x_admin_token, settings.admin_token):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token de administración inválido")
+
+
+@router.get("/model", dependencies=[Depends(require_admin)])
+def get_model_status():
+    """Modelo en servicio, métricas de carga/recarga y estado de shadows/challenger."""
+    return {**model_manager.status(), 'experiments': model_experiments.status()}
+
+
+@router.get("/queries", dependencies=[Depends(require_admin)])
+def get_query_summary():
+    """Consultas por endpoint, patrones N+1 y consultas lentas (requiere QUERY_PROFILER_ENABLED)."""
+    return query_profiler.status()
+
+
+@router.delete("/queries", status_code=status.HTTP_204_NO_CONTENT, dependencies=[Depends(require_admin)])
+def reset_query_summary():
+    query_profiler.reset()
+
+
+@router.post("/model/reload", status_code=status.HTTP_202_ACCEPTED, dependencies=[Depends(require_admin)])
+def reload_model(
+    version: Optional[str] = Query(None, description="Cargar esta versión del registro y activarla si pasa la validación"),
+    wait: bool = Query(False, description="Esperar a que termine la recarga")
+):
+    """
+    Carga la versión activa (o `version`) en segundo plano, la valida con el conjunto de humo
+    y la pone en servicio sin reiniciar. Las peticiones en curso terminan con el modelo anterior.
+    `version` se marca como activa en el registro solo si pasa la validación.
+    """
+    if version and not model_manager.registry.model_path(version).is_file():
+        raise HTTPException(status_code=404, detail=f"La versión {version} no existe en el registro")
+    
+    if wait:
+        try:
+            model_manager.reload(version=version)
+        except Exception as e:
+            raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=f"Recarga rechazada: {str(e)}")
+        return model_manager.status()
+    
+    if not model_manager.reload_in_background(version=version):
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Ya hay una recarga en curso")
+    return model_manager.status()
+
+
+@router.post("/analytics/refresh", dependencies=[Depends(require_admin)])
+def refresh_analytics():
+    """Reconstruye ahora las tablas resumen de /api/v1/analytics (p. ej. tras una carga masiva)."""
+    stats = analytics_refresher.run_once()
+    return {**analytics_refresher.status(), 'stats': stats}
+
+
+@router.get("/recommendation-cache/stats", response_model=dict, dependencies=[Depends(require_admin)])
+def get_recommendation_cache_stats():
+    """Contadores de aciertos/fallos de la caché de recomendaciones GPT."""
+    return recommendation_cache.stats()
+
+
+@router.delete("/recommendation-cache/tenders/{tender_key}", response_model=dict, dependencies=[Depends(require_admin)])
+def invalidate_recommendation_cache(tender_key: str):
+    """Invalida las recomendaciones cacheadas de una licitación (ID o clave mock)."""
+    removed = recommendation_cache.invalidate_tender(tender_key)
+    return {"tender_key": tender_key, "removed": removed}
@@ -0,0 +1,76 @@
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+
+from api.v1.routes_tenders import get_current_user_id, load_current_user
+from core.database import AsyncDb, get_async_db
+from schemas.analytics import (
+    AnalyticsOverview,
+    BudgetDistribution,
+    CompanyParticipationSummary,
+    TenderStatsResponse,
+)
+from services import analytics
+
+
+router = APIRouter()
+
+
+def _tender_stats(db: Session, group_by: str, status_filter: Optional[str], category_filter: Optional[str]):
+    return {
+        'group_by': group_by,
+        'groups': analytics.tenders_by(db, group_by, status_filter, category_filter),
+        'refreshed_at': analytics.last_refreshed_at(db),
+    }
+
+
+def _budget_distribution(db: Session, category_filter: Optional[str]):
+    return {**analytics.budget_distribution(db, category_filter), 'refreshed_at': analytics.last_refreshed_at(db)}
+
+
+def _my_company_stats(db: Session, user_id: int):
+    current_user = load_current_user(db, user_id)
+    if current_user.company_id is None:
+        raise HTTPException(status_code=404, detail="El usuario no pertenece a una empresa")
+    return analytics.company_stats(db, current_user.company_id)
+
+
+@router.get("/overview", response_model=AnalyticsOverview)
+async def get_overview(
+    db: AsyncDb = Depends(get_async_db),
+    user_id: int = Depends(get_current_user_id)
+):
+    """Total de licitaciones, abiertas, presupuesto total y competidores promedio."""
+    return await db.run(analytics.overview)
+
+
+@router.get("/tenders", response_model=TenderStatsResponse)
+async def get_tender_stats(
+    group_by: Literal['status', 'category', 'month'] = Query('status', description="Agrupar por estado, categoría o mes"),
+    status_filter: Optional[str] = Query(None, description="Filtrar por estado"),
+    category_filter: Optional[str] = Query(None, description="Filtrar por categoría"),
+    db: AsyncDb = Depends(get_async_db),
+    user_id: int = Depends(get_current_user_id)
+):
+    """Licitaciones, presupuesto total y competidores promedio por grupo."""
+    return await db.run(_tender_stats, group_by, status_filter, category_filter)
+
+
+@router.get("/budget-distribution", response_model=BudgetDistribution)
+async def get_budget_distribution(
+    category_filter: Optional[str] = Query(None, description="Filtrar por categoría"),
+    db: AsyncDb = Depends(get_async_db),
+    user_id: int = Depends(get_current_user_id)
+):
+    """Licitaciones por tramo de presupuesto de $500k (hasta > $5M)."""
+    return await db.run(_budget_distribution, category_filter)
+
+
+@router.get("/companies/me", response_model=CompanyParticipationSummary)
+async def get_my_company_stats(
+    db: AsyncDb = Depends(get_async_db),
+    user_id: int = Depends(get_current_user_id)
+):
+    """Participaciones de la empresa del usuario, tasa de éxito y probabilidad media predicha."""
+    return await db.run(_my_company_stats, user_id)
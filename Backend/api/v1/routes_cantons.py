@@ -1,20 +1,24 @@
-from typing import List
+from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
 from sqlalchemy.orm import Session
 
+from api.v1.catalog import catalog_response
 from core.database import get_db
 from models.canton import Canton
 from schemas.canton import CantonCreate, CantonRead
+from services.geo_catalog import geo_catalog
 
 
 router = APIRouter()
 
 
 @router.get("/", response_model=List[CantonRead])
-def list_cantons(db: Session = Depends(get_db)):
-    cantons = db.query(Canton).order_by(Canton.name).all()
-    return cantons
+async def list_cantons(
+    request: Request,
+    province_id: Optional[int] = Query(None, description="Filtrar por provincia"),
+):
+    return await catalog_response(request, "cantons", province_id)
 
 
 @router.post("/", response_model=CantonRead, status_code=status.HTTP_201_CREATED)
@@ -33,5 +37,6 @@ def create_canton(payload: CantonCreate, db: Session = Depends(get_db)):
     db.add(canton)
     db.commit()
     db.refresh(canton)
+    geo_catalog.invalidate("cantons")
     return canton
 
@@ -1,20 +1,24 @@
-from typing import List
+from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
 from sqlalchemy.orm import Session
 
+from api.v1.catalog import catalog_response
 from core.database import get_db
 from models.city import City
 from schemas.city import CityCreate, CityRead
+from services.geo_catalog import geo_catalog
 
 
 router = APIRouter()
 
 
 @router.get("/", response_model=List[CityRead])
-def list_cities(db: Session = Depends(get_db)):
-    cities = db.query(City).order_by(City.name).all()
-    return cities
+async def list_cities(
+    request: Request,
+    province_id: Optional[int] = Query(None, description="Filtrar por provincia"),
+):
+    return await catalog_response(request, "cities", province_id)
 
 
 @router.post("/", response_model=CityRead, status_code=status.HTTP_201_CREATED)
@@ -33,5 +37,6 @@ def create_city(payload: CityCreate, db: Session = Depends(get_db)):
     db.add(city)
     db.commit()
     db.refresh(city)
+    geo_catalog.invalidate("cities")
     return city
 
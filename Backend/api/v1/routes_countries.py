@@ -1,19 +1,20 @@
 from typing import List
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from sqlalchemy.orm import Session
 
+from api.v1.catalog import catalog_response
 from core.database import get_db
 from models.country import Country
 from schemas.country import CountryCreate, CountryRead
+from services.geo_catalog import geo_catalog
 
 router = APIRouter()
 
 
 @router.get("/", response_model=List[CountryRead])
-def list_countries(db: Session = Depends(get_db)):
-    countries = db.query(Country).order_by(Country.name).all()
-    return countries
+async def list_countries(request: Request):
+    return await catalog_response(request, "countries")
 
 
 @router.post("/", response_model=CountryRead, status_code=status.HTTP_201_CREATED)
@@ -28,4 +29,5 @@ def create_country(payload: CountryCreate, db: Session = Depends(get_db)):
     db.add(country)
     db.commit()
     db.refresh(country)
+    geo_catalog.invalidate("countries")
     return country
@@ -0,0 +1,22 @@
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Query, Request, status
+
+from api.v1.catalog import payload_response
+from schemas.geo import GeoTree
+from services.geo_catalog import geo_catalog
+
+
+router = APIRouter()
+
+
+@router.get("/tree", response_model=GeoTree)
+async def get_geo_tree(
+    request: Request,
+    country_id: Optional[int] = Query(None, description="Solo el subárbol de este país"),
+):
+    """Países → provincias → cantones (con parroquias) y ciudades, solo ids y nombres, en una llamada."""
+    payload = (await geo_catalog.tree()).payload(country_id)
+    if payload is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Country not found")
+    return payload_response(request, payload)
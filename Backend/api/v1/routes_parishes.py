@@ -1,20 +1,24 @@
-from typing import List
+from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
 from sqlalchemy.orm import Session
 
+from api.v1.catalog import catalog_response
 from core.database import get_db
 from models.parish import Parish
 from schemas.parish import ParishCreate, ParishRead
+from services.geo_catalog import geo_catalog
 
 
 router = APIRouter()
 
 
 @router.get("/", response_model=List[ParishRead])
-def list_parishes(db: Session = Depends(get_db)):
-    parishes = db.query(Parish).order_by(Parish.name).all()
-    return parishes
+async def list_parishes(
+    request: Request,
+    canton_id: Optional[int] = Query(None, description="Filtrar por cantón"),
+):
+    return await catalog_response(request, "parishes", canton_id)
 
 
 @router.post("/", response_model=ParishRead, status_code=status.HTTP_201_CREATED)
@@ -33,5 +37,6 @@ def create_parish(payload: ParishCreate, db: Session = Depends(get_db)):
     db.add(parish)
     db.commit()
     db.refresh(parish)
+    geo_catalog.invalidate("parishes")
     return parish
 
@@ -1,25 +1,87 @@
-from typing import List
+import json
+from typing import List, Optional
 from decimal import Decimal
 
-from fastapi import APIRouter, Depends, status, HTTPException
+import numpy as np
+
+from fastapi import APIRouter, Depends, Query, status, HTTPException
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
 from core.database import get_db
 from models.participation import Participation
 from models.tender import Tender
 from models.company import Company
-from schemas.participation import ParticipationCreate, ParticipationRead, ParticipationWithPrediction
-from services.prediction_service import predict_win_probability, calculate_contract_duration_days
-from services.gpt_service import generate_recommendation
+from schemas.participation import (
+    ParticipationCreate,
+    ParticipationRead,
+    ParticipationWithPrediction,
+    BatchPredictionRequest,
+    BatchPredictionResponse,
+    BatchPredictionResult,
+    BidSweepRequest,
+    BidSweepResponse,
+    BidSweepPoint,
+    RecommendationStatus,
+)
+from services.prediction_service import (
+    predict_win_probability,
+    predict_win_probability_batch,
+    predict_bid_curve,
+    calculate_contract_duration_days,
+    score_win_probability,
+)
+from services.model_experiments import model_experiments
+from services.query_options import COMPANY_PROFILE_OPTIONS, participation_read_query
+from services.win_matrix import DEFAULT_CONTRACT_DURATION_DAYS, tender_duration_days
+from services.gpt_service import generate_recommendation, generate_quick_recommendation, stream_recommendation
+from services.recommendation_jobs import (
+    recommendation_jobs,
+    build_recommendation_context,
+    QueueUnavailableError,
+    STATUS_COMPLETED,
+    STATUS_FAILED,
+    STATUS_PENDING,
+    FINAL_STATUSES,
+)
 
 
 router = APIRouter()
 
 
 @router.get("/", response_model=List[ParticipationRead])
-def list_participations(db: Session = Depends(get_db)):
-    participations = db.query(Participation).order_by(Participation.created_at.desc()).all()
-    return participations
+def list_participations(
+    company_id: Optional[int] = Query(None, description="Filtrar por empresa"),
+    tender_id: Optional[int] = Query(None, description="Filtrar por licitación"),
+    status_filter: Optional[str] = Query(None, description="Filtrar por estado: submitted, awarded, rejected, withdrawn"),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=500),
+    db: Session = Depends(get_db)
+):
+    """
+    Listar participaciones (más recientes primero), paginadas con skip/limit.
+    Solo se leen las columnas de ParticipationRead: recommendation_text no sale de la base.
+    """
+    query = participation_read_query(db)
+    if company_id is not None:
+        query = query.filter(Participation.company_id == company_id)
+    if tender_id is not None:
+        query = query.filter(Participation.tender_id == tender_id)
+    if status_filter:
+        query = query.filter(Participation.participation_status == status_filter)
+    
+    rows = (
+        query.order_by(Participation.created_at.desc(), Participation.id.desc())
+        .offset(skip)
+        .limit(limit)
+        .all()
+    )
+    return [ParticipationRead.model_validate(row) for row in rows]
+
+
+def _mock_tender_key(tender_data: dict) -> str:
+    """Identificador de una licitación mock para la caché de recomendaciones."""
+    return f"mock:{tender_data.get('id') or tender_data.get('external_id') or tender_data.get('title', '')}"
 
 
 @router.post("/predict", response_model=dict, status_code=status.HTTP_200_OK)
@@ -76,11 +138,11 @@ def predict_without_saving(payload: dict):
             company_sector=None,
             company_size=None,
             bid_amount=bid_amount,
-            predicted_probability=win_probability
+            predicted_probability=win_probability,
+            tender_key=_mock_tender_key(tender_data)
         )
     except Exception as e:
         # Si falla GPT, usar recomendación simple
-        from services.gpt_service import generate_quick_recommendation
         recommendation = generate_quick_recommendation(win_probability, tender_data.get("number_of_tenderers", 1))
         recommendation += f"\n\n*Nota: Error GPT: {str(e)}*"
     
@@ -93,12 +155,173 @@ def predict_without_saving(payload: dict):
     }
 
 
+@router.post("/predict/batch", response_model=BatchPredictionResponse, status_code=status.HTTP_200_OK)
+def predict_batch(payload: BatchPredictionRequest):
+    """
+    Calcula la probabilidad de ganar de varias ofertas en una sola llamada a CatBoost.
+    No genera recomendaciones GPT ni guarda en BD; pensado para el dashboard y procesos nocturnos.
+    """
+    records = [item.model_dump(exclude={"reference"}) for item in payload.items]
+    try:
+        probabilities = predict_win_probability_batch(records)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error en predicción CatBoost: {str(e)}")
+
+    return BatchPredictionResponse(
+        count=len(payload.items),
+        results=[
+            BatchPredictionResult(reference=item.reference, predicted_win_probability=float(probability))
+            for item, probability in zip(payload.items, probabilities)
+        ]
+    )
+
+
+def _sse_event(event: str, data: dict) -> str:
+    """Formatea un evento Server-Sent Events."""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@router.post("/predict/stream")
+def predict_stream(payload: dict):
+    """
+    Igual que /predict pero en streaming (Server-Sent Events), SIN guardar en BD.
+    
+    Eventos emitidos:
+    - probability: probabilidad CatBoost (inmediata)
+    - token: fragmentos de la recomendación GPT a medida que llegan
+    - fallback: recomendación rápida si GPT falla (puede llegar tras algunos tokens)
+    - done: fin del stream
+    """
+    tender_data = payload.get("tender_data", {})
+    bid_amount = payload.get("bid_amount", 0)
+    contract_duration_days = payload.get("contract_duration_days", 365)
+    number_of_tenderers = tender_data.get("number_of_tenderers", 1)
+    
+    # Calcular probabilidad con CatBoost antes de abrir el stream para devolver errores HTTP
+    try:
+        win_probability = predict_win_probability(
+            number_of_tenderers=number_of_tenderers,
+            main_category=tender_data.get("main_category", "Servicios"),
+            budget=tender_data.get("budget_amount", 100000.0),
+            bid_amount=bid_amount,
+            tender_duration_days=tender_data.get("tender_duration_days", 28),
+            contract_duration_days=contract_duration_days,
+            winner=0
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error en predicción CatBoost: {str(e)}")
+    
+    def event_stream():
+        yield _sse_event("probability", {
+            "predicted_win_probability": win_probability,
+            "bid_amount": bid_amount,
+            "tender_title": tender_data.get("title", ""),
+            "main_category": tender_data.get("main_category", "")
+        })
+        
+        try:
+            for text in stream_recommendation(
+                tender_title=tender_data.get("title", "Sin título"),
+                tender_description=tender_data.get("description", "Sin descripción"),
+                main_category=tender_data.get("main_category", "Servicios"),
+                budget_amount=tender_data.get("budget_amount", 100000.0),
+                buyer_name=tender_data.get("buyer_name", "Entidad desconocida"),
+                eligibility_criteria=tender_data.get("eligibility_criteria", "No especificado"),
+                number_of_tenderers=number_of_tenderers,
+                company_name="Mi Empresa PYME",  # Mock
+                company_sector=None,
+                company_size=None,
+                bid_amount=bid_amount,
+                predicted_probability=win_probability,
+                tender_key=_mock_tender_key(tender_data)
+            ):
+                yield _sse_event("token", {"text": text})
+        except Exception as e:
+            # Si falla GPT (al inicio o a mitad), enviar recomendación simple
+            yield _sse_event("fallback", {
+                "text": generate_quick_recommendation(win_probability, number_of_tenderers),
+                "error": str(e)
+            })
+        
+        yield _sse_event("done", {})
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+# Límite de puntos por barrido para acotar el tamaño de la respuesta
+MAX_SWEEP_POINTS = 2000
+
+
+@router.post("/predict/sweep", response_model=BidSweepResponse, status_code=status.HTTP_200_OK)
+def predict_bid_sweep(payload: BidSweepRequest):
+    """
+    Devuelve la curva completa probabilidad-vs-oferta de una licitación con una sola
+    llamada vectorizada a CatBoost, marcando la oferta con mayor valor esperado.
+    No consulta GPT.
+    """
+    if payload.ratios:
+        bid_amounts = np.asarray(payload.ratios, dtype=np.float64) * payload.budget_amount
+    else:
+        n_points = int(np.floor((payload.max_bid - payload.min_bid) / payload.step)) + 1
+        if n_points > MAX_SWEEP_POINTS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"El barrido genera {n_points} puntos; el máximo es {MAX_SWEEP_POINTS}"
+            )
+        bid_amounts = payload.min_bid + payload.step * np.arange(n_points)
+
+    if bid_amounts.shape[0] > MAX_SWEEP_POINTS:
+        raise HTTPException(status_code=400, detail=f"El máximo de puntos es {MAX_SWEEP_POINTS}")
+
+    try:
+        curve = predict_bid_curve(
+            number_of_tenderers=payload.number_of_tenderers,
+            main_category=payload.main_category,
+            budget=payload.budget_amount,
+            bid_amounts=bid_amounts,
+            tender_duration_days=payload.tender_duration_days,
+            contract_duration_days=payload.contract_duration_days,
+            estimated_cost=payload.estimated_cost
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error en predicción CatBoost: {str(e)}")
+
+    points = [
+        BidSweepPoint(
+            bid_amount=float(bid),
+            bid_ratio=float(bid / payload.budget_amount),
+            predicted_win_probability=float(probability),
+            expected_value=float(expected_value)
+        )
+        for bid, probability, expected_value in zip(
+            curve['bid_amounts'], curve['probabilities'], curve['expected_values']
+        )
+    ]
+
+    return BidSweepResponse(
+        count=len(points),
+        points=points,
+        best=points[curve['best_index']] if curve['best_index'] is not None else None
+    )
+
+
 @router.post("/", response_model=ParticipationWithPrediction, status_code=status.HTTP_201_CREATED)
 def create_participation_with_prediction(payload: ParticipationCreate, db: Session = Depends(get_db)):
     """
     Crea una participación y calcula automáticamente:
-    1. Probabilidad de ganar usando CatBoost
-    2. Recomendación personalizada usando GPT-4
+    1. Probabilidad de ganar usando CatBoost (inmediato)
+    2. Recomendación personalizada usando GPT-4 (en segundo plano)
+    
+    La respuesta incluye una recomendación preliminar; la definitiva se consulta en
+    GET /{participation_id}/recommendation o por SSE en /{participation_id}/recommendation/events.
     """
     # Validar que el tender existe
     tender = db.query(Tender).filter(Tender.id == payload.tender_id).first()
@@ -108,12 +331,13 @@ def create_participation_with_prediction(payload: ParticipationCreate, db: Sessi
     # TODO: Obtener company_id del usuario autenticado
     # Por ahora usamos company_id = 1 (mock)
     company_id = 1
-    company = db.query(Company).filter(Company.id == company_id).first()
+    # Sector y tamaño van al contexto de GPT: se cargan en la misma consulta
+    company = db.query(Company).options(*COMPANY_PROFILE_OPTIONS).filter(Company.id == company_id).first()
     if not company:
         raise HTTPException(status_code=404, detail=f"Company {company_id} no encontrada")
     
-    # Calcular contract_duration_days
-    contract_duration_days = 365  # Default 1 año
+    # Calcular contract_duration_days (por defecto el de la licitación o 1 año)
+    contract_duration_days = tender.contract_duration_days or DEFAULT_CONTRACT_DURATION_DAYS
     if payload.contract_start_date and payload.contract_end_date:
         try:
             contract_duration_days = calculate_contract_duration_days(
@@ -125,41 +349,27 @@ def create_participation_with_prediction(payload: ParticipationCreate, db: Sessi
     
     # Calcular probabilidad con CatBoost
     try:
-        win_probability = predict_win_probability(
+        # Según la empresa puede responder el modelo challenger; se guarda la versión usada
+        score = score_win_probability(
             number_of_tenderers=tender.number_of_tenderers or 1,
             main_category=tender.main_category or 'Servicios',
             budget=float(tender.budget_amount) if tender.budget_amount else 100000.0,
             bid_amount=payload.bid_amount,
-            tender_duration_days=tender.tender_duration_days or 28,
+            tender_duration_days=tender_duration_days(tender),
             contract_duration_days=contract_duration_days,
-            winner=0
+            winner=0,
+            company_id=company_id
         )
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error en predicción CatBoost: {str(e)}")
+    win_probability = score.probability
     
-    # Generar recomendación con GPT
-    try:
-        recommendation = generate_recommendation(
-            tender_title=tender.title or "Sin título",
-            tender_description=tender.description or "Sin descripción",
-            main_category=tender.main_category or "Servicios",
-            budget_amount=float(tender.budget_amount) if tender.budget_amount else 100000.0,
-            buyer_name=tender.buyer_name or "Entidad desconocida",
-            eligibility_criteria=tender.eligibility_criteria or "No especificado",
-            number_of_tenderers=tender.number_of_tenderers or 1,
-            company_name=company.display_name or "Empresa",
-            company_sector=company.sector,
-            company_size=company.company_size,
-            bid_amount=payload.bid_amount,
-            predicted_probability=win_probability
-        )
-    except Exception as e:
-        # Si falla GPT, usar recomendación simple
-        from services.gpt_service import generate_quick_recommendation
-        recommendation = generate_quick_recommendation(win_probability, tender.number_of_tenderers or 1)
-        recommendation += f"\n\n*Nota: Recomendación simplificada. Error GPT: {str(e)}*"
+    # Contexto para GPT (valores planos: la sesión se cierra antes de que corra el worker)
+    recommendation_context = build_recommendation_context(
+        tender, company, payload.bid_amount, win_probability
+    )
     
-    # Crear participación con predicción
+    # Crear participación con predicción; la recomendación se completa en segundo plano
     participation = Participation(
         tender_id=payload.tender_id,
         company_id=company_id,
@@ -167,13 +377,26 @@ def create_participation_with_prediction(payload: ParticipationCreate, db: Sessi
         bid_currency=payload.bid_currency,
         participation_status='submitted',
         predicted_win_prob=Decimal(str(round(win_probability, 4))),
-        model_version='catboost_v1',
-        recommendation_text=recommendation
+        model_version=score.model_version,
+        recommendation_text=None
     )
     
     db.add(participation)
     db.commit()
     db.refresh(participation)
+    model_experiments.link(score.request_id, participation.id)
+    
+    preliminary = generate_quick_recommendation(win_probability, tender.number_of_tenderers or 1)
+    try:
+        job = recommendation_jobs.enqueue(participation.id, recommendation_context)
+        recommendation_status = job.status
+    except QueueUnavailableError as e:
+        # Sin cola disponible guardamos la recomendación rápida para no dejarla vacía
+        participation.recommendation_text = preliminary + f"\n\n*Nota: Recomendación simplificada. {str(e)}*"
+        db.commit()
+        db.refresh(participation)
+        preliminary = participation.recommendation_text
+        recommendation_status = STATUS_FAILED
     
     # Construir respuesta
     return ParticipationWithPrediction(
@@ -183,12 +406,60 @@ def create_participation_with_prediction(payload: ParticipationCreate, db: Sessi
         bid_amount=float(participation.bid_amount),
         bid_currency=participation.bid_currency,
         predicted_win_probability=float(participation.predicted_win_prob),
-        recommendation=participation.recommendation_text,
+        recommendation=preliminary,
+        recommendation_status=recommendation_status,
         status=participation.participation_status,
         created_at=participation.created_at
     )
 
 
+def _stored_recommendation_status(participation: Participation) -> str:
+    """Estado sin trabajo en memoria: pendiente mientras el texto siga vacío (se re-encola al arrancar)."""
+    return STATUS_COMPLETED if participation.recommendation_text else STATUS_PENDING
+
+
+@router.get("/{participation_id}/recommendation", response_model=RecommendationStatus)
+def get_recommendation_status(participation_id: int, db: Session = Depends(get_db)):
+    """Estado de la recomendación GPT de una participación (para polling)."""
+    participation = db.query(Participation).filter(Participation.id == participation_id).first()
+    if not participation:
+        raise HTTPException(status_code=404, detail=f"Participation {participation_id} no encontrada")
+    
+    job = recommendation_jobs.get(participation_id)
+    if job is not None:
+        snapshot = job.snapshot()
+    else:
+        # Trabajo ya no está en memoria (p. ej. tras reiniciar): deducir del registro
+        snapshot = {
+            "participation_id": participation_id,
+            "status": _stored_recommendation_status(participation),
+        }
+    
+    if snapshot["status"] in FINAL_STATUSES:
+        snapshot["recommendation"] = participation.recommendation_text
+    return RecommendationStatus(**snapshot)
+
+
+@router.get("/{participation_id}/recommendation/events")
+async def stream_recommendation_status(participation_id: int):
+    """Server-Sent Events con el progreso de la recomendación hasta que termina."""
+    if recommendation_jobs.get(participation_id) is None:
+        raise HTTPException(
+            status_code=404,
+            detail=f"No hay una recomendación en curso para la participación {participation_id}"
+        )
+    
+    async def event_stream():
+        async for snapshot in recommendation_jobs.events(participation_id):
+            yield _sse_event("status", snapshot)
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @router.get("/{participation_id}", response_model=ParticipationWithPrediction)
 def get_participation_with_prediction(participation_id: int, db: Session = Depends(get_db)):
     """Obtiene una participación con su predicción y recomendación."""
@@ -196,6 +467,8 @@ def get_participation_with_prediction(participation_id: int, db: Session = Depen
     if not participation:
         raise HTTPException(status_code=404, detail=f"Participation {participation_id} no encontrada")
     
+    job = recommendation_jobs.get(participation_id)
+    
     return ParticipationWithPrediction(
         id=participation.id,
         tender_id=participation.tender_id,
@@ -204,6 +477,7 @@ def get_participation_with_prediction(participation_id: int, db: Session = Depen
         bid_currency=participation.bid_currency or 'USD',
         predicted_win_probability=float(participation.predicted_win_prob) if participation.predicted_win_prob else 0.0,
         recommendation=participation.recommendation_text or "Sin recomendación",
+        recommendation_status=job.status if job else _stored_recommendation_status(participation),
         status=participation.participation_status or 'unknown',
         created_at=participation.created_at
     )
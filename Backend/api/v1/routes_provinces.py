@@ -1,20 +1,24 @@
-from typing import List
+from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
 from sqlalchemy.orm import Session
 
+from api.v1.catalog import catalog_response
 from core.database import get_db
 from models.province import Province
 from schemas.province import ProvinceCreate, ProvinceRead
+from services.geo_catalog import geo_catalog
 
 
 router = APIRouter()
 
 
 @router.get("/", response_model=List[ProvinceRead])
-def list_provinces(db: Session = Depends(get_db)):
-    provinces = db.query(Province).order_by(Province.name).all()
-    return provinces
+async def list_provinces(
+    request: Request,
+    country_id: Optional[int] = Query(None, description="Filtrar por país"),
+):
+    return await catalog_response(request, "provinces", country_id)
 
 
 @router.post("/", response_model=ProvinceRead, status_code=status.HTTP_201_CREATED)
@@ -33,5 +37,6 @@ def create_province(payload: ProvinceCreate, db: Session = Depends(get_db)):
     db.add(province)
     db.commit()
     db.refresh(province)
+    geo_catalog.invalidate("provinces")
     return province
 
@@ -1,53 +1,61 @@
-from fastapi import APIRouter, HTTPException
+import logging
+from datetime import date
+from typing import Dict, Optional, Tuple
+
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from api.v1.routes_tenders import get_current_user_id, load_current_user
+from core.database import AsyncDb, SessionLocal, get_async_db
+from models.company import Company
+from services.query_options import COMPANY_PROFILE_OPTIONS
 from services.recommendation_service import SimpleRecommendationService
-from typing import Optional
-import json
-import os
 
 router = APIRouter()
 recommendation_service = SimpleRecommendationService()
+logger = logging.getLogger(__name__)
 
 
-@router.get("/daily")
-async def get_daily_recommendations():
-    """
-    Obtiene las 3 mejores recomendaciones del día con resumen corto.
-    Se actualiza cada 24 horas automáticamente.
-    """
+def _stored_recommendations(db: Session, user_id: int, today: date) -> Tuple[int, Optional[Dict]]:
+    current_user = load_current_user(db, user_id)
+    company_id = db.query(Company.id).filter(Company.id == current_user.company_id).scalar()
+    if company_id is None:
+        raise HTTPException(status_code=404, detail=f"Company {current_user.company_id} no encontrada")
+    return company_id, recommendation_service.get_stored(db, company_id, today)
+
+
+def _generate_recommendations(company_id: int, today: date) -> Dict:
+    db = SessionLocal()
     try:
-        # Usar archivo mock_tenders.json
-        mock_file = os.path.join(os.path.dirname(__file__), '..', '..', 'mock_tenders.json')
-        print(f"📁 Buscando archivo en: {mock_file}")
-        
-        if not os.path.exists(mock_file):
-            print(f"⚠️ Archivo no encontrado: {mock_file}")
-            return {
-                'success': True,
-                'data': {
-                    'has_recommendations': False,
-                    'message': 'No hay licitaciones disponibles en este momento'
-                }
-            }
-        
-        with open(mock_file, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-            # Extraer las licitaciones del JSON
-            tenders_dict = data.get('tenders', []) if isinstance(data, dict) else data
-        
-        print(f"📊 Analizando {len(tenders_dict)} licitaciones para recomendaciones...")
-        
-        # Generar recomendaciones
-        result = recommendation_service.get_daily_recommendations(tenders_dict)
-        
-        print(f"✅ Recomendaciones generadas: {result.get('has_recommendations', False)}")
-        
-        return {
-            'success': True,
-            'data': result
-        }
-    
+        # El perfil de la empresa (sector y tamaño) define el ranking y el resumen de GPT
+        company = db.get(Company, company_id, options=COMPANY_PROFILE_OPTIONS)
+        return recommendation_service.get_daily_recommendations(db, company, today)
     except Exception as e:
-        print(f"❌ Error: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Error generando recomendaciones diarias", extra={"company_id": company_id})
         raise HTTPException(status_code=500, detail=f"Error generando recomendaciones: {str(e)}")
+    finally:
+        db.close()
+
+
+@router.get("/daily")
+async def get_daily_recommendations(
+    db: AsyncDb = Depends(get_async_db),
+    user_id: int = Depends(get_current_user_id)
+):
+    """
+    Obtiene las 3 mejores recomendaciones del día para la empresa del usuario con resumen corto.
+    Se generan una vez por empresa y día a partir de la tabla de licitaciones.
+    
+    La lectura de las ya generadas va por la sesión async; la generación (llama a GPT) corre
+    en el threadpool con una sesión síncrona para no bloquear el event loop.
+    """
+    today = date.today()
+    company_id, result = await db.run(_stored_recommendations, user_id, today)
+    if result is None:
+        result = await run_in_threadpool(_generate_recommendations, company_id, today)
+
+    return {
+        'success': True,
+        'data': result
+    }
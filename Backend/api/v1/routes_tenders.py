@@ -1,14 +1,37 @@
-from typing import List, Optional
+from typing import List, Optional, Union
 
 from fastapi import APIRouter, Depends, HTTPException, status, Query, Header
 from sqlalchemy.orm import Session
-from sqlalchemy import not_, exists
+from sqlalchemy import not_, exists, or_, and_
 
-from core.database import get_db
+from core.database import AsyncDb, get_async_db, get_db
+from core.pagination import encode_cursor, decode_cursor, InvalidCursorError
 from models.tender import Tender
 from models.participation import Participation
 from models.user import User
-from schemas.tender import TenderCreate, TenderRead, TenderUpdate, TenderSummary
+from schemas.tender import (
+    TenderCreate,
+    TenderRead,
+    TenderUpdate,
+    TenderSummary,
+    TenderSummaryPage,
+    TenderReadPage,
+    TenderSearchHit,
+    TenderSearchPage,
+    TenderWinProbability,
+)
+from services.query_options import tender_summary_query
+from services.recommendation_cache import recommendation_cache
+from services.tender_scoring import refresh_tender_score, delete_tender_score
+from services.tender_search import SearchIndexMissingError, apply_search, ensure_search_index, render_highlight
+from services.model_experiments import model_experiments
+from services.prediction_service import score_win_probability
+from services.win_matrix import (
+    DEFAULT_CONTRACT_DURATION_DAYS,
+    lookup_win_probability,
+    tender_inputs,
+    win_matrix_refresher,
+)
 
 
 router = APIRouter()
@@ -30,10 +53,8 @@ def get_current_user_id(x_user_id: Optional[str] = Header(None)) -> int:
         )
 
 
-def get_current_user(
-    db: Session = Depends(get_db),
-    user_id: int = Depends(get_current_user_id)
-) -> User:
+def load_current_user(db: Session, user_id: int) -> User:
+    """Usuario del header X-User-Id; también se usa dentro de AsyncDb.run en los endpoints async."""
     user = db.query(User).filter(User.id == user_id).first()
     if not user:
         raise HTTPException(status_code=404, detail="Usuario no encontrado")
@@ -42,6 +63,77 @@ def get_current_user(
     return user
 
 
+def get_current_user(
+    db: Session = Depends(get_db),
+    user_id: int = Depends(get_current_user_id)
+) -> User:
+    return load_current_user(db, user_id)
+
+
+def apply_list_filters(
+    query,
+    db: Session,
+    current_user: User,
+    exclude_participated: bool,
+    status_filter: Optional[str],
+    category_filter: Optional[str]
+):
+    """Filtros comunes del listado y la búsqueda de licitaciones."""
+    # Excluir licitaciones donde ya participamos
+    if exclude_participated:
+        participated_subquery = (
+            db.query(Participation.tender_id)
+            .filter(Participation.company_id == current_user.company_id)
+            .subquery()
+        )
+        query = query.filter(not_(Tender.id.in_(participated_subquery)))
+    
+    # Filtros opcionales
+    if status_filter:
+        query = query.filter(Tender.status == status_filter)
+    
+    if category_filter:
+        query = query.filter(Tender.main_category == category_filter)
+    
+    return query
+
+
+def with_created_at(query):
+    """
+    Excluye las licitaciones sin created_at. Se aplica en ambos modos de paginación para que
+    devuelvan las mismas filas: el cursor (created_at, id) no puede representar un NULL.
+    """
+    return query.filter(Tender.created_at.isnot(None))
+
+
+def paginate_by_cursor(query, cursor: Optional[str], limit: int):
+    """
+    Aplica paginación keyset sobre (created_at DESC, id DESC).
+    Devuelve (items, next_cursor); next_cursor es None en la última página.
+    """
+    query = with_created_at(query)
+    if cursor:
+        try:
+            created_at, tender_id = decode_cursor(cursor)
+        except InvalidCursorError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+        query = query.filter(
+            or_(
+                Tender.created_at < created_at,
+                and_(Tender.created_at == created_at, Tender.id < tender_id)
+            )
+        )
+    
+    # Pedimos una fila extra para saber si hay otra página
+    rows = query.order_by(Tender.created_at.desc(), Tender.id.desc()).limit(limit + 1).all()
+    items = rows[:limit]
+    next_cursor = None
+    if len(rows) > limit:
+        last = items[-1]
+        next_cursor = encode_cursor(last.created_at, last.id)
+    return items, next_cursor
+
+
 @router.post("/", response_model=TenderRead, status_code=status.HTTP_201_CREATED)
 def create_tender(
     tender_data: TenderCreate,
@@ -68,54 +160,79 @@ def create_tender(
     )
     
     db.add(tender)
+    db.flush()
+    
+    # Mantener el índice de puntuación para recomendaciones en la misma transacción
+    refresh_tender_score(db, tender)
+    
     db.commit()
     db.refresh(tender)
     
+    # Precalcular su matriz de probabilidades en segundo plano
+    win_matrix_refresher.request_refresh(tender.id)
+    
     return tender
 
 
-@router.get("/", response_model=List[TenderSummary])
-def list_tenders(
+def _list_tenders(
+    db: Session,
+    user_id: int,
+    exclude_participated: bool,
+    status_filter: Optional[str],
+    category_filter: Optional[str],
+    use_cursor: bool,
+    cursor: Optional[str],
+    skip: int,
+    limit: int
+):
+    current_user = load_current_user(db, user_id)
+    # Solo las columnas de TenderSummary: filas livianas, sin description ni buyer_address
+    query = apply_list_filters(
+        tender_summary_query(db), db, current_user, exclude_participated, status_filter, category_filter
+    )
+    
+    if use_cursor:
+        items, next_cursor = paginate_by_cursor(query, cursor, limit)
+        return TenderSummaryPage(items=items, next_cursor=next_cursor)
+    
+    # Ordenar por fecha de creación (más recientes primero)
+    query = with_created_at(query).order_by(Tender.created_at.desc(), Tender.id.desc())
+    
+    tenders = query.offset(skip).limit(limit).all()
+    
+    return [TenderSummary.model_validate(tender) for tender in tenders]
+
+
+@router.get("/", response_model=Union[List[TenderSummary], TenderSummaryPage])
+async def list_tenders(
     exclude_participated: bool = Query(False, description="Excluir licitaciones donde la empresa ya participó"),
     status_filter: Optional[str] = Query(None, description="Filtrar por estado"),
     category_filter: Optional[str] = Query(None, description="Filtrar por categoría"),
+    pagination: str = Query("offset", pattern="^(offset|cursor)$", description="offset (legado) o cursor"),
+    cursor: Optional[str] = Query(None, description="Cursor opaco devuelto como next_cursor"),
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=500),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncDb = Depends(get_async_db),
+    user_id: int = Depends(get_current_user_id)
 ):
     """
     Listar licitaciones disponibles.
     Si exclude_participated=true, excluye licitaciones donde la empresa del usuario ya participó.
-    """
-    query = db.query(Tender)
     
-    # Excluir licitaciones donde ya participamos
-    if exclude_participated:
-        participated_subquery = (
-            db.query(Participation.tender_id)
-            .filter(Participation.company_id == current_user.company_id)
-            .subquery()
-        )
-        query = query.filter(not_(Tender.id.in_(participated_subquery)))
-    
-    # Filtros opcionales
-    if status_filter:
-        query = query.filter(Tender.status == status_filter)
-    
-    if category_filter:
-        query = query.filter(Tender.main_category == category_filter)
-    
-    # Ordenar por fecha de creación (más recientes primero)
-    query = query.order_by(Tender.created_at.desc())
-    
-    tenders = query.offset(skip).limit(limit).all()
-    
-    return tenders
+    Con pagination=cursor (o enviando cursor) devuelve {items, next_cursor} usando paginación
+    keyset sobre (created_at, id); el modo offset (skip/limit) se mantiene por compatibilidad.
+    Ninguno de los dos modos incluye licitaciones sin created_at.
+    """
+    return await db.run(
+        _list_tenders, user_id, exclude_participated, status_filter, category_filter,
+        pagination == "cursor" or bool(cursor), cursor, skip, limit
+    )
 
 
-@router.get("/my-company", response_model=List[TenderRead])
+@router.get("/my-company", response_model=Union[List[TenderRead], TenderReadPage])
 def list_my_company_tenders(
+    pagination: str = Query("offset", pattern="^(offset|cursor)$", description="offset (legado) o cursor"),
+    cursor: Optional[str] = Query(None, description="Cursor opaco devuelto como next_cursor"),
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=500),
     db: Session = Depends(get_db),
@@ -123,11 +240,17 @@ def list_my_company_tenders(
 ):
     """
     Listar licitaciones publicadas por la empresa del usuario actual.
+    Admite paginación por cursor igual que el listado general.
     """
+    if pagination == "cursor" or cursor:
+        query = db.query(Tender).filter(Tender.publishing_company_id == current_user.company_id)
+        items, next_cursor = paginate_by_cursor(query, cursor, limit)
+        return TenderReadPage(items=items, next_cursor=next_cursor)
+    
     tenders = (
-        db.query(Tender)
+        with_created_at(db.query(Tender))
         .filter(Tender.publishing_company_id == current_user.company_id)
-        .order_by(Tender.created_at.desc())
+        .order_by(Tender.created_at.desc(), Tender.id.desc())
         .offset(skip)
         .limit(limit)
         .all()
@@ -136,21 +259,136 @@ def list_my_company_tenders(
     return tenders
 
 
+@router.get("/search", response_model=TenderSearchPage)
+def search_tenders(
+    q: str = Query(..., min_length=2, max_length=200, description="Texto a buscar en título, descripción y entidad"),
+    exclude_participated: bool = Query(False, description="Excluir licitaciones donde la empresa ya participó"),
+    status_filter: Optional[str] = Query(None, description="Filtrar por estado"),
+    category_filter: Optional[str] = Query(None, description="Filtrar por categoría"),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Búsqueda de texto completo sobre licitaciones, ordenada por relevancia.
+    Los fragmentos resaltados vienen con HTML escapado y las coincidencias entre <mark></mark>.
+    """
+    bind = db.get_bind()
+    try:
+        ensure_search_index(bind)
+    except NotImplementedError as e:
+        raise HTTPException(status_code=status.HTTP_501_NOT_IMPLEMENTED, detail=str(e))
+    except SearchIndexMissingError as e:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e))
+    
+    query = apply_list_filters(
+        tender_summary_query(db), db, current_user, exclude_participated, status_filter, category_filter
+    )
+    query, _ = apply_search(query, q, bind.dialect.name)
+    if query is None:
+        return TenderSearchPage(query=q, items=[])
+    
+    items = []
+    for row in query.offset(skip).limit(limit).all():
+        items.append(TenderSearchHit(
+            **TenderSummary.model_validate(row).model_dump(),
+            rank=float(row.rank or 0),
+            title_highlight=render_highlight(row.title_highlight),
+            description_highlight=render_highlight(row.description_highlight or None),
+        ))
+    
+    return TenderSearchPage(query=q, items=items)
+
+
+def _get_tender(db: Session, user_id: int, tender_id: int) -> TenderRead:
+    load_current_user(db, user_id)
+    tender = db.query(Tender).filter(Tender.id == tender_id).first()
+    
+    if not tender:
+        raise HTTPException(status_code=404, detail="Licitación no encontrada")
+    
+    return TenderRead.model_validate(tender)
+
+
 @router.get("/{tender_id}", response_model=TenderRead)
-def get_tender(
+async def get_tender(
+    tender_id: int,
+    db: AsyncDb = Depends(get_async_db),
+    user_id: int = Depends(get_current_user_id)
+):
+    """
+    Obtener detalles de una licitación específica.
+    """
+    return await db.run(_get_tender, user_id, tender_id)
+
+
+@router.get("/{tender_id}/win-probability", response_model=TenderWinProbability)
+def get_tender_win_probability(
     tender_id: int,
+    bid_amount: Optional[float] = Query(None, gt=0, description="Monto de la oferta en USD"),
+    discount_percent: Optional[float] = Query(
+        None, ge=0, lt=100, description="Alternativa a bid_amount: porcentaje bajo el presupuesto"
+    ),
+    contract_duration_days: Optional[int] = Query(None, gt=0, description="Por defecto el de la licitación o 365"),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """
-    Obtener detalles de una licitación específica.
+    Probabilidad de ganar ofertando `bid_amount` (o `discount_percent`% bajo el presupuesto).
+
+    Si la licitación tiene matriz precalculada vigente y el punto cae dentro de la grilla, se
+    interpola sin llamar al modelo; si no, o si la empresa está asignada al challenger, se
+    llama al modelo igual que al crear una participación.
     """
     tender = db.query(Tender).filter(Tender.id == tender_id).first()
-    
     if not tender:
         raise HTTPException(status_code=404, detail="Licitación no encontrada")
     
-    return tender
+    if (bid_amount is None) == (discount_percent is None):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Indica bid_amount o discount_percent (solo uno)"
+        )
+    
+    inputs = tender_inputs(tender)
+    if bid_amount is None:
+        bid_amount = round(inputs.budget_amount * (1 - discount_percent / 100), 2)
+    contract_duration_days = contract_duration_days or tender.contract_duration_days or DEFAULT_CONTRACT_DURATION_DAYS
+    
+    # Las matrices son del champion: las empresas asignadas al challenger van al modelo
+    matrix_hit = None
+    if not model_experiments.challenger_for(current_user.company_id):
+        matrix_hit = lookup_win_probability(db, tender, bid_amount, contract_duration_days)
+    
+    if matrix_hit is not None:
+        source = 'matrix'
+        probability, model_version = matrix_hit
+    else:
+        source = 'model'
+        try:
+            score = score_win_probability(
+                number_of_tenderers=inputs.number_of_tenderers,
+                main_category=inputs.main_category,
+                budget=inputs.budget_amount,
+                bid_amount=bid_amount,
+                tender_duration_days=inputs.tender_duration_days,
+                contract_duration_days=contract_duration_days,
+                company_id=current_user.company_id
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+        probability, model_version = score.probability, score.model_version
+    
+    return TenderWinProbability(
+        tender_id=tender.id,
+        bid_amount=bid_amount,
+        bid_to_budget_ratio=round(bid_amount / inputs.budget_amount, 4),
+        contract_duration_days=contract_duration_days,
+        predicted_win_probability=probability,
+        source=source,
+        model_version=model_version
+    )
 
 
 @router.put("/{tender_id}", response_model=TenderRead)
@@ -193,9 +431,16 @@ def update_tender(
     for field, value in update_data.items():
         setattr(tender, field, value)
     
+    refresh_tender_score(db, tender)
+    
     db.commit()
     db.refresh(tender)
     
+    # Las recomendaciones cacheadas usan los datos anteriores de la licitación
+    recommendation_cache.invalidate_tender(tender.id)
+    # La matriz guardada deja de servirse si cambiaron sus entradas; se recalcula en segundo plano
+    win_matrix_refresher.request_refresh(tender.id)
+    
     return tender
 
 
@@ -229,8 +474,10 @@ def delete_tender(
             detail="No se puede eliminar una licitación con participaciones activas"
         )
     
+    delete_tender_score(db, tender_id)
     db.delete(tender)
     db.commit()
+    recommendation_cache.invalidate_tender(tender_id)
     
     return None
 
@@ -1,5 +1,14 @@
-from fastapi import FastAPI
+import logging
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
+
+from core.logging_config import configure_logging
+
+# Antes de importar los servicios: algunos registran mensajes al importarse
+configure_logging()
+
 from api.v1 import (
     routes_countries,
     routes_provinces,
@@ -9,12 +18,61 @@ from api.v1 import (
     routes_tenders,
     routes_participations,
     routes_cities,
+    routes_geo,
     routes_auth,
     routes_recommendations,
+    routes_admin,
+    routes_analytics,
 )
+from core.config import settings
+from core.database import async_engine, dispose_async_engine, engine
+from core.metrics import MetricsMiddleware, instrument_engine, render_metrics
+from services.analytics import analytics_refresher
+from services.model_experiments import model_experiments
+from services.model_manager import model_manager
+from services.recommendation_jobs import recommendation_jobs
+from services.tender_search import ensure_search_index
+from services.win_matrix import win_matrix_refresher
+
+logger = logging.getLogger(__name__)
+
+# Conteo y tiempo de consultas SQL por petición (ver /metrics)
+instrument_engine(engine)
+if async_engine is not None:
+    instrument_engine(async_engine.sync_engine)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Workers de recomendaciones GPT en segundo plano
+    await recommendation_jobs.start()
+    # Participaciones que quedaron sin recomendación al detener el proceso anterior
+    try:
+        await recommendation_jobs.requeue_pending()
+    except Exception as e:
+        logger.warning("No se pudieron re-encolar las recomendaciones pendientes: %s", e)
+    # Búsqueda de licitaciones: tabla FTS5 en SQLite; en PostgreSQL la crea la migración 0005
+    try:
+        ensure_search_index(engine)
+    except Exception as e:
+        logger.warning("No se pudo preparar la búsqueda de licitaciones: %s", e)
+    # Recarga automática del modelo si cambia la versión activa del registro
+    model_manager.start_watching(settings.model_watch_interval_seconds)
+    # Matrices de probabilidad precalculadas para las licitaciones abiertas
+    win_matrix_refresher.start(settings.win_matrix_refresh_seconds)
+    # Tablas resumen del dashboard (/api/v1/analytics)
+    analytics_refresher.start(settings.analytics_refresh_seconds)
+    yield
+    analytics_refresher.stop()
+    win_matrix_refresher.stop()
+    model_manager.stop_watching()
+    # Escribir las predicciones y shadows pendientes del registro de experimentos
+    model_experiments.flush()
+    await recommendation_jobs.stop()
+    await dispose_async_engine()
 
 
-app = FastAPI(title="PYMES API", version="1.0.0", redirect_slashes=False)
+app = FastAPI(title="PYMES API", version="1.0.0", redirect_slashes=False, lifespan=lifespan)
 
 # Configuración de CORS
 app.add_middleware(
@@ -31,6 +89,8 @@ app.add_middleware(
     expose_headers=["*"],  # Exponer todos los headers en la respuesta
     allow_origin_regex=r"http://(localhost|127\.0\.0\.1):4200",  # Regex para ambos
 )
+# Último en añadirse = el más externo: mide también el tiempo de CORS
+app.add_middleware(MetricsMiddleware)
 
 
 @app.get("/api/health", include_in_schema=False)
@@ -38,6 +98,12 @@ def health():
     return {"status": "ok"}
 
 
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
+
+
 app.include_router(
     routes_countries.router,
     prefix="/api/v1/countries",
@@ -58,6 +124,11 @@ app.include_router(
     prefix="/api/v1/cantons",
     tags=["cantons"],
 )
+app.include_router(
+    routes_geo.router,
+    prefix="/api/v1/geo",
+    tags=["geo"],
+)
 app.include_router(
     routes_companies.router,
     prefix="/api/v1/companies",
@@ -78,9 +149,19 @@ app.include_router(
     prefix="/api/v1/participations",
     tags=["participations"],
 )
+app.include_router(
+    routes_analytics.router,
+    prefix="/api/v1/analytics",
+    tags=["analytics"],
+)
 app.include_router(routes_auth.router)
 app.include_router(
     routes_recommendations.router,
     prefix="/api/v1/recommendations",
     tags=["recommendations"],
 )
+app.include_router(
+    routes_admin.router,
+    prefix="/api/v1/admin",
+    tags=["admin"],
+)
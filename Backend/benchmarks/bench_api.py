@@ -0,0 +1,273 @@
+"""
+Prueba de carga de los endpoints principales con datos sintéticos.
+
+Levanta la app en proceso (httpx + ASGITransport, con su lifespan) sobre una base SQLite
+temporal o la indicada en --database-url, con el cliente OpenAI falso (OPENAI_FAKE_CLIENT=1).
+Con --base-url apunta a un servidor ya levantado (que debe tener los datos sembrados).
+
+Escenarios:
+- tenders_offset / tenders_cursor: GET /api/v1/tenders/ paginado por offset y por cursor
+- participations_list: GET /api/v1/participations/ de una empresa (sembradas n_tenders / 2)
+- participations_predict: POST /api/v1/participations/predict (CatBoost + recomendación)
+- recommendations_daily: GET /api/v1/recommendations/daily (la primera llamada de cada
+  empresa genera las recomendaciones y se mide aparte como first_call)
+
+Uso (desde Backend/):
+    python -m benchmarks.bench_api
+    python -m benchmarks.bench_api --requests 2000 --concurrency 32 --tenders 50000
+    python -m benchmarks.bench_api --database-url postgresql+psycopg2://... --output new.json
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+
+from benchmarks.common import summarize, write_results
+
+SCENARIOS = ['tenders_offset', 'tenders_cursor', 'participations_list', 'participations_predict', 'recommendations_daily']
+
+
+def configure_environment(database_url: str, async_db: bool = False) -> None:
+    """Variables que la app lee al importarse: debe llamarse antes de importar app/core."""
+    os.environ['DATABASE_URL'] = database_url
+    os.environ['ASYNC_DATABASE_ENABLED'] = '1' if async_db else '0'
+    os.environ.setdefault('OPENAI_FAKE_CLIENT', '1')
+    os.environ.setdefault('OPENAI_API_KEY', 'bench')
+    # Sin refresco de matrices en segundo plano: compite por la CPU con lo que se mide
+    os.environ.setdefault('WIN_MATRIX_REFRESH_SECONDS', '0')
+
+
+def seed_database(n_tenders: int, n_companies: int) -> list:
+    """Crea el esquema, las licitaciones, n_companies empresas, un usuario por empresa y participaciones."""
+    import models
+    from benchmarks.bench_recommendations import seed
+    from core.database import SessionLocal, engine
+    from models import Company, Participation, User
+    from services.tender_scoring import rebuild_tender_scores
+
+    models.Base.metadata.drop_all(bind=engine)
+    models.Base.metadata.create_all(bind=engine)
+    session = SessionLocal()
+    try:
+        seed(session, n_tenders)
+        for company_id in range(2, n_companies + 1):
+            session.add(Company(id=company_id, legal_name=f'Bench {company_id} S.A.', tax_id=f'{company_id:013d}',
+                                country_id=1, province_id=1, city_id=1, sector_id=1, company_size_id=1))
+        session.flush()
+        users = [
+            User(id=company_id, company_id=company_id, email=f'bench{company_id}@example.com',
+                 password_hash='bench', first_name='Bench', last_name=str(company_id),
+                 membership_status='approved')
+            for company_id in range(1, n_companies + 1)
+        ]
+        session.add_all(users)
+        session.commit()
+        rng = random.Random(2021)
+        session.execute(Participation.__table__.insert(), [
+            {'tender_id': rng.randint(1, n_tenders), 'company_id': rng.randint(1, n_companies),
+             'bid_amount': round(rng.lognormvariate(11, 1.2), 2), 'bid_currency': 'USD',
+             'participation_status': rng.choice(['submitted', 'awarded', 'rejected']),
+             'predicted_win_prob': round(rng.random(), 4), 'recommendation_text': 'Recomendación ' * 40}
+            for _ in range(n_tenders // 2)
+        ])
+        session.commit()
+        rebuild_tender_scores(session)
+        return [user.id for user in users]
+    finally:
+        session.close()
+
+
+def build_requests(rng: random.Random, user_ids: list, n_tenders: int):
+    """Escenario → función que arma (método, url, kwargs) para una petición."""
+    def headers():
+        return {'X-User-Id': str(rng.choice(user_ids))}
+
+    def tenders_offset():
+        skip = rng.randrange(0, max(1, n_tenders - 20))
+        return 'GET', '/api/v1/tenders/', {'params': {'skip': skip, 'limit': 20}, 'headers': headers()}
+
+    def tenders_cursor():
+        return 'GET', '/api/v1/tenders/', {'params': {'pagination': 'cursor', 'limit': 20}, 'headers': headers()}
+
+    def participations_list():
+        params = {'company_id': rng.choice(user_ids), 'limit': 50}
+        return 'GET', '/api/v1/participations/', {'params': params}
+
+    def participations_predict():
+        budget = round(rng.lognormvariate(11, 1.2), 2)
+        payload = {
+            'tender_data': {
+                # Pocos títulos distintos: la caché de recomendaciones acierta como en producción
+                'title': f'Licitación sintética {rng.randrange(50)}',
+                'description': 'Adquisición de servicios',
+                'main_category': rng.choice(['Bienes', 'Obras', 'Servicios']),
+                'budget_amount': budget,
+                'buyer_name': 'Entidad de prueba',
+                'eligibility_criteria': 'RUC activo',
+                'number_of_tenderers': rng.randint(1, 15),
+                'tender_duration_days': rng.randint(7, 60),
+            },
+            'bid_amount': round(budget * rng.uniform(0.6, 1.05), 2),
+            'contract_duration_days': rng.randint(30, 1095),
+        }
+        return 'POST', '/api/v1/participations/predict', {'json': payload}
+
+    def recommendations_daily():
+        return 'GET', '/api/v1/recommendations/daily', {'headers': headers()}
+
+    return {
+        'tenders_offset': tenders_offset,
+        'tenders_cursor': tenders_cursor,
+        'participations_list': participations_list,
+        'participations_predict': participations_predict,
+        'recommendations_daily': recommendations_daily,
+    }
+
+
+async def timed_request(client: httpx.AsyncClient, method: str, url: str, **kwargs):
+    started = time.perf_counter()
+    try:
+        response = await client.request(method, url, **kwargs)
+        status = response.status_code
+    except httpx.HTTPError as e:
+        status = type(e).__name__
+    return (time.perf_counter() - started) * 1000, status
+
+
+async def run_scenario(client: httpx.AsyncClient, make_request, requests: int, concurrency: int):
+    """requests peticiones repartidas entre `concurrency` clientes concurrentes."""
+    remaining = iter(range(requests))
+    samples, errors = [], {}
+
+    async def worker():
+        for _ in remaining:
+            method, url, kwargs = make_request()
+            elapsed_ms, status = await timed_request(client, method, url, **kwargs)
+            if status == 200:
+                samples.append(elapsed_ms)
+            else:
+                errors[str(status)] = errors.get(str(status), 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    return {
+        'requests': requests,
+        'concurrency': concurrency,
+        'latency_ms': summarize(samples),
+        'requests_per_second': round(requests / elapsed, 1),
+        'errors': errors,
+    }
+
+
+async def first_calls(client: httpx.AsyncClient, user_ids: list):
+    """Primera llamada diaria de cada empresa (genera y guarda las recomendaciones)."""
+    samples, errors = [], {}
+    for user_id in user_ids:
+        elapsed_ms, status = await timed_request(
+            client, 'GET', '/api/v1/recommendations/daily', headers={'X-User-Id': str(user_id)}
+        )
+        if status == 200:
+            samples.append(elapsed_ms)
+        else:
+            errors[str(status)] = errors.get(str(status), 0) + 1
+    return {'latency_ms': summarize(samples), 'errors': errors}
+
+
+async def run_all(client: httpx.AsyncClient, args, user_ids: list) -> dict:
+    rng = random.Random(2021)
+    factories = build_requests(rng, user_ids, args.tenders)
+    results = {}
+    for name in args.scenarios:
+        result = {}
+        if name == 'recommendations_daily':
+            # Secuencial: dos generaciones simultáneas de la misma empresa chocan en la BD
+            result['first_call'] = await first_calls(client, user_ids)
+        await run_scenario(client, factories[name], args.warmup, args.concurrency)
+        result.update(await run_scenario(client, factories[name], args.requests, args.concurrency))
+        results[name] = result
+
+        latency = result['latency_ms']
+        errors = sum(result['errors'].values())
+        print(f"   {name:<24} p50 {latency.get('p50', 0):7.2f} ms  p95 {latency.get('p95', 0):7.2f} ms  "
+              f"p99 {latency.get('p99', 0):7.2f} ms  {result['requests_per_second']:8,.1f} req/s"
+              + (f"  ⚠️ {errors} errores {result['errors']}" if errors else ""))
+    return results
+
+
+async def run_in_process(args, user_ids: list) -> dict:
+    from app import app
+
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url='http://bench', timeout=60) as client:
+            return await run_all(client, args, user_ids)
+
+
+async def run_remote(args, user_ids: list) -> dict:
+    limits = httpx.Limits(max_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=60, limits=limits) as client:
+        return await run_all(client, args, user_ids)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tenders', type=int, default=20000)
+    parser.add_argument('--companies', type=int, default=20, help='Empresas (y usuarios) sintéticos')
+    parser.add_argument('--requests', type=int, default=1000, help='Peticiones medidas por escenario')
+    parser.add_argument('--warmup', type=int, default=50)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS), help='Escenarios separados por comas')
+    parser.add_argument('--database-url', default=None, help='Por defecto una base SQLite temporal')
+    parser.add_argument('--async-db', action='store_true',
+                        help='Endpoints de lectura con el engine async (asyncpg / aiosqlite)')
+    parser.add_argument('--skip-seed', action='store_true',
+                        help='Reutilizar los datos ya sembrados en --database-url')
+    parser.add_argument('--base-url', default=None,
+                        help='Servidor ya levantado (no siembra datos; usa usuarios 1..--companies)')
+    parser.add_argument('--output', default=None, help='Archivo JSON (por defecto benchmarks/results/)')
+    args = parser.parse_args(argv)
+
+    args.scenarios = [name.strip() for name in args.scenarios.split(',') if name.strip()]
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"Escenarios desconocidos: {', '.join(sorted(unknown))}")
+
+    if args.base_url:
+        user_ids = list(range(1, args.companies + 1))
+        print(f"🌐 Prueba de carga contra {args.base_url}")
+        results = asyncio.run(run_remote(args, user_ids))
+        target = {'base_url': args.base_url}
+    else:
+        url = args.database_url
+        if url is None:
+            url = f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='bench_api_'), 'bench.db')}"
+        configure_environment(url, args.async_db)
+        if args.skip_seed:
+            user_ids = list(range(1, args.companies + 1))
+        else:
+            print(f"📦 Sembrando {args.tenders:,} licitaciones y {args.companies} empresas...")
+            started = time.perf_counter()
+            user_ids = seed_database(args.tenders, args.companies)
+            print(f"   listo en {time.perf_counter() - started:.1f}s")
+        print(f"🚀 Prueba de carga en proceso ({args.concurrency} concurrentes, {args.requests} peticiones)")
+        results = asyncio.run(run_in_process(args, user_ids))
+        from core.database import engine
+        target = {'database': engine.dialect.name, 'async_database': args.async_db,
+                  'tenders': args.tenders, 'companies': args.companies}
+        engine.dispose()
+
+    path = write_results('api', {'target': target, 'scenarios': results}, args.output)
+    print(f"\n💾 Resultados en {path}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,156 @@
+"""
+Microbenchmark de predicción: carga del modelo, llamadas individuales y lotes.
+
+Mide por backend de inferencia (catboost / numpy):
+- carga del modelo (en proceso, repetida) y arranque en frío (import + primera predicción
+  en un proceso nuevo)
+- predict_win_probability: latencia p50/p95/p99 por llamada y llamadas/s
+- predict_win_probability_batch: latencia por lote y filas/s para varios tamaños
+
+Uso (desde Backend/):
+    python -m benchmarks.bench_prediction
+    python -m benchmarks.bench_prediction --backends numpy --iterations 20000 --output base.json
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from benchmarks.common import BACKEND_DIR, summarize, write_results
+from core.config import settings
+from services.model_manager import BACKEND_CATBOOST, BACKEND_NUMPY, model_manager
+from services.prediction_service import predict_win_probability, predict_win_probability_batch
+
+CATEGORIES = ['Bienes', 'Obras', 'Servicios']
+
+COLD_START_SCRIPT = (
+    "import time; started = time.perf_counter()\n"
+    "from services.prediction_service import predict_win_probability\n"
+    "predict_win_probability(3, 'Servicios', 100000.0, 85000.0, 28, 365)\n"
+    "elapsed = time.perf_counter() - started\n"
+    "# VmHWM (pico de RSS) es del espacio de memoria del proceso; ru_maxrss se hereda del padre\n"
+    "peak = [line.split()[1] for line in open('/proc/self/status') if line.startswith('VmHWM')]\n"
+    "print(elapsed, peak[0] if peak else 0)\n"
+)
+
+
+def synthetic_records(n: int, seed: int = 2021):
+    """Ofertas aleatorias con rangos parecidos a los de SERCOP."""
+    rng = np.random.default_rng(seed)
+    budgets = np.round(rng.lognormal(11, 1.2, n), 2)
+    return [
+        dict(
+            number_of_tenderers=int(rng.integers(1, 15)),
+            main_category=CATEGORIES[int(rng.integers(0, 3))],
+            budget=float(budget),
+            bid_amount=float(round(budget * rng.uniform(0.6, 1.05), 2)),
+            tender_duration_days=int(rng.integers(7, 60)),
+            contract_duration_days=int(rng.integers(30, 1095)),
+        )
+        for budget in budgets
+    ]
+
+
+def bench_load(repeat: int):
+    """Lectura del artefacto (sin la validación de humo que hace reload)."""
+    return summarize(model_manager.reload().load_seconds * 1000 for _ in range(repeat))
+
+
+def bench_cold_start(backend: str):
+    """Import + primera predicción en un proceso nuevo (lo que paga cada worker al arrancar)."""
+    env = {**os.environ, 'INFERENCE_BACKEND': backend}
+    completed = subprocess.run(
+        [sys.executable, '-W', 'ignore', '-c', COLD_START_SCRIPT],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True,
+    )
+    seconds, peak_rss_kb = completed.stdout.split()[-2:]
+    return {'seconds': round(float(seconds), 4), 'peak_rss_mb': round(int(peak_rss_kb) / 1024, 1) or None}
+
+
+def bench_single(records, iterations: int, warmup: int):
+    for record in records[:warmup]:
+        predict_win_probability(**record)
+    samples = []
+    started = time.perf_counter()
+    for index in range(iterations):
+        record = records[index % len(records)]
+        call_started = time.perf_counter()
+        predict_win_probability(**record)
+        samples.append((time.perf_counter() - call_started) * 1000)
+    elapsed = time.perf_counter() - started
+    return {'latency_ms': summarize(samples), 'calls_per_second': round(iterations / elapsed, 1)}
+
+
+def bench_batches(records, sizes, min_rows: int):
+    results = {}
+    for size in sizes:
+        batch = records[:size]
+        predict_win_probability_batch(batch)  # calentamiento
+        repeat = max(3, min_rows // size)
+        samples = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            predict_win_probability_batch(batch)
+            samples.append((time.perf_counter() - started) * 1000)
+        latency = summarize(samples)
+        results[str(size)] = {
+            'latency_ms': latency,
+            'rows_per_second': round(size / (latency['p50'] / 1000), 1),
+        }
+    return results
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--backends', default=f'{BACKEND_CATBOOST},{BACKEND_NUMPY}',
+                        help='Backends separados por comas')
+    parser.add_argument('--iterations', type=int, default=5000, help='Llamadas individuales por backend')
+    parser.add_argument('--warmup', type=int, default=200)
+    parser.add_argument('--batch-sizes', default='10,100,1000,10000')
+    parser.add_argument('--batch-rows', type=int, default=50000, help='Filas mínimas evaluadas por tamaño de lote')
+    parser.add_argument('--load-repeat', type=int, default=5)
+    parser.add_argument('--skip-cold-start', action='store_true')
+    parser.add_argument('--output', default=None, help='Archivo JSON (por defecto benchmarks/results/)')
+    args = parser.parse_args(argv)
+
+    sizes = [int(size) for size in args.batch_sizes.split(',') if size]
+    records = synthetic_records(max(sizes + [args.iterations]))
+    results = {}
+
+    for backend in [name.strip() for name in args.backends.split(',') if name.strip()]:
+        settings.inference_backend = backend
+        load = bench_load(args.load_repeat)
+        loaded = model_manager.current()
+        if loaded.backend != backend:
+            print(f"⚠️  Backend {backend} no disponible (se cargó {loaded.backend}); se omite")
+            continue
+
+        print(f"\n⏱️  Backend {backend} ({loaded.version}, {os.path.basename(loaded.path)})")
+        result = {'model_version': loaded.version, 'load_ms': load}
+        if not args.skip_cold_start:
+            result['cold_start'] = bench_cold_start(backend)
+        result['single'] = bench_single(records, args.iterations, args.warmup)
+        result['batch'] = bench_batches(records, sizes, args.batch_rows)
+        results[backend] = result
+
+        single = result['single']['latency_ms']
+        print(f"   carga:      p50 {load['p50']:.1f} ms")
+        if 'cold_start' in result:
+            print(f"   en frío:    {result['cold_start']['seconds']:.2f} s, {result['cold_start']['peak_rss_mb']} MB RSS")
+        print(f"   individual: p50 {single['p50'] * 1000:.0f} µs  p95 {single['p95'] * 1000:.0f} µs  "
+              f"p99 {single['p99'] * 1000:.0f} µs  ({result['single']['calls_per_second']:,.0f} llamadas/s)")
+        for size, batch in result['batch'].items():
+            print(f"   lote {size:>6}: p50 {batch['latency_ms']['p50']:.2f} ms  ({batch['rows_per_second']:,.0f} filas/s)")
+
+    path = write_results('prediction', results, args.output)
+    print(f"\n💾 Resultados en {path}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
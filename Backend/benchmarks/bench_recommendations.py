@@ -0,0 +1,168 @@
+"""
+Benchmark del top-N de recomendaciones diarias con un dataset sintético de licitaciones.
+
+Compara el recorrido anterior en Python (puntuar cada licitación y ordenar la lista
+completa) con la consulta ORDER BY ... LIMIT sobre el índice tender_scores.
+
+Uso (desde Backend/):
+    python -m benchmarks.bench_recommendations --tenders 100000
+    python -m benchmarks.bench_recommendations --database-url postgresql+psycopg2://...
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+import models
+from models import Company, CompanySize, Sector, Tender
+from services.recommendation_service import SimpleRecommendationService
+from services.tender_scoring import rebuild_tender_scores
+
+CATEGORIES = ['Bienes', 'Obras', 'Servicios', 'Servicios de TI', 'Tecnología e informática']
+STATUSES = ['Abierta', 'active', 'Cerrada', 'complete']
+
+
+def seed(session, n_tenders: int, seed_value: int = 2021) -> Company:
+    """Crea una empresa y n_tenders licitaciones sintéticas con inserciones en bloque."""
+    rng = random.Random(seed_value)
+    today = date.today()
+
+    session.add(Sector(id=1, name='Tecnología'))
+    session.add(CompanySize(id=1, name='Pequeña'))
+    company = Company(id=1, legal_name='Bench S.A.', display_name='Bench', tax_id='0000000000001',
+                      country_id=1, province_id=1, city_id=1, sector_id=1, company_size_id=1)
+    session.add(company)
+    session.commit()
+
+    batch = []
+    for i in range(1, n_tenders + 1):
+        batch.append({
+            'external_id': f'BENCH-{i}',
+            'title': f'Licitación sintética {i} {rng.choice(["sistemas", "obra vial", "insumos", "consultoría"])}',
+            'status': rng.choice(STATUSES),
+            'main_category': rng.choice(CATEGORIES),
+            'budget_amount': round(rng.lognormvariate(11, 1.2), 2),
+            'budget_currency': 'USD',
+            'number_of_tenderers': rng.randint(1, 15),
+            'tender_end_date': today + timedelta(days=rng.randint(-30, 60)),
+            'publishing_company_id': 1,
+            'created_by_user_id': 1,
+        })
+        if len(batch) == 10000:
+            session.execute(Tender.__table__.insert(), batch)
+            batch = []
+    if batch:
+        session.execute(Tender.__table__.insert(), batch)
+    session.commit()
+    return company
+
+
+def legacy_top_candidates(session, today: date, top_n: int = 3):
+    """Implementación anterior: carga todas las licitaciones y puntúa cada una en Python."""
+    scored = []
+    for tender in session.query(Tender).all():
+        status = (tender.status or '').lower()
+        if status not in ['abierta', 'active', 'open']:
+            continue
+        score = 0
+        category = (tender.main_category or '').lower()
+        if any(kw in category for kw in ['tecnolog', 'software', 'ti', 'informát', 'sistemas']):
+            score += 40
+        budget = float(tender.budget_amount or 0)
+        if 20000 <= budget <= 100000:
+            score += 30
+        elif 10000 <= budget <= 150000:
+            score += 15
+        competitors = tender.number_of_tenderers or 0
+        if competitors <= 3:
+            score += 20
+        elif competitors <= 7:
+            score += 10
+        try:
+            end_date = datetime.fromisoformat(tender.tender_end_date.isoformat())
+            if (end_date - datetime.now()).days > 15:
+                score += 10
+        except Exception:
+            pass
+        if score >= 50:
+            scored.append((score, tender.id))
+    scored.sort(key=lambda x: x[0], reverse=True)
+    return scored[:top_n]
+
+
+def timed(fn, repeat: int):
+    samples = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return result, samples[len(samples) // 2], samples[-1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tenders', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--database-url', default=None,
+                        help='Por defecto una base SQLite temporal')
+    args = parser.parse_args()
+
+    tmp_dir = None
+    url = args.database_url
+    if url is None:
+        tmp_dir = tempfile.mkdtemp(prefix='bench_recommendations_')
+        url = f"sqlite:///{os.path.join(tmp_dir, 'bench.db')}"
+
+    engine = create_engine(url, future=True)
+    models.Base.metadata.drop_all(bind=engine)
+    models.Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine, autocommit=False, autoflush=False)
+    session = Session()
+
+    print(f"📦 Generando {args.tenders:,} licitaciones sintéticas en {engine.dialect.name}...")
+    start = time.perf_counter()
+    company = seed(session, args.tenders)
+    print(f"   listo en {time.perf_counter() - start:.1f}s")
+
+    start = time.perf_counter()
+    indexed = rebuild_tender_scores(session)
+    print(f"📈 Índice tender_scores: {indexed:,} filas en {time.perf_counter() - start:.1f}s")
+
+    company = session.get(Company, company.id)
+    service = SimpleRecommendationService()
+    today = date.today()
+
+    legacy, legacy_p50, legacy_max = timed(lambda: legacy_top_candidates(session, today), args.repeat)
+    session.expunge_all()
+    company = session.get(Company, company.id)
+    indexed_top, indexed_p50, indexed_max = timed(
+        lambda: service._filter_top_candidates(session, company, today), args.repeat
+    )
+
+    print("\n" + "=" * 60)
+    print(f"{'Método':<28}{'p50 (ms)':>14}{'máx (ms)':>14}")
+    print("-" * 60)
+    print(f"{'Python (lista completa)':<28}{legacy_p50:>14.1f}{legacy_max:>14.1f}")
+    print(f"{'SQL ORDER BY ... LIMIT':<28}{indexed_p50:>14.1f}{indexed_max:>14.1f}")
+    print("=" * 60)
+    print(f"Aceleración: x{legacy_p50 / indexed_p50:.1f}")
+    print(f"Top legacy:  {[(tid, score) for score, tid in legacy]}")
+    print(f"Top índice:  {[(t['id'], t['match_score']) for t in indexed_top]}")
+
+    session.close()
+    if tmp_dir is not None:
+        engine.dispose()
+
+
+if __name__ == '__main__':
+    main()
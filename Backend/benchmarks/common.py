@@ -0,0 +1,74 @@
+"""
+Utilidades compartidas por los benchmarks: percentiles, metadatos del entorno y
+resultados en JSON (benchmarks/results/<benchmark>-<commit>.json por defecto) para
+comparar entre commits con `python -m benchmarks.compare`.
+"""
+import json
+import os
+import platform
+import subprocess
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional
+
+import numpy as np
+
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+
+
+def summarize(samples_ms: Iterable[float]) -> Dict[str, float]:
+    """Latencias en ms → {count, mean, min, p50, p95, p99, max}."""
+    samples = np.asarray(list(samples_ms), dtype=np.float64)
+    if samples.size == 0:
+        return {'count': 0}
+    p50, p95, p99 = np.percentile(samples, [50, 95, 99])
+    return {
+        'count': int(samples.size),
+        'mean': round(float(samples.mean()), 4),
+        'min': round(float(samples.min()), 4),
+        'p50': round(float(p50), 4),
+        'p95': round(float(p95), 4),
+        'p99': round(float(p99), 4),
+        'max': round(float(samples.max()), 4),
+    }
+
+
+def _git(*args: str) -> Optional[str]:
+    try:
+        return subprocess.run(
+            ['git', *args], cwd=BACKEND_DIR, capture_output=True, text=True, timeout=10, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def environment() -> Dict[str, Any]:
+    """Commit, máquina y versiones: sin esto dos resultados no son comparables."""
+    packages = {}
+    for name in ('numpy', 'catboost', 'sqlalchemy', 'fastapi'):
+        try:
+            packages[name] = __import__(name).__version__
+        except Exception:
+            packages[name] = None
+    return {
+        'commit': _git('rev-parse', '--short', 'HEAD'),
+        'dirty': bool(_git('status', '--porcelain', '--untracked-files=no')),
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'packages': packages,
+    }
+
+
+def write_results(benchmark: str, results: Dict[str, Any], output: Optional[str] = None) -> Path:
+    env = environment()
+    path = Path(output) if output else RESULTS_DIR / f"{benchmark}-{env['commit'] or 'local'}.json"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(
+        json.dumps({'benchmark': benchmark, 'environment': env, 'results': results}, indent=2),
+        encoding='utf-8',
+    )
+    return path
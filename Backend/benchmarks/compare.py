@@ -0,0 +1,104 @@
+"""
+Compara dos resultados JSON de un mismo benchmark y marca las regresiones.
+
+Recorre ambos árboles de resultados y compara las métricas comunes: percentiles de
+latencia (p50/p95/p99 de cualquier *_ms), segundos de arranque y throughput (*_per_second).
+Sale con código 1 si alguna empeora más que --threshold (relativo), útil en CI.
+
+Uso (desde Backend/):
+    python -m benchmarks.compare benchmarks/results/prediction-abc123.json benchmarks/results/prediction-def456.json
+    python -m benchmarks.compare base.json new.json --threshold 0.15 --metrics p50,p95
+"""
+import argparse
+import json
+import sys
+from typing import Dict, Iterator, Tuple
+
+DEFAULT_METRICS = 'p50,p95,p99'
+
+
+def load(path: str) -> Dict:
+    with open(path, encoding='utf-8') as fp:
+        return json.load(fp)
+
+
+def flatten(node, percentiles, path: Tuple[str, ...] = ()) -> Iterator[Tuple[str, float, bool]]:
+    """(ruta, valor, mayor_es_mejor) de cada métrica comparable."""
+    if not isinstance(node, dict):
+        return
+    for key, value in node.items():
+        current = path + (key,)
+        if isinstance(value, dict):
+            # Percentiles de latencia: {'latency_ms': {'p50': ..}} o {'load_ms': {...}}
+            if key.endswith('_ms'):
+                for percentile in percentiles:
+                    if isinstance(value.get(percentile), (int, float)):
+                        yield '.'.join(current + (percentile,)), float(value[percentile]), False
+            else:
+                yield from flatten(value, percentiles, current)
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            if key.endswith('_per_second'):
+                yield '.'.join(current), float(value), True
+            elif key == 'seconds':
+                yield '.'.join(current), float(value), False
+
+
+def compare(base: Dict, new: Dict, threshold: float, percentiles) -> Tuple[list, list]:
+    """Filas (métrica, base, nuevo, cambio relativo, regresión) y lista de regresiones."""
+    base_metrics = {name: (value, higher) for name, value, higher in flatten(base.get('results'), percentiles)}
+    rows, regressions = [], []
+    for name, value, higher_is_better in flatten(new.get('results'), percentiles):
+        if name not in base_metrics or base_metrics[name][0] == 0:
+            continue
+        base_value = base_metrics[name][0]
+        change = (value - base_value) / base_value
+        # Una latencia que sube o un throughput que baja es peor
+        worse = -change if higher_is_better else change
+        regression = worse > threshold
+        rows.append((name, base_value, value, change, regression))
+        if regression:
+            regressions.append(name)
+    return rows, regressions
+
+
+def describe(data: Dict) -> str:
+    env = data.get('environment') or {}
+    dirty = ' (con cambios)' if env.get('dirty') else ''
+    return f"{env.get('commit') or '?'}{dirty} {env.get('timestamp', '')[:19]}"
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('base', help='Resultado de referencia')
+    parser.add_argument('new', help='Resultado a evaluar')
+    parser.add_argument('--threshold', type=float, default=0.10,
+                        help='Empeoramiento relativo tolerado (0.10 = 10%%)')
+    parser.add_argument('--metrics', default=DEFAULT_METRICS, help='Percentiles de latencia a comparar')
+    args = parser.parse_args(argv)
+
+    base, new = load(args.base), load(args.new)
+    if base.get('benchmark') != new.get('benchmark'):
+        print(f"❌ Benchmarks distintos: {base.get('benchmark')} vs {new.get('benchmark')}")
+        return 2
+
+    percentiles = [name.strip() for name in args.metrics.split(',') if name.strip()]
+    rows, regressions = compare(base, new, args.threshold, percentiles)
+
+    print(f"📊 {new.get('benchmark')}: {describe(base)} → {describe(new)}")
+    width = max((len(row[0]) for row in rows), default=10)
+    for name, base_value, value, change, regression in rows:
+        mark = '❌' if regression else '  '
+        print(f"{mark} {name:<{width}} {base_value:>12.4f} → {value:>12.4f}  {change:+7.1%}")
+
+    if not rows:
+        print("⚠️  No hay métricas comunes entre ambos resultados")
+        return 2
+    if regressions:
+        print(f"\n❌ {len(regressions)} regresiones por encima del {args.threshold:.0%}")
+        return 1
+    print(f"\n✅ Sin regresiones por encima del {args.threshold:.0%}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -11,9 +11,74 @@ class Settings(BaseSettings):
         env="DATABASE_URL",
     )
 
+    # Pool de conexiones (engine síncrono y async; no aplica a SQLite)
+    db_pool_size: int = Field(5, env="DB_POOL_SIZE")
+    db_max_overflow: int = Field(10, env="DB_MAX_OVERFLOW")
+    # Segundos esperando una conexión libre antes de fallar
+    db_pool_timeout: float = Field(30, env="DB_POOL_TIMEOUT")
+    # Reciclar conexiones más viejas que esto (segundos, -1 = nunca) antes de que las corte el servidor
+    db_pool_recycle: int = Field(1800, env="DB_POOL_RECYCLE")
+    # Verificar la conexión al sacarla del pool (descarta las que cerró PostgreSQL o un proxy)
+    db_pool_pre_ping: bool = Field(True, env="DB_POOL_PRE_PING")
+    # Engine async (asyncpg / aiosqlite) para los endpoints de lectura; la URL por defecto
+    # es DATABASE_URL con el driver async equivalente
+    async_database_enabled: bool = Field(False, env="ASYNC_DATABASE_ENABLED")
+    async_database_url: str | None = Field(None, env="ASYNC_DATABASE_URL")
+    # Catálogo geográfico en memoria: recarga cada N segundos (0 = solo al invalidar), así los
+    # demás workers ven las altas hechas en otro proceso
+    geo_catalog_ttl_seconds: int = Field(300, env="GEO_CATALOG_TTL_SECONDS")
+
     openai_api_key: str | None = Field(default=None, env="OPENAI_API_KEY")
     openai_model_recommender: str = "gpt-4.1-mini"
 
+    # Cola de recomendaciones GPT en segundo plano
+    recommendation_workers: int = Field(4, env="RECOMMENDATION_WORKERS")
+    recommendation_queue_max_size: int = Field(1000, env="RECOMMENDATION_QUEUE_MAX_SIZE")
+
+    # Caché de recomendaciones GPT: "memory" (LRU en proceso) o "database" (LRU + tabla)
+    recommendation_cache_backend: str = Field("memory", env="RECOMMENDATION_CACHE_BACKEND")
+    recommendation_cache_ttl_seconds: int = Field(24 * 3600, env="RECOMMENDATION_CACHE_TTL_SECONDS")
+    recommendation_cache_max_entries: int = Field(2048, env="RECOMMENDATION_CACHE_MAX_ENTRIES")
+    # Base de datos alternativa para la caché (ej. sqlite:///cache.db); por defecto la principal
+    recommendation_cache_database_url: str | None = Field(None, env="RECOMMENDATION_CACHE_DATABASE_URL")
+
+    # Registro de modelos entrenados (training/); por defecto Backend/model_registry
+    model_registry_dir: str | None = Field(None, env="MODEL_REGISTRY_DIR")
+    # Motor de inferencia: "catboost" (.cbm) o "numpy" (exportación .npz, sin importar catboost)
+    inference_backend: str = Field("catboost", env="INFERENCE_BACKEND")
+    # Cada cuántos segundos revisar si cambió el modelo activo (0 = sin vigilancia)
+    model_watch_interval_seconds: float = Field(0, env="MODEL_WATCH_INTERVAL_SECONDS")
+
+    # Evaluación de modelos: versiones shadow (separadas por comas) que puntúan en segundo plano,
+    # challenger que sirve a un % estable de empresas y registro JSONL de predicciones
+    shadow_model_versions: str | None = Field(None, env="SHADOW_MODEL_VERSIONS")
+    challenger_model_version: str | None = Field(None, env="CHALLENGER_MODEL_VERSION")
+    challenger_traffic_percent: float = Field(0, env="CHALLENGER_TRAFFIC_PERCENT")
+    # Por defecto Backend/prediction_log.jsonl si hay shadows o challenger
+    prediction_log_path: str | None = Field(None, env="PREDICTION_LOG_PATH")
+
+    # Cada cuántos segundos recalcular las matrices de probabilidad de licitaciones abiertas (0 = desactivado)
+    win_matrix_refresh_seconds: float = Field(300, env="WIN_MATRIX_REFRESH_SECONDS")
+    # Cada cuántos segundos reconstruir las tablas resumen de /api/v1/analytics (0 = desactivado)
+    analytics_refresh_seconds: float = Field(600, env="ANALYTICS_REFRESH_SECONDS")
+
+    # Logging: nivel (DEBUG, INFO, WARNING...) y formato "text" o "json" (una línea por evento)
+    log_level: str = Field("INFO", env="LOG_LEVEL")
+    log_format: str = Field("text", env="LOG_FORMAT")
+
+    # Detector de N+1 y consultas lentas (resumen en GET /api/v1/admin/queries)
+    query_profiler_enabled: bool = Field(False, env="QUERY_PROFILER_ENABLED")
+    # Fracción de peticiones perfiladas (en producción, p. ej. 0.05)
+    query_profiler_sample_rate: float = Field(1.0, env="QUERY_PROFILER_SAMPLE_RATE")
+    # Una misma forma de consulta repetida más veces que esto en una petición se marca como N+1
+    query_n_plus_one_threshold: int = Field(10, env="QUERY_N_PLUS_ONE_THRESHOLD")
+    slow_query_ms: float = Field(200, env="SLOW_QUERY_MS")
+    # Adjuntar EXPLAIN a las consultas lentas (solo PostgreSQL)
+    slow_query_explain: bool = Field(True, env="SLOW_QUERY_EXPLAIN")
+
+    # Token para los endpoints /api/v1/admin (header X-Admin-Token); sin token quedan deshabilitados
+    admin_token: str | None = Field(None, env="ADMIN_TOKEN")
+
     class Config:
         env_file = ".env"
         env_file_encoding = "utf-8"
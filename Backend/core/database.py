@@ -1,14 +1,51 @@
+from typing import Any, Callable, Dict
+
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker, declarative_base
+from starlette.concurrency import run_in_threadpool
 
 from core.config import settings
 
 
-engine = create_engine(settings.database_url, future=True)
+def engine_options(url: str) -> Dict[str, Any]:
+    """Opciones del pool de conexiones según la configuración (SQLite usa el pool por defecto)."""
+    options: Dict[str, Any] = {"pool_pre_ping": settings.db_pool_pre_ping}
+    if make_url(url).get_backend_name() != "sqlite":
+        options.update(
+            pool_size=settings.db_pool_size,
+            max_overflow=settings.db_max_overflow,
+            pool_timeout=settings.db_pool_timeout,
+            pool_recycle=settings.db_pool_recycle,
+        )
+    return options
+
+
+def async_database_url(url: str) -> str:
+    """DATABASE_URL con el driver async equivalente: asyncpg para PostgreSQL, aiosqlite para SQLite."""
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    drivers = {"postgresql": "asyncpg", "sqlite": "aiosqlite"}
+    if backend not in drivers:
+        raise ValueError(f"No hay driver async configurado para {backend}; define ASYNC_DATABASE_URL")
+    return parsed.set(drivername=f"{backend}+{drivers[backend]}").render_as_string(hide_password=False)
+
+
+engine = create_engine(settings.database_url, future=True, **engine_options(settings.database_url))
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
 
+# Engine async opcional (ASYNC_DATABASE_ENABLED) para los endpoints de lectura
+async_engine = None
+AsyncSessionLocal = None
+if settings.async_database_enabled:
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+    _async_url = settings.async_database_url or async_database_url(settings.database_url)
+    async_engine = create_async_engine(_async_url, **engine_options(_async_url))
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 
 def get_db():
     db = SessionLocal()
@@ -16,3 +53,57 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+class AsyncDb:
+    """
+    Sesión de los endpoints `async def`: `await db.run(fn, *args)` ejecuta fn(session, *args)
+    con la API síncrona del ORM, la misma que usan los endpoints `def`.
+
+    Con el engine async, fn corre con AsyncSession.run_sync y la espera de la base no ocupa
+    un hilo del threadpool; sin él, fn corre en el threadpool con una Session normal. Por eso
+    fn no debe hacer E/S bloqueante ajena a la base (OpenAI, archivos) y debe devolver datos
+    ya serializados: fuera de run() no hay lazy loads.
+
+    Cada run() es una unidad: al terminar cierra la sesión y devuelve la conexión al pool. En
+    modo síncrono es necesario en el mismo hilo; si el cierre esperara otro hilo del
+    threadpool, con el pool agotado los hilos quedarían esperando conexiones que nadie libera.
+    """
+
+    def __init__(self):
+        self.is_async = AsyncSessionLocal is not None
+        self.session = AsyncSessionLocal() if self.is_async else SessionLocal()
+
+    def _run_and_close(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        try:
+            return fn(self.session, *args, **kwargs)
+        finally:
+            self.session.close()
+
+    async def run(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        if self.is_async:
+            try:
+                return await self.session.run_sync(fn, *args, **kwargs)
+            finally:
+                await self.session.close()
+        return await run_in_threadpool(self._run_and_close, fn, *args, **kwargs)
+
+    async def close(self) -> None:
+        # Sin conexión asociada (run() ya la devolvió) cerrar no hace E/S
+        if self.is_async:
+            await self.session.close()
+        else:
+            self.session.close()
+
+
+async def get_async_db():
+    db = AsyncDb()
+    try:
+        yield db
+    finally:
+        await db.close()
+
+
+async def dispose_async_engine() -> None:
+    if async_engine is not None:
+        await async_engine.dispose()
@@ -0,0 +1,86 @@
+"""
+Logging estructurado de la API.
+
+Los servicios usan `logging.getLogger(__name__)` y pasan los datos como campos
+(`logger.info("...", extra={"company_id": 3})`), no dentro del texto. El nivel se controla
+con LOG_LEVEL y el formato con LOG_FORMAT ("text" o "json", una línea JSON por evento).
+
+La escritura a stderr la hace un hilo aparte (QueueHandler → QueueListener): el hilo de la
+petición solo encola el registro y no se bloquea en E/S cuando hay mucha carga.
+"""
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+from datetime import datetime, timezone
+from typing import Optional
+
+# Atributos propios de LogRecord: el resto son los campos pasados en extra=
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def _extra_fields(record: logging.LogRecord) -> dict:
+    return {key: value for key, value in vars(record).items() if key not in _RECORD_ATTRIBUTES}
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        entry.update(_extra_fields(record))
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """Formato legible para desarrollo: los campos extra van al final como clave=valor."""
+
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)-7s %(name)s: %(message)s")
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = super().format(record)
+        fields = _extra_fields(record)
+        if fields:
+            line += " " + " ".join(f"{key}={value}" for key, value in fields.items())
+        return line
+
+
+class _PreparedQueueHandler(logging.handlers.QueueHandler):
+    # QueueHandler.prepare formatea en el hilo que llama; aquí solo se resuelve el mensaje
+    # y el formateo completo (JSON, traceback) queda para el hilo del listener
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+def configure_logging(level: Optional[str] = None, fmt: Optional[str] = None) -> None:
+    """Configura el logger raíz (idempotente: una segunda llamada solo cambia el nivel)."""
+    global _listener
+    from core.config import settings
+
+    level = (level or settings.log_level).upper()
+    root = logging.getLogger()
+    root.setLevel(level)
+    if _listener is not None:
+        return
+
+    handler = logging.StreamHandler()
+    handler.setFormatter(JsonFormatter() if (fmt or settings.log_format) == "json" else TextFormatter())
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    _listener = logging.handlers.QueueListener(log_queue, handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
+
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(_PreparedQueueHandler(log_queue))
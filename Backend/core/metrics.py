@@ -0,0 +1,212 @@
+"""
+Métricas Prometheus de la API (expuestas en GET /metrics).
+
+- HTTP: histograma de latencia por ruta (plantilla, no la URL concreta) y peticiones en curso
+- Base de datos: consultas y tiempo de consulta por petición, vía eventos de SQLAlchemy
+- Modelo: tiempo de inferencia y filas evaluadas por backend
+- OpenAI: latencia, tokens y fallos por operación
+
+Con varios workers (gunicorn/uvicorn --workers) define PROMETHEUS_MULTIPROC_DIR: cada proceso
+escribe sus métricas ahí y /metrics agrega las de todos.
+"""
+import os
+import time
+from contextvars import ContextVar
+from typing import Any, Optional
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+)
+from sqlalchemy import event
+
+from core.query_profiler import query_profiler
+
+
+# Inferencias de una fila tardan decenas de µs; los lotes y la API, milisegundos
+INFERENCE_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 250)
+OPENAI_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.0, 5.0, 10.0, 20.0, 30.0, 60.0)
+
+# Peticiones que no encajan en ninguna ruta: una sola etiqueta para no disparar la cardinalidad
+UNMATCHED_ROUTE = "unmatched"
+
+HTTP_REQUEST_DURATION = Histogram(
+    "pymes_http_request_duration_seconds",
+    "Latencia de las peticiones HTTP",
+    ["method", "route", "status"],
+)
+HTTP_REQUESTS_IN_FLIGHT = Gauge(
+    "pymes_http_requests_in_flight",
+    "Peticiones HTTP en curso",
+    multiprocess_mode="livesum",
+)
+DB_QUERIES_PER_REQUEST = Histogram(
+    "pymes_db_queries_per_request",
+    "Consultas SQL ejecutadas por petición",
+    ["route"],
+    buckets=QUERY_COUNT_BUCKETS,
+)
+DB_TIME_PER_REQUEST = Histogram(
+    "pymes_db_query_seconds_per_request",
+    "Tiempo total en consultas SQL por petición",
+    ["route"],
+)
+DB_QUERIES = Counter(
+    "pymes_db_queries",
+    "Consultas SQL ejecutadas (incluye tareas en segundo plano)",
+)
+MODEL_INFERENCE_DURATION = Histogram(
+    "pymes_model_inference_seconds",
+    "Tiempo de predict_proba",
+    ["backend", "mode"],
+    buckets=INFERENCE_BUCKETS,
+)
+MODEL_INFERENCE_ROWS = Counter(
+    "pymes_model_inference_rows",
+    "Filas evaluadas por el modelo",
+    ["backend", "mode"],
+)
+OPENAI_REQUEST_DURATION = Histogram(
+    "pymes_openai_request_seconds",
+    "Latencia de las llamadas a OpenAI",
+    ["operation", "outcome"],
+    buckets=OPENAI_BUCKETS,
+)
+OPENAI_TOKENS = Counter(
+    "pymes_openai_tokens",
+    "Tokens consumidos en OpenAI",
+    ["operation", "kind"],
+)
+OPENAI_FAILURES = Counter(
+    "pymes_openai_failures",
+    "Llamadas a OpenAI fallidas",
+    ["operation", "error"],
+)
+
+
+class QueryStats:
+    """Consultas de una petición; los hilos del threadpool comparten el objeto vía contextvars."""
+    __slots__ = ("count", "seconds", "profile")
+
+    def __init__(self, profile=None):
+        self.count = 0
+        self.seconds = 0.0
+        # RequestProfile del detector de N+1 (None si está deshabilitado o fuera de la muestra)
+        self.profile = profile
+
+
+_request_queries: ContextVar[Optional[QueryStats]] = ContextVar("request_queries", default=None)
+
+
+def current_query_stats() -> Optional[QueryStats]:
+    return _request_queries.get()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_started"].pop()
+    DB_QUERIES.inc()
+    stats = _request_queries.get()
+    if stats is not None:
+        stats.count += 1
+        stats.seconds += elapsed
+    if query_profiler.enabled:
+        profile = stats.profile if stats is not None else None
+        query_profiler.record(profile, conn, statement, parameters, elapsed, executemany)
+
+
+def _handle_error(exception_context):
+    # La consulta fallida no pasa por after_cursor_execute: descartar su marca de inicio
+    conn = exception_context.connection
+    if conn is not None and conn.info.get("query_started"):
+        conn.info["query_started"].pop()
+
+
+def instrument_engine(engine) -> None:
+    """Cuenta y cronometra cada consulta del engine (idempotente)."""
+    if event.contains(engine, "after_cursor_execute", _after_cursor_execute):
+        return
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+
+
+def observe_inference(backend: str, mode: str, seconds: float, rows: int = 1) -> None:
+    MODEL_INFERENCE_DURATION.labels(backend, mode).observe(seconds)
+    MODEL_INFERENCE_ROWS.labels(backend, mode).inc(rows)
+
+
+def observe_openai(operation: str, seconds: float, usage: Any = None, error: Optional[BaseException] = None) -> None:
+    """Registra una llamada a OpenAI; usage es el objeto `response.usage` del SDK (si lo hay)."""
+    OPENAI_REQUEST_DURATION.labels(operation, "error" if error is not None else "ok").observe(seconds)
+    if error is not None:
+        OPENAI_FAILURES.labels(operation, type(error).__name__).inc()
+    if usage is not None:
+        OPENAI_TOKENS.labels(operation, "prompt").inc(getattr(usage, "prompt_tokens", 0) or 0)
+        OPENAI_TOKENS.labels(operation, "completion").inc(getattr(usage, "completion_tokens", 0) or 0)
+
+
+def _route_template(scope) -> str:
+    route = scope.get("route")
+    return getattr(route, "path", None) or UNMATCHED_ROUTE
+
+
+class MetricsMiddleware:
+    """
+    Middleware ASGI puro (sin BaseHTTPMiddleware, que añade una tarea y copias por petición).
+    La latencia de respuestas en streaming (SSE) incluye todo el stream.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        stats = QueryStats(query_profiler.start_request())
+        token = _request_queries.set(stats)
+        HTTP_REQUESTS_IN_FLIGHT.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            HTTP_REQUESTS_IN_FLIGHT.dec()
+            _request_queries.reset(token)
+            # El router de FastAPI deja la ruta resuelta en el scope
+            route = _route_template(scope)
+            HTTP_REQUEST_DURATION.labels(scope["method"], route, str(status_code)).observe(elapsed)
+            DB_QUERIES_PER_REQUEST.labels(route).observe(stats.count)
+            DB_TIME_PER_REQUEST.labels(route).observe(stats.seconds)
+            if stats.profile is not None:
+                query_profiler.finish_request(stats.profile, scope["method"], route, stats.count, stats.seconds)
+
+
+def render_metrics() -> tuple:
+    """(cuerpo, content-type) en formato de exposición de Prometheus."""
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
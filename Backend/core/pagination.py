@@ -0,0 +1,28 @@
+"""
+Utilidades para paginación por cursor (keyset) sobre (created_at, id).
+
+El cursor es opaco para el cliente: base64 url-safe de un JSON [created_at ISO, id].
+Las filas con created_at NULL no tienen cursor posible y los listados las excluyen.
+"""
+import base64
+import json
+from datetime import datetime
+from typing import Tuple
+
+
+class InvalidCursorError(ValueError):
+    """El cursor recibido no se puede decodificar."""
+
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    raw = json.dumps([created_at.isoformat(), row_id], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (ValueError, TypeError, json.JSONDecodeError) as e:
+        raise InvalidCursorError(f"Cursor inválido: {cursor}") from e
@@ -0,0 +1,246 @@
+"""
+Detector de N+1 y consultas lentas.
+
+Se engancha a los eventos del engine de core.database (el mismo que usan SessionLocal y
+get_db) a través de core.metrics, así ve todas las sesiones de la petición:
+
+- Agrupa las consultas de cada petición por forma (SQL sin literales ni parámetros) y
+  marca como posible N+1 la forma que se repite más de QUERY_N_PLUS_ONE_THRESHOLD veces
+  (p. ej. un lazy load de Tender.company por cada fila serializada)
+- Registra las consultas que superan SLOW_QUERY_MS; en PostgreSQL adjunta su EXPLAIN,
+  que se obtiene en un hilo aparte con otra conexión (la petición no espera)
+- Acumula un resumen por endpoint (GET /api/v1/admin/queries)
+
+Se activa con QUERY_PROFILER_ENABLED=1; QUERY_PROFILER_SAMPLE_RATE acota el costo en
+producción perfilando solo una fracción de las peticiones.
+"""
+import logging
+import queue
+import random
+import re
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Sentencias guardadas en el resumen y en los logs (las formas largas se recortan)
+MAX_STATEMENT_CHARS = 500
+# Formas distintas por endpoint en el resumen (se conservan las más repetidas)
+MAX_PATTERNS_PER_ENDPOINT = 20
+# No repetir el EXPLAIN de una misma forma antes de este intervalo
+EXPLAIN_INTERVAL_SECONDS = 600
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_PLACEHOLDER = re.compile(r"%\(\w+\)s|%s|\$\d+|(?<![:\w]):\w+|\?")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+# IN (?, ?, ?) con cualquier cantidad de elementos: misma forma
+_PLACEHOLDER_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def statement_shape(statement: str) -> str:
+    """SQL normalizado: literales y parámetros como ?, listas IN colapsadas y espacios simples."""
+    shape = _STRING_LITERAL.sub("?", statement)
+    shape = _PLACEHOLDER.sub("?", shape)
+    shape = _NUMBER.sub("?", shape)
+    shape = _PLACEHOLDER_LIST.sub("(?+)", shape)
+    return _WHITESPACE.sub(" ", shape).strip()
+
+
+class RequestProfile:
+    """Consultas de una petición agrupadas por forma: {forma: [veces, segundos]}."""
+    __slots__ = ("shapes", "slow")
+
+    def __init__(self):
+        self.shapes: Dict[str, List[float]] = {}
+        self.slow: List[Tuple[str, float]] = []
+
+
+class EndpointSummary:
+    __slots__ = ("requests", "queries", "max_queries", "db_seconds", "n_plus_one_requests", "slow_queries", "patterns")
+
+    def __init__(self):
+        self.requests = 0
+        self.queries = 0
+        self.max_queries = 0
+        self.db_seconds = 0.0
+        self.n_plus_one_requests = 0
+        self.slow_queries = 0
+        # forma -> [peticiones marcadas, máximo de repeticiones en una petición]
+        self.patterns: Dict[str, List[int]] = {}
+
+    def as_dict(self) -> Dict[str, Any]:
+        patterns = sorted(self.patterns.items(), key=lambda item: item[1][1], reverse=True)
+        return {
+            'requests': self.requests,
+            'queries_total': self.queries,
+            'queries_avg': round(self.queries / self.requests, 2) if self.requests else 0,
+            'queries_max': self.max_queries,
+            'db_ms_avg': round(self.db_seconds * 1000 / self.requests, 3) if self.requests else 0,
+            'n_plus_one_requests': self.n_plus_one_requests,
+            'slow_queries': self.slow_queries,
+            'n_plus_one_patterns': [
+                {'statement': shape, 'requests': flagged, 'max_repeats': repeats}
+                for shape, (flagged, repeats) in patterns
+            ],
+        }
+
+
+class QueryProfiler:
+    def __init__(self):
+        from core.config import settings
+
+        self.configure(
+            enabled=settings.query_profiler_enabled,
+            sample_rate=settings.query_profiler_sample_rate,
+            n_plus_one_threshold=settings.query_n_plus_one_threshold,
+            slow_query_ms=settings.slow_query_ms,
+            explain=settings.slow_query_explain,
+        )
+        self._lock = threading.Lock()
+        self._endpoints: Dict[str, EndpointSummary] = {}
+        self._shape_cache: Dict[str, str] = {}
+        self._explained_at: Dict[str, float] = {}
+        self._explain_queue: "queue.Queue" = queue.Queue(maxsize=100)
+        self._explain_thread: Optional[threading.Thread] = None
+
+    def configure(self, enabled: bool, sample_rate: float = 1.0, n_plus_one_threshold: int = 10,
+                  slow_query_ms: float = 200, explain: bool = True) -> None:
+        self.enabled = bool(enabled)
+        self.sample_rate = min(max(float(sample_rate), 0.0), 1.0)
+        self.n_plus_one_threshold = int(n_plus_one_threshold)
+        self.slow_query_ms = float(slow_query_ms)
+        self.explain = bool(explain)
+
+    def shape(self, statement: str) -> str:
+        # Las sentencias salen de la caché de compilación de SQLAlchemy: se repiten mucho
+        shape = self._shape_cache.get(statement)
+        if shape is None:
+            if len(self._shape_cache) >= 4096:
+                self._shape_cache.clear()
+            shape = self._shape_cache[statement] = statement_shape(statement)
+        return shape
+
+    def start_request(self) -> Optional[RequestProfile]:
+        """Perfil para la petición entrante (None si está deshabilitado o no entra en la muestra)."""
+        if not self.enabled or (self.sample_rate < 1.0 and random.random() >= self.sample_rate):
+            return None
+        return RequestProfile()
+
+    def record(self, profile: Optional[RequestProfile], conn, statement: str, parameters,
+               seconds: float, executemany: bool) -> None:
+        """Llamado por core.metrics tras cada consulta cuando el detector está activo."""
+        if profile is not None:
+            shape = self.shape(statement)
+            entry = profile.shapes.get(shape)
+            if entry is None:
+                profile.shapes[shape] = [1, seconds]
+            else:
+                entry[0] += 1
+                entry[1] += seconds
+
+        elapsed_ms = seconds * 1000
+        if elapsed_ms < self.slow_query_ms or statement.lstrip()[:7].upper() == "EXPLAIN":
+            return
+        shape = self.shape(statement)
+        if profile is not None:
+            profile.slow.append((shape, elapsed_ms))
+        else:
+            logger.warning("Consulta lenta fuera de una petición (%.0f ms): %s", elapsed_ms, shape[:MAX_STATEMENT_CHARS])
+        # EXPLAIN con psycopg2: las sentencias de asyncpg ($1, $2...) no se pueden reenviar tal cual
+        if self.explain and not executemany and conn.dialect.name == "postgresql" and conn.dialect.driver == "psycopg2":
+            self._request_explain(statement, parameters, shape, elapsed_ms)
+
+    def finish_request(self, profile: RequestProfile, method: str, route: str,
+                       query_count: int, db_seconds: float) -> None:
+        endpoint = f"{method} {route}"
+        repeated = [
+            (shape, int(entry[0])) for shape, entry in profile.shapes.items()
+            if entry[0] > self.n_plus_one_threshold
+        ]
+        for shape, repeats in repeated:
+            logger.warning(
+                "Posible N+1 en %s: la misma consulta se ejecutó %d veces", endpoint, repeats,
+                extra={"endpoint": endpoint, "repeats": repeats, "queries": query_count,
+                       "statement": shape[:MAX_STATEMENT_CHARS]},
+            )
+        for shape, elapsed_ms in profile.slow:
+            logger.warning(
+                "Consulta lenta en %s (%.0f ms)", endpoint, elapsed_ms,
+                extra={"endpoint": endpoint, "ms": round(elapsed_ms, 1), "statement": shape[:MAX_STATEMENT_CHARS]},
+            )
+
+        with self._lock:
+            summary = self._endpoints.get(endpoint)
+            if summary is None:
+                summary = self._endpoints[endpoint] = EndpointSummary()
+            summary.requests += 1
+            summary.queries += query_count
+            summary.max_queries = max(summary.max_queries, query_count)
+            summary.db_seconds += db_seconds
+            summary.slow_queries += len(profile.slow)
+            if repeated:
+                summary.n_plus_one_requests += 1
+            for shape, repeats in repeated:
+                key = shape[:MAX_STATEMENT_CHARS]
+                pattern = summary.patterns.get(key)
+                if pattern is None:
+                    if len(summary.patterns) >= MAX_PATTERNS_PER_ENDPOINT:
+                        continue
+                    pattern = summary.patterns[key] = [0, 0]
+                pattern[0] += 1
+                pattern[1] = max(pattern[1], repeats)
+
+    def _request_explain(self, statement: str, parameters, shape: str, elapsed_ms: float) -> None:
+        now = time.monotonic()
+        with self._lock:
+            if now - self._explained_at.get(shape, -EXPLAIN_INTERVAL_SECONDS) < EXPLAIN_INTERVAL_SECONDS:
+                return
+            self._explained_at[shape] = now
+            if self._explain_thread is None or not self._explain_thread.is_alive():
+                self._explain_thread = threading.Thread(target=self._explain_loop, name="slow-query-explain", daemon=True)
+                self._explain_thread.start()
+        try:
+            self._explain_queue.put_nowait((statement, parameters, shape, elapsed_ms))
+        except queue.Full:
+            pass
+
+    def _explain_loop(self) -> None:
+        from core.database import engine
+
+        while True:
+            statement, parameters, shape, elapsed_ms = self._explain_queue.get()
+            try:
+                # EXPLAIN sin ANALYZE: solo planifica, no vuelve a ejecutar la consulta
+                with engine.connect() as conn:
+                    rows = conn.exec_driver_sql(f"EXPLAIN {statement}", parameters).fetchall()
+                    conn.rollback()
+                plan = "\n".join(row[0] for row in rows)
+                logger.warning(
+                    "Plan de consulta lenta (%.0f ms)", elapsed_ms,
+                    extra={"statement": shape[:MAX_STATEMENT_CHARS], "plan": plan},
+                )
+            except Exception as e:
+                logger.debug("No se pudo obtener el EXPLAIN de una consulta lenta: %s", e)
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            endpoints = {name: summary.as_dict() for name, summary in self._endpoints.items()}
+        return {
+            'enabled': self.enabled,
+            'sample_rate': self.sample_rate,
+            'n_plus_one_threshold': self.n_plus_one_threshold,
+            'slow_query_ms': self.slow_query_ms,
+            'explain': self.explain,
+            # Primero los endpoints que más consultas emiten
+            'endpoints': dict(sorted(endpoints.items(), key=lambda item: item[1]['queries_total'], reverse=True)),
+        }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._endpoints.clear()
+            self._explained_at.clear()
+
+
+query_profiler = QueryProfiler()
@@ -0,0 +1,73 @@
+"""
+Carga releases OCDS de SERCOP (JSON lines o páginas JSON) a la tabla de licitaciones.
+
+Uso:
+    python ingest_ocds.py releases_2024.jsonl
+    python ingest_ocds.py paginas/ --chunk-size 5000        # directorio con páginas .json/.jsonl(.gz)
+    python ingest_ocds.py releases.jsonl.gz --company-id 1 --user-id 1
+
+La lectura es en streaming: la memoria no crece con el tamaño del archivo.
+"""
+import argparse
+import sys
+
+from core.database import SessionLocal, engine
+from models.tender import Tender
+from seed_tenders import print_chunk, resolve_owner
+from services.ocds_ingestion import ingest_releases
+from services.tender_ingestion import DEFAULT_CHUNK_SIZE
+from services.tender_scoring import rebuild_tender_scores
+import models  # Importar todos los modelos para crear las tablas
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Ingesta en streaming de releases OCDS")
+    parser.add_argument("paths", nargs="+", help="Archivos o directorios con releases")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Releases por bloque")
+    parser.add_argument("--company-id", type=int, default=None, help="Empresa publicadora (por defecto la del primer usuario)")
+    parser.add_argument("--user-id", type=int, default=None, help="Usuario creador (por defecto el primer usuario)")
+    parser.add_argument("--skip-scores", action="store_true", help="No recalcular el índice de puntuación")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    models.Base.metadata.create_all(bind=engine)
+
+    db = SessionLocal()
+    try:
+        company_id, user_id = resolve_owner(db, args.company_id, args.user_id)
+
+        print(f"💾 Cargando releases OCDS en bloques de {args.chunk_size}...")
+        report = ingest_releases(
+            engine,
+            args.paths,
+            publishing_company_id=company_id,
+            created_by_user_id=user_id,
+            chunk_size=args.chunk_size,
+            on_chunk=print_chunk,
+        )
+
+        if not args.skip_scores:
+            print("\n📈 Actualizando índice de puntuación de licitaciones...")
+            print(f"✅ {rebuild_tender_scores(db)} licitaciones indexadas")
+
+        print("\n" + "="*60)
+        print(f"📄 Releases:    {report.rows}")
+        print(f"✅ Guardadas:   {report.upserted}")
+        print(f"⏭️  Omitidas:    {report.skipped} (adjudicaciones/contratos sin licitación cargada)")
+        print(f"❌ Errores:     {report.errors}")
+        print(f"⏱️  Tiempo:      {report.seconds:.2f}s ({report.rows_per_second:,.0f} filas/s)")
+        print(f"📈 Total en BD: {db.query(Tender).count()}")
+        print("="*60)
+        return 1 if report.errors else 0
+
+    except (FileNotFoundError, ValueError) as e:
+        print(f"\n❌ Error: {str(e)}")
+        return 1
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,239 @@
+"""Esquema base: las tablas de models/ antes de las migraciones (como las crea create_all)
+
+Las bases existentes (pymes1.sql o create_all) no ejecutan esta revisión: se marcan con
+`alembic stamp 0001` y siguen con `alembic upgrade head`. Las columnas y tablas agregadas
+después (o que le faltan a pymes1.sql) las crea 0004 si no existen.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17 22:08:03.036543
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0001'
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('company_sizes',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=50), nullable=False),
+    sa.Column('min_employees', sa.Integer(), nullable=True),
+    sa.Column('max_employees', sa.Integer(), nullable=True),
+    sa.Column('min_revenue', sa.Numeric(), nullable=True),
+    sa.Column('max_revenue', sa.Numeric(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_company_sizes_id'), 'company_sizes', ['id'], unique=False)
+    op.create_table('company_types',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=100), nullable=False),
+    sa.Column('description', sa.Text(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_company_types_id'), 'company_types', ['id'], unique=False)
+    op.create_table('sectors',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=100), nullable=False),
+    sa.Column('description', sa.Text(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_sectors_id'), 'sectors', ['id'], unique=False)
+    op.create_table('countries',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(), nullable=False),
+    sa.Column('iso_code', sa.String(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('name')
+    )
+    op.create_index(op.f('ix_countries_id'), 'countries', ['id'], unique=False)
+    op.create_table('provinces',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(), nullable=False),
+    sa.Column('country_id', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.ForeignKeyConstraint(['country_id'], ['countries.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_provinces_id'), 'provinces', ['id'], unique=False)
+    op.create_table('cities',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('province_id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.ForeignKeyConstraint(['province_id'], ['provinces.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_cities_id'), 'cities', ['id'], unique=False)
+    op.create_table('cantons',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(), nullable=False),
+    sa.Column('province_id', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.ForeignKeyConstraint(['province_id'], ['provinces.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_cantons_id'), 'cantons', ['id'], unique=False)
+    op.create_table('parishes',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(), nullable=False),
+    sa.Column('canton_id', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.ForeignKeyConstraint(['canton_id'], ['cantons.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_parishes_id'), 'parishes', ['id'], unique=False)
+    op.create_table('companies',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('legal_name', sa.String(), nullable=False),
+    sa.Column('trade_name', sa.String(), nullable=True),
+    sa.Column('display_name', sa.String(), nullable=True),
+    sa.Column('tax_id', sa.String(), nullable=False),
+    sa.Column('incorporation_date', sa.Date(), nullable=True),
+    sa.Column('email', sa.String(), nullable=True),
+    sa.Column('phone', sa.String(), nullable=True),
+    sa.Column('website', sa.String(), nullable=True),
+    sa.Column('country_id', sa.Integer(), nullable=False),
+    sa.Column('province_id', sa.Integer(), nullable=False),
+    sa.Column('city_id', sa.Integer(), nullable=False),
+    sa.Column('address_line', sa.String(), nullable=True),
+    sa.Column('postal_code', sa.String(), nullable=True),
+    sa.Column('logo_url', sa.String(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.Column('company_type_id', sa.Integer(), nullable=True),
+    sa.Column('sector_id', sa.Integer(), nullable=True),
+    sa.Column('company_size_id', sa.Integer(), nullable=True),
+    sa.ForeignKeyConstraint(['city_id'], ['cities.id'], ),
+    sa.ForeignKeyConstraint(['company_size_id'], ['company_sizes.id'], ),
+    sa.ForeignKeyConstraint(['company_type_id'], ['company_types.id'], ),
+    sa.ForeignKeyConstraint(['country_id'], ['countries.id'], ),
+    sa.ForeignKeyConstraint(['province_id'], ['provinces.id'], ),
+    sa.ForeignKeyConstraint(['sector_id'], ['sectors.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('tax_id')
+    )
+    op.create_index(op.f('ix_companies_id'), 'companies', ['id'], unique=False)
+    op.create_table('users',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('company_id', sa.Integer(), nullable=True),
+    sa.Column('email', sa.String(), nullable=False),
+    sa.Column('password_hash', sa.String(), nullable=False),
+    sa.Column('first_name', sa.String(), nullable=False),
+    sa.Column('last_name', sa.String(), nullable=False),
+    sa.Column('phone', sa.String(), nullable=True),
+    sa.Column('position', sa.String(), nullable=True),
+    sa.Column('username', sa.String(), nullable=True),
+    sa.Column('membership_status', sa.String(), server_default='pending', nullable=False),
+    sa.Column('is_company_admin', sa.Boolean(), server_default='false', nullable=False),
+    sa.Column('is_active', sa.Boolean(), server_default='true', nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.Column('last_login_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['company_id'], ['companies.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('email'),
+    sa.UniqueConstraint('username')
+    )
+    op.create_index(op.f('ix_users_id'), 'users', ['id'], unique=False)
+    op.create_table('tenders',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('external_id', sa.String(length=255), nullable=False),
+    sa.Column('ocid', sa.String(length=255), nullable=True),
+    sa.Column('title', sa.String(length=500), nullable=False),
+    sa.Column('description', sa.Text(), nullable=True),
+    sa.Column('status', sa.String(length=50), nullable=True),
+    sa.Column('main_category', sa.String(length=100), nullable=True),
+    sa.Column('buyer_name', sa.String(length=500), nullable=True),
+    sa.Column('buyer_ruc', sa.String(length=13), nullable=True),
+    sa.Column('buyer_region', sa.String(length=255), nullable=True),
+    sa.Column('buyer_city', sa.String(length=255), nullable=True),
+    sa.Column('buyer_address', sa.Text(), nullable=True),
+    sa.Column('budget_amount', sa.Numeric(precision=18, scale=2), nullable=True),
+    sa.Column('budget_currency', sa.String(length=3), nullable=True),
+    sa.Column('estimated_value', sa.Numeric(precision=18, scale=2), nullable=True),
+    sa.Column('tender_start_date', sa.Date(), nullable=True),
+    sa.Column('tender_end_date', sa.Date(), nullable=True),
+    sa.Column('contract_start_date', sa.Date(), nullable=True),
+    sa.Column('contract_end_date', sa.Date(), nullable=True),
+    sa.Column('publish_date', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('number_of_tenderers', sa.Integer(), nullable=True),
+    sa.Column('award_criteria', sa.Text(), nullable=True),
+    sa.Column('country_id', sa.Integer(), nullable=True),
+    sa.Column('requirement_city_id', sa.Integer(), nullable=True),
+    sa.Column('publishing_company_id', sa.Integer(), nullable=False),
+    sa.Column('created_by_user_id', sa.Integer(), nullable=False),
+    sa.Column('winning_company_id', sa.Integer(), nullable=True),
+    sa.Column('winning_participation_id', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['country_id'], ['countries.id'], ),
+    sa.ForeignKeyConstraint(['created_by_user_id'], ['users.id'], ),
+    sa.ForeignKeyConstraint(['publishing_company_id'], ['companies.id'], ),
+    sa.ForeignKeyConstraint(['requirement_city_id'], ['cities.id'], ),
+    sa.ForeignKeyConstraint(['winning_company_id'], ['companies.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('external_id')
+    )
+    op.create_index(op.f('ix_tenders_id'), 'tenders', ['id'], unique=False)
+    op.create_table('participations',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('tender_id', sa.Integer(), nullable=False),
+    sa.Column('company_id', sa.Integer(), nullable=False),
+    sa.Column('created_by_user_id', sa.Integer(), nullable=True),
+    sa.Column('bid_amount', sa.Numeric(precision=18, scale=2), nullable=True),
+    sa.Column('bid_currency', sa.String(length=3), nullable=True),
+    sa.Column('participation_status', sa.String(length=50), nullable=True),
+    sa.Column('predicted_win_prob', sa.Numeric(precision=5, scale=4), nullable=True),
+    sa.Column('model_version', sa.String(length=50), nullable=True),
+    sa.Column('recommendation_text', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['company_id'], ['companies.id'], ),
+    sa.ForeignKeyConstraint(['created_by_user_id'], ['users.id'], ),
+    sa.ForeignKeyConstraint(['tender_id'], ['tenders.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_participations_id'), 'participations', ['id'], unique=False)
+    # tenders y participations se referencian entre sí: esta FK va después de crear ambas
+    # (batch: en SQLite recrea la tabla, en PostgreSQL es un ALTER TABLE)
+    with op.batch_alter_table('tenders') as batch_op:
+        batch_op.create_foreign_key(
+            'tenders_winning_participation_id_fkey', 'participations', ['winning_participation_id'], ['id']
+        )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('tenders') as batch_op:
+        batch_op.drop_constraint('tenders_winning_participation_id_fkey', type_='foreignkey')
+    op.drop_index(op.f('ix_participations_id'), table_name='participations')
+    op.drop_table('participations')
+    op.drop_index(op.f('ix_tenders_id'), table_name='tenders')
+    op.drop_table('tenders')
+    op.drop_index(op.f('ix_users_id'), table_name='users')
+    op.drop_table('users')
+    op.drop_index(op.f('ix_companies_id'), table_name='companies')
+    op.drop_table('companies')
+    op.drop_index(op.f('ix_parishes_id'), table_name='parishes')
+    op.drop_table('parishes')
+    op.drop_index(op.f('ix_cantons_id'), table_name='cantons')
+    op.drop_table('cantons')
+    op.drop_index(op.f('ix_cities_id'), table_name='cities')
+    op.drop_table('cities')
+    op.drop_index(op.f('ix_provinces_id'), table_name='provinces')
+    op.drop_table('provinces')
+    op.drop_index(op.f('ix_countries_id'), table_name='countries')
+    op.drop_table('countries')
+    op.drop_index(op.f('ix_sectors_id'), table_name='sectors')
+    op.drop_table('sectors')
+    op.drop_index(op.f('ix_company_types_id'), table_name='company_types')
+    op.drop_table('company_types')
+    op.drop_index(op.f('ix_company_sizes_id'), table_name='company_sizes')
+    op.drop_table('company_sizes')
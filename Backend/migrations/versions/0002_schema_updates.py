@@ -0,0 +1,171 @@
+"""Columnas y tablas posteriores al esquema base, y las que le faltan a pymes1.sql
+
+Cada operación se aplica solo si el objeto no existe: las bases marcadas con `alembic stamp
+0001` pueden venir de pymes1.sql (sin cantons, parishes, tenders.country_id/updated_at ni
+users.username) o de create_all con cualquier versión de models/ (con parte de lo de abajo).
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 10:12:37.204118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, Sequence[str], None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Índices para la paginación por cursor del listado de licitaciones
+TENDER_INDEXES = [
+    ('ix_tenders_created_at_id', ['created_at', 'id']),
+    ('ix_tenders_publishing_company_created_at_id', ['publishing_company_id', 'created_at', 'id']),
+]
+
+
+def _tender_columns():
+    """Columnas agregadas a tenders (ingesta OCDS y features del modelo)."""
+    return [
+        sa.Column('eligibility_criteria', sa.Text(), nullable=True),
+        sa.Column('tender_duration_days', sa.Integer(), nullable=True),
+        sa.Column('contract_duration_days', sa.Integer(), nullable=True),
+    ]
+
+
+def _series_tables():
+    """Tablas nuevas: (nombre, columnas y restricciones, índices)."""
+    return [
+        ('tender_scores', [
+            sa.Column('tender_id', sa.Integer(), nullable=False),
+            sa.Column('is_open', sa.Boolean(), nullable=False),
+            sa.Column('competition_score', sa.Integer(), nullable=False),
+            sa.Column('budget_amount', sa.Numeric(precision=18, scale=2), nullable=True),
+            sa.Column('tender_end_date', sa.Date(), nullable=True),
+            sa.Column('search_text', sa.String(length=255), nullable=False),
+            sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+            sa.ForeignKeyConstraint(['tender_id'], ['tenders.id'], ondelete='CASCADE'),
+            sa.PrimaryKeyConstraint('tender_id'),
+        ], [
+            ('ix_tender_scores_open_budget', ['is_open', 'budget_amount']),
+            ('ix_tender_scores_open_end_date', ['is_open', 'tender_end_date']),
+        ]),
+        ('tender_win_matrices', [
+            sa.Column('tender_id', sa.Integer(), nullable=False),
+            sa.Column('model_version', sa.String(length=50), nullable=False),
+            sa.Column('grid_version', sa.String(length=20), nullable=False),
+            sa.Column('number_of_tenderers', sa.Integer(), nullable=False),
+            sa.Column('main_category', sa.String(length=100), nullable=False),
+            sa.Column('budget_amount', sa.Numeric(precision=18, scale=2), nullable=False),
+            sa.Column('tender_duration_days', sa.Integer(), nullable=False),
+            sa.Column('probabilities', sa.LargeBinary(), nullable=False),
+            sa.Column('computed_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+            sa.ForeignKeyConstraint(['tender_id'], ['tenders.id'], ondelete='CASCADE'),
+            sa.PrimaryKeyConstraint('tender_id'),
+        ], []),
+        ('recommendation_cache', [
+            sa.Column('cache_key', sa.String(length=64), nullable=False),
+            sa.Column('tender_key', sa.String(length=255), nullable=True),
+            sa.Column('model', sa.String(length=100), nullable=False),
+            sa.Column('recommendation_text', sa.Text(), nullable=False),
+            sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+            sa.Column('expires_at', sa.DateTime(timezone=True), nullable=False),
+            sa.PrimaryKeyConstraint('cache_key'),
+        ], [
+            ('ix_recommendation_cache_tender_key', ['tender_key']),
+        ]),
+        ('daily_recommendations', [
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('company_id', sa.Integer(), nullable=False),
+            sa.Column('recommendation_date', sa.Date(), nullable=False),
+            sa.Column('payload', sa.JSON(), nullable=False),
+            sa.Column('generated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+            sa.ForeignKeyConstraint(['company_id'], ['companies.id'], ),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('company_id', 'recommendation_date', name='uq_daily_recommendations_company_date'),
+        ], [
+            (op.f('ix_daily_recommendations_id'), ['id']),
+        ]),
+    ]
+
+
+def _pymes1_tables():
+    """Tablas de models/ que pymes1.sql no trae (en 0001 ya existen)."""
+    return [
+        ('cantons', [
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('name', sa.String(), nullable=False),
+            sa.Column('province_id', sa.Integer(), nullable=False),
+            sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+            sa.ForeignKeyConstraint(['province_id'], ['provinces.id'], ),
+            sa.PrimaryKeyConstraint('id'),
+        ], [
+            (op.f('ix_cantons_id'), ['id']),
+        ]),
+        ('parishes', [
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('name', sa.String(), nullable=False),
+            sa.Column('canton_id', sa.Integer(), nullable=False),
+            sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+            sa.ForeignKeyConstraint(['canton_id'], ['cantons.id'], ),
+            sa.PrimaryKeyConstraint('id'),
+        ], [
+            (op.f('ix_parishes_id'), ['id']),
+        ]),
+    ]
+
+
+def _create_missing_tables(inspector, tables) -> None:
+    existing = set(inspector.get_table_names())
+    for name, elements, indexes in tables:
+        if name not in existing:
+            op.create_table(name, *elements)
+        for index_name, columns in indexes:
+            op.create_index(index_name, name, columns, unique=False, if_not_exists=True)
+
+
+def _columns(inspector, table: str) -> set:
+    return {column['name'] for column in inspector.get_columns(table)}
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+
+    # Lo que pymes1.sql no trae respecto de models/ en 0001
+    _create_missing_tables(inspector, _pymes1_tables())
+    tender_columns = _columns(inspector, 'tenders')
+    user_columns = _columns(inspector, 'users')
+    with op.batch_alter_table('tenders') as batch_op:
+        if 'country_id' not in tender_columns:
+            batch_op.add_column(sa.Column('country_id', sa.Integer(), nullable=True))
+            batch_op.create_foreign_key('tenders_country_id_fkey', 'countries', ['country_id'], ['id'])
+        if 'updated_at' not in tender_columns:
+            batch_op.add_column(sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True))
+        for column in _tender_columns():
+            if column.name not in tender_columns:
+                batch_op.add_column(column)
+    if 'username' not in user_columns:
+        with op.batch_alter_table('users') as batch_op:
+            batch_op.add_column(sa.Column('username', sa.String(), nullable=True))
+            batch_op.create_unique_constraint('users_username_key', ['username'])
+
+    for name, columns in TENDER_INDEXES:
+        op.create_index(name, 'tenders', columns, unique=False, if_not_exists=True)
+    _create_missing_tables(inspector, _series_tables())
+
+
+def downgrade() -> None:
+    # Solo lo posterior al esquema base: lo de pymes1.sql ya es parte de 0001
+    for name, _, indexes in reversed(_series_tables()):
+        for index_name, _ in indexes:
+            op.drop_index(index_name, table_name=name)
+        op.drop_table(name)
+    for name, _ in reversed(TENDER_INDEXES):
+        op.drop_index(name, table_name='tenders')
+    with op.batch_alter_table('tenders') as batch_op:
+        for column in reversed(_tender_columns()):
+            batch_op.drop_column(column.name)
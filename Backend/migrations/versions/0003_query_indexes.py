@@ -0,0 +1,63 @@
+"""Índices para los filtros de los listados de licitaciones, participaciones, usuarios y catálogos
+
+En PostgreSQL se crean con CREATE INDEX CONCURRENTLY (fuera de la transacción) para no
+bloquear las escrituras en tablas grandes. IF NOT EXISTS: las bases creadas con
+create_all a partir de los modelos actuales ya los tienen.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17 22:20:41.512233
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003'
+down_revision: Union[str, Sequence[str], None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Mismo criterio que models.tender.OPEN_STATUSES (copiado: la migración no debe cambiar con el modelo)
+OPEN_TENDERS = sa.text("lower(status) IN ('abierta', 'active', 'open')")
+
+# (nombre, tabla, columnas, opciones)
+INDEXES = [
+    ('ix_tenders_status_created_at_id', 'tenders', ['status', 'created_at', 'id'], {}),
+    ('ix_tenders_main_category_created_at_id', 'tenders', ['main_category', 'created_at', 'id'], {}),
+    ('ix_tenders_open_id', 'tenders', ['id'], {'postgresql_where': OPEN_TENDERS, 'sqlite_where': OPEN_TENDERS}),
+    ('ix_participations_company_created_at_id', 'participations', ['company_id', 'created_at', 'id'], {}),
+    ('ix_participations_tender_created_at_id', 'participations', ['tender_id', 'created_at', 'id'], {}),
+    ('ix_users_company_membership_status', 'users', ['company_id', 'membership_status'], {}),
+    ('ix_provinces_country_id_name', 'provinces', ['country_id', 'name'], {}),
+    ('ix_cantons_province_id_name', 'cantons', ['province_id', 'name'], {}),
+    ('ix_cities_province_id_name', 'cities', ['province_id', 'name'], {}),
+    ('ix_parishes_canton_id_name', 'parishes', ['canton_id', 'name'], {}),
+]
+
+
+def _is_postgresql() -> bool:
+    return op.get_bind().dialect.name == 'postgresql'
+
+
+def upgrade() -> None:
+    if _is_postgresql():
+        with op.get_context().autocommit_block():
+            for name, table, columns, options in INDEXES:
+                op.create_index(name, table, columns, if_not_exists=True, postgresql_concurrently=True, **options)
+    else:
+        for name, table, columns, options in INDEXES:
+            op.create_index(name, table, columns, if_not_exists=True, **options)
+
+
+def downgrade() -> None:
+    if _is_postgresql():
+        with op.get_context().autocommit_block():
+            for name, table, _, _ in reversed(INDEXES):
+                op.drop_index(name, table_name=table, if_exists=True, postgresql_concurrently=True)
+    else:
+        for name, table, _, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, if_exists=True)
@@ -0,0 +1,58 @@
+"""Tablas resumen del dashboard: tender_stats y company_participation_stats
+
+Se crean vacías y solo si no existen (create_all ya las crea); las llena services.analytics
+(el job de la API o POST /api/v1/admin/analytics/refresh).
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17 22:13:45.950092
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0004'
+down_revision: Union[str, Sequence[str], None] = '0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('tender_stats',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('status', sa.String(length=50), nullable=True),
+    sa.Column('main_category', sa.String(length=100), nullable=True),
+    sa.Column('month', sa.String(length=7), nullable=True),
+    sa.Column('budget_bucket', sa.Integer(), nullable=True),
+    sa.Column('tender_count', sa.Integer(), nullable=False),
+    sa.Column('budget_total', sa.Numeric(precision=20, scale=2), nullable=False),
+    sa.Column('tenderers_total', sa.Integer(), nullable=False),
+    sa.Column('tenderers_count', sa.Integer(), nullable=False),
+    sa.Column('refreshed_at', sa.DateTime(timezone=True), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    if_not_exists=True
+    )
+    op.create_index('ix_tender_stats_month', 'tender_stats', ['month'], unique=False, if_not_exists=True)
+
+    op.create_table('company_participation_stats',
+    sa.Column('company_id', sa.Integer(), nullable=False),
+    sa.Column('participation_count', sa.Integer(), nullable=False),
+    sa.Column('won_count', sa.Integer(), nullable=False),
+    sa.Column('decided_count', sa.Integer(), nullable=False),
+    sa.Column('predicted_prob_total', sa.Numeric(precision=18, scale=4), nullable=False),
+    sa.Column('predicted_prob_count', sa.Integer(), nullable=False),
+    sa.Column('refreshed_at', sa.DateTime(timezone=True), nullable=False),
+    sa.ForeignKeyConstraint(['company_id'], ['companies.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('company_id'),
+    if_not_exists=True
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('company_participation_stats')
+    op.drop_index('ix_tender_stats_month', table_name='tender_stats')
+    op.drop_table('tender_stats')
@@ -0,0 +1,56 @@
+"""Búsqueda de texto completo en PostgreSQL: tenders.search_vector e índice GIN
+
+Antes los creaba ensure_search_index al iniciar cada worker. ADD COLUMN ... STORED reescribe
+`tenders` con un bloqueo exclusivo, así que se hace una sola vez aquí, en el despliegue; el
+índice se crea con CREATE INDEX CONCURRENTLY (como 0003). IF NOT EXISTS: las bases donde ya
+los creó la aplicación quedan igual. En SQLite no hace nada: la tabla FTS5 sigue en
+services.tender_search.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17 23:41:08.318245
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0005'
+down_revision: Union[str, Sequence[str], None] = '0004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Mismos pesos que services.tender_search (copiado: la migración no debe cambiar con el servicio)
+ADD_SEARCH_VECTOR = """
+ALTER TABLE tenders ADD COLUMN IF NOT EXISTS search_vector tsvector
+GENERATED ALWAYS AS (
+    setweight(to_tsvector('spanish', coalesce(title, '')), 'A') ||
+    setweight(to_tsvector('spanish', coalesce(buyer_name, '')), 'B') ||
+    setweight(to_tsvector('spanish', coalesce(description, '')), 'C')
+) STORED
+"""
+
+
+def _is_postgresql() -> bool:
+    return op.get_bind().dialect.name == 'postgresql'
+
+
+def upgrade() -> None:
+    if not _is_postgresql():
+        return
+    op.execute(ADD_SEARCH_VECTOR)
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_tenders_search_vector', 'tenders', ['search_vector'],
+            if_not_exists=True, postgresql_using='gin', postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    if not _is_postgresql():
+        return
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_tenders_search_vector', table_name='tenders', if_exists=True, postgresql_concurrently=True)
+    op.execute("ALTER TABLE tenders DROP COLUMN IF EXISTS search_vector")
@@ -11,6 +11,11 @@ from models.parish import Parish
 from models.user import User
 from models.tender import Tender
 from models.participation import Participation
+from models.recommendation_cache import RecommendationCacheEntry
+from models.daily_recommendation import DailyRecommendation
+from models.tender_score import TenderScore
+from models.tender_win_matrix import TenderWinMatrix
+from models.analytics_summary import TenderStats, CompanyParticipationStats
 
 __all__ = [
     "Base",
@@ -25,5 +30,11 @@ __all__ = [
     "Parish",
     "User",
     "Tender",
-    "Participation"
+    "Participation",
+    "RecommendationCacheEntry",
+    "DailyRecommendation",
+    "TenderScore",
+    "TenderWinMatrix",
+    "TenderStats",
+    "CompanyParticipationStats"
 ]
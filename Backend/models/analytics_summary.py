@@ -0,0 +1,48 @@
+from sqlalchemy import Column, Integer, String, DateTime, Numeric, ForeignKey, Index
+
+from core.database import Base
+
+
+class TenderStats(Base):
+    """
+    Conteos y totales de licitaciones agrupados por estado × categoría × mes × tramo de
+    presupuesto. Lo reconstruye services.analytics; los endpoints del dashboard agregan
+    sobre estas filas en lugar de recorrer tenders.
+    """
+    __tablename__ = "tender_stats"
+
+    id = Column(Integer, primary_key=True)
+    status = Column(String(50), nullable=True)
+    main_category = Column(String(100), nullable=True)
+    # 'YYYY-MM' de publish_date (o created_at si no tiene)
+    month = Column(String(7), nullable=True)
+    # Índice en services.analytics.BUDGET_BUCKETS; NULL = sin presupuesto
+    budget_bucket = Column(Integer, nullable=True)
+
+    tender_count = Column(Integer, nullable=False)
+    budget_total = Column(Numeric(20, 2), nullable=False)
+    # Suma y conteo de number_of_tenderers informados (el promedio se combina entre grupos)
+    tenderers_total = Column(Integer, nullable=False)
+    tenderers_count = Column(Integer, nullable=False)
+
+    refreshed_at = Column(DateTime(timezone=True), nullable=False)
+
+    __table_args__ = (
+        Index("ix_tender_stats_month", "month"),
+    )
+
+
+class CompanyParticipationStats(Base):
+    """Participaciones, resultados y probabilidad media predicha por empresa (services.analytics)."""
+    __tablename__ = "company_participation_stats"
+
+    company_id = Column(Integer, ForeignKey("companies.id", ondelete="CASCADE"), primary_key=True)
+
+    participation_count = Column(Integer, nullable=False)
+    # Mismo criterio que model_experiments.load_outcomes: las pendientes no cuentan como decididas
+    won_count = Column(Integer, nullable=False)
+    decided_count = Column(Integer, nullable=False)
+    predicted_prob_total = Column(Numeric(18, 4), nullable=False)
+    predicted_prob_count = Column(Integer, nullable=False)
+
+    refreshed_at = Column(DateTime(timezone=True), nullable=False)
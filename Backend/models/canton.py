@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, func
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index, func
 from sqlalchemy.orm import relationship
 
 from core.database import Base
@@ -14,3 +14,7 @@ class Canton(Base):
 
     province = relationship("Province", backref="cantons")
 
+    # Hijos de un provincia ordenados por nombre y control de duplicados en create_*
+    __table_args__ = (
+        Index("ix_cantons_province_id_name", "province_id", "name"),
+    )
@@ -30,4 +30,6 @@ class Company(Base):
     country = relationship("Country")
     province = relationship("Province")
     city = relationship("City")
+    sector = relationship("Sector")
+    company_size = relationship("CompanySize")
 
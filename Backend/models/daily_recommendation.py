@@ -0,0 +1,24 @@
+from sqlalchemy import Column, Integer, Date, DateTime, ForeignKey, JSON, UniqueConstraint, func
+from sqlalchemy.orm import relationship
+
+from core.database import Base
+
+
+class DailyRecommendation(Base):
+    __tablename__ = "daily_recommendations"
+
+    id = Column(Integer, primary_key=True, index=True)
+    company_id = Column(Integer, ForeignKey("companies.id"), nullable=False)
+    recommendation_date = Column(Date, nullable=False)
+
+    # Resultado servido tal cual: {has_recommendations, tenders, summary, generated_at, next_update}
+    payload = Column(JSON, nullable=False)
+
+    generated_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    company = relationship("Company")
+
+    # La restricción única crea el índice usado para servir (company_id, fecha)
+    __table_args__ = (
+        UniqueConstraint("company_id", "recommendation_date", name="uq_daily_recommendations_company_date"),
+    )
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, func
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index, func
 from sqlalchemy.orm import relationship
 
 from core.database import Base
@@ -14,3 +14,7 @@ class Parish(Base):
 
     canton = relationship("Canton", backref="parishes")
 
+    # Hijos de un cantón ordenados por nombre y control de duplicados en create_*
+    __table_args__ = (
+        Index("ix_parishes_canton_id_name", "canton_id", "name"),
+    )
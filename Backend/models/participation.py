@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Numeric, ForeignKey, func, Text
+from sqlalchemy import Column, Integer, String, DateTime, Numeric, ForeignKey, Index, func, Text
 from sqlalchemy.orm import relationship
 
 from core.database import Base
@@ -31,3 +31,9 @@ class Participation(Base):
     company = relationship("Company", backref="participations")
     created_by_user = relationship("User", foreign_keys=[created_by_user_id], backref="created_participations")
 
+    # GET /participations/ por empresa o licitación (más recientes primero); el de empresa
+    # también resuelve exclude_participated del listado de licitaciones
+    __table_args__ = (
+        Index("ix_participations_company_created_at_id", "company_id", "created_at", "id"),
+        Index("ix_participations_tender_created_at_id", "tender_id", "created_at", "id"),
+    )
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, func
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index, func
 from sqlalchemy.orm import relationship
 
 from core.database import Base
@@ -14,3 +14,7 @@ class Province(Base):
 
     country = relationship("Country", backref="provinces")
 
+    # Hijos de un país ordenados por nombre y control de duplicados en create_*
+    __table_args__ = (
+        Index("ix_provinces_country_id_name", "country_id", "name"),
+    )
@@ -0,0 +1,20 @@
+from sqlalchemy import Column, String, DateTime, Text, Index, func
+
+from core.database import Base
+
+
+class RecommendationCacheEntry(Base):
+    __tablename__ = "recommendation_cache"
+
+    # Hash SHA-256 de las entradas normalizadas del prompt + modelo
+    cache_key = Column(String(64), primary_key=True)
+    tender_key = Column(String(255), nullable=True)
+    model = Column(String(100), nullable=False)
+    recommendation_text = Column(Text, nullable=False)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    expires_at = Column(DateTime(timezone=True), nullable=False)
+
+    __table_args__ = (
+        Index("ix_recommendation_cache_tender_key", "tender_key"),
+    )
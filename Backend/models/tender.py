@@ -1,9 +1,13 @@
-from sqlalchemy import Column, Integer, String, DateTime, Numeric, ForeignKey, func, Date, Text
+from sqlalchemy import Column, Integer, String, DateTime, Numeric, ForeignKey, func, Date, Text, Index
 from sqlalchemy.orm import relationship
 
 from core.database import Base
 
 
+# Estados que se consideran licitaciones abiertas ('Abierta', 'active', 'open'), comparados en minúsculas
+OPEN_STATUSES = ['abierta', 'active', 'open']
+
+
 class Tender(Base):
     __tablename__ = "tenders"
 
@@ -40,6 +44,11 @@ class Tender(Base):
     # Información del proceso
     number_of_tenderers = Column(Integer, nullable=True)
     award_criteria = Column(Text, nullable=True)
+    eligibility_criteria = Column(Text, nullable=True)  # Criterios separados por comas (OCDS eligibilityCriteria)
+    
+    # Duraciones derivadas (features del modelo de predicción)
+    tender_duration_days = Column(Integer, nullable=True)
+    contract_duration_days = Column(Integer, nullable=True)
     
     # Relaciones geográficas
     country_id = Column(Integer, ForeignKey("countries.id"), nullable=True)
@@ -65,3 +74,18 @@ class Tender(Base):
     winning_company = relationship("Company", foreign_keys=[winning_company_id], backref="won_tenders")
     winning_participation = relationship("Participation", foreign_keys=[winning_participation_id], post_update=True, backref="won_tender_record")
 
+    # Índices para paginación por cursor (created_at DESC, id DESC), solos o tras los filtros
+    # del listado (status_filter, category_filter, /my-company); las migraciones en migrations/
+    __table_args__ = (
+        Index("ix_tenders_created_at_id", "created_at", "id"),
+        Index("ix_tenders_publishing_company_created_at_id", "publishing_company_id", "created_at", "id"),
+        Index("ix_tenders_status_created_at_id", "status", "created_at", "id"),
+        Index("ix_tenders_main_category_created_at_id", "main_category", "created_at", "id"),
+        # Parcial: solo las abiertas, que recorre por id el refresco de matrices (win_matrix)
+        Index(
+            "ix_tenders_open_id",
+            "id",
+            postgresql_where=func.lower(status).in_(OPEN_STATUSES),
+            sqlite_where=func.lower(status).in_(OPEN_STATUSES),
+        ),
+    )
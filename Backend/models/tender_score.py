@@ -0,0 +1,29 @@
+from sqlalchemy import Column, Integer, String, Boolean, Date, DateTime, Numeric, ForeignKey, Index, func
+
+from core.database import Base
+
+
+class TenderScore(Base):
+    """
+    Componentes de puntuación precalculados por licitación para las recomendaciones.
+    Se mantiene al crear/actualizar licitaciones (services.tender_scoring).
+    """
+    __tablename__ = "tender_scores"
+
+    tender_id = Column(Integer, ForeignKey("tenders.id", ondelete="CASCADE"), primary_key=True)
+
+    # Estado normalizado ('Abierta', 'active', 'open' -> True)
+    is_open = Column(Boolean, nullable=False, default=False)
+    # Puntos por baja competencia (0, 10 o 20)
+    competition_score = Column(Integer, nullable=False, default=0)
+    budget_amount = Column(Numeric(18, 2), nullable=True)
+    tender_end_date = Column(Date, nullable=True)
+    # Categoría en minúsculas para el matching por palabras clave
+    search_text = Column(String(255), nullable=False, default="")
+
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    __table_args__ = (
+        Index("ix_tender_scores_open_end_date", "is_open", "tender_end_date"),
+        Index("ix_tender_scores_open_budget", "is_open", "budget_amount"),
+    )
@@ -0,0 +1,27 @@
+from sqlalchemy import Column, Integer, String, DateTime, Numeric, ForeignKey, LargeBinary, func
+
+from core.database import Base
+
+
+class TenderWinMatrix(Base):
+    """
+    Probabilidades de ganar precalculadas por licitación sobre una grilla fija
+    (relación oferta/presupuesto × duración del contrato). La mantiene el job de
+    services.win_matrix; se descarta si cambian las entradas del modelo o la versión.
+    """
+    __tablename__ = "tender_win_matrices"
+
+    tender_id = Column(Integer, ForeignKey("tenders.id", ondelete="CASCADE"), primary_key=True)
+
+    # Entradas con las que se calculó (si difieren de la licitación, la matriz está vencida)
+    model_version = Column(String(50), nullable=False)
+    grid_version = Column(String(20), nullable=False)
+    number_of_tenderers = Column(Integer, nullable=False)
+    main_category = Column(String(100), nullable=False)
+    budget_amount = Column(Numeric(18, 2), nullable=False)
+    tender_duration_days = Column(Integer, nullable=False)
+
+    # float32 little-endian, forma (len(BID_RATIOS), len(CONTRACT_DURATIONS)) en orden C
+    probabilities = Column(LargeBinary, nullable=False)
+
+    computed_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -1,4 +1,4 @@
-from sqlalchemy import Boolean, Column, DateTime, ForeignKey, Integer, String, func
+from sqlalchemy import Boolean, Column, DateTime, ForeignKey, Index, Integer, String, func
 from sqlalchemy.orm import relationship
 
 from core.database import Base
@@ -59,3 +59,7 @@ class User(Base):
 
     company = relationship("Company")
 
+    # Usuarios pendientes de aprobación de una empresa (GET /users/company/{id}/pending)
+    __table_args__ = (
+        Index("ix_users_company_membership_status", "company_id", "membership_status"),
+    )
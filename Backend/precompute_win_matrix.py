@@ -0,0 +1,54 @@
+"""
+Precalcula las matrices de probabilidad de ganar de las licitaciones abiertas.
+
+Uso:
+    python precompute_win_matrix.py                 # solo las vencidas o faltantes
+    python precompute_win_matrix.py --force         # todas (p. ej. tras cambiar la grilla)
+    python precompute_win_matrix.py --tender-id 12 --tender-id 15
+
+La API hace lo mismo en segundo plano cada WIN_MATRIX_REFRESH_SECONDS; este script sirve
+para cargas masivas o para correrlo desde cron con el refresco de la API desactivado.
+"""
+import argparse
+import sys
+import time
+
+from core.database import SessionLocal, engine
+from core.logging_config import configure_logging
+from services.win_matrix import DEFAULT_BATCH_SIZE, GRID_SHAPE, refresh_win_matrices
+import models  # Importar todos los modelos para crear las tablas
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Precalcular matrices de probabilidad de licitaciones abiertas")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="Licitaciones por llamada al modelo")
+    parser.add_argument("--tender-id", type=int, action="append", default=None, help="Solo estas licitaciones")
+    parser.add_argument("--force", action="store_true", help="Recalcular aunque estén vigentes")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    configure_logging()
+    args = parse_args(argv)
+    models.Base.metadata.create_all(bind=engine)
+
+    db = SessionLocal()
+    try:
+        started = time.perf_counter()
+        stats = refresh_win_matrices(db, args.tender_id, batch_size=args.batch_size, force=args.force)
+        seconds = time.perf_counter() - started
+    finally:
+        db.close()
+
+    print("="*60)
+    print(f"📄 Licitaciones abiertas revisadas: {stats['checked']}")
+    print(f"✅ Matrices calculadas:             {stats['computed']} ({GRID_SHAPE[0]}×{GRID_SHAPE[1]} puntos c/u)")
+    print(f"⏭️  Omitidas (datos inválidos):      {stats['skipped']}")
+    print(f"🗑️  Eliminadas (ya no abiertas):     {stats['pruned']}")
+    print(f"⏱️  Tiempo:                          {seconds:.2f}s")
+    print("="*60)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,48 @@
+from datetime import datetime
+from typing import List, Optional
+
+from pydantic import BaseModel
+
+
+class AnalyticsOverview(BaseModel):
+    total_tenders: int
+    open_tenders: int
+    budget_total: float
+    avg_number_of_tenderers: Optional[float] = None
+    refreshed_at: Optional[datetime] = None
+
+
+class TenderGroupStats(BaseModel):
+    key: Optional[str] = None
+    tenders: int
+    budget_total: float
+    avg_number_of_tenderers: Optional[float] = None
+
+
+class TenderStatsResponse(BaseModel):
+    group_by: str
+    groups: List[TenderGroupStats]
+    refreshed_at: Optional[datetime] = None
+
+
+class BudgetBucketStats(BaseModel):
+    label: str
+    min_amount: int
+    max_amount: Optional[int] = None
+    tenders: int
+
+
+class BudgetDistribution(BaseModel):
+    buckets: List[BudgetBucketStats]
+    without_budget: int
+    refreshed_at: Optional[datetime] = None
+
+
+class CompanyParticipationSummary(BaseModel):
+    company_id: int
+    participations: int
+    won: int
+    decided: int
+    win_rate: Optional[float] = None
+    avg_predicted_win_probability: Optional[float] = None
+    refreshed_at: Optional[datetime] = None
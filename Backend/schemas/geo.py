@@ -0,0 +1,25 @@
+from typing import List
+
+from pydantic import BaseModel
+
+
+class GeoNode(BaseModel):
+    id: int
+    name: str
+
+
+class GeoCantonNode(GeoNode):
+    parishes: List[GeoNode] = []
+
+
+class GeoProvinceNode(GeoNode):
+    cantons: List[GeoCantonNode] = []
+    cities: List[GeoNode] = []
+
+
+class GeoCountryNode(GeoNode):
+    provinces: List[GeoProvinceNode] = []
+
+
+class GeoTree(BaseModel):
+    countries: List[GeoCountryNode]
@@ -1,7 +1,7 @@
 from datetime import datetime
 from decimal import Decimal
-from typing import Optional
-from pydantic import BaseModel, ConfigDict, Field
+from typing import List, Optional
+from pydantic import BaseModel, ConfigDict, Field, model_validator
 
 
 class ParticipationBase(BaseModel):
@@ -30,6 +30,7 @@ class ParticipationWithPrediction(BaseModel):
     bid_currency: str
     predicted_win_probability: float = Field(..., ge=0.0, le=1.0, description="Probabilidad de ganar (0-1)")
     recommendation: str = Field(..., description="Recomendación generada por GPT")
+    recommendation_status: str = Field("completed", description="Estado de la recomendación: queued, running, completed, failed o pending")
     status: str
     created_at: datetime
 
@@ -42,3 +43,82 @@ class ParticipationRead(ParticipationBase):
 
     model_config = ConfigDict(from_attributes=True)
 
+
+
+class PredictionItem(BaseModel):
+    """Datos de una oferta para predicción en lote."""
+    number_of_tenderers: int = Field(..., description="Número de participantes en la licitación")
+    main_category: str = Field(..., description="Categoría: Bienes, Obras, Servicios")
+    budget: float = Field(..., description="Presupuesto de la licitación en USD")
+    bid_amount: float = Field(..., description="Monto de la oferta en USD")
+    tender_duration_days: int = Field(..., description="Duración del proceso de licitación en días")
+    contract_duration_days: int = Field(365, description="Duración del contrato en días")
+    reference: Optional[str] = Field(None, max_length=255, description="Identificador libre devuelto en la respuesta")
+
+
+class BatchPredictionRequest(BaseModel):
+    """Schema para calcular probabilidades de varias ofertas en una sola petición."""
+    items: List[PredictionItem] = Field(..., min_length=1, max_length=5000)
+
+
+class BatchPredictionResult(BaseModel):
+    reference: Optional[str] = None
+    predicted_win_probability: float = Field(..., ge=0.0, le=1.0)
+
+
+class BatchPredictionResponse(BaseModel):
+    count: int
+    results: List[BatchPredictionResult]
+
+
+class BidSweepRequest(BaseModel):
+    """
+    Schema para evaluar una licitación sobre una grilla de ofertas.
+    Se indica un rango (min_bid, max_bid, step) o una lista de razones oferta/presupuesto.
+    """
+    number_of_tenderers: int = Field(..., gt=0, description="Número de participantes en la licitación")
+    main_category: str = Field(..., description="Categoría: Bienes, Obras, Servicios")
+    budget_amount: float = Field(..., gt=0, description="Presupuesto de la licitación en USD")
+    tender_duration_days: int = Field(28, gt=0, description="Duración del proceso de licitación en días")
+    contract_duration_days: int = Field(365, gt=0, description="Duración del contrato en días")
+    estimated_cost: Optional[float] = Field(None, ge=0, description="Costo estimado para calcular el margen")
+
+    min_bid: Optional[float] = Field(None, gt=0, description="Oferta mínima del rango en USD")
+    max_bid: Optional[float] = Field(None, gt=0, description="Oferta máxima del rango en USD")
+    step: Optional[float] = Field(None, gt=0, description="Paso entre ofertas en USD")
+    ratios: Optional[List[float]] = Field(None, min_length=1, description="Razones oferta/presupuesto (ej. 0.85)")
+
+    @model_validator(mode="after")
+    def check_grid(self):
+        has_range = self.min_bid is not None and self.max_bid is not None and self.step is not None
+        if not has_range and not self.ratios:
+            raise ValueError("Debe indicar min_bid, max_bid y step, o una lista de ratios")
+        if has_range and self.min_bid > self.max_bid:
+            raise ValueError("min_bid no puede ser mayor que max_bid")
+        if self.ratios and any(ratio <= 0 for ratio in self.ratios):
+            raise ValueError("Todos los ratios deben ser mayores a 0")
+        return self
+
+
+class BidSweepPoint(BaseModel):
+    bid_amount: float
+    bid_ratio: float
+    predicted_win_probability: float = Field(..., ge=0.0, le=1.0)
+    expected_value: float
+
+
+class BidSweepResponse(BaseModel):
+    count: int
+    points: List[BidSweepPoint]
+    best: Optional[BidSweepPoint] = Field(None, description="Oferta que maximiza probabilidad × margen")
+
+
+class RecommendationStatus(BaseModel):
+    """Estado de la generación en segundo plano de una recomendación."""
+    participation_id: int
+    status: str = Field(..., description="queued, running, completed, failed o pending (sin texto: la genera otro proceso o se re-encola al arrancar)")
+    error: Optional[str] = None
+    created_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    recommendation: Optional[str] = None
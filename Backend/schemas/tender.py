@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field, ConfigDict
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime, date
 from decimal import Decimal
 
@@ -38,6 +38,9 @@ class TenderCreate(BaseModel):
     # Información del proceso
     number_of_tenderers: Optional[int] = Field(None, ge=0)
     award_criteria: Optional[str] = Field(None)
+    eligibility_criteria: Optional[str] = Field(None)
+    tender_duration_days: Optional[int] = Field(None, ge=0)
+    contract_duration_days: Optional[int] = Field(None, ge=0)
     
     # Relaciones geográficas
     country_id: Optional[int] = None
@@ -71,6 +74,9 @@ class TenderUpdate(BaseModel):
     
     number_of_tenderers: Optional[int] = Field(None, ge=0)
     award_criteria: Optional[str] = None
+    eligibility_criteria: Optional[str] = None
+    tender_duration_days: Optional[int] = Field(None, ge=0)
+    contract_duration_days: Optional[int] = Field(None, ge=0)
     
     country_id: Optional[int] = None
     requirement_city_id: Optional[int] = None
@@ -110,6 +116,9 @@ class TenderRead(BaseModel):
     
     number_of_tenderers: Optional[int]
     award_criteria: Optional[str]
+    eligibility_criteria: Optional[str] = None
+    tender_duration_days: Optional[int] = None
+    contract_duration_days: Optional[int] = None
     
     country_id: Optional[int]
     requirement_city_id: Optional[int]
@@ -139,3 +148,36 @@ class TenderSummary(BaseModel):
     publishing_company_id: int
     created_at: datetime
 
+
+# Páginas para paginación por cursor
+class TenderSummaryPage(BaseModel):
+    items: List[TenderSummary]
+    next_cursor: Optional[str] = Field(None, description="Cursor de la siguiente página (null si no hay más)")
+
+
+class TenderReadPage(BaseModel):
+    items: List[TenderRead]
+    next_cursor: Optional[str] = Field(None, description="Cursor de la siguiente página (null si no hay más)")
+
+
+# Resultados de búsqueda de texto completo
+class TenderSearchHit(TenderSummary):
+    rank: float = Field(..., description="Relevancia (mayor es mejor)")
+    title_highlight: Optional[str] = Field(None, description="Título con HTML escapado y coincidencias entre <mark></mark>")
+    description_highlight: Optional[str] = Field(None, description="Fragmento de la descripción (HTML escapado) con coincidencias entre <mark></mark>")
+
+
+class TenderSearchPage(BaseModel):
+    query: str
+    items: List[TenderSearchHit]
+
+
+# Probabilidad de ganar servida desde la matriz precalculada
+class TenderWinProbability(BaseModel):
+    tender_id: int
+    bid_amount: float
+    bid_to_budget_ratio: float
+    contract_duration_days: int
+    predicted_win_probability: float
+    source: str = Field(..., description="'matrix' (interpolada, sin llamar al modelo) o 'model'")
+    model_version: str
@@ -1,157 +1,140 @@
 """
-Script para cargar datos de mock_tenders.json a la base de datos PostgreSQL
+Carga masiva de licitaciones a la base de datos (no interactiva e idempotente).
+
+Uso:
+    python seed_tenders.py                          # mock_tenders.json
+    python seed_tenders.py Tender.xlsx              # hoja "Tender" del export de SERCOP
+    python seed_tenders.py licitaciones.jsonl --chunk-size 5000 --company-id 1 --user-id 1
+    python seed_tenders.py mock_tenders.json --replace   # borra las licitaciones (y sus participaciones) antes de cargar
+
+Las licitaciones se insertan por bloques con INSERT ... ON CONFLICT (external_id) DO UPDATE,
+así que volver a ejecutar el comando actualiza las existentes en lugar de duplicarlas.
 """
-import json
+import argparse
 import sys
-from datetime import datetime
+
 from sqlalchemy.orm import Session
+
 from core.database import SessionLocal, engine
+from models.daily_recommendation import DailyRecommendation
+from models.participation import Participation
 from models.tender import Tender
+from models.tender_score import TenderScore
+from models.tender_win_matrix import TenderWinMatrix
+from models.user import User
+from services.tender_ingestion import DEFAULT_CHUNK_SIZE, ChunkReport, ingest_records, iter_records
+from services.tender_scoring import rebuild_tender_scores
 import models  # Importar todos los modelos para crear las tablas
 
-def load_tenders_from_json():
-    """Carga licitaciones desde el archivo JSON"""
-    try:
-        with open('mock_tenders.json', 'r', encoding='utf-8') as f:
-            data = json.load(f)
-            return data.get('tenders', [])
-    except FileNotFoundError:
-        print("❌ Error: No se encontró el archivo mock_tenders.json")
-        sys.exit(1)
-    except json.JSONDecodeError as e:
-        print(f"❌ Error al leer JSON: {e}")
-        sys.exit(1)
-
-def parse_date(date_str):
-    """Convierte string de fecha a datetime"""
-    if not date_str:
-        return None
-    try:
-        # Intentar varios formatos
-        for fmt in ['%Y-%m-%dT%H:%M:%S.%fZ', '%Y-%m-%dT%H:%M:%SZ', '%Y-%m-%d']:
-            try:
-                return datetime.strptime(date_str, fmt)
-            except ValueError:
-                continue
-        return None
-    except:
-        return None
-
-def seed_database():
-    """Inserta datos en la base de datos"""
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Carga masiva de licitaciones (JSON, JSONL o XLSX)")
+    parser.add_argument("path", nargs="?", default="mock_tenders.json", help="Archivo de origen")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Filas por bloque")
+    parser.add_argument("--sheet", default=None, help="Hoja del XLSX (por defecto 'Tender')")
+    parser.add_argument("--company-id", type=int, default=None, help="Empresa publicadora (por defecto la del primer usuario)")
+    parser.add_argument("--user-id", type=int, default=None, help="Usuario creador (por defecto el primer usuario)")
+    parser.add_argument(
+        "--replace", action="store_true",
+        help="Eliminar las licitaciones existentes antes de cargar (también participaciones y recomendaciones diarias)"
+    )
+    parser.add_argument("--skip-scores", action="store_true", help="No recalcular el índice de puntuación")
+    return parser.parse_args(argv)
+
+
+def resolve_owner(db: Session, company_id, user_id):
+    """Empresa y usuario a los que se atribuyen las licitaciones importadas."""
+    query = db.query(User).filter(User.company_id.isnot(None))
+    if user_id is not None:
+        query = query.filter(User.id == user_id)
+    elif company_id is not None:
+        query = query.filter(User.company_id == company_id)
+    user = query.order_by(User.id).first()
+    if user is None:
+        raise SystemExit("❌ No hay un usuario con empresa para atribuir las licitaciones (usa --company-id/--user-id)")
+    return company_id or user.company_id, user.id
+
+
+def delete_tenders(db: Session) -> int:
+    """
+    Borra todas las licitaciones y lo que depende de ellas, en orden de claves foráneas:
+    participaciones (y la referencia a la ganadora), índices precalculados y recomendaciones
+    diarias, que guardan licitaciones en su payload.
+    """
+    db.query(Tender).update({Tender.winning_participation_id: None}, synchronize_session=False)
+    db.query(Participation).delete(synchronize_session=False)
+    db.query(TenderScore).delete(synchronize_session=False)
+    db.query(TenderWinMatrix).delete(synchronize_session=False)
+    db.query(DailyRecommendation).delete(synchronize_session=False)
+    deleted = db.query(Tender).delete(synchronize_session=False)
+    db.commit()
+    return deleted
+
+
+def print_chunk(chunk: ChunkReport) -> None:
+    print(
+        f"  ✓ Bloque {chunk.index}: {chunk.upserted}/{chunk.rows} filas, "
+        f"{chunk.errors} errores, {chunk.skipped} omitidas, {chunk.rows_per_second:,.0f} filas/s"
+    )
+    for sample in chunk.error_samples:
+        print(f"      ❌ {sample}")
+
+
+def seed_database(argv=None) -> int:
+    """Inserta datos en la base de datos. Devuelve el código de salida."""
+    args = parse_args(argv)
+
     # Crear todas las tablas si no existen
     print("📋 Creando tablas si no existen...")
-    models.tender.Base.metadata.create_all(bind=engine)
-    
-    # Crear sesión
+    models.Base.metadata.create_all(bind=engine)
+
     db: Session = SessionLocal()
-    
     try:
-        # Cargar datos del JSON
-        print("📂 Cargando datos de mock_tenders.json...")
-        tenders_data = load_tenders_from_json()
-        print(f"✅ Se encontraron {len(tenders_data)} licitaciones en el JSON")
-        
-        # Verificar cuántas ya existen
-        existing_count = db.query(Tender).count()
-        print(f"📊 Hay {existing_count} licitaciones en la base de datos")
-        
-        # Preguntar si desea eliminar datos existentes
-        if existing_count > 0:
-            response = input("\n⚠️  ¿Desea eliminar las licitaciones existentes y cargar nuevas? (s/n): ")
-            if response.lower() == 's':
-                print("🗑️  Eliminando licitaciones existentes...")
-                db.query(Tender).delete()
-                db.commit()
-                print("✅ Licitaciones eliminadas")
-            else:
-                print("ℹ️  Se agregarán solo las licitaciones que no existan")
-        
-        # Insertar licitaciones
-        print("\n💾 Insertando licitaciones en la base de datos...")
-        inserted = 0
-        skipped = 0
-        errors = 0
-        
-        for idx, tender_data in enumerate(tenders_data, 1):
-            try:
-                # Verificar si ya existe
-                existing = db.query(Tender).filter(
-                    Tender.external_id == tender_data.get('external_id')
-                ).first()
-                
-                if existing:
-                    skipped += 1
-                    continue
-                
-                # Mapear status correcto
-                status = tender_data.get('status', 'active')
-                if status == 'active':
-                    status = 'Abierta'
-                elif status == 'complete':
-                    status = 'Cerrada'
-                
-                # Crear objeto Tender
-                tender = Tender(
-                    external_id=tender_data.get('external_id'),
-                    ocid=tender_data.get('ocid'),
-                    title=tender_data.get('title'),
-                    description=tender_data.get('description'),
-                    status=status,
-                    main_category=tender_data.get('main_category'),
-                    buyer_name=tender_data.get('buyer_name'),
-                    buyer_ruc=tender_data.get('buyer_ruc'),
-                    budget_amount=tender_data.get('budget_amount'),
-                    budget_currency=tender_data.get('budget_currency', 'USD'),
-                    tender_start_date=parse_date(tender_data.get('tender_start_date')),
-                    tender_end_date=parse_date(tender_data.get('tender_end_date')),
-                    tender_duration_days=tender_data.get('tender_duration_days'),
-                    number_of_tenderers=tender_data.get('number_of_tenderers', 0),
-                    procedure_type=tender_data.get('procedure_type'),
-                    has_enquiries=tender_data.get('has_enquiries', False)
-                )
-                
-                db.add(tender)
-                inserted += 1
-                
-                # Commit cada 50 registros
-                if inserted % 50 == 0:
-                    db.commit()
-                    print(f"  ✓ Procesadas {idx}/{len(tenders_data)} licitaciones... ({inserted} insertadas)")
-                
-            except Exception as e:
-                errors += 1
-                print(f"  ❌ Error en licitación {idx}: {str(e)}")
-                continue
-        
-        # Commit final
-        db.commit()
-        
+        company_id, user_id = resolve_owner(db, args.company_id, args.user_id)
+
+        if args.replace:
+            print("🗑️  Eliminando licitaciones existentes y sus participaciones...")
+            print(f"   {delete_tenders(db)} licitaciones eliminadas")
+
+        print(f"💾 Cargando {args.path} en bloques de {args.chunk_size}...")
+        report = ingest_records(
+            engine,
+            iter_records(args.path, sheet=args.sheet),
+            publishing_company_id=company_id,
+            created_by_user_id=user_id,
+            chunk_size=args.chunk_size,
+            on_chunk=print_chunk,
+        )
+
+        if not args.skip_scores:
+            # Recalcular el índice de puntuación usado por las recomendaciones
+            print("\n📈 Actualizando índice de puntuación de licitaciones...")
+            scored = rebuild_tender_scores(db)
+            print(f"✅ {scored} licitaciones indexadas")
+
         # Resumen
         print("\n" + "="*60)
         print("📊 RESUMEN DE IMPORTACIÓN")
         print("="*60)
-        print(f"✅ Insertadas:  {inserted}")
-        print(f"⏭️  Omitidas:    {skipped}")
-        print(f"❌ Errores:     {errors}")
+        print(f"📄 Leídas:      {report.rows}")
+        print(f"✅ Guardadas:   {report.upserted}")
+        print(f"❌ Errores:     {report.errors}")
+        print(f"⏱️  Tiempo:      {report.seconds:.2f}s ({report.rows_per_second:,.0f} filas/s)")
         print(f"📈 Total en BD: {db.query(Tender).count()}")
         print("="*60)
-        
-        if inserted > 0:
-            print("\n✨ ¡Datos cargados exitosamente!")
-            print("\n💡 Ahora puedes actualizar el endpoint de recomendaciones para usar la BD")
-        
-    except Exception as e:
-        print(f"\n❌ Error general: {str(e)}")
+        return 1 if report.errors else 0
+
+    except (FileNotFoundError, ValueError, RuntimeError) as e:
+        print(f"\n❌ Error: {str(e)}")
         db.rollback()
-        import traceback
-        traceback.print_exc()
+        return 1
     finally:
         db.close()
 
+
 if __name__ == "__main__":
     print("="*60)
-    print("🔄 IMPORTACIÓN DE LICITACIONES A POSTGRESQL")
+    print("🔄 IMPORTACIÓN DE LICITACIONES")
     print("="*60)
     print()
-    seed_database()
+    sys.exit(seed_database())
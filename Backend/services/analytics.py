@@ -0,0 +1,306 @@
+"""
+Agregados del dashboard de licitaciones sobre tablas resumen.
+
+refresh_summaries reconstruye en una transacción, con GROUP BY en la base:
+  - tender_stats: licitaciones por estado × categoría × mes × tramo de presupuesto
+  - company_participation_stats: participaciones, ganadas y probabilidad media por empresa
+Los endpoints de /api/v1/analytics agregan sobre esas filas (unos cientos, según los meses
+con datos), así que su costo no crece con tenders ni participations. Los datos tienen el
+retraso del refresco (ANALYTICS_REFRESH_SECONDS); cada respuesta incluye refreshed_at.
+"""
+import hashlib
+import logging
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from sqlalchemy import DateTime, case, delete, func, insert, literal, null, or_, select, text
+from sqlalchemy.orm import Session
+
+from models.analytics_summary import CompanyParticipationStats, TenderStats
+from models.participation import Participation
+from models.tender import OPEN_STATUSES, Tender
+
+logger = logging.getLogger(__name__)
+
+
+# Tramos de 500k hasta 5M y uno abierto, como en el análisis del notebook (pd.cut, cerrados a la derecha)
+BUDGET_BUCKET_SIZE = 500000
+BUDGET_BUCKETS = [
+    (i * BUDGET_BUCKET_SIZE, (i + 1) * BUDGET_BUCKET_SIZE) for i in range(10)
+] + [(10 * BUDGET_BUCKET_SIZE, None)]
+BUDGET_BUCKET_LABELS = [
+    '< $500k', '$500k - $1M', '$1M - $1.5M', '$1.5M - $2M', '$2M - $2.5M', '$2.5M - $3M',
+    '$3M - $3.5M', '$3.5M - $4M', '$4M - $4.5M', '$4.5M - $5M', '> $5M',
+]
+
+# Dimensiones de GET /analytics/tenders
+GROUP_BY_COLUMNS = {
+    'status': TenderStats.status,
+    'category': TenderStats.main_category,
+    'month': TenderStats.month,
+}
+
+
+def _budget_bucket(budget):
+    """Índice del tramo en BUDGET_BUCKETS; NULL si no hay presupuesto o no es positivo."""
+    whens = [(or_(budget.is_(None), budget <= 0), null())]
+    whens += [(budget <= upper, index) for index, (_, upper) in enumerate(BUDGET_BUCKETS) if upper is not None]
+    return case(*whens, else_=len(BUDGET_BUCKETS) - 1)
+
+
+def _month(db: Session, value):
+    if db.get_bind().dialect.name == 'postgresql':
+        return func.to_char(value, 'YYYY-MM')
+    return func.strftime('%Y-%m', value)
+
+
+def _tender_stats_select(db: Session, refreshed_at: datetime):
+    # Subconsulta con las expresiones por fila: el GROUP BY externo agrupa por columnas
+    rows = select(
+        Tender.status.label('status'),
+        Tender.main_category.label('main_category'),
+        _month(db, func.coalesce(Tender.publish_date, Tender.created_at)).label('month'),
+        _budget_bucket(Tender.budget_amount).label('budget_bucket'),
+        Tender.budget_amount.label('budget_amount'),
+        Tender.number_of_tenderers.label('number_of_tenderers'),
+    ).subquery()
+    keys = [rows.c.status, rows.c.main_category, rows.c.month, rows.c.budget_bucket]
+    return select(
+        *keys,
+        func.count(),
+        func.coalesce(func.sum(rows.c.budget_amount), 0),
+        func.coalesce(func.sum(rows.c.number_of_tenderers), 0),
+        func.count(rows.c.number_of_tenderers),
+        literal(refreshed_at, DateTime(timezone=True)),
+    ).group_by(*keys)
+
+
+def _company_stats_select(refreshed_at: datetime):
+    won = or_(Tender.winning_participation_id == Participation.id, Participation.participation_status == 'awarded')
+    decided = or_(won, Tender.winning_participation_id.is_not(None), Participation.participation_status == 'rejected')
+    return (
+        select(
+            Participation.company_id,
+            func.count(),
+            func.sum(case((won, 1), else_=0)),
+            func.sum(case((decided, 1), else_=0)),
+            func.coalesce(func.sum(Participation.predicted_win_prob), 0),
+            func.count(Participation.predicted_win_prob),
+            literal(refreshed_at, DateTime(timezone=True)),
+        )
+        .join(Tender, Tender.id == Participation.tender_id)
+        .group_by(Participation.company_id)
+    )
+
+
+# Advisory lock del refresco, compartido por todos los procesos
+REFRESH_LOCK_ID = int.from_bytes(hashlib.sha256(b"analytics:refresh_summaries").digest()[:8], 'big', signed=True)
+
+
+def _acquire_refresh_lock(db: Session) -> None:
+    """
+    Advisory lock transaccional en PostgreSQL (no-op en otros motores). Sin él, dos
+    refrescos concurrentes (un hilo por worker) no borran las filas que inserta el otro
+    y los totales se duplican.
+    """
+    if db.get_bind().dialect.name != 'postgresql':
+        return
+    db.execute(text("SELECT pg_advisory_xact_lock(:lock_id)"), {"lock_id": REFRESH_LOCK_ID})
+
+
+def refresh_summaries(db: Session) -> Dict[str, int]:
+    """
+    Reconstruye ambas tablas resumen en una sola transacción (los lectores ven la versión
+    anterior hasta el commit). Los refrescos de distintos procesos se serializan.
+
+    Returns:
+        {'tender_groups', 'companies'}
+    """
+    _acquire_refresh_lock(db)
+    refreshed_at = datetime.now(timezone.utc)
+    db.execute(delete(TenderStats))
+    db.execute(
+        insert(TenderStats).from_select(
+            ['status', 'main_category', 'month', 'budget_bucket', 'tender_count', 'budget_total',
+             'tenderers_total', 'tenderers_count', 'refreshed_at'],
+            _tender_stats_select(db, refreshed_at),
+        )
+    )
+    db.execute(delete(CompanyParticipationStats))
+    db.execute(
+        insert(CompanyParticipationStats).from_select(
+            ['company_id', 'participation_count', 'won_count', 'decided_count', 'predicted_prob_total',
+             'predicted_prob_count', 'refreshed_at'],
+            _company_stats_select(refreshed_at),
+        )
+    )
+    db.commit()
+    return {
+        'tender_groups': db.scalar(select(func.count()).select_from(TenderStats)),
+        'companies': db.scalar(select(func.count()).select_from(CompanyParticipationStats)),
+    }
+
+
+def _ratio(total, count) -> Optional[float]:
+    return round(float(total) / count, 4) if count else None
+
+
+def last_refreshed_at(db: Session) -> Optional[datetime]:
+    """Momento del último refresco (None si las tablas resumen están vacías)."""
+    return db.scalar(select(func.max(TenderStats.refreshed_at)))
+
+
+def overview(db: Session) -> Dict:
+    """Totales generales y licitaciones abiertas."""
+    totals = db.execute(
+        select(
+            func.coalesce(func.sum(TenderStats.tender_count), 0),
+            func.coalesce(func.sum(TenderStats.budget_total), 0),
+            func.coalesce(func.sum(TenderStats.tenderers_total), 0),
+            func.coalesce(func.sum(TenderStats.tenderers_count), 0),
+            func.max(TenderStats.refreshed_at),
+        )
+    ).one()
+    open_tenders = db.scalar(
+        select(func.coalesce(func.sum(TenderStats.tender_count), 0))
+        .where(func.lower(TenderStats.status).in_(OPEN_STATUSES))
+    )
+    return {
+        'total_tenders': int(totals[0]),
+        'open_tenders': int(open_tenders),
+        'budget_total': float(totals[1]),
+        'avg_number_of_tenderers': _ratio(totals[2], totals[3]),
+        'refreshed_at': totals[4],
+    }
+
+
+def tenders_by(
+    db: Session,
+    group_by: str,
+    status_filter: Optional[str] = None,
+    category_filter: Optional[str] = None,
+) -> List[Dict]:
+    """Licitaciones, presupuesto total y competidores promedio por estado, categoría o mes."""
+    key = GROUP_BY_COLUMNS[group_by]
+    tender_count = func.sum(TenderStats.tender_count)
+    query = select(
+        key,
+        tender_count,
+        func.sum(TenderStats.budget_total),
+        func.sum(TenderStats.tenderers_total),
+        func.sum(TenderStats.tenderers_count),
+    ).group_by(key)
+    if status_filter:
+        query = query.where(TenderStats.status == status_filter)
+    if category_filter:
+        query = query.where(TenderStats.main_category == category_filter)
+    # Los meses en orden cronológico; estados y categorías de mayor a menor
+    query = query.order_by(key) if group_by == 'month' else query.order_by(tender_count.desc(), key)
+    return [
+        {
+            'key': value,
+            'tenders': int(count),
+            'budget_total': float(budget_total),
+            'avg_number_of_tenderers': _ratio(tenderers_total, tenderers_count),
+        }
+        for value, count, budget_total, tenderers_total, tenderers_count in db.execute(query)
+    ]
+
+
+def budget_distribution(db: Session, category_filter: Optional[str] = None) -> Dict:
+    """Licitaciones por tramo de presupuesto (todos los tramos, aunque estén vacíos)."""
+    query = select(TenderStats.budget_bucket, func.sum(TenderStats.tender_count)).group_by(TenderStats.budget_bucket)
+    if category_filter:
+        query = query.where(TenderStats.main_category == category_filter)
+    counts = {bucket: int(count) for bucket, count in db.execute(query)}
+    return {
+        'buckets': [
+            {'label': label, 'min_amount': lower, 'max_amount': upper, 'tenders': counts.get(index, 0)}
+            for index, (label, (lower, upper)) in enumerate(zip(BUDGET_BUCKET_LABELS, BUDGET_BUCKETS))
+        ],
+        'without_budget': counts.get(None, 0),
+    }
+
+
+def company_stats(db: Session, company_id: int) -> Dict:
+    """Participaciones, tasa de éxito (ganadas / decididas) y probabilidad media predicha."""
+    row = db.get(CompanyParticipationStats, company_id)
+    if row is None:
+        return {
+            'company_id': company_id, 'participations': 0, 'won': 0, 'decided': 0,
+            'win_rate': None, 'avg_predicted_win_probability': None,
+            'refreshed_at': last_refreshed_at(db),
+        }
+    return {
+        'company_id': company_id,
+        'participations': row.participation_count,
+        'won': row.won_count,
+        'decided': row.decided_count,
+        'win_rate': _ratio(row.won_count, row.decided_count),
+        'avg_predicted_win_probability': _ratio(row.predicted_prob_total, row.predicted_prob_count),
+        'refreshed_at': row.refreshed_at,
+    }
+
+
+class AnalyticsRefresher:
+    """Hilo que reconstruye las tablas resumen al arrancar y cada `interval_seconds`."""
+
+    def __init__(self, session_factory=None):
+        self._session_factory = session_factory
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self.last_run: Optional[Dict[str, float]] = None
+        self.last_error: Optional[str] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def run_once(self) -> Dict[str, int]:
+        if self._session_factory is None:
+            from core.database import SessionLocal
+            self._session_factory = SessionLocal
+        # Un refresco a la vez en el proceso (el hilo y POST /admin/analytics/refresh);
+        # entre procesos lo serializa el advisory lock de refresh_summaries
+        with self._lock:
+            started = time.perf_counter()
+            db = self._session_factory()
+            try:
+                stats = refresh_summaries(db)
+            finally:
+                db.close()
+        self.last_run = {**stats, 'seconds': round(time.perf_counter() - started, 3), 'at': time.time()}
+        return stats
+
+    def start(self, interval_seconds: float) -> None:
+        if interval_seconds <= 0 or self.running:
+            return
+        self._stop.clear()
+
+        def loop():
+            while not self._stop.is_set():
+                try:
+                    self.run_once()
+                    self.last_error = None
+                except Exception as e:
+                    self.last_error = str(e)
+                    logger.exception("Error refrescando los resúmenes de analytics: %s", e)
+                self._stop.wait(interval_seconds)
+
+        self._thread = threading.Thread(target=loop, name="analytics-refresh", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=30)
+        self._thread = None
+
+    def status(self) -> Dict:
+        return {'running': self.running, 'last_run': self.last_run, 'last_error': self.last_error}
+
+
+analytics_refresher = AnalyticsRefresher()
@@ -0,0 +1,91 @@
+"""
+Cliente falso de OpenAI para desarrollo y pruebas sin conexión.
+Imita la interfaz `client.chat.completions.create(...)` del SDK oficial.
+
+Se activa con la variable de entorno OPENAI_FAKE_CLIENT=1.
+La latencia simulada (segundos) se controla con OPENAI_FAKE_LATENCY.
+"""
+import os
+import time
+from types import SimpleNamespace
+from typing import Any, Dict, Iterator, List, Optional
+
+
+class _FakeCompletions:
+    def __init__(self, owner: "FakeOpenAI"):
+        self._owner = owner
+
+    def create(
+        self,
+        model: str,
+        messages: List[Dict[str, str]],
+        temperature: float = 0.7,
+        max_tokens: Optional[int] = None,
+        **kwargs: Any
+    ):
+        """Devuelve una respuesta determinística con la misma forma que la del SDK."""
+        self._owner.calls.append({"model": model, "messages": messages, **kwargs})
+
+        content = self._owner.reply or (
+            "**Recomendación de prueba**\n\n"
+            f"Respuesta generada por el cliente falso de OpenAI para el modelo {model}."
+        )
+
+        if kwargs.get("stream"):
+            return self._owner._stream(model, content)
+
+        if self._owner.latency:
+            time.sleep(self._owner.latency)
+
+        if self._owner.fail_with is not None:
+            raise self._owner.fail_with
+
+        message = SimpleNamespace(role="assistant", content=content)
+        usage = SimpleNamespace(
+            prompt_tokens=sum(len(m.get("content", "").split()) for m in messages),
+            completion_tokens=len(content.split()),
+        )
+        usage.total_tokens = usage.prompt_tokens + usage.completion_tokens
+        return SimpleNamespace(
+            model=model,
+            choices=[SimpleNamespace(index=0, message=message, finish_reason="stop")],
+            usage=usage,
+        )
+
+
+class FakeOpenAI:
+    """
+    Reemplazo offline de `openai.OpenAI`.
+
+    Args:
+        latency: Segundos de espera simulada por llamada
+        reply: Texto fijo a devolver (si es None se usa un texto genérico)
+        fail_with: Excepción a lanzar en cada llamada (para probar fallbacks)
+    """
+
+    def __init__(self, latency: Optional[float] = None, reply: Optional[str] = None,
+                 fail_with: Optional[Exception] = None):
+        if latency is None:
+            latency = float(os.getenv("OPENAI_FAKE_LATENCY", "0") or 0)
+        self.latency = latency
+        self.reply = reply
+        self.fail_with = fail_with
+        self.calls: List[Dict[str, Any]] = []
+        self.chat = SimpleNamespace(completions=_FakeCompletions(self))
+
+    def _stream(self, model: str, content: str) -> Iterator[SimpleNamespace]:
+        """Emite el texto palabra por palabra; la latencia se reparte entre los fragmentos."""
+        tokens = content.split(" ")
+        delay = self.latency / len(tokens) if self.latency else 0
+        for index, token in enumerate(tokens):
+            if delay:
+                time.sleep(delay)
+            # Con fail_with el error ocurre a mitad del stream
+            if self.fail_with is not None and index == len(tokens) // 2:
+                raise self.fail_with
+            text = token if index == 0 else " " + token
+            delta = SimpleNamespace(role="assistant" if index == 0 else None, content=text)
+            yield SimpleNamespace(
+                model=model,
+                choices=[SimpleNamespace(index=0, delta=delta, finish_reason=None)],
+            )
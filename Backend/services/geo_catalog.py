@@ -0,0 +1,252 @@
+"""
+Catálogo geográfico en memoria: países, provincias, cantones, ciudades y parroquias.
+
+Cada tabla se lee una vez y se guarda ya serializada (JSON en bytes) junto con su ETag, tanto
+la lista completa como los grupos por padre (provincias de un país, ciudades de una provincia...),
+así un GET no toca la base ni vuelve a serializar. El ETag es un hash del contenido: todos los
+workers calculan el mismo para los mismos datos.
+
+Los endpoints create_* invalidan su catálogo en el proceso que atiende la escritura; en los
+demás workers el cambio se ve al vencer GEO_CATALOG_TTL_SECONDS.
+
+El árbol país → provincia → cantón/ciudad → parroquia (GET /api/v1/geo/tree) se arma en una
+pasada sobre esos mismos catálogos y se memoiza mientras no cambie ninguno. Las respuestas
+grandes guardan además su versión comprimida (gzip y, si está instalado `brotli`, br).
+"""
+import gzip
+import hashlib
+import json
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from pydantic import TypeAdapter
+from sqlalchemy.orm import Session
+
+try:
+    import brotli
+except ImportError:  # pip install brotli para servir Content-Encoding: br
+    brotli = None
+
+from core.config import settings
+from core.database import AsyncDb
+from models.canton import Canton
+from models.city import City
+from models.country import Country
+from models.parish import Parish
+from models.province import Province
+from schemas.canton import CantonRead
+from schemas.city import CityRead
+from schemas.country import CountryRead
+from schemas.parish import ParishRead
+from schemas.province import ProvinceRead
+
+
+@dataclass(frozen=True)
+class CatalogSpec:
+    model: Any
+    schema: Any
+    # Columna para filtrar por padre (?country_id=, ?province_id=, ?canton_id=)
+    parent_field: Optional[str] = None
+
+
+CATALOGS: Dict[str, CatalogSpec] = {
+    'countries': CatalogSpec(Country, CountryRead),
+    'provinces': CatalogSpec(Province, ProvinceRead, 'country_id'),
+    'cantons': CatalogSpec(Canton, CantonRead, 'province_id'),
+    'cities': CatalogSpec(City, CityRead, 'province_id'),
+    'parishes': CatalogSpec(Parish, ParishRead, 'canton_id'),
+}
+
+
+# Por debajo de este tamaño comprimir no compensa (cabe en un paquete igual)
+MIN_COMPRESS_BYTES = 1024
+
+
+def supported_encodings() -> List[str]:
+    """Codificaciones disponibles, en orden de preferencia."""
+    return ['br', 'gzip'] if brotli is not None else ['gzip']
+
+
+@dataclass
+class CatalogPayload:
+    body: bytes
+    etag: str
+    # Cuerpo comprimido por codificación, calculado en el primer uso
+    _compressed: Dict[str, bytes] = field(default_factory=dict, repr=False)
+
+    def encoded(self, encoding: str) -> bytes:
+        body = self._compressed.get(encoding)
+        if body is None:
+            if encoding == 'br':
+                body = brotli.compress(self.body, quality=11)
+            else:
+                # mtime=0: mismo resultado en todos los workers
+                body = gzip.compress(self.body, compresslevel=9, mtime=0)
+            self._compressed[encoding] = body
+        return body
+
+    def encoded_etag(self, encoding: str) -> str:
+        # Cada representación lleva su propio ETag fuerte
+        return self.etag[:-1] + '-' + encoding + '"'
+
+
+def _etag(body: bytes) -> str:
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+
+def _payload(adapter: TypeAdapter, items: List[Any]) -> CatalogPayload:
+    body = adapter.dump_json(items)
+    return CatalogPayload(body, _etag(body))
+
+
+def _json_payload(data: Any) -> CatalogPayload:
+    body = json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    return CatalogPayload(body, _etag(body))
+
+
+class CatalogSnapshot:
+    """Un catálogo serializado: lista completa y grupos por padre."""
+
+    def __init__(self, spec: CatalogSpec, items: List[Any]):
+        adapter = TypeAdapter(List[spec.schema])
+        self.loaded_at = time.monotonic()
+        self.items = items
+        self.count = len(items)
+        self.all = _payload(adapter, items)
+        self.empty = _payload(adapter, [])
+        self.by_parent: Dict[int, CatalogPayload] = {}
+        if spec.parent_field:
+            groups: Dict[int, List[Any]] = {}
+            for item in items:
+                groups.setdefault(getattr(item, spec.parent_field), []).append(item)
+            self.by_parent = {parent_id: _payload(adapter, group) for parent_id, group in groups.items()}
+
+    def payload(self, parent_id: Optional[int] = None) -> CatalogPayload:
+        if parent_id is None:
+            return self.all
+        return self.by_parent.get(parent_id, self.empty)
+
+
+def _nodes(items: List[Any], parent_field: str) -> Dict[int, List[Dict[str, Any]]]:
+    """{id del padre: [{id, name}, ...]} respetando el orden por nombre de la carga."""
+    groups: Dict[int, List[Dict[str, Any]]] = {}
+    for item in items:
+        groups.setdefault(getattr(item, parent_field), []).append({'id': item.id, 'name': item.name})
+    return groups
+
+
+class GeoTree:
+    """Árbol compacto (solo ids y nombres) armado con los catálogos de un momento dado."""
+
+    def __init__(self, snapshots: Dict[str, CatalogSnapshot]):
+        self.snapshots = snapshots
+        parishes = _nodes(snapshots['parishes'].items, 'canton_id')
+        cities = _nodes(snapshots['cities'].items, 'province_id')
+        cantons = _nodes(snapshots['cantons'].items, 'province_id')
+        for canton_list in cantons.values():
+            for canton in canton_list:
+                canton['parishes'] = parishes.get(canton['id'], [])
+        provinces = _nodes(snapshots['provinces'].items, 'country_id')
+        for province_list in provinces.values():
+            for province in province_list:
+                province['cantons'] = cantons.get(province['id'], [])
+                province['cities'] = cities.get(province['id'], [])
+        self.countries = {
+            country.id: {'id': country.id, 'name': country.name, 'provinces': provinces.get(country.id, [])}
+            for country in snapshots['countries'].items
+        }
+        self._payloads: Dict[Optional[int], CatalogPayload] = {}
+        self._lock = threading.Lock()
+
+    def is_current(self, snapshots: Dict[str, CatalogSnapshot]) -> bool:
+        return all(snapshots[name] is self.snapshots[name] for name in CATALOGS)
+
+    def payload(self, country_id: Optional[int] = None) -> Optional[CatalogPayload]:
+        """Árbol completo o el subárbol de un país (None si el país no existe)."""
+        if country_id is not None and country_id not in self.countries:
+            return None
+        payload = self._payloads.get(country_id)
+        if payload is None:
+            countries = list(self.countries.values()) if country_id is None else [self.countries[country_id]]
+            payload = _json_payload({'countries': countries})
+            with self._lock:
+                payload = self._payloads.setdefault(country_id, payload)
+        return payload
+
+
+class GeoCatalog:
+    def __init__(self, ttl_seconds: float = 3600):
+        self.ttl_seconds = ttl_seconds
+        self._snapshots: Dict[str, CatalogSnapshot] = {}
+        # Se incrementa al invalidar: una carga que empezó antes no pisa la invalidación
+        self._generations: Dict[str, int] = {name: 0 for name in CATALOGS}
+        self._lock = threading.Lock()
+        self._tree: Optional[GeoTree] = None
+        self.loads = 0
+
+    def cached(self, name: str) -> Optional[CatalogSnapshot]:
+        snapshot = self._snapshots.get(name)
+        if snapshot is None:
+            return None
+        if self.ttl_seconds and time.monotonic() - snapshot.loaded_at > self.ttl_seconds:
+            return None
+        return snapshot
+
+    def load(self, db: Session, name: str) -> CatalogSnapshot:
+        """Lee la tabla ordenada por nombre y la deja serializada en memoria."""
+        spec = CATALOGS[name]
+        generation = self._generations[name]
+        rows = db.query(spec.model).order_by(spec.model.name, spec.model.id).all()
+        snapshot = CatalogSnapshot(spec, [spec.schema.model_validate(row) for row in rows])
+        with self._lock:
+            self.loads += 1
+            if self._generations[name] == generation:
+                self._snapshots[name] = snapshot
+        return snapshot
+
+    async def get(self, name: str) -> CatalogSnapshot:
+        """Catálogo en memoria; lo carga (sesión async o threadpool) si falta o venció."""
+        snapshot = self.cached(name)
+        if snapshot is not None:
+            return snapshot
+        db = AsyncDb()
+        try:
+            return await db.run(self.load, name)
+        finally:
+            await db.close()
+
+    async def tree(self) -> GeoTree:
+        """Árbol memoizado; se vuelve a armar cuando se recarga cualquiera de los catálogos."""
+        snapshots = {name: await self.get(name) for name in CATALOGS}
+        tree = self._tree
+        if tree is None or not tree.is_current(snapshots):
+            tree = self._tree = GeoTree(snapshots)
+        return tree
+
+    def invalidate(self, name: Optional[str] = None) -> None:
+        with self._lock:
+            for catalog in [name] if name else list(CATALOGS):
+                self._generations[catalog] += 1
+                self._snapshots.pop(catalog, None)
+
+    def status(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        return {
+            'ttl_seconds': self.ttl_seconds,
+            'loads': self.loads,
+            'encodings': supported_encodings(),
+            'catalogs': {
+                name: {
+                    'rows': snapshot.count,
+                    'bytes': len(snapshot.all.body),
+                    'etag': snapshot.all.etag,
+                    'age_seconds': round(now - snapshot.loaded_at, 1),
+                }
+                for name, snapshot in list(self._snapshots.items())
+            },
+        }
+
+
+geo_catalog = GeoCatalog(ttl_seconds=settings.geo_catalog_ttl_seconds)
@@ -2,30 +2,60 @@
 Servicio de recomendaciones con OpenAI GPT.
 Genera recomendaciones personalizadas basadas en el análisis de licitación y probabilidad de ganar.
 """
+import logging
 import os
-from typing import Optional
+import time
+from typing import Iterator, Optional
 from dotenv import load_dotenv
 
+from core.metrics import observe_openai
+from services.recommendation_cache import recommendation_cache, build_cache_key
+
+logger = logging.getLogger(__name__)
+
 # Cargar variables de entorno
 load_dotenv()
 
+# Modelo usado para las recomendaciones (forma parte de la clave de caché)
+RECOMMENDATION_MODEL = "gpt-4o-mini"
+
 # Inicializar cliente OpenAI solo si la API key está disponible
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+OPENAI_FAKE_CLIENT = os.getenv("OPENAI_FAKE_CLIENT", "").lower() in ("1", "true", "yes")
 client = None
 
-if OPENAI_API_KEY:
+if OPENAI_FAKE_CLIENT:
+    from services.fake_openai import FakeOpenAI
+    client = FakeOpenAI()
+    logger.info("Usando cliente falso de OpenAI (OPENAI_FAKE_CLIENT)")
+elif OPENAI_API_KEY:
     try:
         from openai import OpenAI
         client = OpenAI(api_key=OPENAI_API_KEY)
-        print(f"✅ OpenAI client inicializado correctamente")
+        logger.info("OpenAI client inicializado correctamente")
     except Exception as e:
-        print(f"⚠️  Warning: No se pudo inicializar OpenAI client: {e}")
+        logger.warning("No se pudo inicializar OpenAI client: %s", e)
         client = None
 else:
-    print(f"⚠️  Warning: OPENAI_API_KEY no encontrada en variables de entorno")
+    logger.warning("OPENAI_API_KEY no encontrada en variables de entorno")
 
 
-def generate_recommendation(
+SYSTEM_PROMPT = "Eres un experto consultor en contratación pública ecuatoriana con amplia experiencia en SERCOP. Proporcionas análisis claros, profesionales y basados en datos."
+
+
+def _competitiveness_level(probability_percent: float) -> str:
+    """Nivel de competitividad según la probabilidad de ganar (en porcentaje)."""
+    if probability_percent >= 70:
+        return "ALTA (muy favorable)"
+    elif probability_percent >= 50:
+        return "MEDIA-ALTA (favorable)"
+    elif probability_percent >= 30:
+        return "MEDIA (competitiva)"
+    else:
+        return "BAJA (muy competitiva)"
+
+
+def build_recommendation_prompt(
     tender_title: str,
     tender_description: str,
     main_category: str,
@@ -39,39 +69,10 @@ def generate_recommendation(
     bid_amount: float,
     predicted_probability: float
 ) -> str:
-    """
-    Genera una recomendación personalizada usando GPT-4 basada en los datos de la licitación,
-    la empresa y la probabilidad de ganar.
-    
-    Args:
-        tender_title: Título de la licitación
-        tender_description: Descripción completa
-        main_category: Categoría (Bienes, Obras, Servicios)
-        budget_amount: Presupuesto total en USD
-        buyer_name: Nombre de la entidad compradora
-        eligibility_criteria: Criterios de elegibilidad
-        number_of_tenderers: Número de participantes
-        company_name: Nombre de la empresa que participa
-        company_sector: Sector de la empresa (opcional)
-        company_size: Tamaño de la empresa (opcional)
-        bid_amount: Monto de la oferta presentada
-        predicted_probability: Probabilidad de ganar calculada por CatBoost (0.0 a 1.0)
-    
-    Returns:
-        str: Recomendación generada por GPT
-    """
+    """Construye el prompt de usuario para la recomendación de una oferta."""
     # Formatear probabilidad como porcentaje
     probability_percent = predicted_probability * 100
-    
-    # Determinar nivel de competitividad
-    if probability_percent >= 70:
-        competitiveness = "ALTA (muy favorable)"
-    elif probability_percent >= 50:
-        competitiveness = "MEDIA-ALTA (favorable)"
-    elif probability_percent >= 30:
-        competitiveness = "MEDIA (competitiva)"
-    else:
-        competitiveness = "BAJA (muy competitiva)"
+    competitiveness = _competitiveness_level(probability_percent)
     
     # Calcular diferencia entre oferta y presupuesto
     price_difference_percent = ((budget_amount - bid_amount) / budget_amount) * 100
@@ -116,19 +117,94 @@ Proporciona una recomendación estructurada con los siguientes apartados:
 5. **Recomendación Final**: Conclusión clara (Participar/Reconsiderar/No participar) con 2-3 acciones concretas.
 
 Sé conciso (máximo 400 palabras), profesional y práctico. Usa datos específicos del análisis."""
+    return prompt
+
 
+def generate_recommendation(
+    tender_title: str,
+    tender_description: str,
+    main_category: str,
+    budget_amount: float,
+    buyer_name: str,
+    eligibility_criteria: str,
+    number_of_tenderers: int,
+    company_name: str,
+    company_sector: Optional[str],
+    company_size: Optional[str],
+    bid_amount: float,
+    predicted_probability: float,
+    tender_key: Optional[str] = None,
+    use_cache: bool = True,
+    fallback_on_error: bool = True
+) -> str:
+    """
+    Genera una recomendación personalizada usando GPT-4 basada en los datos de la licitación,
+    la empresa y la probabilidad de ganar.
+    
+    Las respuestas exitosas de OpenAI se guardan en la caché de recomendaciones; los
+    textos de respaldo (sin cliente o con error) no se cachean.
+    
+    Args:
+        tender_title: Título de la licitación
+        tender_description: Descripción completa
+        main_category: Categoría (Bienes, Obras, Servicios)
+        budget_amount: Presupuesto total en USD
+        buyer_name: Nombre de la entidad compradora
+        eligibility_criteria: Criterios de elegibilidad
+        number_of_tenderers: Número de participantes
+        company_name: Nombre de la empresa que participa
+        company_sector: Sector de la empresa (opcional)
+        company_size: Tamaño de la empresa (opcional)
+        bid_amount: Monto de la oferta presentada
+        predicted_probability: Probabilidad de ganar calculada por CatBoost (0.0 a 1.0)
+        tender_key: Identificador de la licitación, para invalidar su caché
+        use_cache: Si es False se consulta siempre a OpenAI
+        fallback_on_error: Si es False, un error de OpenAI se relanza en lugar de devolver
+            el análisis automático (la cola de trabajos lo registra como fallido)
+    
+    Returns:
+        str: Recomendación generada por GPT
+    """
+    inputs = dict(
+        tender_title=tender_title,
+        tender_description=tender_description,
+        main_category=main_category,
+        budget_amount=budget_amount,
+        buyer_name=buyer_name,
+        eligibility_criteria=eligibility_criteria,
+        number_of_tenderers=number_of_tenderers,
+        company_name=company_name,
+        company_sector=company_sector,
+        company_size=company_size,
+        bid_amount=bid_amount,
+        predicted_probability=predicted_probability
+    )
+    
+    cache_key = build_cache_key(model=RECOMMENDATION_MODEL, **inputs) if use_cache else None
+    if cache_key is not None:
+        cached = recommendation_cache.get(cache_key, tender_key=tender_key, model=RECOMMENDATION_MODEL)
+        if cached is not None:
+            return cached
+    
+    # Formatear probabilidad como porcentaje
+    probability_percent = predicted_probability * 100
+    
+    competitiveness = _competitiveness_level(probability_percent)
+    prompt = build_recommendation_prompt(**inputs)
+    
     # Si no hay cliente OpenAI configurado, usar recomendación rápida
     if not client:
         return generate_quick_recommendation(predicted_probability, number_of_tenderers)
     
+    started = time.perf_counter()
     try:
         # Llamar a la API de OpenAI
         response = client.chat.completions.create(
-            model="gpt-4o-mini",  # Usar GPT-4o-mini (más barato, tier gratuito)
+            model=RECOMMENDATION_MODEL,  # Usar GPT-4o-mini (más barato, tier gratuito)
             messages=[
                 {
                     "role": "system",
-                    "content": "Eres un experto consultor en contratación pública ecuatoriana con amplia experiencia en SERCOP. Proporcionas análisis claros, profesionales y basados en datos."
+                    "content": SYSTEM_PROMPT
                 },
                 {
                     "role": "user",
@@ -138,13 +214,21 @@ Sé conciso (máximo 400 palabras), profesional y práctico. Usa datos específi
             temperature=0.7,  # Balance entre creatividad y precisión
             max_tokens=800,   # Limitar respuesta a ~400 palabras
         )
+        observe_openai("recommendation", time.perf_counter() - started, usage=getattr(response, "usage", None))
         
         # Extraer recomendación
         recommendation = response.choices[0].message.content
         
+        if cache_key is not None and recommendation:
+            recommendation_cache.set(cache_key, recommendation, tender_key=tender_key, model=RECOMMENDATION_MODEL)
+        
         return recommendation
     
     except Exception as e:
+        observe_openai("recommendation", time.perf_counter() - started, error=e)
+        if not fallback_on_error:
+            raise
+        logger.warning("Error de OpenAI, se usa recomendación automática: %s", e, extra={"tender_key": tender_key})
         # En caso de error, devolver mensaje genérico basado en probabilidad
         if probability_percent >= 50:
             fallback = f"""**ANÁLISIS AUTOMÁTICO (API no disponible)**
@@ -170,6 +254,94 @@ Su oferta de ${bid_amount:,.2f} USD presenta una probabilidad moderada-baja de a
         return fallback
 
 
+def stream_recommendation(
+    tender_title: str,
+    tender_description: str,
+    main_category: str,
+    budget_amount: float,
+    buyer_name: str,
+    eligibility_criteria: str,
+    number_of_tenderers: int,
+    company_name: str,
+    company_sector: Optional[str],
+    company_size: Optional[str],
+    bid_amount: float,
+    predicted_probability: float,
+    tender_key: Optional[str] = None,
+    use_cache: bool = True
+) -> Iterator[str]:
+    """
+    Variante en streaming de generate_recommendation: produce los fragmentos de texto
+    a medida que llegan de OpenAI (stream=True).
+    
+    Si la recomendación está en caché se emite completa en un solo fragmento. A diferencia
+    de generate_recommendation, los errores se propagan para que el llamador decida el
+    respaldo (el stream puede haber emitido ya parte del texto).
+    
+    Raises:
+        RuntimeError: Si no hay cliente OpenAI configurado
+        Exception: Cualquier error de la API de OpenAI
+    """
+    inputs = dict(
+        tender_title=tender_title,
+        tender_description=tender_description,
+        main_category=main_category,
+        budget_amount=budget_amount,
+        buyer_name=buyer_name,
+        eligibility_criteria=eligibility_criteria,
+        number_of_tenderers=number_of_tenderers,
+        company_name=company_name,
+        company_sector=company_sector,
+        company_size=company_size,
+        bid_amount=bid_amount,
+        predicted_probability=predicted_probability
+    )
+    
+    cache_key = build_cache_key(model=RECOMMENDATION_MODEL, **inputs) if use_cache else None
+    if cache_key is not None:
+        cached = recommendation_cache.get(cache_key, tender_key=tender_key, model=RECOMMENDATION_MODEL)
+        if cached is not None:
+            yield cached
+            return
+    
+    if not client:
+        raise RuntimeError("Cliente OpenAI no configurado")
+    
+    started = time.perf_counter()
+    usage = None
+    parts = []
+    try:
+        stream = client.chat.completions.create(
+            model=RECOMMENDATION_MODEL,
+            messages=[
+                {"role": "system", "content": SYSTEM_PROMPT},
+                {"role": "user", "content": build_recommendation_prompt(**inputs)}
+            ],
+            temperature=0.7,
+            max_tokens=800,
+            stream=True,
+            # El último fragmento (sin choices) trae el consumo de tokens
+            stream_options={"include_usage": True},
+        )
+        
+        for chunk in stream:
+            usage = getattr(chunk, "usage", None) or usage
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if delta:
+                parts.append(delta)
+                yield delta
+    except Exception as e:
+        observe_openai("recommendation_stream", time.perf_counter() - started, usage=usage, error=e)
+        raise
+    observe_openai("recommendation_stream", time.perf_counter() - started, usage=usage)
+    
+    # Solo se cachea una respuesta completa
+    if cache_key is not None and parts:
+        recommendation_cache.set(cache_key, "".join(parts), tender_key=tender_key, model=RECOMMENDATION_MODEL)
+
+
 def generate_quick_recommendation(predicted_probability: float, number_of_tenderers: int) -> str:
     """
     Genera una recomendación rápida y simple basada solo en probabilidad y competencia.
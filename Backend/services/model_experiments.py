@@ -0,0 +1,402 @@
+"""
+Evaluación de modelos en producción: shadow y challenger (A/B).
+
+- Shadow: las versiones de SHADOW_MODEL_VERSIONS puntúan el mismo vector de
+  características fuera del camino de la petición (un hilo de fondo con cola acotada;
+  si la cola se llena se descarta el trabajo y se cuenta, nunca se bloquea al cliente).
+- Challenger: un porcentaje estable de empresas (hash de company_id) recibe la
+  predicción de CHALLENGER_MODEL_VERSION; la versión usada queda en Participation.model_version.
+- Registro: JSON Lines de solo anexar (PREDICTION_LOG_PATH), una línea compacta por
+  predicción, más una línea de enlace {rid, pid} cuando la predicción se guarda como
+  participación. `python -m training report` compara calibración y latencia.
+
+Formato de cada línea:
+    {"t": epoch, "rid": id de la petición, "r": champion|challenger|shadow, "m": versión,
+     "p": probabilidad, "ms": latencia del modelo, "c": company_id, "x": características}
+    {"t": epoch, "rid": ..., "pid": participation_id}
+"""
+import hashlib
+import json
+import queue
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from core.config import settings
+from services.model_manager import model_manager
+
+
+ROLE_CHAMPION = "champion"
+ROLE_CHALLENGER = "challenger"
+ROLE_SHADOW = "shadow"
+
+SHADOW_RETRY_SECONDS = 60.0
+
+DEFAULT_LOG_PATH = Path(__file__).resolve().parent.parent / "prediction_log.jsonl"
+
+
+def _parse_versions(value: Optional[str]) -> List[str]:
+    return [version.strip() for version in (value or "").split(",") if version.strip()]
+
+
+def challenger_bucket(company_id: int, version: str) -> float:
+    """Posición estable de la empresa en [0, 100) para la versión dada."""
+    digest = hashlib.sha1(f"{version}:{company_id}".encode()).hexdigest()
+    return int(digest[:8], 16) % 10000 / 100
+
+
+@dataclass
+class ExperimentStats:
+    logged: int = 0
+    shadow_scored: int = 0
+    shadow_errors: int = 0
+    dropped: int = 0
+    write_errors: int = 0
+    last_error: Optional[str] = None
+
+
+@dataclass
+class ExperimentConfig:
+    shadow_versions: List[str] = field(default_factory=list)
+    challenger_version: Optional[str] = None
+    challenger_percent: float = 0.0
+    log_path: Optional[str] = None
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.shadow_versions or self.log_path or
+                    (self.challenger_version and self.challenger_percent > 0))
+
+    @classmethod
+    def from_settings(cls) -> "ExperimentConfig":
+        config = cls(
+            shadow_versions=_parse_versions(settings.shadow_model_versions),
+            challenger_version=settings.challenger_model_version or None,
+            challenger_percent=min(max(settings.challenger_traffic_percent, 0.0), 100.0),
+            log_path=settings.prediction_log_path,
+        )
+        if config.enabled and not config.log_path:
+            config.log_path = str(DEFAULT_LOG_PATH)
+        return config
+
+
+class ModelExperiments:
+    """
+    Un único hilo de fondo puntúa los shadows y escribe el registro, así el archivo
+    tiene un solo escritor y las líneas nunca se intercalan.
+    """
+
+    def __init__(self, config: Optional[ExperimentConfig] = None, max_pending: int = 10000):
+        self._config = config
+        self.max_pending = max_pending
+        self.stats = ExperimentStats()
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_pending)
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        # Versiones shadow que fallaron al cargar: no se reintentan hasta pasado SHADOW_RETRY_SECONDS
+        self._failed_until: Dict[str, float] = {}
+
+    @property
+    def config(self) -> ExperimentConfig:
+        if self._config is None:
+            self._config = ExperimentConfig.from_settings()
+        return self._config
+
+    def configure(self, config: ExperimentConfig) -> None:
+        self.flush()
+        self._config = config
+
+    @property
+    def enabled(self) -> bool:
+        return self.config.enabled
+
+    # ------------------------------------------------------------------
+    # Camino de la petición (solo operaciones baratas)
+    # ------------------------------------------------------------------
+
+    def challenger_for(self, company_id: Optional[int]) -> Optional[str]:
+        """Versión challenger asignada a la empresa, o None si le toca el champion."""
+        config = self.config
+        if company_id is None or not config.challenger_version or config.challenger_percent <= 0:
+            return None
+        if challenger_bucket(company_id, config.challenger_version) < config.challenger_percent:
+            return config.challenger_version
+        return None
+
+    def observe(
+        self,
+        role: str,
+        version: str,
+        probability: float,
+        latency_ms: float,
+        raw_features: Sequence[Any],
+        company_id: Optional[int] = None,
+    ) -> Optional[str]:
+        """
+        Registra la predicción servida y encola los shadows.
+
+        Returns:
+            Id de la petición (para enlazarla luego con la participación) o None si está deshabilitado
+        """
+        if not self.enabled:
+            return None
+        rid = uuid.uuid4().hex[:16]
+        features = list(raw_features)
+        self._put(("log", {
+            "t": round(time.time(), 3), "rid": rid, "r": role, "m": version,
+            "p": round(probability, 6), "ms": round(latency_ms, 3), "c": company_id, "x": features,
+        }))
+        for shadow in self.config.shadow_versions:
+            if shadow != version:
+                self._put(("shadow", (rid, shadow, features, company_id)))
+        return rid
+
+    def link(self, rid: Optional[str], participation_id: int) -> None:
+        """Asocia la predicción con la participación guardada (para cruzar con el resultado)."""
+        if rid:
+            self._put(("log", {"t": round(time.time(), 3), "rid": rid, "pid": participation_id}))
+
+    def _put(self, item) -> None:
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            self.stats.dropped += 1
+
+    # ------------------------------------------------------------------
+    # Hilo de fondo
+    # ------------------------------------------------------------------
+
+    def _ensure_started(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="model-experiments", daemon=True)
+                self._thread.start()
+
+    def _score_shadow(self, version: str, raw_features: Sequence[Any]) -> Dict[str, float]:
+        loaded = model_manager.get_version(version)
+        features = list(raw_features)
+        features[1] = loaded.category_map[features[1]]
+        started = time.perf_counter()
+        probability = float(loaded.model.predict_proba(loaded.select_features(features))[0][1])
+        return {"p": probability, "ms": (time.perf_counter() - started) * 1000}
+
+    def _run(self) -> None:
+        fp = None
+        while True:
+            item = self._queue.get()
+            try:
+                kind, payload = item
+                if kind == "shadow":
+                    rid, version, features, company_id = payload
+                    if self._failed_until.get(version, 0) > time.monotonic():
+                        self.stats.shadow_errors += 1
+                        continue
+                    try:
+                        scored = self._score_shadow(version, features)
+                    except Exception as e:
+                        self._failed_until[version] = time.monotonic() + SHADOW_RETRY_SECONDS
+                        self.stats.shadow_errors += 1
+                        self.stats.last_error = f"{version}: {e}"
+                        continue
+                    self.stats.shadow_scored += 1
+                    payload = {
+                        "t": round(time.time(), 3), "rid": rid, "r": ROLE_SHADOW, "m": version,
+                        "p": round(scored["p"], 6), "ms": round(scored["ms"], 3), "c": company_id, "x": features,
+                    }
+                if kind in ("log", "shadow"):
+                    try:
+                        if fp is None:
+                            path = Path(self.config.log_path)
+                            path.parent.mkdir(parents=True, exist_ok=True)
+                            fp = open(path, "a", encoding="utf-8")
+                        fp.write(json.dumps(payload, separators=(",", ":")) + "\n")
+                        if "r" in payload:
+                            self.stats.logged += 1
+                    except OSError as e:
+                        self.stats.write_errors += 1
+                        self.stats.last_error = str(e)
+                # Vaciar a disco cuando no queda trabajo pendiente (escrituras agrupadas)
+                if fp is not None and (kind == "flush" or self._queue.empty()):
+                    fp.flush()
+                if kind == "flush":
+                    fp_close, fp = fp, None
+                    if fp_close is not None:
+                        fp_close.close()
+                    payload.set()
+            finally:
+                self._queue.task_done()
+
+    def flush(self, timeout: float = 10.0) -> bool:
+        """Espera a que se procese lo encolado y cierra el archivo (p. ej. al apagar)."""
+        if self._thread is None or not self._thread.is_alive():
+            return True
+        done = threading.Event()
+        try:
+            self._queue.put(("flush", done), timeout=timeout)
+        except queue.Full:
+            return False
+        return done.wait(timeout)
+
+    def status(self) -> Dict[str, Any]:
+        config = self.config
+        stats = self.stats
+        return {
+            "enabled": config.enabled,
+            "shadow_versions": config.shadow_versions,
+            "challenger_version": config.challenger_version,
+            "challenger_traffic_percent": config.challenger_percent,
+            "log_path": config.log_path,
+            "pending": self._queue.qsize(),
+            "logged": stats.logged,
+            "shadow_scored": stats.shadow_scored,
+            "shadow_errors": stats.shadow_errors,
+            "dropped": stats.dropped,
+            "write_errors": stats.write_errors,
+            "last_error": stats.last_error,
+        }
+
+
+model_experiments = ModelExperiments()
+
+
+# ----------------------------------------------------------------------
+# Reporte
+# ----------------------------------------------------------------------
+
+def read_log(path) -> Iterable[Dict[str, Any]]:
+    """Lee el registro tolerando una última línea a medias."""
+    with open(path, encoding="utf-8") as fp:
+        for line in fp:
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                continue
+
+
+def _calibration(probabilities: np.ndarray, outcomes: np.ndarray, bins: int) -> Dict[str, Any]:
+    edges = np.linspace(0.0, 1.0, bins + 1)
+    indices = np.clip(np.digitize(probabilities, edges[1:-1]), 0, bins - 1)
+    buckets = []
+    ece = 0.0
+    for index in range(bins):
+        mask = indices == index
+        count = int(mask.sum())
+        if not count:
+            continue
+        predicted = float(probabilities[mask].mean())
+        observed = float(outcomes[mask].mean())
+        ece += count / len(probabilities) * abs(predicted - observed)
+        buckets.append({
+            "range": [round(float(edges[index]), 2), round(float(edges[index + 1]), 2)],
+            "count": count, "predicted": round(predicted, 4), "observed": round(observed, 4),
+        })
+    clipped = np.clip(probabilities, 1e-15, 1 - 1e-15)
+    return {
+        "rows": int(len(probabilities)),
+        "brier": round(float(np.mean((probabilities - outcomes) ** 2)), 6),
+        "logloss": round(float(-np.mean(outcomes * np.log(clipped) + (1 - outcomes) * np.log(1 - clipped))), 6),
+        "ece": round(ece, 6),
+        "buckets": buckets,
+    }
+
+
+def build_report(
+    entries: Iterable[Dict[str, Any]],
+    outcomes: Optional[Dict[int, int]] = None,
+    bins: int = 10,
+) -> Dict[str, Any]:
+    """
+    Compara por versión y rol (champion, challenger, shadow; una versión puede ser challenger
+    y shadow a la vez y se reporta por separado): latencia (p50/p95/p99), probabilidad media,
+    diferencia de los shadows con lo servido en las mismas peticiones y, si hay resultados
+    (participation_id → 0/1), calibración (Brier, logloss, ECE y buckets).
+
+    Las claves del reporte son "versión:rol".
+    """
+    links: Dict[str, int] = {}
+    by_key: Dict[Tuple[str, str], Dict[str, list]] = {}
+    served: Dict[str, float] = {}
+    for entry in entries:
+        if "pid" in entry:
+            links[entry["rid"]] = entry["pid"]
+            continue
+        data = by_key.setdefault((entry["m"], entry["r"]), {"rid": [], "p": [], "ms": []})
+        data["rid"].append(entry["rid"])
+        data["p"].append(entry["p"])
+        data["ms"].append(entry["ms"])
+        if entry["r"] != ROLE_SHADOW:
+            served[entry["rid"]] = entry["p"]
+
+    report: Dict[str, Any] = {}
+    for (version, role), data in sorted(by_key.items()):
+        probabilities = np.asarray(data["p"], dtype=np.float64)
+        latencies = np.asarray(data["ms"], dtype=np.float64)
+        row: Dict[str, Any] = {
+            "version": version,
+            "role": role,
+            "predictions": int(len(probabilities)),
+            "mean_probability": round(float(probabilities.mean()), 6),
+            "latency_ms": {
+                "p50": round(float(np.percentile(latencies, 50)), 3),
+                "p95": round(float(np.percentile(latencies, 95)), 3),
+                "p99": round(float(np.percentile(latencies, 99)), 3),
+                "max": round(float(latencies.max()), 3),
+            },
+        }
+
+        # Predicciones shadow contra lo que se sirvió en la misma petición
+        paired = [
+            (p, served[rid])
+            for rid, p in zip(data["rid"], probabilities)
+            if role == ROLE_SHADOW and rid in served
+        ]
+        if paired:
+            own, reference = np.asarray(paired).T
+            row["vs_served"] = {
+                "pairs": len(paired),
+                "mean_abs_diff": round(float(np.mean(np.abs(own - reference))), 6),
+                "agreement_at_0_5": round(float(np.mean((own >= 0.5) == (reference >= 0.5))), 4),
+            }
+
+        if outcomes:
+            labelled = [
+                (p, outcomes[links[rid]])
+                for rid, p in zip(data["rid"], probabilities)
+                if rid in links and links[rid] in outcomes
+            ]
+            if labelled:
+                predicted, observed = np.asarray(labelled, dtype=np.float64).T
+                row["calibration"] = _calibration(predicted, observed, bins)
+        report[f"{version}:{role}"] = row
+    return report
+
+
+def load_outcomes(db) -> Dict[int, int]:
+    """
+    Resultado conocido de cada participación: 1 si ganó, 0 si perdió.
+    Ganó si es la ganadora de la licitación o su estado es 'awarded'; perdió si la licitación
+    tiene otra ganadora o su estado es 'rejected'. Las pendientes no se incluyen.
+    """
+    from models.participation import Participation
+    from models.tender import Tender
+
+    rows = (
+        db.query(Participation.id, Participation.participation_status, Tender.winning_participation_id)
+        .join(Tender, Tender.id == Participation.tender_id)
+        .all()
+    )
+    outcomes: Dict[int, int] = {}
+    for participation_id, status, winning_id in rows:
+        if winning_id == participation_id or status == "awarded":
+            outcomes[participation_id] = 1
+        elif winning_id is not None or status == "rejected":
+            outcomes[participation_id] = 0
+    return outcomes
@@ -0,0 +1,456 @@
+"""
+Carga perezosa y recarga en caliente del modelo CatBoost.
+
+- El modelo se carga en la primera predicción (no al importar), así los procesos que
+  nunca predicen no pagan el coste de importar CatBoost ni de leer el .cbm.
+- `reload` carga la versión activa del registro (o la pedida, que se activa solo si pasa
+  la validación) en segundo plano, la valida con un conjunto de humo y cambia la
+  referencia de forma atómica. Cada predicción toma la referencia una sola vez
+  (`current()`), por lo que las peticiones en curso terminan con el modelo anterior.
+  La carga perezosa de `current()` pasa por la misma validación.
+- Los servicios arman el vector completo INPUT_FEATURES y cada modelo recibe solo sus
+  columnas (`LoadedModel.select_features`), según los `features` de su manifiesto o, sin
+  manifiesto, los nombres guardados en el modelo. La validación exige que coincidan.
+- Opcionalmente un hilo vigila el registro (archivo ACTIVE y .cbm) y recarga al cambiar.
+- Con INFERENCE_BACKEND=numpy se carga la exportación .npz (services/tree_model.py) en lugar
+  del .cbm: predicciones individuales mucho más rápidas y el worker no importa catboost.
+  Si falta la exportación o no corresponde al .cbm actual, se usa CatBoost.
+"""
+import hashlib
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+from core.config import settings
+from training.registry import ModelRegistry, default_registry
+
+logger = logging.getLogger(__name__)
+
+
+# Modelo heredado del notebook, usado si el registro no tiene versión activa
+LEGACY_MODEL_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'catboost_model.cbm')
+LEGACY_MODEL_VERSION = 'catboost_v1'
+
+BACKEND_CATBOOST = 'catboost'
+BACKEND_NUMPY = 'numpy'
+
+DEFAULT_CATEGORY_MAP = {
+    'Bienes': 0,
+    'Obras': 1,
+    'Servicios': 2
+}
+
+# Columnas del vector de entrada que arman los servicios, en este orden
+INPUT_FEATURES = (
+    'NumberOfTenderers',
+    'MainCategory',
+    'Budget',
+    'BidAmount',
+    'TenderDurationDays',
+    'ContractDurationDays',
+    'Winner',
+)
+
+# Conjunto de humo: mismos casos que test_prediction.py
+# [number_of_tenderers, main_category, budget, bid_amount, tender_duration_days, contract_duration_days, winner]
+SMOKE_CASES = [
+    (3, 'Servicios', 100000.0, 85000.0, 28, 365, 0),
+    (12, 'Obras', 2965076.05, 2900000.0, 28, 730, 0),
+    (1, 'Bienes', 50000.0, 35000.0, 15, 180, 0),
+]
+
+
+class ModelValidationError(RuntimeError):
+    """El modelo candidato no pasó la validación de humo."""
+
+
+@dataclass(frozen=True)
+class LoadedModel:
+    model: Any
+    version: str
+    path: str
+    manifest: Dict[str, Any]
+    category_map: Dict[str, int]
+    signature: Tuple
+    loaded_at: datetime
+    load_seconds: float
+    backend: str = BACKEND_CATBOOST
+    # Features del modelo en su orden y su posición en INPUT_FEATURES (vacío si alguna no existe)
+    features: Tuple[str, ...] = INPUT_FEATURES[:6]
+    feature_indices: Tuple[int, ...] = tuple(range(6))
+
+    def select_features(self, rows) -> np.ndarray:
+        """Matriz con las columnas del modelo a partir de filas con INPUT_FEATURES."""
+        matrix = np.asarray(rows, dtype=np.float64)
+        if matrix.ndim == 1:
+            matrix = matrix.reshape(1, -1)
+        return matrix[:, self.feature_indices]
+
+
+@dataclass
+class ModelMetrics:
+    loads: int = 0
+    swaps: int = 0
+    failures: int = 0
+    last_load_seconds: Optional[float] = None
+    last_validation_seconds: Optional[float] = None
+    last_swap_at: Optional[datetime] = None
+    last_error: Optional[str] = None
+    history: list = field(default_factory=list)
+
+
+def _file_sha256(path: str) -> str:
+    with open(path, 'rb') as fp:
+        return hashlib.sha256(fp.read()).hexdigest()
+
+
+def _category_map(manifest: Dict[str, Any]) -> Dict[str, int]:
+    """Codificación de categorías con la que se entrenó el modelo."""
+    classes = ((manifest.get('preprocessing') or {}).get('label_encoders') or {}).get('MainCategory')
+    if classes:
+        return {name: index for index, name in enumerate(classes)}
+    return dict(DEFAULT_CATEGORY_MAP)
+
+
+def _model_feature_names(model: Any) -> Tuple[str, ...]:
+    """Nombres guardados en el .cbm (feature_names_) o en la exportación .npz (feature_names)."""
+    names = getattr(model, 'feature_names_', None) or getattr(model, 'feature_names', None) or ()
+    return tuple(str(name) for name in names)
+
+
+def _model_features(manifest: Dict[str, Any], model: Any) -> Tuple[str, ...]:
+    """Features del manifiesto; sin manifiesto, los nombres del modelo (o posicionales)."""
+    if manifest.get('features'):
+        return tuple(manifest['features'])
+    names = _model_feature_names(model)
+    if names and all(name.isdigit() for name in names):
+        # Modelo entrenado sin nombres: columnas en el orden de INPUT_FEATURES
+        return INPUT_FEATURES[:len(names)]
+    return names or INPUT_FEATURES[:6]
+
+
+class ModelManager:
+    def __init__(
+        self,
+        registry: Optional[ModelRegistry] = None,
+        legacy_path: str = LEGACY_MODEL_PATH,
+        backend: Optional[str] = None,
+    ):
+        self._registry = registry
+        self.legacy_path = legacy_path
+        self._backend = backend
+        self._current: Optional[LoadedModel] = None
+        self._load_lock = threading.Lock()
+        self._reload_lock = threading.Lock()
+        self._reload_thread: Optional[threading.Thread] = None
+        self._watch_thread: Optional[threading.Thread] = None
+        self._watch_stop = threading.Event()
+        self.metrics = ModelMetrics()
+        # Versiones adicionales (challenger / shadow) cargadas bajo demanda
+        self._versions: Dict[str, LoadedModel] = {}
+        self._versions_lock = threading.Lock()
+
+    @property
+    def registry(self) -> ModelRegistry:
+        return self._registry or default_registry()
+
+    @property
+    def backend(self) -> str:
+        return (self._backend or settings.inference_backend or BACKEND_CATBOOST).lower()
+
+    @property
+    def loaded(self) -> bool:
+        return self._current is not None
+
+    # ------------------------------------------------------------------
+    # Resolución y carga
+    # ------------------------------------------------------------------
+
+    def _resolve(self, version: Optional[str] = None) -> Tuple[str, str, Dict[str, Any]]:
+        """(versión, ruta, manifiesto) de la versión pedida o de la que debería estar activa."""
+        registry = self.registry
+        version = version or registry.active_version()
+        if version and (version != LEGACY_MODEL_VERSION or registry.model_path(version).is_file()):
+            return version, self._artifact(str(registry.model_path(version))), registry.load_manifest(version)
+        return LEGACY_MODEL_VERSION, self._artifact(self.legacy_path), {}
+
+    def _artifact(self, cbm_path: str) -> str:
+        """Con el backend NumPy, la exportación .npz vigente junto al .cbm; si no, el .cbm."""
+        if self.backend != BACKEND_NUMPY:
+            return cbm_path
+        npz_path = os.path.splitext(cbm_path)[0] + '.npz'
+        if not os.path.isfile(npz_path):
+            logger.warning("No existe %s (python -m training export); se usa CatBoost", npz_path)
+            return cbm_path
+        return npz_path
+
+    @staticmethod
+    def _signature(version: str, path: str) -> Tuple:
+        stat = os.stat(path)
+        return version, path, stat.st_mtime_ns, stat.st_size
+
+    def _load(self, version: Optional[str] = None) -> LoadedModel:
+        version, path, manifest = self._resolve(version)
+        started = time.perf_counter()
+        backend = BACKEND_CATBOOST
+        model = None
+        if path.endswith('.npz'):
+            from services.tree_model import ObliviousTreeModel
+
+            model = ObliviousTreeModel.load(path)
+            cbm_path = path[:-len('.npz')] + '.cbm'
+            if os.path.isfile(cbm_path) and model.source_sha256 != _file_sha256(cbm_path):
+                logger.warning("%s no corresponde al .cbm actual (vuelve a exportar); se usa CatBoost", path)
+                model, path = None, cbm_path
+            else:
+                backend = BACKEND_NUMPY
+        if model is None:
+            from catboost import CatBoostClassifier
+
+            model = CatBoostClassifier()
+            model.load_model(path)
+        load_seconds = time.perf_counter() - started
+        features = _model_features(manifest, model)
+        return LoadedModel(
+            model=model,
+            version=version,
+            path=path,
+            manifest=manifest,
+            category_map=_category_map(manifest),
+            signature=self._signature(version, path),
+            loaded_at=datetime.now(timezone.utc),
+            load_seconds=load_seconds,
+            backend=backend,
+            features=features,
+            feature_indices=(
+                tuple(INPUT_FEATURES.index(name) for name in features)
+                if all(name in INPUT_FEATURES for name in features) else ()
+            ),
+        )
+
+    @staticmethod
+    def _check_features(candidate: LoadedModel) -> None:
+        """Las features del manifiesto existen en INPUT_FEATURES y coinciden con las del modelo."""
+        unknown = [name for name in candidate.features if name not in INPUT_FEATURES]
+        if unknown or not candidate.feature_indices:
+            raise ModelValidationError(
+                f"El modelo {candidate.version} usa features que el servicio no calcula: {', '.join(unknown)}"
+            )
+        names = _model_feature_names(candidate.model)
+        if names and not all(name.isdigit() for name in names) and names != candidate.features:
+            raise ModelValidationError(
+                f"Las features del manifiesto de {candidate.version} {list(candidate.features)} "
+                f"no coinciden con las del modelo {list(names)}"
+            )
+        # Sin nombres, la exportación NumPy solo conoce la última columna que usa
+        expected = len(names) or getattr(candidate.model, 'n_features', 0)
+        if len(candidate.features) != expected and (names or len(candidate.features) < expected):
+            raise ModelValidationError(
+                f"El modelo {candidate.version} espera {expected} columnas, el manifiesto declara {len(candidate.features)}"
+            )
+
+    def validate(self, candidate: LoadedModel) -> float:
+        """
+        Ejecuta el conjunto de humo contra el candidato.
+
+        Returns:
+            Segundos que tomó la validación
+
+        Raises:
+            ModelValidationError: Si alguna predicción no es una probabilidad válida
+        """
+        started = time.perf_counter()
+        self._check_features(candidate)
+        try:
+            features = candidate.select_features([
+                [row[0], candidate.category_map[row[1]], *row[2:]]
+                for row in SMOKE_CASES
+            ])
+            probabilities = np.asarray(candidate.model.predict_proba(features))
+        except Exception as e:
+            raise ModelValidationError(f"El modelo {candidate.version} falló al predecir: {e}") from e
+
+        if probabilities.shape != (len(SMOKE_CASES), 2):
+            raise ModelValidationError(
+                f"El modelo {candidate.version} devolvió forma {probabilities.shape}, se esperaba ({len(SMOKE_CASES)}, 2)"
+            )
+        if not np.isfinite(probabilities).all() or (probabilities < 0).any() or (probabilities > 1).any():
+            raise ModelValidationError(f"El modelo {candidate.version} devolvió probabilidades fuera de [0, 1]")
+        if not np.allclose(probabilities.sum(axis=1), 1.0, atol=1e-6):
+            raise ModelValidationError(f"Las probabilidades del modelo {candidate.version} no suman 1")
+        return time.perf_counter() - started
+
+    def current(self) -> LoadedModel:
+        """Modelo en servicio; se carga y valida en la primera llamada."""
+        current = self._current
+        if current is not None:
+            return current
+        with self._load_lock:
+            if self._current is None:
+                candidate = self._load()
+                self.metrics.loads += 1
+                self.metrics.last_load_seconds = candidate.load_seconds
+                try:
+                    self.metrics.last_validation_seconds = self.validate(candidate)
+                except ModelValidationError as e:
+                    self.metrics.failures += 1
+                    self.metrics.last_error = str(e)
+                    logger.error("El modelo %s no pasó la validación, no se pone en servicio: %s", candidate.version, e)
+                    raise
+                self._current = candidate
+            return self._current
+
+    def get_version(self, version: str) -> LoadedModel:
+        """
+        Una versión concreta del registro (para challengers y shadows), validada y cacheada.
+        Si es la que está en servicio se reutiliza.
+        """
+        current = self._current
+        if current is not None and current.version == version:
+            return current
+        loaded = self._versions.get(version)
+        if loaded is not None:
+            return loaded
+        with self._versions_lock:
+            if version not in self._versions:
+                candidate = self._load(version)
+                self.validate(candidate)
+                self._versions[version] = candidate
+            return self._versions[version]
+
+    def forget_versions(self) -> None:
+        """Descarta las versiones adicionales cacheadas (se recargan al pedirlas)."""
+        with self._versions_lock:
+            self._versions.clear()
+
+    # ------------------------------------------------------------------
+    # Recarga en caliente
+    # ------------------------------------------------------------------
+
+    def reload(self, force: bool = True, version: Optional[str] = None) -> LoadedModel:
+        """
+        Carga la versión activa (o `version`), la valida y la pone en servicio.
+        Con `version`, el archivo ACTIVE del registro se reescribe solo si pasó la validación.
+        Si falla, el modelo anterior sigue sirviendo y se relanza el error.
+        Con force=False no recarga si el archivo no cambió.
+        """
+        with self._reload_lock:
+            previous = self._current
+            try:
+                if not force and previous is not None:
+                    resolved, path, _ = self._resolve(version)
+                    if self._signature(resolved, path) == previous.signature:
+                        return previous
+
+                candidate = self._load(version)
+                self.metrics.loads += 1
+                self.metrics.last_load_seconds = candidate.load_seconds
+                self.metrics.last_validation_seconds = self.validate(candidate)
+                if version:
+                    self.registry.activate(version)
+            except Exception as e:
+                self.metrics.failures += 1
+                self.metrics.last_error = str(e)
+                logger.error(
+                    "Recarga del modelo fallida, se mantiene %s: %s", previous.version if previous else 'ninguno', e
+                )
+                raise
+
+            # Cambio atómico de referencia
+            self._current = candidate
+            self.forget_versions()
+            self.metrics.swaps += 1
+            self.metrics.last_swap_at = datetime.now(timezone.utc)
+            self.metrics.last_error = None
+            self.metrics.history = (self.metrics.history + [{
+                'from': previous.version if previous else None,
+                'to': candidate.version,
+                'at': self.metrics.last_swap_at.isoformat(),
+                'load_seconds': round(candidate.load_seconds, 4),
+                'validation_seconds': round(self.metrics.last_validation_seconds, 4),
+            }])[-10:]
+            logger.info(
+                "Modelo en servicio: %s", candidate.version,
+                extra={"backend": candidate.backend, "load_ms": round(candidate.load_seconds * 1000, 1)},
+            )
+            return candidate
+
+    @property
+    def reloading(self) -> bool:
+        return self._reload_thread is not None and self._reload_thread.is_alive()
+
+    def reload_in_background(self, force: bool = True, version: Optional[str] = None) -> bool:
+        """Lanza la recarga en un hilo. Devuelve False si ya hay una en curso."""
+        if self.reloading:
+            return False
+
+        def run():
+            try:
+                self.reload(force=force, version=version)
+            except Exception:
+                pass  # registrado en metrics
+
+        self._reload_thread = threading.Thread(target=run, name="model-reload", daemon=True)
+        self._reload_thread.start()
+        return True
+
+    def check_for_updates(self) -> bool:
+        """Recarga si la versión activa o su archivo cambiaron. Devuelve True si hubo cambio."""
+        if self._current is None:
+            return False  # la carga perezosa ya tomará la versión vigente
+        previous = self._current
+        try:
+            return self.reload(force=False) is not previous
+        except Exception:
+            return False
+
+    def start_watching(self, interval_seconds: float) -> None:
+        if interval_seconds <= 0 or (self._watch_thread and self._watch_thread.is_alive()):
+            return
+        self._watch_stop.clear()
+
+        def watch():
+            while not self._watch_stop.wait(interval_seconds):
+                self.check_for_updates()
+
+        self._watch_thread = threading.Thread(target=watch, name="model-watch", daemon=True)
+        self._watch_thread.start()
+
+    def stop_watching(self) -> None:
+        self._watch_stop.set()
+        if self._watch_thread:
+            self._watch_thread.join(timeout=5)
+        self._watch_thread = None
+
+    def status(self) -> Dict[str, Any]:
+        current = self._current
+        metrics = self.metrics
+        return {
+            'loaded': current is not None,
+            'version': current.version if current else None,
+            'path': current.path if current else None,
+            'backend': current.backend if current else self.backend,
+            'loaded_at': current.loaded_at.isoformat() if current else None,
+            'load_seconds': current.load_seconds if current else None,
+            'reloading': self.reloading,
+            'watching': bool(self._watch_thread and self._watch_thread.is_alive()),
+            'metrics': {
+                'loads': metrics.loads,
+                'swaps': metrics.swaps,
+                'failures': metrics.failures,
+                'last_load_seconds': metrics.last_load_seconds,
+                'last_validation_seconds': metrics.last_validation_seconds,
+                'last_swap_at': metrics.last_swap_at.isoformat() if metrics.last_swap_at else None,
+                'last_error': metrics.last_error,
+                'history': list(metrics.history),
+            },
+        }
+
+
+model_manager = ModelManager()
@@ -0,0 +1,211 @@
+"""
+Ingesta en streaming de releases OCDS (Open Contracting Data Standard) de SERCOP.
+
+Sustituye el camino del notebook (leer Tender.xlsx entero con pandas y unir seis hojas por
+`ocid` en memoria): cada release ya trae planning, tender, awards y contracts anidados,
+así que se aplana release a release y se escribe por bloques con el upsert de
+`services.tender_ingestion`. La memoria depende del tamaño del bloque, no del archivo.
+
+Un release es una actualización parcial del proceso (`ocid`): los de adjudicación o
+contrato suelen traer solo awards/contracts, sin tender.title ni tender.status. Se cargan
+en modo parcial: los releases del mismo ocid se unen, los campos vacíos no borran los ya
+guardados y los que no traen title solo completan licitaciones existentes.
+
+Entradas admitidas (archivos o directorios con páginas):
+- .jsonl / .ndjson: un release o un release package por línea
+- .json: release package (`{"releases": [...]}`) o arreglo de releases
+- cualquiera de los anteriores comprimido con .gz
+"""
+import gzip
+import json
+import re
+from datetime import date
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Union
+
+from sqlalchemy.engine import Engine
+
+from services.tender_ingestion import (
+    DEFAULT_CHUNK_SIZE,
+    IngestionReport,
+    ingest_records,
+    iter_json_array,
+    normalize_record,
+    parse_date,
+)
+
+
+RELEASE_SUFFIXES = (".json", ".jsonl", ".ndjson")
+RUC_PATTERN = re.compile(r"\d{13}")
+
+PathLike = Union[str, Path]
+
+
+# ---------------------------------------------------------------------------
+# Lectura
+# ---------------------------------------------------------------------------
+
+def _open_text(path: Path):
+    if path.suffix.lower() == ".gz":
+        return gzip.open(path, "rt", encoding="utf-8")
+    return path.open("r", encoding="utf-8")
+
+
+def _base_suffix(path: Path) -> str:
+    suffixes = [suffix.lower() for suffix in path.suffixes]
+    if suffixes and suffixes[-1] == ".gz":
+        suffixes = suffixes[:-1]
+    return suffixes[-1] if suffixes else ""
+
+
+def _expand_paths(paths: Iterable[PathLike]) -> Iterator[Path]:
+    """Archivos a leer; los directorios se recorren en orden (páginas del feed)."""
+    for path in map(Path, paths):
+        if path.is_dir():
+            for child in sorted(path.iterdir()):
+                if child.is_file() and _base_suffix(child) in RELEASE_SUFFIXES:
+                    yield child
+        else:
+            yield path
+
+
+def _releases_from(item: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    # Una línea puede ser un release o un release package completo
+    if "releases" in item and "ocid" not in item:
+        yield from item.get("releases") or []
+    else:
+        yield item
+
+
+def iter_releases(paths: Iterable[PathLike]) -> Iterator[Dict[str, Any]]:
+    """Itera los releases de uno o varios archivos/directorios con memoria constante."""
+    for path in _expand_paths(paths):
+        suffix = _base_suffix(path)
+        if suffix not in RELEASE_SUFFIXES:
+            raise ValueError(f"Formato no soportado: {path.name} (usa .json, .jsonl o .ndjson)")
+
+        with _open_text(path) as fp:
+            if suffix == ".json":
+                head = fp.read(4096)
+                fp.seek(0)
+                key = "releases" if '"releases"' in head or not head.lstrip().startswith("[") else None
+                yield from iter_json_array(fp, key=key)
+            else:
+                for line in fp:
+                    line = line.strip()
+                    if line:
+                        yield from _releases_from(json.loads(line))
+
+
+# ---------------------------------------------------------------------------
+# Aplanado
+# ---------------------------------------------------------------------------
+
+def _duration_days(period: Optional[Dict[str, Any]]) -> Optional[int]:
+    """durationInDays del periodo o, si falta, la diferencia entre sus fechas."""
+    if not period:
+        return None
+    if period.get("durationInDays") not in (None, ""):
+        return int(period["durationInDays"])
+    start, end = parse_date(period.get("startDate")), parse_date(period.get("endDate"))
+    if isinstance(start, date) and isinstance(end, date):
+        return max((end - start).days, 0)
+    return None
+
+
+def _first(items: Optional[List[Dict[str, Any]]]) -> Dict[str, Any]:
+    return items[0] if items else {}
+
+
+def _buyer_party(release: Dict[str, Any]) -> Dict[str, Any]:
+    buyer_id = (release.get("buyer") or {}).get("id")
+    for party in release.get("parties") or []:
+        if party.get("id") == buyer_id or "buyer" in (party.get("roles") or []):
+            return party
+    return {}
+
+
+def _eligibility(tender: Dict[str, Any]) -> Optional[str]:
+    criteria = tender.get("eligibilityCriteria")
+    if isinstance(criteria, list):
+        criteria = ",".join(str(item) for item in criteria)
+    return criteria or None
+
+
+def flatten_release(release: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Aplana un release OCDS a las claves de origen que entiende `normalize_record`,
+    incluidas las features derivadas del modelo (duraciones, competidores, elegibilidad).
+    """
+    tender = release.get("tender") or {}
+    buyer = release.get("buyer") or tender.get("procuringEntity") or {}
+    address = _buyer_party(release).get("address") or {}
+    budget = ((release.get("planning") or {}).get("budget") or {}).get("amount") or {}
+    value = tender.get("value") or budget
+
+    award = _first(release.get("awards"))
+    contract = _first(release.get("contracts"))
+    contract_period = contract.get("period") or award.get("contractPeriod")
+
+    number_of_tenderers = tender.get("numberOfTenderers")
+    if number_of_tenderers in (None, "") and tender.get("tenderers") is not None:
+        number_of_tenderers = len(tender["tenderers"])
+
+    ruc = RUC_PATTERN.search(str(buyer.get("id") or ""))
+
+    return {
+        "external_id": tender.get("id") or release.get("ocid"),
+        "ocid": release.get("ocid"),
+        "title": tender.get("title") or tender.get("description"),
+        "description": tender.get("description"),
+        "status": tender.get("status"),
+        "main_category": tender.get("mainProcurementCategory"),
+        "buyer_name": buyer.get("name"),
+        "buyer_ruc": ruc.group(0) if ruc else None,
+        "buyer_region": address.get("region"),
+        "buyer_city": address.get("locality"),
+        "buyer_address": address.get("streetAddress"),
+        "budget_amount": value.get("amount"),
+        "budget_currency": value.get("currency"),
+        "estimated_value": budget.get("amount"),
+        "tender_start_date": (tender.get("tenderPeriod") or {}).get("startDate"),
+        "tender_end_date": (tender.get("tenderPeriod") or {}).get("endDate"),
+        "contract_start_date": (contract_period or {}).get("startDate"),
+        "contract_end_date": (contract_period or {}).get("endDate"),
+        # La fecha de un release de adjudicación o contrato no es la de publicación
+        "publish_date": tender.get("datePublished") or (release.get("date") if tender.get("title") else None),
+        "number_of_tenderers": number_of_tenderers,
+        "award_criteria": tender.get("awardCriteria"),
+        "eligibility_criteria": _eligibility(tender),
+        "tender_duration_days": _duration_days(tender.get("tenderPeriod")),
+        "contract_duration_days": _duration_days(contract_period),
+    }
+
+
+def normalize_release(release: Dict[str, Any], publishing_company_id: int, created_by_user_id: int) -> Dict[str, Any]:
+    return normalize_record(flatten_release(release), publishing_company_id, created_by_user_id, partial=True)
+
+
+def ingest_releases(
+    engine: Engine,
+    paths: Iterable[PathLike],
+    publishing_company_id: int,
+    created_by_user_id: int,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    on_chunk=None,
+) -> IngestionReport:
+    """
+    Carga releases OCDS en `tenders` por bloques (upsert parcial por external_id).
+    Si un mismo proceso aparece en varios releases, cada campo toma el último valor no vacío;
+    los releases sin title de procesos que aún no están en la base se omiten (report.skipped).
+    """
+    return ingest_records(
+        engine,
+        iter_releases(paths),
+        publishing_company_id=publishing_company_id,
+        created_by_user_id=created_by_user_id,
+        chunk_size=chunk_size,
+        normalize=normalize_release,
+        on_chunk=on_chunk,
+        partial=True,
+    )
@@ -2,53 +2,91 @@
 Servicio de predicción con CatBoost.
 Calcula la probabilidad de ganar una licitación basado en características del tender y la oferta.
 """
-from catboost import CatBoostClassifier
-import os
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Union
+import numpy as np
 
-# Ruta al modelo entrenado
-MODEL_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'catboost_model.cbm')
+from core.metrics import observe_inference
+from services.model_experiments import ROLE_CHALLENGER, ROLE_CHAMPION, model_experiments
+from services.model_manager import DEFAULT_CATEGORY_MAP, model_manager
 
-# Cargar modelo una sola vez al importar el módulo
-model = CatBoostClassifier()
-model.load_model(MODEL_PATH)
+# Mapeo de categorías a valores numéricos (el modelo activo puede traer el suyo en el manifiesto)
+CATEGORY_MAP = DEFAULT_CATEGORY_MAP
 
-# Mapeo de categorías a valores numéricos
-CATEGORY_MAP = {
-    'Bienes': 0,
-    'Obras': 1,
-    'Servicios': 2
-}
+logger = logging.getLogger(__name__)
 
 
-def predict_win_probability(
+def get_model_version() -> str:
+    """Versión del modelo que está sirviendo predicciones (lo carga si hace falta)."""
+    return model_manager.current().version
+
+
+# Columnas de entrada, en el orden de model_manager.INPUT_FEATURES (cada modelo toma las suyas)
+FEATURE_COLUMNS = [
+    'number_of_tenderers',
+    'main_category',
+    'budget',
+    'bid_amount',
+    'tender_duration_days',
+    'contract_duration_days',
+    'winner',
+]
+
+# Columnas que deben ser estrictamente mayores a 0
+POSITIVE_COLUMNS = [
+    'number_of_tenderers',
+    'budget',
+    'bid_amount',
+    'tender_duration_days',
+    'contract_duration_days',
+]
+
+BatchInput = Union[Mapping[str, Sequence[Any]], Sequence[Mapping[str, Any]], Any]
+
+
+@dataclass(frozen=True)
+class WinScore:
+    probability: float
+    model_version: str
+    # Id de la predicción en el registro de experimentos (None si está deshabilitado)
+    request_id: Optional[str] = None
+
+
+def score_win_probability(
     number_of_tenderers: int,
     main_category: str,
     budget: float,
     bid_amount: float,
     tender_duration_days: int,
     contract_duration_days: int,
-    winner: int = 0
-) -> float:
+    winner: int = 0,
+    company_id: Optional[int] = None
+) -> WinScore:
     """
-    Predice la probabilidad de ganar una licitación.
-    
-    Args:
-        number_of_tenderers: Número de participantes en la licitación
-        main_category: Categoría principal ('Bienes', 'Obras', 'Servicios')
-        budget: Presupuesto total de la licitación en USD
-        bid_amount: Monto de la oferta presentada en USD
-        tender_duration_days: Duración del proceso de licitación en días
-        contract_duration_days: Duración del contrato en días
-        winner: 0 (default) para predicción, 1 si ya ganó (para entrenamiento)
-    
-    Returns:
-        float: Probabilidad de ganar (0.0 a 1.0)
-    
+    Igual que predict_win_probability, pero indica qué versión respondió.
+
+    Si hay challenger configurado y la empresa cae en su porcentaje, responde el challenger;
+    si no, el modelo activo. Con experimentos habilitados la predicción se registra y los
+    modelos shadow puntúan el mismo vector en segundo plano.
+
     Raises:
         ValueError: Si la categoría no es válida o los valores son negativos
     """
+    # Tomar el modelo una sola vez: si hay una recarga en curso, esta petición termina con él
+    loaded = model_manager.current()
+    role = ROLE_CHAMPION
+    challenger = model_experiments.challenger_for(company_id)
+    if challenger and challenger != loaded.version:
+        try:
+            loaded = model_manager.get_version(challenger)
+            role = ROLE_CHALLENGER
+        except Exception as e:
+            logger.warning("Challenger %s no disponible, responde %s: %s", challenger, loaded.version, e)
+    
     # Validaciones
-    if main_category not in CATEGORY_MAP:
+    if main_category not in loaded.category_map:
         raise ValueError(f"Categoría inválida: {main_category}. Debe ser 'Bienes', 'Obras' o 'Servicios'")
     
     if number_of_tenderers <= 0:
@@ -67,9 +105,9 @@ def predict_win_probability(
         raise ValueError("contract_duration_days debe ser mayor a 0")
     
     # Convertir categoría a número
-    main_category_encoded = CATEGORY_MAP[main_category]
+    main_category_encoded = loaded.category_map[main_category]
     
-    # Crear vector de características en el orden esperado por el modelo
+    # Vector de entrada en el orden de INPUT_FEATURES; el modelo recibe solo sus columnas
     # [NumberOfTenderers, MainCategory, Budget, BidAmount, TenderDurationDays, ContractDurationDays, Winner]
     features = [
         number_of_tenderers,
@@ -82,12 +120,113 @@ def predict_win_probability(
     ]
     
     # Predecir probabilidad (devuelve array con [prob_clase_0, prob_clase_1])
-    probabilities = model.predict_proba([features])
+    started = time.perf_counter()
+    probabilities = loaded.model.predict_proba(loaded.select_features(features))
+    elapsed = time.perf_counter() - started
+    latency_ms = elapsed * 1000
+    observe_inference(loaded.backend, 'single', elapsed)
+    
+    # Probabilidad de la clase positiva (ganar)
+    win_probability = float(probabilities[0][1])
     
-    # Retornar probabilidad de la clase positiva (ganar)
-    win_probability = probabilities[0][1]
+    request_id = None
+    if model_experiments.enabled:
+        # Los shadows reciben la categoría sin codificar: cada versión usa su propio mapeo
+        raw_features = [
+            int(number_of_tenderers), main_category, float(budget), float(bid_amount),
+            int(tender_duration_days), int(contract_duration_days), int(winner),
+        ]
+        request_id = model_experiments.observe(
+            role, loaded.version, win_probability, latency_ms, raw_features, company_id
+        )
     
-    return float(win_probability)
+    return WinScore(win_probability, loaded.version, request_id)
+
+
+def predict_win_probability(
+    number_of_tenderers: int,
+    main_category: str,
+    budget: float,
+    bid_amount: float,
+    tender_duration_days: int,
+    contract_duration_days: int,
+    winner: int = 0
+) -> float:
+    """
+    Predice la probabilidad de ganar una licitación.
+    
+    Args:
+        number_of_tenderers: Número de participantes en la licitación
+        main_category: Categoría principal ('Bienes', 'Obras', 'Servicios')
+        budget: Presupuesto total de la licitación en USD
+        bid_amount: Monto de la oferta presentada en USD
+        tender_duration_days: Duración del proceso de licitación en días
+        contract_duration_days: Duración del contrato en días
+        winner: 0 (default) para predicción, 1 si ya ganó (para entrenamiento)
+    
+    Returns:
+        float: Probabilidad de ganar (0.0 a 1.0)
+    
+    Raises:
+        ValueError: Si la categoría no es válida o los valores son negativos
+    """
+    return score_win_probability(
+        number_of_tenderers,
+        main_category,
+        budget,
+        bid_amount,
+        tender_duration_days,
+        contract_duration_days,
+        winner
+    ).probability
+
+
+def predict_bid_curve(
+    number_of_tenderers: int,
+    main_category: str,
+    budget: float,
+    bid_amounts: Sequence[float],
+    tender_duration_days: int,
+    contract_duration_days: int,
+    estimated_cost: float | None = None
+) -> Dict[str, Any]:
+    """
+    Calcula la curva probabilidad-vs-oferta de una licitación en una sola llamada al modelo.
+
+    Args:
+        number_of_tenderers: Número de participantes en la licitación
+        main_category: Categoría principal ('Bienes', 'Obras', 'Servicios')
+        budget: Presupuesto total de la licitación en USD
+        bid_amounts: Montos de oferta a evaluar en USD
+        tender_duration_days: Duración del proceso de licitación en días
+        contract_duration_days: Duración del contrato en días
+        estimated_cost: Costo estimado de ejecución. Si se indica, el valor esperado es
+            probabilidad × (oferta - costo); si no, probabilidad × oferta.
+
+    Returns:
+        dict: {'bid_amounts', 'probabilities', 'expected_values', 'best_index'}
+    """
+    bids = np.asarray(bid_amounts, dtype=np.float64)
+    n_points = bids.shape[0]
+
+    probabilities = predict_win_probability_batch({
+        'number_of_tenderers': np.full(n_points, number_of_tenderers),
+        'main_category': np.full(n_points, main_category),
+        'budget': np.full(n_points, budget),
+        'bid_amount': bids,
+        'tender_duration_days': np.full(n_points, tender_duration_days),
+        'contract_duration_days': np.full(n_points, contract_duration_days),
+    })
+
+    margins = bids - estimated_cost if estimated_cost is not None else bids
+    expected_values = probabilities * margins
+
+    return {
+        'bid_amounts': bids,
+        'probabilities': probabilities,
+        'expected_values': expected_values,
+        'best_index': int(np.argmax(expected_values)) if n_points else None,
+    }
 
 
 def calculate_contract_duration_days(contract_start_date: str, contract_end_date: str) -> int:
@@ -111,3 +250,121 @@ def calculate_contract_duration_days(contract_start_date: str, contract_end_date
     duration = (end - start).days
     
     return max(duration, 1)  # Mínimo 1 día
+
+
+def _to_columns(data: BatchInput) -> Dict[str, np.ndarray]:
+    """
+    Normaliza la entrada del lote a un diccionario columna -> array de NumPy.
+
+    Acepta un DataFrame de pandas, un diccionario de columnas (listas o arrays)
+    o una lista de registros (diccionarios con las mismas claves que
+    predict_win_probability).
+    """
+    # DataFrame de pandas (sin importar pandas: basta con que tenga .columns y .to_numpy)
+    if hasattr(data, 'columns') and hasattr(data, 'to_numpy'):
+        return {column: data[column].to_numpy() for column in data.columns}
+
+    if isinstance(data, Mapping):
+        return {column: np.asarray(values) for column, values in data.items()}
+
+    records: List[Mapping[str, Any]] = list(data)
+    columns: Dict[str, np.ndarray] = {}
+    for column in FEATURE_COLUMNS:
+        if column == 'winner':
+            columns[column] = np.array([record.get('winner', 0) for record in records])
+        elif all(column in record for record in records):
+            columns[column] = np.array([record[column] for record in records])
+    return columns
+
+
+def build_feature_matrix(data: BatchInput, category_map: Optional[Mapping[str, int]] = None) -> np.ndarray:
+    """
+    Valida un lote completo y construye la matriz de características (n_filas x 7).
+
+    Las validaciones son las mismas que en predict_win_probability, pero se
+    aplican de forma vectorizada sobre todas las filas a la vez.
+
+    Raises:
+        ValueError: Si faltan columnas, las longitudes no coinciden, hay
+            categorías inválidas o valores no positivos (indica las filas).
+    """
+    category_map = category_map or CATEGORY_MAP
+    columns = _to_columns(data)
+
+    if 'winner' not in columns:
+        n_rows = len(next(iter(columns.values()))) if columns else 0
+        columns['winner'] = np.zeros(n_rows, dtype=np.int64)
+
+    missing = [column for column in FEATURE_COLUMNS if column not in columns]
+    if missing:
+        raise ValueError(f"Faltan columnas requeridas: {', '.join(missing)}")
+
+    lengths = {len(columns[column]) for column in FEATURE_COLUMNS}
+    if len(lengths) != 1:
+        raise ValueError("Todas las columnas deben tener la misma longitud")
+
+    n_rows = lengths.pop()
+    if n_rows == 0:
+        return np.empty((0, len(FEATURE_COLUMNS)), dtype=np.float64)
+
+    # Codificar categorías
+    categories = columns['main_category'].astype(str)
+    valid_category = np.isin(categories, list(category_map))
+    if not valid_category.all():
+        invalid_rows = np.flatnonzero(~valid_category).tolist()
+        raise ValueError(
+            f"Categoría inválida en las filas {invalid_rows}. Debe ser 'Bienes', 'Obras' o 'Servicios'"
+        )
+    category_encoded = np.select(
+        [categories == name for name in category_map],
+        list(category_map.values()),
+    )
+
+    matrix = np.empty((n_rows, len(FEATURE_COLUMNS)), dtype=np.float64)
+    for index, column in enumerate(FEATURE_COLUMNS):
+        if column == 'main_category':
+            matrix[:, index] = category_encoded
+            continue
+        try:
+            matrix[:, index] = columns[column].astype(np.float64)
+        except (TypeError, ValueError):
+            raise ValueError(f"{column} debe contener solo valores numéricos")
+
+    # Validar valores positivos de todas las columnas en una sola pasada
+    positive_indices = [FEATURE_COLUMNS.index(column) for column in POSITIVE_COLUMNS]
+    invalid = ~(matrix[:, positive_indices] > 0)  # también detecta NaN
+    if invalid.any():
+        errors = [
+            f"{column} debe ser mayor a 0 (filas {np.flatnonzero(invalid[:, i]).tolist()})"
+            for i, column in enumerate(POSITIVE_COLUMNS)
+            if invalid[:, i].any()
+        ]
+        raise ValueError("; ".join(errors))
+
+    return matrix
+
+
+def predict_win_probability_batch(data: BatchInput) -> np.ndarray:
+    """
+    Predice la probabilidad de ganar para un lote de ofertas en una sola llamada al modelo.
+
+    Args:
+        data: DataFrame de pandas, diccionario de columnas o lista de registros con
+            las claves number_of_tenderers, main_category, budget, bid_amount,
+            tender_duration_days, contract_duration_days y opcionalmente winner.
+
+    Returns:
+        np.ndarray: Probabilidades de ganar (0.0 a 1.0), una por fila y en el mismo orden.
+
+    Raises:
+        ValueError: Si alguna fila no pasa las validaciones
+    """
+    loaded = model_manager.current()
+    features = build_feature_matrix(data, loaded.category_map)
+    if features.shape[0] == 0:
+        return np.empty(0, dtype=np.float64)
+
+    started = time.perf_counter()
+    probabilities = loaded.model.predict_proba(loaded.select_features(features))
+    observe_inference(loaded.backend, 'batch', time.perf_counter() - started, rows=features.shape[0])
+    return probabilities[:, 1].astype(np.float64)
@@ -0,0 +1,38 @@
+"""
+Proyecciones y perfiles de carga para las lecturas.
+
+- Listados: solo las columnas que devuelve el schema de resumen (filas, no entidades ORM), así
+  no viajan description/buyer_address/recommendation_text ni se llena el identity map
+- Detalle: relaciones que la respuesta usa cargadas en la misma consulta (sin lazy loads)
+"""
+from sqlalchemy.orm import Session, joinedload
+
+from models.company import Company
+from models.participation import Participation
+from models.tender import Tender
+from schemas.tender import TenderSummary
+
+
+# Columnas de TenderSummary, en el mismo orden que el schema
+TENDER_SUMMARY_COLUMNS = tuple(getattr(Tender, name) for name in TenderSummary.model_fields)
+
+# ParticipationRead usa offered_amount/status; en la tabla son bid_amount/participation_status
+PARTICIPATION_READ_COLUMNS = (
+    Participation.id,
+    Participation.tender_id,
+    Participation.company_id,
+    Participation.bid_amount.label('offered_amount'),
+    Participation.participation_status.label('status'),
+    Participation.created_at,
+)
+
+# Sector y tamaño de la empresa: contexto de GPT y perfil de las recomendaciones diarias
+COMPANY_PROFILE_OPTIONS = (joinedload(Company.sector), joinedload(Company.company_size))
+
+
+def tender_summary_query(db: Session):
+    return db.query(*TENDER_SUMMARY_COLUMNS)
+
+
+def participation_read_query(db: Session):
+    return db.query(*PARTICIPATION_READ_COLUMNS)
@@ -0,0 +1,278 @@
+"""
+Caché de recomendaciones GPT direccionada por contenido.
+
+La clave es un hash SHA-256 de las entradas normalizadas del prompt (licitación, empresa,
+oferta y probabilidad redondeadas) más el nombre del modelo, de modo que reenviar la misma
+oferta no vuelve a consumir tokens de OpenAI.
+
+Niveles:
+- InMemoryLRUCache: LRU en proceso con TTL (siempre activo)
+- DatabaseCache: tabla `recommendation_cache` en SQLite/PostgreSQL (opcional, compartida
+  entre workers y persistente entre reinicios)
+"""
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional, Tuple
+
+from sqlalchemy import create_engine, delete
+from sqlalchemy.orm import sessionmaker
+
+from core.config import settings
+from models.recommendation_cache import RecommendationCacheEntry
+
+logger = logging.getLogger(__name__)
+
+
+# Incrementar si cambia la plantilla del prompt para invalidar entradas antiguas
+PROMPT_VERSION = 1
+
+# Precisión del redondeo de las entradas numéricas
+BID_RATIO_DECIMALS = 3      # oferta/presupuesto al 0.1%
+PROBABILITY_DECIMALS = 2    # probabilidad al 1%
+
+
+def _normalize_text(value: Optional[str], max_length: Optional[int] = None) -> str:
+    text = " ".join((value or "").split())
+    return text[:max_length] if max_length else text
+
+
+def build_cache_key(
+    model: str,
+    tender_title: str,
+    tender_description: str,
+    main_category: str,
+    budget_amount: float,
+    buyer_name: str,
+    eligibility_criteria: str,
+    number_of_tenderers: int,
+    company_name: str,
+    company_sector: Optional[str],
+    company_size: Optional[str],
+    bid_amount: float,
+    predicted_probability: float
+) -> str:
+    """Calcula la clave de caché a partir de las mismas entradas que usa el prompt."""
+    budget = float(budget_amount or 0)
+    bid_ratio = float(bid_amount) / budget if budget else float(bid_amount)
+
+    normalized = {
+        "v": PROMPT_VERSION,
+        "model": model,
+        "tender_title": _normalize_text(tender_title),
+        # El prompt solo usa los primeros 500 caracteres de la descripción
+        "tender_description": _normalize_text(tender_description, 500),
+        "main_category": _normalize_text(main_category),
+        "budget_amount": round(budget, 2),
+        "buyer_name": _normalize_text(buyer_name),
+        "eligibility_criteria": _normalize_text(eligibility_criteria),
+        "number_of_tenderers": int(number_of_tenderers or 0),
+        "company_name": _normalize_text(company_name),
+        "company_sector": _normalize_text(company_sector),
+        "company_size": _normalize_text(company_size),
+        "bid_ratio": round(bid_ratio, BID_RATIO_DECIMALS),
+        "predicted_probability": round(float(predicted_probability), PROBABILITY_DECIMALS),
+    }
+    payload = json.dumps(normalized, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class InMemoryLRUCache:
+    """LRU en memoria con expiración por TTL. Seguro entre hilos."""
+
+    def __init__(self, max_entries: int = 2048, ttl_seconds: int = 24 * 3600):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        # cache_key -> (expira_en, tender_key, texto)
+        self._entries: "OrderedDict[str, Tuple[float, Optional[str], str]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, _, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: str, tender_key: Optional[str] = None, model: str = "") -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, tender_key, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate_tender(self, tender_key: str) -> int:
+        with self._lock:
+            keys = [key for key, (_, tk, _) in self._entries.items() if tk == tender_key]
+            for key in keys:
+                del self._entries[key]
+            return len(keys)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class DatabaseCache:
+    """Nivel persistente sobre la tabla recommendation_cache (SQLite o PostgreSQL)."""
+
+    def __init__(self, engine, ttl_seconds: int = 24 * 3600):
+        self.ttl_seconds = ttl_seconds
+        self._session_factory = sessionmaker(bind=engine, autocommit=False, autoflush=False)
+        RecommendationCacheEntry.__table__.create(bind=engine, checkfirst=True)
+
+    def get(self, key: str) -> Optional[str]:
+        db = self._session_factory()
+        try:
+            entry = db.get(RecommendationCacheEntry, key)
+            if entry is None:
+                return None
+            expires_at = entry.expires_at
+            if expires_at.tzinfo is None:  # SQLite no guarda la zona horaria
+                expires_at = expires_at.replace(tzinfo=timezone.utc)
+            if expires_at <= datetime.now(timezone.utc):
+                db.delete(entry)
+                db.commit()
+                return None
+            return entry.recommendation_text
+        finally:
+            db.close()
+
+    def set(self, key: str, value: str, tender_key: Optional[str] = None, model: str = "") -> None:
+        db = self._session_factory()
+        try:
+            db.merge(RecommendationCacheEntry(
+                cache_key=key,
+                tender_key=tender_key,
+                model=model,
+                recommendation_text=value,
+                expires_at=datetime.now(timezone.utc) + timedelta(seconds=self.ttl_seconds),
+            ))
+            db.commit()
+        finally:
+            db.close()
+
+    def invalidate_tender(self, tender_key: str) -> int:
+        db = self._session_factory()
+        try:
+            result = db.execute(
+                delete(RecommendationCacheEntry).where(RecommendationCacheEntry.tender_key == tender_key)
+            )
+            db.commit()
+            return result.rowcount or 0
+        finally:
+            db.close()
+
+    def clear(self) -> None:
+        db = self._session_factory()
+        try:
+            db.execute(delete(RecommendationCacheEntry))
+            db.commit()
+        finally:
+            db.close()
+
+
+class RecommendationCache:
+    """Caché de dos niveles (memoria → base de datos) con contadores de aciertos/fallos."""
+
+    def __init__(self, memory: InMemoryLRUCache, database: Optional[DatabaseCache] = None):
+        self.memory = memory
+        self.database = database
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "memory_hits": 0, "database_hits": 0, "misses": 0, "sets": 0, "errors": 0}
+
+    def _count(self, *names: str) -> None:
+        with self._lock:
+            for name in names:
+                self._counters[name] += 1
+
+    def get(self, key: str, tender_key: Optional[str] = None, model: str = "") -> Optional[str]:
+        value = self.memory.get(key)
+        if value is not None:
+            self._count("hits", "memory_hits")
+            return value
+
+        if self.database is not None:
+            try:
+                value = self.database.get(key)
+            except Exception as e:
+                self._count("errors")
+                logger.warning("Error leyendo caché de recomendaciones: %s", e)
+                value = None
+            if value is not None:
+                # Promover al nivel en memoria
+                self.memory.set(key, value, tender_key=tender_key, model=model)
+                self._count("hits", "database_hits")
+                return value
+
+        self._count("misses")
+        return None
+
+    def set(self, key: str, value: str, tender_key: Optional[str] = None, model: str = "") -> None:
+        self.memory.set(key, value, tender_key=tender_key, model=model)
+        if self.database is not None:
+            try:
+                self.database.set(key, value, tender_key=tender_key, model=model)
+            except Exception as e:
+                self._count("errors")
+                logger.warning("Error guardando caché de recomendaciones: %s", e)
+        self._count("sets")
+
+    def invalidate_tender(self, tender_key: Any) -> int:
+        """Elimina todas las recomendaciones cacheadas de una licitación."""
+        tender_key = str(tender_key)
+        removed = self.memory.invalidate_tender(tender_key)
+        if self.database is not None:
+            try:
+                removed = max(removed, self.database.invalidate_tender(tender_key))
+            except Exception as e:
+                self._count("errors")
+                logger.warning("Error invalidando caché de recomendaciones: %s", e, extra={"tender_key": tender_key})
+        return removed
+
+    def clear(self) -> None:
+        self.memory.clear()
+        if self.database is not None:
+            self.database.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counters = dict(self._counters)
+        lookups = counters["hits"] + counters["misses"]
+        counters["hit_rate"] = counters["hits"] / lookups if lookups else 0.0
+        counters["memory_entries"] = len(self.memory)
+        counters["backend"] = "database" if self.database is not None else "memory"
+        return counters
+
+
+def _build_default_cache() -> RecommendationCache:
+    memory = InMemoryLRUCache(
+        max_entries=settings.recommendation_cache_max_entries,
+        ttl_seconds=settings.recommendation_cache_ttl_seconds,
+    )
+    database = None
+    if settings.recommendation_cache_backend == "database":
+        if settings.recommendation_cache_database_url:
+            engine = create_engine(settings.recommendation_cache_database_url, future=True)
+        else:
+            from core.database import engine
+        try:
+            database = DatabaseCache(engine, ttl_seconds=settings.recommendation_cache_ttl_seconds)
+        except Exception as e:
+            logger.warning("Caché en base de datos no disponible, usando solo memoria: %s", e)
+    return RecommendationCache(memory, database)
+
+
+recommendation_cache = _build_default_cache()
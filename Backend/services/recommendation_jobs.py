@@ -0,0 +1,427 @@
+"""
+Cola en proceso para generar recomendaciones GPT en segundo plano.
+
+La creación de una participación devuelve de inmediato la probabilidad de CatBoost;
+la recomendación se encola aquí, la procesan N workers asíncronos (concurrencia acotada)
+y el resultado se escribe en Participation.recommendation_text.
+
+Los trabajos terminados se conservan en memoria un tiempo acotado (para polling y SSE);
+después el estado se deduce de la participación. Los pendientes se pierden al detener
+el proceso: `requeue_pending` los vuelve a encolar al arrancar a partir de las filas con
+recommendation_text en NULL. Con varios procesos una misma fila puede encolarse en más
+de uno: en PostgreSQL el worker toma un advisory lock por participación antes de llamar a
+GPT (si otro proceso lo tiene, el trabajo se descarta y queda pendiente) y, ya con el lock,
+comprueba que siga vacía. El lock se libera al guardar o al morir la conexión.
+"""
+import asyncio
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from sqlalchemy import func, select, update
+from sqlalchemy.orm import joinedload
+
+from core.config import settings
+from models.company import Company
+from models.participation import Participation
+from models.tender import Tender
+from services.gpt_service import generate_recommendation, generate_quick_recommendation
+
+logger = logging.getLogger(__name__)
+
+
+# Estados posibles de un trabajo
+STATUS_QUEUED = "queued"
+STATUS_RUNNING = "running"
+STATUS_COMPLETED = "completed"
+STATUS_FAILED = "failed"
+# Sin trabajo en memoria y sin texto guardado (encolado en otro proceso o tras reiniciar)
+STATUS_PENDING = "pending"
+
+FINAL_STATUSES = (STATUS_COMPLETED, STATUS_FAILED)
+
+
+def _claim_lock_id(participation_id: int) -> int:
+    key = f"recommendation_jobs:{participation_id}".encode()
+    return int.from_bytes(hashlib.sha256(key).digest()[:8], 'big', signed=True)
+
+
+class QueueUnavailableError(RuntimeError):
+    """La cola no está iniciada o está llena."""
+
+
+@dataclass
+class RecommendationJob:
+    participation_id: int
+    context: Dict[str, Any]
+    status: str = STATUS_QUEUED
+    error: Optional[str] = None
+    created_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "participation_id": self.participation_id,
+            "status": self.status,
+            "error": self.error,
+            "created_at": self.created_at.isoformat(),
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+        }
+
+
+def build_recommendation_context(
+    tender: Tender,
+    company: Company,
+    bid_amount: float,
+    predicted_probability: float,
+) -> Dict[str, Any]:
+    """Argumentos de generate_recommendation en valores planos (el worker corre sin sesión)."""
+    return dict(
+        tender_title=tender.title or "Sin título",
+        tender_description=tender.description or "Sin descripción",
+        main_category=tender.main_category or "Servicios",
+        budget_amount=float(tender.budget_amount) if tender.budget_amount else 100000.0,
+        buyer_name=tender.buyer_name or "Entidad desconocida",
+        eligibility_criteria=tender.eligibility_criteria or "No especificado",
+        number_of_tenderers=tender.number_of_tenderers or 1,
+        company_name=company.display_name or "Empresa",
+        company_sector=company.sector.name if company.sector else None,
+        company_size=company.company_size.name if company.company_size else None,
+        bid_amount=bid_amount,
+        predicted_probability=predicted_probability,
+        tender_key=str(tender.id)
+    )
+
+
+class RecommendationJobQueue:
+    """
+    Pool de workers asyncio que consume trabajos de recomendación.
+
+    `enqueue` es seguro para llamarse desde los endpoints síncronos (threadpool):
+    publica en el event loop con call_soon_threadsafe.
+    """
+
+    def __init__(
+        self,
+        workers: int = 4,
+        max_size: int = 1000,
+        session_factory=None,
+        finished_ttl_seconds: float = 600,
+        max_finished: int = 1000,
+    ):
+        self.workers = workers
+        self.max_size = max_size
+        self.finished_ttl_seconds = finished_ttl_seconds
+        self.max_finished = max_finished
+        self._session_factory = session_factory
+        self._jobs: Dict[int, RecommendationJob] = {}
+        # Terminados, en orden de finalización: participation_id -> time.monotonic()
+        self._finished: "OrderedDict[int, float]" = OrderedDict()
+        self._listeners: Dict[int, List[asyncio.Queue]] = {}
+        self._lock = threading.Lock()
+        self._queue: Optional[asyncio.Queue] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._tasks: List[asyncio.Task] = []
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    async def start(self) -> None:
+        """Inicia los workers en el event loop actual."""
+        if self.running:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue()
+        self._tasks = [
+            asyncio.create_task(self._worker(), name=f"recommendation-worker-{i}")
+            for i in range(self.workers)
+        ]
+
+    def _session(self):
+        if self._session_factory is None:
+            from core.database import SessionLocal
+            self._session_factory = SessionLocal
+        return self._session_factory()
+
+    async def stop(self) -> None:
+        """Detiene los workers. Los pendientes se descartan (requeue_pending los retoma)."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._queue = None
+        self._loop = None
+
+    def enqueue(self, participation_id: int, context: Dict[str, Any]) -> RecommendationJob:
+        """
+        Encola la generación de la recomendación de una participación.
+
+        Args:
+            participation_id: ID de la participación a actualizar
+            context: Argumentos para gpt_service.generate_recommendation
+
+        Raises:
+            QueueUnavailableError: Si la cola no está iniciada o está llena
+        """
+        if not self.running or self._loop is None:
+            raise QueueUnavailableError("La cola de recomendaciones no está iniciada")
+        if self._queue.qsize() >= self.max_size:
+            raise QueueUnavailableError("La cola de recomendaciones está llena")
+
+        job = RecommendationJob(participation_id=participation_id, context=context)
+        with self._lock:
+            self._jobs[participation_id] = job
+            self._finished.pop(participation_id, None)
+        self._loop.call_soon_threadsafe(self._queue.put_nowait, job)
+        return job
+
+    def get(self, participation_id: int) -> Optional[RecommendationJob]:
+        with self._lock:
+            self._prune_finished()
+            return self._jobs.get(participation_id)
+
+    def _prune_finished(self) -> None:
+        """Descarta los terminados más viejos que el TTL o por encima del máximo (con el lock)."""
+        expired_before = time.monotonic() - self.finished_ttl_seconds
+        while self._finished:
+            participation_id, finished_at = next(iter(self._finished.items()))
+            if len(self._finished) <= self.max_finished and finished_at >= expired_before:
+                break
+            self._finished.popitem(last=False)
+            self._jobs.pop(participation_id, None)
+
+    def _mark_finished(self, job: RecommendationJob) -> None:
+        job.finished_at = datetime.now(timezone.utc)
+        # El contexto (descripción de la licitación, etc.) ya no hace falta
+        job.context = {}
+        with self._lock:
+            if self._jobs.get(job.participation_id) is job:
+                self._finished[job.participation_id] = time.monotonic()
+                self._finished.move_to_end(job.participation_id)
+            self._prune_finished()
+
+    async def requeue_pending(self) -> int:
+        """
+        Encola las participaciones sin recomendación (trabajos perdidos al detener o reiniciar),
+        hasta max_size. Devuelve cuántas encoló.
+        """
+        pending = await asyncio.to_thread(self._pending_contexts, self.max_size)
+        requeued = 0
+        for participation_id, context in pending:
+            if self.get(participation_id) is None:
+                self.enqueue(participation_id, context)
+                requeued += 1
+        return requeued
+
+    def _pending_contexts(self, limit: int) -> List[Tuple[int, Dict[str, Any]]]:
+        db = self._session()
+        try:
+            participations = (
+                db.query(Participation)
+                .options(
+                    joinedload(Participation.tender),
+                    joinedload(Participation.company).joinedload(Company.sector),
+                    joinedload(Participation.company).joinedload(Company.company_size),
+                )
+                .filter(Participation.recommendation_text.is_(None))
+                .order_by(Participation.id)
+                .limit(limit)
+                .all()
+            )
+            return [
+                (
+                    participation.id,
+                    build_recommendation_context(
+                        participation.tender,
+                        participation.company,
+                        float(participation.bid_amount) if participation.bid_amount else 0.0,
+                        float(participation.predicted_win_prob) if participation.predicted_win_prob else 0.0,
+                    ),
+                )
+                for participation in participations
+            ]
+        finally:
+            db.close()
+
+    async def events(self, participation_id: int) -> AsyncIterator[Dict[str, Any]]:
+        """Emite el estado actual del trabajo y luego cada cambio hasta que termine."""
+        listener: asyncio.Queue = asyncio.Queue()
+        self._listeners.setdefault(participation_id, []).append(listener)
+        try:
+            job = self.get(participation_id)
+            if job is None:
+                return
+            yield job.snapshot()
+            status = job.status
+            # Pendiente: la genera otro proceso, este ya no emitirá más cambios
+            while status not in FINAL_STATUSES and status != STATUS_PENDING:
+                snapshot = await listener.get()
+                status = snapshot["status"]
+                yield snapshot
+        finally:
+            listeners = self._listeners.get(participation_id, [])
+            if listener in listeners:
+                listeners.remove(listener)
+            if not listeners:
+                self._listeners.pop(participation_id, None)
+
+    def _publish(self, job: RecommendationJob) -> None:
+        snapshot = job.snapshot()
+        for listener in self._listeners.get(job.participation_id, []):
+            listener.put_nowait(snapshot)
+
+    async def _worker(self) -> None:
+        while True:
+            job = await self._queue.get()
+            try:
+                await self._process(job)
+            finally:
+                self._queue.task_done()
+
+    async def _process(self, job: RecommendationJob) -> None:
+        job.status = STATUS_RUNNING
+        job.started_at = datetime.now(timezone.utc)
+        self._publish(job)
+
+        try:
+            claimed, claim = await asyncio.to_thread(self._claim, job.participation_id)
+        except Exception as e:
+            claimed, claim = True, None
+            logger.warning("No se pudo reservar la participación: %s", e, extra={"participation_id": job.participation_id})
+        if not claimed:
+            # Otro proceso la está generando (p. ej. re-encolada al arrancar en varios workers)
+            job.status = STATUS_PENDING
+            self._discard(job)
+            self._publish(job)
+            return
+
+        try:
+            await self._generate(job)
+        finally:
+            # shield: aunque se detenga la cola, el lock se libera antes de devolver la conexión al pool
+            await asyncio.shield(asyncio.to_thread(self._release, job.participation_id, claim))
+
+    async def _generate(self, job: RecommendationJob) -> None:
+        try:
+            already_done = not await asyncio.to_thread(self._needs_recommendation, job.participation_id)
+        except Exception as e:
+            already_done = False
+            logger.warning("No se pudo comprobar la participación: %s", e, extra={"participation_id": job.participation_id})
+        if already_done:
+            # Otro proceso la completó (p. ej. re-encolada al arrancar en varios workers)
+            job.status = STATUS_COMPLETED
+            self._mark_finished(job)
+            self._publish(job)
+            return
+
+        try:
+            # El cliente de OpenAI es síncrono: se ejecuta en un hilo para no bloquear el loop
+            recommendation = await asyncio.to_thread(
+                generate_recommendation, **job.context, fallback_on_error=False
+            )
+            job.status = STATUS_COMPLETED
+        except Exception as e:
+            recommendation = generate_quick_recommendation(
+                job.context["predicted_probability"],
+                job.context["number_of_tenderers"]
+            )
+            recommendation += f"\n\n*Nota: Recomendación simplificada. Error GPT: {str(e)}*"
+            job.status = STATUS_FAILED
+            job.error = str(e)
+
+        try:
+            await asyncio.to_thread(self._save_recommendation, job.participation_id, recommendation)
+        except Exception as e:
+            job.status = STATUS_FAILED
+            job.error = f"Error guardando recomendación: {str(e)}"
+            logger.error(job.error, extra={"participation_id": job.participation_id})
+
+        self._mark_finished(job)
+        self._publish(job)
+
+    def _discard(self, job: RecommendationJob) -> None:
+        """Quita el trabajo de memoria: el estado se deduce de la participación."""
+        job.context = {}
+        with self._lock:
+            if self._jobs.get(job.participation_id) is job:
+                del self._jobs[job.participation_id]
+                self._finished.pop(job.participation_id, None)
+
+    def _claim(self, participation_id: int) -> Tuple[bool, Any]:
+        """
+        Advisory lock de sesión de la participación, en una conexión aparte en autocommit
+        (se mantiene durante la llamada a GPT). Devuelve (False, None) si otro proceso lo
+        tiene; fuera de PostgreSQL siempre (True, None).
+        """
+        db = self._session()
+        try:
+            engine = db.get_bind()
+        finally:
+            db.close()
+        if engine.dialect.name != 'postgresql':
+            return True, None
+        conn = engine.connect().execution_options(isolation_level="AUTOCOMMIT")
+        try:
+            acquired = conn.scalar(select(func.pg_try_advisory_lock(_claim_lock_id(participation_id))))
+        except Exception:
+            conn.close()
+            raise
+        if not acquired:
+            conn.close()
+            return False, None
+        return True, conn
+
+    def _release(self, participation_id: int, conn) -> None:
+        if conn is None:
+            return
+        try:
+            conn.scalar(select(func.pg_advisory_unlock(_claim_lock_id(participation_id))))
+        except Exception as e:
+            # Sin unlock la conexión no vuelve al pool: al cerrarse se libera el lock
+            conn.invalidate()
+            logger.warning("No se pudo liberar la participación: %s", e, extra={"participation_id": participation_id})
+        finally:
+            conn.close()
+
+    def _needs_recommendation(self, participation_id: int) -> bool:
+        """True si la participación existe y aún no tiene recomendación."""
+        db = self._session()
+        try:
+            text = (
+                db.query(Participation.recommendation_text)
+                .filter(Participation.id == participation_id)
+                .first()
+            )
+            # Si no existe se sigue: el guardado registra el error
+            return text is None or text[0] is None
+        finally:
+            db.close()
+
+    def _save_recommendation(self, participation_id: int, recommendation: str) -> None:
+        """Escribe la recomendación generada en la participación si sigue vacía."""
+        db = self._session()
+        try:
+            result = db.execute(
+                update(Participation)
+                .where(Participation.id == participation_id, Participation.recommendation_text.is_(None))
+                .values(recommendation_text=recommendation)
+            )
+            db.commit()
+            if result.rowcount == 0 and db.get(Participation, participation_id) is None:
+                raise ValueError(f"Participation {participation_id} no encontrada")
+        finally:
+            db.close()
+
+
+recommendation_jobs = RecommendationJobQueue(
+    workers=settings.recommendation_workers,
+    max_size=settings.recommendation_queue_max_size,
+)
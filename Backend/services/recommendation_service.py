@@ -1,105 +1,303 @@
-import os
-from openai import OpenAI
-from typing import List, Dict, Optional
-from datetime import datetime, timedelta
-import json
+import hashlib
+import logging
+import threading
+import time
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import case, func, or_, text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from core.metrics import observe_openai
+from models.company import Company
+from models.daily_recommendation import DailyRecommendation
+from models.tender import Tender
+from models.tender_score import TenderScore
+from services import gpt_service
+
+logger = logging.getLogger(__name__)
+
+# Palabras clave por defecto cuando la empresa no tiene sector (perfil tecnológico original)
+DEFAULT_KEYWORDS = ['tecnolog', 'software', 'ti', 'informát', 'sistemas']
+
+# Rango de presupuesto ideal y tolerable según el tamaño de la empresa
+BUDGET_BANDS = {
+    'micro': ((5000, 50000), (1000, 80000)),
+    'pequeña': ((20000, 100000), (10000, 150000)),
+    'mediana': ((100000, 1000000), (50000, 2000000)),
+    'grande': ((500000, float('inf')), (200000, float('inf'))),
+}
+DEFAULT_BUDGET_BAND = BUDGET_BANDS['pequeña']
+
+MIN_MATCH_SCORE = 50
+
+# Fila provisional de daily_recommendations mientras un proceso llama a GPT
+CLAIM_KEY = 'generating'
+# Pasado este tiempo otro proceso puede retomar una generación abandonada
+CLAIM_TIMEOUT_SECONDS = 120
+CLAIM_POLL_SECONDS = 0.5
+
 
 class SimpleRecommendationService:
+    """
+    Recomendaciones diarias por empresa a partir de la tabla `tenders`.
+
+    El resultado se guarda en `daily_recommendations` por (company_id, fecha) y se sirve
+    con una búsqueda por índice. La regeneración es single-flight: un lock por clave en
+    el proceso y, entre procesos, una fila provisional ("claim") que se reserva en una
+    transacción corta con advisory lock en PostgreSQL. La llamada a GPT ocurre fuera de
+    toda transacción; las demás peticiones esperan a que la fila tenga el resultado.
+    Los días sin licitaciones relevantes no se guardan: se reevalúan en cada consulta.
+    """
+
     def __init__(self):
-        self.client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
-        self.cache_file = 'data/daily_recommendations.json'
-        
-    def get_daily_recommendations(self, all_tenders: List[Dict]) -> Optional[Dict]:
+        self._locks: Dict[Tuple[int, date], threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+
+    def get_daily_recommendations(self, db: Session, company: Company, today: Optional[date] = None) -> Dict:
         """
-        Obtiene las 3 mejores recomendaciones del día con análisis corto
+        Obtiene las 3 mejores recomendaciones del día para la empresa con análisis corto
         """
-        # Verificar caché (24 horas)
-        cached = self._get_cache()
-        if cached and self._is_valid_cache(cached):
-            print("📌 Usando recomendación en caché")
+        today = today or date.today()
+
+        cached = self.get_stored(db, company.id, today)
+        if cached is not None:
             return cached
-        
-        # Generar nuevas recomendaciones
-        print("🔄 Generando nuevas recomendaciones diarias...")
-        recommendations = self._generate_recommendations(all_tenders)
-        
-        # Guardar en caché
-        self._save_cache(recommendations)
-        
+
+        with self._lock_for(company.id, today):
+            # Otra petición pudo generarlas mientras esperábamos el lock
+            cached = self.get_stored(db, company.id, today)
+            if cached is not None:
+                return cached
+
+            company_id = company.id
+            while True:
+                claimed, stored = self._claim(db, company_id, today)
+                if claimed:
+                    break
+                if stored is not None:
+                    return stored
+                # Otro proceso está generando: esperar su resultado
+                time.sleep(CLAIM_POLL_SECONDS)
+
+            logger.info("Generando recomendaciones diarias", extra={"company_id": company_id})
+            try:
+                recommendations = self._generate_recommendations(db, company, today)
+            except Exception:
+                db.rollback()
+                self._release(db, company_id, today)
+                raise
+            return self._save(db, company_id, today, recommendations)
+
+    def _lock_for(self, company_id: int, day: date) -> threading.Lock:
+        with self._locks_guard:
+            # Descartar locks de días anteriores
+            for key in [key for key in self._locks if key[1] < day and not self._locks[key].locked()]:
+                del self._locks[key]
+            return self._locks.setdefault((company_id, day), threading.Lock())
+
+    def _acquire_db_lock(self, db: Session, company_id: int, day: date) -> None:
+        """Advisory lock transaccional en PostgreSQL (no-op en otros motores)."""
+        if db.get_bind().dialect.name != 'postgresql':
+            return
+        digest = hashlib.sha256(f"daily_recommendations:{company_id}:{day.isoformat()}".encode()).digest()
+        lock_id = int.from_bytes(digest[:8], 'big', signed=True)
+        db.execute(text("SELECT pg_advisory_xact_lock(:lock_id)"), {"lock_id": lock_id})
+
+    def _stored_row(self, db: Session, company_id: int, day: date) -> Optional[DailyRecommendation]:
+        return (
+            db.query(DailyRecommendation)
+            .filter(
+                DailyRecommendation.company_id == company_id,
+                DailyRecommendation.recommendation_date == day
+            )
+            .first()
+        )
+
+    def get_stored(self, db: Session, company_id: int, day: date) -> Optional[Dict]:
+        """Recomendaciones ya guardadas de la empresa para ese día (None si aún no se generaron)."""
+        row = (
+            db.query(DailyRecommendation.payload)
+            .filter(
+                DailyRecommendation.company_id == company_id,
+                DailyRecommendation.recommendation_date == day
+            )
+            .first()
+        )
+        if row is None or row.payload.get(CLAIM_KEY):
+            return None
+        return row.payload
+
+    def _claim(self, db: Session, company_id: int, day: date) -> Tuple[bool, Optional[Dict]]:
+        """
+        Reserva la generación en una transacción corta.
+
+        Returns:
+            (True, None) si esta petición debe generar; (False, payload) si ya estaban
+            guardadas; (False, None) si otro proceso las está generando.
+        """
+        claim = {CLAIM_KEY: True, 'claimed_at': time.time()}
+        self._acquire_db_lock(db, company_id, day)
+        row = self._stored_row(db, company_id, day)
+        if row is None:
+            db.add(DailyRecommendation(company_id=company_id, recommendation_date=day, payload=claim))
+            try:
+                db.commit()
+            except IntegrityError:
+                # Otro proceso sin advisory lock (p. ej. SQLite) reservó primero
+                db.rollback()
+                return False, None
+            return True, None
+        payload = row.payload
+        if not payload.get(CLAIM_KEY):
+            db.commit()  # libera el advisory lock
+            return False, payload
+        if time.time() - payload.get('claimed_at', 0) > CLAIM_TIMEOUT_SECONDS:
+            logger.warning("Retomando una generación abandonada", extra={"company_id": company_id})
+            row.payload = claim
+            db.commit()
+            return True, None
+        db.commit()
+        return False, None
+
+    def _release(self, db: Session, company_id: int, day: date) -> None:
+        """Borra la reserva (si sigue siéndolo) para que otra petición pueda generar."""
+        self._acquire_db_lock(db, company_id, day)
+        row = self._stored_row(db, company_id, day)
+        if row is not None and row.payload.get(CLAIM_KEY):
+            db.delete(row)
+        db.commit()
+
+    def _save(self, db: Session, company_id: int, day: date, recommendations: Dict) -> Dict:
+        if not recommendations.get('has_recommendations'):
+            # Sin candidatas no se fija el día: pueden aparecer licitaciones nuevas
+            self._release(db, company_id, day)
+            return recommendations
+        self._acquire_db_lock(db, company_id, day)
+        row = self._stored_row(db, company_id, day)
+        if row is None:
+            db.add(DailyRecommendation(company_id=company_id, recommendation_date=day, payload=recommendations))
+        else:
+            row.payload = recommendations
+            row.generated_at = func.now()
+        try:
+            db.commit()
+        except IntegrityError:
+            db.rollback()
+            return self.get_stored(db, company_id, day) or recommendations
         return recommendations
-    
-    def _generate_recommendations(self, tenders: List[Dict]) -> Dict:
+
+    def _generate_recommendations(self, db: Session, company: Company, today: date) -> Dict:
         """Genera las 3 mejores recomendaciones con GPT"""
-        
+
         # Filtrar las mejores candidatas
-        top_tenders = self._filter_top_candidates(tenders, top_n=3)
-        
+        top_tenders = self._filter_top_candidates(db, company, today, top_n=3)
+
         if len(top_tenders) < 3:
             return {
                 'has_recommendations': False,
                 'message': 'No hay suficientes licitaciones relevantes en este momento'
             }
-        
+
+        # Cargar lo que usa el prompt y cerrar la transacción de lectura antes de llamar a GPT
+        profile = self._summary_profile(company)
+        db.commit()
+
         # Obtener resumen general con GPT
-        summary = self._get_gpt_summary(top_tenders)
-        
+        summary = self._get_gpt_summary(top_tenders, *profile)
+
         return {
             'has_recommendations': True,
             'tenders': top_tenders,
             'summary': summary,
             'generated_at': datetime.now().isoformat(),
-            'next_update': (datetime.now() + timedelta(hours=24)).isoformat()
+            'next_update': datetime.combine(today + timedelta(days=1), datetime.min.time()).isoformat()
         }
-    
-    def _filter_top_candidates(self, tenders: List[Dict], top_n: int = 3) -> List[Dict]:
-        """Filtra y puntúa candidatos con reglas de negocio"""
-        scored = []
-        
-        for tender in tenders:
-            # Aceptar múltiples formatos de status: 'Abierta', 'active', 'abierta'
-            status = tender.get('status', '').lower()
-            if status not in ['abierta', 'active', 'open']:
-                continue
-            
-            score = 0
-            
-            # Categoría tecnología
-            category = tender.get('main_category', '').lower()
-            if any(kw in category for kw in ['tecnolog', 'software', 'ti', 'informát', 'sistemas']):
-                score += 40
-            
-            # Presupuesto razonable (20k - 100k)
-            budget = tender.get('budget_amount', 0)
-            if 20000 <= budget <= 100000:
-                score += 30
-            elif 10000 <= budget <= 150000:
-                score += 15
-            
-            # Baja competencia
-            competitors = tender.get('number_of_tenderers', 0)
-            if competitors <= 3:
-                score += 20
-            elif competitors <= 7:
-                score += 10
-            
+
+    def _company_profile(self, company: Company) -> Tuple[List[str], Tuple, Tuple]:
+        """Palabras clave del sector y rangos de presupuesto según el tamaño."""
+        keywords = DEFAULT_KEYWORDS
+        if company.sector and company.sector.name:
+            keywords = [word for word in company.sector.name.lower().split() if len(word) > 3] or DEFAULT_KEYWORDS
+
+        ideal, tolerable = DEFAULT_BUDGET_BAND
+        if company.company_size and company.company_size.name:
+            size_name = company.company_size.name.lower()
+            for size, bands in BUDGET_BANDS.items():
+                if size in size_name:
+                    ideal, tolerable = bands
+                    break
+
+        return keywords, ideal, tolerable
+
+    def _score_expression(self, keywords: List[str], ideal: Tuple, tolerable: Tuple, today: date):
+        """Puntuación de una licitación para el perfil de la empresa, como expresión SQL sobre tender_scores"""
+        # Afinidad con el sector de la empresa
+        keyword_match = or_(*[TenderScore.search_text.contains(kw, autoescape=True) for kw in keywords])
+
+        # Presupuesto acorde al tamaño de la empresa
+        def in_band(band: Tuple):
+            low, high = band
+            if high == float('inf'):
+                return TenderScore.budget_amount >= low
+            return TenderScore.budget_amount.between(low, high)
+
+        return (
+            case((keyword_match, 40), else_=0)
+            + case((in_band(ideal), 30), (in_band(tolerable), 15), else_=0)
+            # Baja competencia (precalculada)
+            + TenderScore.competition_score
             # Tiempo disponible
-            try:
-                end_date = datetime.fromisoformat(tender.get('tender_end_date', '').replace('Z', '+00:00'))
-                days = (end_date - datetime.now()).days
-                if days > 15:
-                    score += 10
-            except:
-                pass
-            
-            if score >= 50:
-                scored.append({**tender, 'match_score': score})
-        
-        scored.sort(key=lambda x: x['match_score'], reverse=True)
-        return scored[:top_n]
-    
-    def _get_gpt_summary(self, tenders: List[Dict]) -> str:
+            + case((TenderScore.tender_end_date > today + timedelta(days=15), 10), else_=0)
+        )
+
+    def _filter_top_candidates(self, db: Session, company: Company, today: date, top_n: int = 3) -> List[Dict]:
+        """Top-N de licitaciones abiertas con un ORDER BY ... LIMIT sobre el índice tender_scores"""
+        keywords, ideal, tolerable = self._company_profile(company)
+        score = self._score_expression(keywords, ideal, tolerable, today).label('match_score')
+
+        top = (
+            db.query(Tender, score)
+            .join(TenderScore, TenderScore.tender_id == Tender.id)
+            .filter(TenderScore.is_open.is_(True))
+            .filter(or_(TenderScore.tender_end_date.is_(None), TenderScore.tender_end_date >= today))
+            .filter(score >= MIN_MATCH_SCORE)
+            .order_by(score.desc(), Tender.id)
+            .limit(top_n)
+            .all()
+        )
+        return [self._serialize(tender, int(match_score)) for tender, match_score in top]
+
+    def _serialize(self, tender: Tender, score: int) -> Dict:
+        return {
+            'id': tender.id,
+            'external_id': tender.external_id,
+            'ocid': tender.ocid,
+            'title': tender.title,
+            'description': tender.description,
+            'status': tender.status,
+            'main_category': tender.main_category,
+            'buyer_name': tender.buyer_name,
+            'budget_amount': float(tender.budget_amount) if tender.budget_amount is not None else 0.0,
+            'budget_currency': tender.budget_currency,
+            'number_of_tenderers': tender.number_of_tenderers or 0,
+            'tender_end_date': tender.tender_end_date.isoformat() if tender.tender_end_date else None,
+            'match_score': score,
+        }
+
+    def _summary_profile(self, company: Company) -> Tuple[int, str, str]:
+        """(company_id, sector, tamaño) para el prompt del resumen."""
+        sector = company.sector.name if company.sector else 'tecnología'
+        size = company.company_size.name.lower() if company.company_size else 'pequeña'
+        return company.id, sector, size
+
+    def _get_gpt_summary(self, tenders: List[Dict], company_id: int, sector: str, size: str) -> str:
         """Genera resumen corto con GPT"""
-        
+        fallback = "Estas licitaciones fueron seleccionadas por su alta compatibilidad con tu perfil, presupuestos accesibles y bajo nivel de competencia actual."
+        if not gpt_service.client:
+            return fallback
+
         tenders_text = "\n\n".join([
             f"Licitación {i+1}:\n"
             f"- Título: {t.get('title', 'N/A')}\n"
@@ -109,9 +307,9 @@ class SimpleRecommendationService:
             f"- Competidores: {t.get('number_of_tenderers', 0)}"
             for i, t in enumerate(tenders)
         ])
-        
+
         prompt = f"""
-Eres un asesor de licitaciones. Analiza estas 3 licitaciones recomendadas para una empresa pequeña de tecnología:
+Eres un asesor de licitaciones. Analiza estas 3 licitaciones recomendadas para una empresa {size} del sector {sector}:
 
 {tenders_text}
 
@@ -122,8 +320,9 @@ Formato: Un solo párrafo, directo, profesional. NO usar bullets ni listas.
 Ejemplo: "Estas tres licitaciones destacan por su alta compatibilidad con tu perfil tecnológico, presupuestos accesibles entre $40K-$80K y baja competencia (2-5 participantes), lo que incrementa significativamente tus probabilidades de éxito."
 """
 
+        started = time.perf_counter()
         try:
-            response = self.client.chat.completions.create(
+            response = gpt_service.client.chat.completions.create(
                 model="gpt-4o-mini",
                 messages=[
                     {"role": "system", "content": "Eres un asesor experto. Respondes de forma concisa y profesional."},
@@ -132,37 +331,11 @@ Ejemplo: "Estas tres licitaciones destacan por su alta compatibilidad con tu per
                 temperature=0.7,
                 max_tokens=200
             )
-            
+            observe_openai("daily_summary", time.perf_counter() - started, usage=getattr(response, "usage", None))
+
             return response.choices[0].message.content.strip()
-            
-        except Exception as e:
-            print(f"Error GPT: {e}")
-            return "Estas licitaciones fueron seleccionadas por su alta compatibilidad con tu perfil, presupuestos accesibles y bajo nivel de competencia actual."
-    
-    def _get_cache(self) -> Optional[Dict]:
-        """Lee caché"""
-        try:
-            if not os.path.exists(self.cache_file):
-                return None
-            with open(self.cache_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except:
-            return None
-    
-    def _is_valid_cache(self, cache: Dict) -> bool:
-        """Valida caché (24h)"""
-        try:
-            cache_time = datetime.fromisoformat(cache['generated_at'])
-            return (datetime.now() - cache_time) < timedelta(hours=24)
-        except:
-            return False
-    
-    def _save_cache(self, data: Dict):
-        """Guarda en caché"""
-        try:
-            os.makedirs(os.path.dirname(self.cache_file), exist_ok=True)
-            with open(self.cache_file, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
-            print(f"✅ Recomendaciones guardadas en caché hasta: {(datetime.now() + timedelta(hours=24)).strftime('%Y-%m-%d %H:%M')}")
+
         except Exception as e:
-            print(f"Error guardando caché: {e}")
+            observe_openai("daily_summary", time.perf_counter() - started, error=e)
+            logger.warning("Error GPT en el resumen diario: %s", e, extra={"company_id": company_id})
+            return fallback
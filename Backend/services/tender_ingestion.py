@@ -0,0 +1,503 @@
+"""
+Ingesta masiva e idempotente de licitaciones.
+
+Lee registros de JSON, JSONL o XLSX en streaming, los agrupa en bloques y los inserta con
+`INSERT ... ON CONFLICT (external_id) DO UPDATE` (PostgreSQL y SQLite): un round-trip
+por bloque en lugar de un SELECT + INSERT por licitación. Volver a cargar el mismo
+archivo actualiza las filas existentes en vez de duplicarlas.
+
+Con `partial=True` (releases OCDS) cada registro es una actualización parcial: los campos
+vacíos no pisan los ya guardados, no se asume un estado por defecto y los registros sin
+title (releases de adjudicación o contrato) solo completan licitaciones ya cargadas.
+
+Formatos admitidos:
+- .json: arreglo de licitaciones (o un objeto con el arreglo, p. ej. {"tenders": [...]})
+- .jsonl / .ndjson: una licitación por línea
+- .xlsx: hoja "Tender" del export OCDS aplanado de SERCOP (o la hoja activa)
+"""
+import json
+import logging
+import re
+import time
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+from sqlalchemy import bindparam, func, or_, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import SQLAlchemyError
+
+from models.tender import Tender
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_CHUNK_SIZE = 1000
+JSON_READ_SIZE = 1 << 16
+
+# Estados OCDS → estados usados por la aplicación
+STATUS_MAP = {
+    'active': 'Abierta',
+    'planning': 'Abierta',
+    'planned': 'Abierta',
+    'complete': 'Cerrada',
+    'unsuccessful': 'Cerrada',
+    'cancelled': 'Cancelada',
+    'withdrawn': 'Cancelada',
+}
+
+# mainProcurementCategory OCDS → categorías usadas por el modelo
+CATEGORY_MAP = {
+    'goods': 'Bienes',
+    'works': 'Obras',
+    'services': 'Servicios',
+    'consultingservices': 'Servicios',
+}
+
+# Columna de Tender → claves aceptadas en el registro de origen (mock JSON o export SERCOP)
+FIELD_ALIASES = {
+    'external_id': ('external_id', 'id'),
+    'ocid': ('ocid',),
+    'title': ('title',),
+    'description': ('description',),
+    'status': ('status',),
+    'main_category': ('main_category', 'mainProcurementCategory'),
+    'buyer_name': ('buyer_name', 'procuringEntity_name'),
+    'buyer_ruc': ('buyer_ruc',),
+    'buyer_region': ('buyer_region',),
+    'buyer_city': ('buyer_city',),
+    'buyer_address': ('buyer_address',),
+    'budget_amount': ('budget_amount', 'value_amount'),
+    'budget_currency': ('budget_currency', 'value_currency'),
+    'estimated_value': ('estimated_value',),
+    'tender_start_date': ('tender_start_date', 'tenderPeriod_startDate'),
+    'tender_end_date': ('tender_end_date', 'tenderPeriod_endDate'),
+    'contract_start_date': ('contract_start_date', 'contractPeriod_startDate'),
+    'contract_end_date': ('contract_end_date', 'contractPeriod_endDate'),
+    'publish_date': ('publish_date', 'date'),
+    'number_of_tenderers': ('number_of_tenderers', 'numberOfTenderers'),
+    'award_criteria': ('award_criteria', 'awardCriteria'),
+    'eligibility_criteria': ('eligibility_criteria', 'eligibilityCriteria'),
+    'tender_duration_days': ('tender_duration_days', 'tenderPeriod_durationInDays'),
+    'contract_duration_days': ('contract_duration_days', 'contractPeriod_durationInDays'),
+    'country_id': ('country_id',),
+    'requirement_city_id': ('requirement_city_id',),
+}
+
+DATE_FIELDS = ('tender_start_date', 'tender_end_date', 'contract_start_date', 'contract_end_date')
+DATETIME_FIELDS = ('publish_date',)
+DECIMAL_FIELDS = ('budget_amount', 'estimated_value')
+INTEGER_FIELDS = (
+    'number_of_tenderers', 'tender_duration_days', 'contract_duration_days', 'country_id', 'requirement_city_id'
+)
+
+# Columnas que no se sobrescriben al actualizar una licitación existente
+IMMUTABLE_ON_CONFLICT = ('id', 'external_id', 'publishing_company_id', 'created_by_user_id', 'created_at')
+
+
+@dataclass
+class ChunkReport:
+    index: int
+    rows: int
+    upserted: int = 0
+    errors: int = 0
+    # Registros parciales de licitaciones que aún no están en la base
+    skipped: int = 0
+    seconds: float = 0.0
+    error_samples: List[str] = field(default_factory=list)
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.upserted / self.seconds if self.seconds else 0.0
+
+
+@dataclass
+class IngestionReport:
+    chunks: List[ChunkReport] = field(default_factory=list)
+    seconds: float = 0.0
+
+    @property
+    def rows(self) -> int:
+        return sum(chunk.rows for chunk in self.chunks)
+
+    @property
+    def upserted(self) -> int:
+        return sum(chunk.upserted for chunk in self.chunks)
+
+    @property
+    def errors(self) -> int:
+        return sum(chunk.errors for chunk in self.chunks)
+
+    @property
+    def skipped(self) -> int:
+        return sum(chunk.skipped for chunk in self.chunks)
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.upserted / self.seconds if self.seconds else 0.0
+
+
+# ---------------------------------------------------------------------------
+# Lectores
+# ---------------------------------------------------------------------------
+
+def iter_json_array(fp, key: Optional[str] = None, read_size: int = JSON_READ_SIZE) -> Iterator[Dict[str, Any]]:
+    """
+    Recorre en streaming los objetos de un arreglo JSON sin cargar el archivo en memoria.
+
+    Sin `key` usa el primer arreglo (sirve para `[...]` y para `{"tenders": [...]}`);
+    con `key` usa el arreglo de esa clave (p. ej. "releases" en un release package OCDS).
+    """
+    decoder = json.JSONDecoder()
+    pattern = re.compile(r'"%s"\s*:\s*\[' % re.escape(key)) if key else re.compile(r"\[")
+    buffer = ""
+
+    # Avanzar hasta el inicio del arreglo (conservando una cola por si el patrón queda partido)
+    while True:
+        match = pattern.search(buffer)
+        if match:
+            buffer = buffer[match.end():]
+            break
+        more = fp.read(read_size)
+        if not more:
+            return
+        buffer = buffer[-256:] + more
+    eof = False
+    pos = 0
+
+    while True:
+        while pos < len(buffer) and buffer[pos] in " \t\r\n,":
+            pos += 1
+        if pos < len(buffer) and buffer[pos] == "]":
+            return
+        try:
+            record, pos = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            # Objeto incompleto: descartar lo ya consumido y leer más
+            more = fp.read(read_size)
+            eof = not more
+            buffer = buffer[pos:] + more
+            pos = 0
+            continue
+        yield record
+
+
+def iter_jsonl(fp) -> Iterator[Dict[str, Any]]:
+    for line in fp:
+        line = line.strip()
+        if line:
+            yield json.loads(line)
+
+
+def iter_xlsx(path: Path, sheet: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    try:
+        from openpyxl import load_workbook
+    except ImportError as e:
+        raise RuntimeError("Para leer archivos .xlsx instala openpyxl (pip install openpyxl)") from e
+
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        if sheet is None:
+            sheet = "Tender" if "Tender" in workbook.sheetnames else workbook.active.title
+        rows = workbook[sheet].iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        columns = [str(name) if name is not None else None for name in header]
+        for values in rows:
+            if values is None or all(value is None for value in values):
+                continue
+            yield {name: value for name, value in zip(columns, values) if name}
+    finally:
+        workbook.close()
+
+
+def iter_records(path, sheet: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    """Itera los registros del archivo según su extensión."""
+    path = Path(path)
+    suffix = path.suffix.lower()
+    if suffix == ".json":
+        with path.open("r", encoding="utf-8") as fp:
+            yield from iter_json_array(fp)
+    elif suffix in (".jsonl", ".ndjson"):
+        with path.open("r", encoding="utf-8") as fp:
+            yield from iter_jsonl(fp)
+    elif suffix == ".xlsx":
+        yield from iter_xlsx(path, sheet)
+    else:
+        raise ValueError(f"Formato no soportado: {suffix} (usa .json, .jsonl o .xlsx)")
+
+
+def chunked(records: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    iterator = iter(records)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+# ---------------------------------------------------------------------------
+# Normalización
+# ---------------------------------------------------------------------------
+
+def parse_datetime(value: Any) -> Optional[datetime]:
+    if value in (None, ""):
+        return None
+    if isinstance(value, datetime):
+        return value
+    if isinstance(value, date):
+        return datetime(value.year, value.month, value.day)
+    return datetime.fromisoformat(str(value).strip().replace("Z", "+00:00"))
+
+
+def parse_date(value: Any) -> Optional[date]:
+    parsed = parse_datetime(value)
+    return parsed.date() if parsed else None
+
+
+def _parse_decimal(value: Any) -> Optional[Decimal]:
+    if value in (None, ""):
+        return None
+    try:
+        return Decimal(str(value)).quantize(Decimal("0.01"))
+    except InvalidOperation:
+        raise ValueError(f"monto inválido: {value!r}")
+
+
+def _parse_int(value: Any) -> Optional[int]:
+    if value in (None, ""):
+        return None
+    return int(float(value))
+
+
+def _pick(raw: Dict[str, Any], keys) -> Any:
+    for key in keys:
+        if key in raw and raw[key] not in (None, ""):
+            return raw[key]
+    return None
+
+
+def normalize_record(
+    raw: Dict[str, Any],
+    publishing_company_id: int,
+    created_by_user_id: int,
+    partial: bool = False,
+) -> Dict[str, Any]:
+    """
+    Convierte un registro de origen en una fila de `tenders`.
+
+    Con `partial=True` title puede faltar y no se completan status ni budget_currency
+    por defecto (un campo en None conserva el valor guardado).
+
+    Raises:
+        ValueError: Si faltan campos obligatorios o algún valor no se puede convertir
+    """
+    row = {column: _pick(raw, keys) for column, keys in FIELD_ALIASES.items()}
+
+    if not row['external_id']:
+        raise ValueError("falta external_id")
+    row['external_id'] = str(row['external_id'])
+    if not row['title'] and not partial:
+        raise ValueError(f"{row['external_id']}: falta title")
+
+    for column in DATE_FIELDS:
+        row[column] = parse_date(row[column])
+    for column in DATETIME_FIELDS:
+        row[column] = parse_datetime(row[column])
+    for column in DECIMAL_FIELDS:
+        row[column] = _parse_decimal(row[column])
+    for column in INTEGER_FIELDS:
+        row[column] = _parse_int(row[column])
+
+    status = row['status'] or (None if partial else 'active')
+    if status is not None:
+        row['status'] = STATUS_MAP.get(str(status).lower(), status)
+    if row['main_category']:
+        row['main_category'] = CATEGORY_MAP.get(str(row['main_category']).lower(), row['main_category'])
+    if not partial or row['budget_amount'] is not None:
+        row['budget_currency'] = row['budget_currency'] or 'USD'
+    if row['buyer_ruc'] is not None:
+        row['buyer_ruc'] = str(row['buyer_ruc'])[:13]
+
+    row['publishing_company_id'] = publishing_company_id
+    row['created_by_user_id'] = created_by_user_id
+    return row
+
+
+# ---------------------------------------------------------------------------
+# Escritura
+# ---------------------------------------------------------------------------
+
+def _insert_for(engine: Engine):
+    dialect = engine.dialect.name
+    if dialect == "postgresql":
+        return postgresql.insert
+    if dialect == "sqlite":
+        return sqlite.insert
+    raise NotImplementedError(f"Upsert no soportado para {dialect}")
+
+
+def build_upsert(engine: Engine, columns: Iterable[str], partial: bool = False):
+    """
+    INSERT ... ON CONFLICT (external_id) DO UPDATE. Se ejecuta con la lista de filas como
+    parámetros: SQLAlchemy la agrupa en sentencias multi-VALUES ("insertmanyvalues")
+    respetando el límite de parámetros del motor.
+
+    Con `partial=True` se actualiza con COALESCE(excluded.col, tenders.col).
+    """
+    table = Tender.__table__
+    statement = _insert_for(engine)(table)
+    updates = {
+        column: func.coalesce(statement.excluded[column], table.c[column]) if partial else statement.excluded[column]
+        for column in columns
+        if column not in IMMUTABLE_ON_CONFLICT
+    }
+    updates['updated_at'] = func.now()
+    return statement.on_conflict_do_update(index_elements=['external_id'], set_=updates)
+
+
+def upsert_rows(engine: Engine, rows: List[Dict[str, Any]], report: ChunkReport, partial: bool = False) -> None:
+    """
+    Escribe un bloque en una sola sentencia. Si el bloque falla (p. ej. una fila viola una
+    restricción), se reintenta fila por fila para aislar y contar solo las filas erróneas.
+    """
+    if not rows:
+        return
+    try:
+        with engine.begin() as conn:
+            conn.execute(build_upsert(engine, rows[0].keys(), partial), rows)
+        report.upserted += len(rows)
+        return
+    except SQLAlchemyError as e:
+        logger.debug("Bloque rechazado, se reintenta fila por fila: %s", str(e).splitlines()[0])
+
+    statement = build_upsert(engine, rows[0].keys(), partial)
+    with engine.connect() as conn:
+        for row in rows:
+            try:
+                with conn.begin():
+                    conn.execute(statement, row)
+                report.upserted += 1
+            except Exception as e:
+                report.errors += 1
+                if len(report.error_samples) < 5:
+                    report.error_samples.append(f"{row.get('external_id')}: {str(e).splitlines()[0]}")
+
+
+def update_existing_rows(engine: Engine, rows: List[Dict[str, Any]], report: ChunkReport) -> None:
+    """
+    Completa con registros parciales sin title las licitaciones ya cargadas, buscándolas por
+    external_id u ocid (UPDATE con COALESCE). Las que aún no existen se cuentan como omitidas.
+    """
+    if not rows:
+        return
+    table = Tender.__table__
+    ocids = [row['ocid'] for row in rows if row.get('ocid')]
+    try:
+        with engine.begin() as conn:
+            existing = conn.execute(
+                select(table.c.external_id, table.c.ocid).where(or_(
+                    table.c.external_id.in_([row['external_id'] for row in rows]),
+                    table.c.ocid.in_(ocids),
+                ))
+            ).all()
+            external_ids = {external_id for external_id, _ in existing}
+            by_ocid = {ocid: external_id for external_id, ocid in existing if ocid}
+
+            matched = []
+            for row in rows:
+                external_id = row['external_id'] if row['external_id'] in external_ids else by_ocid.get(row.get('ocid'))
+                if external_id is None:
+                    report.skipped += 1
+                else:
+                    matched.append({**row, 'external_id': external_id})
+            if not matched:
+                return
+
+            columns = [column for column in matched[0] if column not in IMMUTABLE_ON_CONFLICT]
+            statement = (
+                update(table)
+                .where(table.c.external_id == bindparam('b_external_id'))
+                .values({
+                    **{column: func.coalesce(bindparam(f'b_{column}', type_=table.c[column].type), table.c[column])
+                       for column in columns},
+                    'updated_at': func.now(),
+                })
+            )
+            conn.execute(statement, [{f'b_{key}': value for key, value in row.items()} for row in matched])
+        report.upserted += len(matched)
+    except SQLAlchemyError as e:
+        report.errors += len(rows) - report.skipped
+        if len(report.error_samples) < 5:
+            report.error_samples.append(f"actualización parcial: {str(e).splitlines()[0]}")
+
+
+def merge_partial(previous: Optional[Dict[str, Any]], row: Dict[str, Any]) -> Dict[str, Any]:
+    """Une dos registros parciales del mismo proceso: los campos no vacíos del último ganan."""
+    if previous is None:
+        return row
+    merged = dict(previous)
+    merged.update((key, value) for key, value in row.items() if value is not None)
+    # Un external_id tomado del ocid (release sin tender.id) no reemplaza al real
+    if row['external_id'] == row.get('ocid') and previous['external_id'] != previous.get('ocid'):
+        merged['external_id'] = previous['external_id']
+    return merged
+
+
+def ingest_records(
+    engine: Engine,
+    records: Iterable[Dict[str, Any]],
+    publishing_company_id: int,
+    created_by_user_id: int,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    normalize: Callable[[Dict[str, Any], int, int], Dict[str, Any]] = normalize_record,
+    on_chunk: Optional[Callable[[ChunkReport], None]] = None,
+    partial: bool = False,
+) -> IngestionReport:
+    """
+    Normaliza y hace upsert de los registros en bloques de `chunk_size`.
+    Con `partial=True` los registros del mismo ocid se unen y los vacíos no pisan datos.
+
+    Returns:
+        IngestionReport con filas, errores y tiempo por bloque
+    """
+    report = IngestionReport()
+    started = time.perf_counter()
+
+    for index, chunk in enumerate(chunked(records, chunk_size), 1):
+        chunk_started = time.perf_counter()
+        chunk_report = ChunkReport(index=index, rows=len(chunk))
+
+        # Deduplicar por external_id dentro del bloque (gana el último; en parcial se unen
+        # por ocid); ON CONFLICT no admite dos filas con la misma clave en una sentencia
+        rows: Dict[str, Dict[str, Any]] = {}
+        for raw in chunk:
+            try:
+                row = normalize(raw, publishing_company_id, created_by_user_id)
+            except (ValueError, TypeError) as e:
+                chunk_report.errors += 1
+                if len(chunk_report.error_samples) < 5:
+                    chunk_report.error_samples.append(str(e))
+                continue
+            if partial:
+                key = row.get('ocid') or row['external_id']
+                rows[key] = merge_partial(rows.get(key), row)
+            else:
+                rows[row['external_id']] = row
+
+        upsert_rows(engine, [row for row in rows.values() if row['title']], chunk_report, partial)
+        update_existing_rows(engine, [row for row in rows.values() if not row['title']], chunk_report)
+        chunk_report.seconds = time.perf_counter() - chunk_started
+        report.chunks.append(chunk_report)
+        if on_chunk:
+            on_chunk(chunk_report)
+
+    report.seconds = time.perf_counter() - started
+    return report
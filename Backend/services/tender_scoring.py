@@ -0,0 +1,89 @@
+"""
+Mantenimiento del índice de puntuación de licitaciones (tabla tender_scores).
+
+Guarda por licitación los componentes de la puntuación de recomendaciones que no dependen
+de la empresa (estado abierto, competencia, presupuesto, fecha de cierre y texto normalizado),
+de modo que el top-N diario sea una consulta SQL con ORDER BY ... LIMIT en lugar de recorrer
+todas las licitaciones en Python.
+"""
+from typing import Iterable, Optional
+
+from sqlalchemy import delete
+from sqlalchemy.orm import Session
+
+from models.tender import OPEN_STATUSES, Tender
+from models.tender_score import TenderScore
+
+SEARCH_TEXT_MAX_LENGTH = 255
+
+
+def competition_score(number_of_tenderers: Optional[int]) -> int:
+    """Puntos por baja competencia"""
+    competitors = number_of_tenderers or 0
+    if competitors <= 3:
+        return 20
+    elif competitors <= 7:
+        return 10
+    return 0
+
+
+def build_score_row(tender: Tender) -> TenderScore:
+    """Calcula los componentes precalculados de una licitación."""
+    # Solo la categoría: palabras cortas como 'ti' darían falsos positivos en los títulos
+    search_text = (tender.main_category or '').lower()
+    return TenderScore(
+        tender_id=tender.id,
+        is_open=(tender.status or '').lower() in OPEN_STATUSES,
+        competition_score=competition_score(tender.number_of_tenderers),
+        budget_amount=tender.budget_amount,
+        tender_end_date=tender.tender_end_date,
+        search_text=search_text[:SEARCH_TEXT_MAX_LENGTH],
+    )
+
+
+def refresh_tender_score(db: Session, tender: Tender) -> None:
+    """
+    Inserta o actualiza la fila de puntuación de una licitación.
+    La licitación debe tener id (llamar después de flush/commit). No hace commit.
+    """
+    db.merge(build_score_row(tender))
+
+
+def refresh_tender_scores(db: Session, tenders: Iterable[Tender]) -> int:
+    """Actualiza en lote las filas de puntuación de varias licitaciones. No hace commit."""
+    count = 0
+    for tender in tenders:
+        refresh_tender_score(db, tender)
+        count += 1
+    return count
+
+
+def delete_tender_score(db: Session, tender_id: int) -> None:
+    """Elimina la fila de puntuación de una licitación. No hace commit."""
+    db.execute(delete(TenderScore).where(TenderScore.tender_id == tender_id))
+
+
+def rebuild_tender_scores(db: Session, batch_size: int = 5000) -> int:
+    """Recalcula el índice completo recorriendo la tabla tenders por lotes."""
+    db.execute(delete(TenderScore))
+    count = 0
+    batch = []
+    for tender in db.query(Tender).order_by(Tender.id).yield_per(batch_size):
+        row = build_score_row(tender)
+        batch.append({
+            'tender_id': row.tender_id,
+            'is_open': row.is_open,
+            'competition_score': row.competition_score,
+            'budget_amount': row.budget_amount,
+            'tender_end_date': row.tender_end_date,
+            'search_text': row.search_text,
+        })
+        if len(batch) >= batch_size:
+            db.execute(TenderScore.__table__.insert(), batch)
+            count += len(batch)
+            batch = []
+    if batch:
+        db.execute(TenderScore.__table__.insert(), batch)
+        count += len(batch)
+    db.commit()
+    return count
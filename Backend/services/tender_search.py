@@ -0,0 +1,167 @@
+"""
+Búsqueda de texto completo sobre licitaciones (título, descripción y entidad compradora).
+
+- PostgreSQL: columna generada `tenders.search_vector` (tsvector, configuración 'spanish')
+  con índice GIN; ranking con ts_rank y resaltado con ts_headline.
+- SQLite: tabla virtual FTS5 `tenders_fts` sincronizada con triggers; ranking con bm25
+  y resaltado con highlight/snippet. Permite probar la búsqueda en local.
+
+Los resaltados se piden a la base con marcadores de uso privado (no HTML) y
+`render_highlight` escapa el texto antes de cambiarlos por <mark></mark>: el título y la
+descripción vienen de fuentes externas y podrían traer HTML.
+
+En PostgreSQL la columna y el índice GIN los crea la migración 0005 (reescribe la tabla,
+no debe hacerse al arrancar cada worker). En SQLite `ensure_search_index` crea la tabla FTS5
+de forma idempotente (al iniciar la app y, por si acaso, antes de la primera búsqueda).
+"""
+import html
+import re
+import threading
+from typing import List, Optional, Tuple
+
+from sqlalchemy import column, func, literal_column, table, text
+from sqlalchemy.orm import Query
+
+from models.tender import Tender
+
+
+SEARCH_CONFIG = "spanish"
+HIGHLIGHT_START = "<mark>"
+HIGHLIGHT_STOP = "</mark>"
+# Marcadores que devuelve la base (área de uso privado de Unicode)
+SENTINEL_START = "\ue000"
+SENTINEL_STOP = "\ue001"
+
+SQLITE_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS tenders_fts USING fts5(
+        title, description, buyer_name,
+        content='tenders', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS tenders_fts_ai AFTER INSERT ON tenders BEGIN
+        INSERT INTO tenders_fts(rowid, title, description, buyer_name)
+        VALUES (new.id, new.title, new.description, new.buyer_name);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS tenders_fts_ad AFTER DELETE ON tenders BEGIN
+        INSERT INTO tenders_fts(tenders_fts, rowid, title, description, buyer_name)
+        VALUES ('delete', old.id, old.title, old.description, old.buyer_name);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS tenders_fts_au AFTER UPDATE ON tenders BEGIN
+        INSERT INTO tenders_fts(tenders_fts, rowid, title, description, buyer_name)
+        VALUES ('delete', old.id, old.title, old.description, old.buyer_name);
+        INSERT INTO tenders_fts(rowid, title, description, buyer_name)
+        VALUES (new.id, new.title, new.description, new.buyer_name);
+    END
+    """,
+]
+
+# Tabla virtual FTS5 (solo SQLite); rowid coincide con tenders.id
+tenders_fts = table("tenders_fts", column("rowid"))
+
+_ready = set()
+_ready_lock = threading.Lock()
+
+
+class SearchIndexMissingError(RuntimeError):
+    """Falta tenders.search_vector en PostgreSQL (no se aplicó la migración 0005)."""
+
+
+def ensure_search_index(engine) -> None:
+    """
+    Prepara la búsqueda para el motor dado: en SQLite crea (si no existe) la tabla FTS5;
+    en PostgreSQL solo comprueba que la migración creó tenders.search_vector.
+    """
+    key = str(engine.url)
+    if key in _ready:
+        return
+    with _ready_lock:
+        if key in _ready:
+            return
+        dialect = engine.dialect.name
+        with engine.begin() as conn:
+            if dialect == "postgresql":
+                exists = conn.execute(text(
+                    "SELECT 1 FROM information_schema.columns "
+                    "WHERE table_schema = current_schema() AND table_name = 'tenders' "
+                    "AND column_name = 'search_vector'"
+                )).first()
+                if not exists:
+                    raise SearchIndexMissingError(
+                        "Falta tenders.search_vector: ejecuta `alembic upgrade head`"
+                    )
+            elif dialect == "sqlite":
+                exists = conn.execute(
+                    text("SELECT 1 FROM sqlite_master WHERE name = 'tenders_fts'")
+                ).first()
+                for statement in SQLITE_DDL:
+                    conn.execute(text(statement))
+                if not exists:
+                    # Indexar las filas que ya existían
+                    conn.execute(text("INSERT INTO tenders_fts(tenders_fts) VALUES ('rebuild')"))
+            else:
+                raise NotImplementedError(f"Búsqueda de texto no soportada para {dialect}")
+        _ready.add(key)
+
+
+def render_highlight(value: Optional[str]) -> Optional[str]:
+    """Escapa el fragmento resaltado y cambia los marcadores por <mark></mark>."""
+    if value is None:
+        return None
+    return (
+        html.escape(value, quote=False)
+        .replace(SENTINEL_START, HIGHLIGHT_START)
+        .replace(SENTINEL_STOP, HIGHLIGHT_STOP)
+    )
+
+
+def _fts5_query(query: str) -> str:
+    """Convierte el texto del usuario en una consulta FTS5 segura (AND de prefijos)."""
+    terms = re.findall(r"\w+", query, flags=re.UNICODE)
+    return " ".join(f'"{term}"*' for term in terms)
+
+
+def apply_search(query: Query, search_text: str, dialect: str) -> Tuple[Optional[Query], List]:
+    """
+    Añade a una consulta sobre Tender la condición de búsqueda, la relevancia y los resaltados.
+
+    Returns:
+        (consulta ordenada por relevancia, columnas extra [rank, title_hl, description_hl]);
+        la consulta es None si el texto no contiene términos buscables. Los resaltados traen
+        marcadores sin escapar: pasarlos por render_highlight.
+    """
+    if dialect == "postgresql":
+        ts_query = func.websearch_to_tsquery(SEARCH_CONFIG, search_text)
+        vector = literal_column("tenders.search_vector")
+        options = f"StartSel={SENTINEL_START}, StopSel={SENTINEL_STOP}"
+        rank = func.ts_rank(vector, ts_query).label("rank")
+        title_hl = func.ts_headline(SEARCH_CONFIG, Tender.title, ts_query, options + ", HighlightAll=true").label("title_highlight")
+        description_hl = func.ts_headline(
+            SEARCH_CONFIG, func.coalesce(Tender.description, ""), ts_query, options + ", MaxWords=35, MinWords=15"
+        ).label("description_highlight")
+        query = query.filter(vector.op("@@")(ts_query))
+    elif dialect == "sqlite":
+        match = _fts5_query(search_text)
+        if not match:
+            return None, []
+        fts = literal_column("tenders_fts")
+        # bm25 devuelve valores negativos (más negativo = más relevante)
+        rank = (-func.bm25(fts, 10.0, 1.0, 4.0)).label("rank")
+        title_hl = func.highlight(fts, 0, SENTINEL_START, SENTINEL_STOP).label("title_highlight")
+        description_hl = func.snippet(fts, 1, SENTINEL_START, SENTINEL_STOP, "…", 24).label("description_highlight")
+        query = (
+            query.join(tenders_fts, tenders_fts.c.rowid == Tender.id)
+            .filter(fts.op("MATCH")(match))
+        )
+    else:
+        raise NotImplementedError(f"Búsqueda de texto no soportada para {dialect}")
+
+    columns = [rank, title_hl, description_hl]
+    query = query.add_columns(*columns).order_by(rank.desc(), Tender.id.desc())
+    return query, columns
@@ -0,0 +1,161 @@
+"""
+Evaluador de árboles simétricos (oblivious trees) de CatBoost en NumPy puro.
+
+Se genera desde el volcado JSON del modelo (training/export.py) y se guarda como .npz,
+así los workers de la API pueden predecir sin importar el paquete catboost. Replica la
+evaluación de CatBoost: las características y los umbrales se comparan en float32
+(`valor > umbral` enciende el bit de esa profundidad) y las hojas se suman en float64.
+"""
+from typing import Any, Dict, Sequence
+
+import numpy as np
+
+
+# Filas por bloque al evaluar lotes grandes (acota las matrices intermedias condiciones × filas)
+DEFAULT_BLOCK_SIZE = 8192
+
+
+class ObliviousTreeModel:
+    """Mismo contrato que CatBoostClassifier para predict_proba sobre características numéricas."""
+
+    def __init__(
+        self,
+        split_features: np.ndarray,
+        split_borders: np.ndarray,
+        leaf_values: np.ndarray,
+        scale: float = 1.0,
+        bias: float = 0.0,
+        feature_names: Sequence[str] = (),
+        source_sha256: str = "",
+    ):
+        # (árboles, profundidad máxima); los árboles menos profundos se rellenan con umbral +inf
+        self.split_features = np.ascontiguousarray(split_features, dtype=np.int32)
+        self.split_borders = np.ascontiguousarray(split_borders, dtype=np.float32)
+        # (árboles, 2 ** profundidad máxima)
+        self.leaf_values = np.ascontiguousarray(leaf_values, dtype=np.float64)
+        self.scale = float(scale)
+        self.bias = float(bias)
+        self.feature_names = list(feature_names)
+        self.source_sha256 = source_sha256
+
+        tree_count, depth = self.split_features.shape
+        # Condiciones únicas (característica, umbral): cada una se evalúa una sola vez por fila
+        pairs = np.rec.fromarrays([self.split_features.ravel(), self.split_borders.ravel()])
+        unique_pairs, inverse = np.unique(pairs, return_inverse=True)
+        self._condition_features = np.ascontiguousarray(unique_pairs.f0, dtype=np.intp)
+        self._condition_borders = np.ascontiguousarray(unique_pairs.f1, dtype=np.float32)
+        # (profundidad, árboles): índice de la condición que decide cada bit
+        self._tree_conditions = np.ascontiguousarray(inverse.reshape(tree_count, depth).T, dtype=np.intp)
+        # CatBoost admite hasta 16 niveles: el índice de hoja cabe en uint8 o uint16
+        self._index_dtype = np.uint8 if depth <= 8 else np.uint16
+        self._bit_weights = (1 << np.arange(depth)).astype(np.intp)
+        self._tree_offsets = np.arange(tree_count, dtype=np.intp) * self.leaf_values.shape[1]
+        self._flat_leaves = self.leaf_values.ravel()
+        self.n_features = int(self.split_features.max()) + 1 if tree_count else 0
+
+    @property
+    def tree_count_(self) -> int:
+        return int(self.split_features.shape[0])
+
+    @classmethod
+    def from_catboost_json(cls, dump: Dict[str, Any], source_sha256: str = "") -> "ObliviousTreeModel":
+        """Construye el evaluador desde `model.save_model(path, format='json')`."""
+        if (dump.get('features_info') or {}).get('categorical_features'):
+            raise ValueError("El evaluador NumPy solo soporta características numéricas")
+        float_features = dump['features_info']['float_features']
+        flat_index = {feature['feature_index']: feature['flat_feature_index'] for feature in float_features}
+        feature_names = [feature.get('feature_id') or str(feature['flat_feature_index']) for feature in float_features]
+
+        trees = dump['oblivious_trees']
+        depth = max((len(tree['splits']) for tree in trees), default=0)
+        split_features = np.zeros((len(trees), depth), dtype=np.int32)
+        split_borders = np.full((len(trees), depth), np.inf, dtype=np.float32)
+        leaf_values = np.zeros((len(trees), 1 << depth), dtype=np.float64)
+        for index, tree in enumerate(trees):
+            for level, split in enumerate(tree['splits']):
+                if split.get('split_type', 'FloatFeature') != 'FloatFeature':
+                    raise ValueError(f"Tipo de split no soportado: {split['split_type']}")
+                split_features[index, level] = flat_index[split['float_feature_index']]
+                split_borders[index, level] = split['border']
+            values = tree['leaf_values']
+            if len(values) != 1 << len(tree['splits']):
+                raise ValueError("Solo se soportan modelos de clasificación binaria (una dimensión por hoja)")
+            leaf_values[index, :len(values)] = values
+
+        scale, bias = dump.get('scale_and_bias') or [1.0, [0.0]]
+        bias = bias[0] if isinstance(bias, (list, tuple)) else bias
+        return cls(split_features, split_borders, leaf_values, scale, bias, feature_names, source_sha256)
+
+    @classmethod
+    def load(cls, path) -> "ObliviousTreeModel":
+        with np.load(path, allow_pickle=False) as data:
+            return cls(
+                data['split_features'],
+                data['split_borders'],
+                data['leaf_values'],
+                float(data['scale']),
+                float(data['bias']),
+                [str(name) for name in data['feature_names']],
+                str(data['source_sha256']),
+            )
+
+    def save(self, path) -> None:
+        with open(path, 'wb') as fp:
+            np.savez_compressed(
+                fp,
+                split_features=self.split_features,
+                split_borders=self.split_borders,
+                leaf_values=self.leaf_values,
+                scale=np.float64(self.scale),
+                bias=np.float64(self.bias),
+                feature_names=np.array(self.feature_names, dtype=str),
+                source_sha256=np.array(self.source_sha256),
+            )
+
+    def _raw_row(self, row: np.ndarray) -> float:
+        # Una fila (camino de la API): pocas operaciones de NumPy, sin bucles por nivel
+        bits = (row[self._condition_features] > self._condition_borders)[self._tree_conditions]
+        if self._index_dtype is np.uint8:
+            leaf_index = np.packbits(bits, axis=0, bitorder='little')[0] + self._tree_offsets
+        else:
+            leaf_index = self._bit_weights @ bits + self._tree_offsets
+        return float(np.take(self._flat_leaves, leaf_index).sum())
+
+    def _raw_block(self, features: np.ndarray) -> np.ndarray:
+        # (condiciones únicas, filas): valor > umbral; filas en el eje contiguo
+        conditions = features.T[self._condition_features] > self._condition_borders[:, None]
+        # Índice de hoja de cada árbol armado bit a bit, nivel por nivel: (árboles, filas)
+        leaf_index = np.zeros((self.tree_count_, features.shape[0]), dtype=self._index_dtype)
+        for level, columns in enumerate(self._tree_conditions):
+            leaf_index |= conditions[columns].view(np.uint8).astype(self._index_dtype, copy=False) << level
+        leaf_index = leaf_index.astype(np.intp)
+        leaf_index += self._tree_offsets[:, None]
+        return np.take(self._flat_leaves, leaf_index).sum(axis=0)
+
+    def predict_raw(self, features, block_size: int = DEFAULT_BLOCK_SIZE) -> np.ndarray:
+        """Suma de hojas escalada (log-odds) por fila."""
+        features = np.asarray(features, dtype=np.float32)
+        if features.ndim == 1:
+            features = features.reshape(1, -1)
+        if self.feature_names and features.shape[1] != len(self.feature_names):
+            raise ValueError(f"Se esperaban {len(self.feature_names)} columnas, llegaron {features.shape[1]}")
+        if features.shape[1] < self.n_features:
+            raise ValueError(f"Se esperaban al menos {self.n_features} columnas, llegaron {features.shape[1]}")
+        if features.shape[0] == 1:
+            raw = np.array([self._raw_row(features[0])])
+        elif features.shape[0] <= block_size:
+            raw = self._raw_block(features)
+        else:
+            raw = np.concatenate([
+                self._raw_block(features[start:start + block_size])
+                for start in range(0, features.shape[0], block_size)
+            ])
+        return raw * self.scale + self.bias
+
+    def predict_proba(self, features) -> np.ndarray:
+        """Array (filas, 2) con [prob_clase_0, prob_clase_1], igual que CatBoost."""
+        raw = self.predict_raw(features)
+        probabilities = np.empty((raw.shape[0], 2), dtype=np.float64)
+        probabilities[:, 1] = 1.0 / (1.0 + np.exp(-raw))
+        probabilities[:, 0] = 1.0 - probabilities[:, 1]
+        return probabilities
@@ -0,0 +1,425 @@
+"""
+Matriz de probabilidades de ganar precalculada para las licitaciones abiertas.
+
+Para cada licitación abierta se evalúa el modelo sobre una grilla fija de relaciones
+oferta/presupuesto × duraciones de contrato, todas las licitaciones de un lote en una
+sola llamada a predict_proba, y se guarda el resultado (float32) en tender_win_matrices.
+La consulta "¿qué probabilidad tengo ofertando X% bajo el presupuesto?" se responde
+interpolando sobre la grilla, sin llamar al modelo.
+
+La matriz guarda las entradas con las que se calculó (competidores, categoría, presupuesto,
+duración del proceso, versión del modelo y de la grilla); si alguna cambió se considera
+vencida, no se sirve y el job la recalcula.
+
+Con varios workers, la pasada completa la hace uno a la vez (advisory lock en PostgreSQL;
+los demás la saltan) y las matrices se escriben con upsert, así que los recálculos
+puntuales concurrentes no chocan con la clave primaria.
+"""
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from core.metrics import observe_inference
+from models.tender import Tender
+from models.tender_win_matrix import TenderWinMatrix
+from services.model_manager import LoadedModel, model_manager
+from services.tender_scoring import OPEN_STATUSES
+
+logger = logging.getLogger(__name__)
+
+
+# Cambiar GRID_VERSION si se modifica la grilla: invalida todas las matrices guardadas
+GRID_VERSION = "g1"
+BID_RATIOS = np.round(np.arange(0.50, 1.2 + 1e-9, 0.025), 4)
+CONTRACT_DURATIONS = np.array([30, 90, 180, 365, 540, 730, 1095], dtype=np.float64)
+GRID_SHAPE = (len(BID_RATIOS), len(CONTRACT_DURATIONS))
+
+DEFAULT_BATCH_SIZE = 500
+
+# Advisory lock de la pasada completa, compartido por todos los procesos
+FULL_REFRESH_LOCK_ID = int.from_bytes(hashlib.sha256(b"win_matrix:full_refresh").digest()[:8], 'big', signed=True)
+
+# Valores por defecto del flujo de participación cuando la licitación no tiene el dato
+DEFAULT_NUMBER_OF_TENDERERS = 1
+DEFAULT_MAIN_CATEGORY = 'Servicios'
+DEFAULT_BUDGET = 100000.0
+DEFAULT_TENDER_DURATION_DAYS = 28
+DEFAULT_CONTRACT_DURATION_DAYS = 365
+
+
+@dataclass(frozen=True)
+class TenderInputs:
+    """Entradas del modelo que dependen solo de la licitación."""
+    number_of_tenderers: int
+    main_category: str
+    budget_amount: float
+    tender_duration_days: int
+
+
+def tender_duration_days(tender: Tender) -> int:
+    """Duración del proceso de licitación (columna derivada, sus fechas o 28 días por defecto)."""
+    if tender.tender_duration_days:
+        return tender.tender_duration_days
+    if tender.tender_start_date and tender.tender_end_date:
+        return max((tender.tender_end_date - tender.tender_start_date).days, 1)
+    return DEFAULT_TENDER_DURATION_DAYS
+
+
+def tender_inputs(tender: Tender) -> TenderInputs:
+    """Mismas entradas (y valores por defecto) que usa la creación de participaciones."""
+    return TenderInputs(
+        number_of_tenderers=tender.number_of_tenderers or DEFAULT_NUMBER_OF_TENDERERS,
+        main_category=tender.main_category or DEFAULT_MAIN_CATEGORY,
+        budget_amount=float(tender.budget_amount) if tender.budget_amount else DEFAULT_BUDGET,
+        tender_duration_days=tender_duration_days(tender),
+    )
+
+
+def is_current(row: Optional[TenderWinMatrix], inputs: TenderInputs, model_version: str) -> bool:
+    """True si la matriz guardada corresponde a las entradas y al modelo actuales."""
+    return (
+        row is not None
+        and row.model_version == model_version
+        and row.grid_version == GRID_VERSION
+        and row.number_of_tenderers == inputs.number_of_tenderers
+        and row.main_category == inputs.main_category
+        and Decimal(row.budget_amount) == Decimal(str(round(inputs.budget_amount, 2)))
+        and row.tender_duration_days == inputs.tender_duration_days
+    )
+
+
+def _is_valid(inputs: TenderInputs, loaded: LoadedModel) -> bool:
+    return (
+        inputs.main_category in loaded.category_map
+        and inputs.number_of_tenderers > 0
+        and inputs.budget_amount > 0
+        and inputs.tender_duration_days > 0
+    )
+
+
+def compute_matrices(inputs: Sequence[TenderInputs], loaded: LoadedModel) -> np.ndarray:
+    """
+    Evalúa la grilla para varias licitaciones en una sola llamada al modelo.
+
+    Returns:
+        Array (n_licitaciones, len(BID_RATIOS), len(CONTRACT_DURATIONS)) de float32
+    """
+    n_tenders = len(inputs)
+    if n_tenders == 0:
+        return np.empty((0, *GRID_SHAPE), dtype=np.float32)
+    cells = GRID_SHAPE[0] * GRID_SHAPE[1]
+
+    tenderers = np.array([item.number_of_tenderers for item in inputs], dtype=np.float64)
+    categories = np.array([loaded.category_map[item.main_category] for item in inputs], dtype=np.float64)
+    budgets = np.array([item.budget_amount for item in inputs], dtype=np.float64)
+    durations = np.array([item.tender_duration_days for item in inputs], dtype=np.float64)
+
+    # Grilla (relación, duración) aplanada en orden C y repetida por licitación
+    ratio_grid, contract_grid = np.meshgrid(BID_RATIOS, CONTRACT_DURATIONS, indexing='ij')
+
+    # Columnas de INPUT_FEATURES; select_features deja las del modelo
+    # [NumberOfTenderers, MainCategory, Budget, BidAmount, TenderDurationDays, ContractDurationDays, Winner]
+    features = np.empty((n_tenders * cells, 7), dtype=np.float64)
+    features[:, 0] = np.repeat(tenderers, cells)
+    features[:, 1] = np.repeat(categories, cells)
+    features[:, 2] = np.repeat(budgets, cells)
+    features[:, 3] = features[:, 2] * np.tile(ratio_grid.ravel(), n_tenders)
+    features[:, 4] = np.repeat(durations, cells)
+    features[:, 5] = np.tile(contract_grid.ravel(), n_tenders)
+    features[:, 6] = 0
+
+    started = time.perf_counter()
+    probabilities = loaded.model.predict_proba(loaded.select_features(features))[:, 1]
+    observe_inference(loaded.backend, 'matrix', time.perf_counter() - started, rows=features.shape[0])
+    return probabilities.astype(np.float32).reshape(n_tenders, *GRID_SHAPE)
+
+
+def _open_tenders_query():
+    return select(Tender).where(func.lower(Tender.status).in_(OPEN_STATUSES))
+
+
+def _write_matrices(db: Session, rows: List[Dict]) -> None:
+    """INSERT ... ON CONFLICT (tender_id) DO UPDATE en PostgreSQL y SQLite; DELETE + INSERT en otros."""
+    dialect = db.get_bind().dialect.name
+    if dialect not in ('postgresql', 'sqlite'):
+        db.execute(delete(TenderWinMatrix).where(TenderWinMatrix.tender_id.in_([row['tender_id'] for row in rows])))
+        db.execute(TenderWinMatrix.__table__.insert(), rows)
+        return
+    insert = postgresql.insert if dialect == 'postgresql' else sqlite.insert
+    statement = insert(TenderWinMatrix.__table__)
+    updates = {column: statement.excluded[column] for column in rows[0] if column != 'tender_id'}
+    updates['computed_at'] = func.now()
+    db.execute(statement.on_conflict_do_update(index_elements=['tender_id'], set_=updates), rows)
+
+
+@contextmanager
+def full_refresh_lock(db: Session):
+    """
+    Advisory lock de sesión en PostgreSQL, en una conexión aparte en autocommit (la pasada
+    hace commit por lote). Devuelve False si otro proceso ya la está haciendo; en otros
+    motores siempre True.
+    """
+    engine = db.get_bind()
+    if engine.dialect.name != 'postgresql':
+        yield True
+        return
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        acquired = conn.scalar(select(func.pg_try_advisory_lock(FULL_REFRESH_LOCK_ID)))
+        try:
+            yield bool(acquired)
+        finally:
+            if acquired:
+                conn.scalar(select(func.pg_advisory_unlock(FULL_REFRESH_LOCK_ID)))
+
+
+def refresh_win_matrices(
+    db: Session,
+    tender_ids: Optional[Iterable[int]] = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    force: bool = False,
+) -> Dict[str, int]:
+    """
+    Recalcula las matrices vencidas o faltantes de las licitaciones abiertas, por lotes
+    de ids (cada lote es una llamada al modelo y un commit). Borra las de licitaciones
+    que ya no están abiertas.
+
+    Returns:
+        {'checked', 'computed', 'skipped', 'pruned'}
+    """
+    loaded = model_manager.current()
+    stats = {'checked': 0, 'computed': 0, 'skipped': 0, 'pruned': 0}
+
+    base_query = _open_tenders_query()
+    if tender_ids is not None:
+        base_query = base_query.where(Tender.id.in_(list(tender_ids)))
+
+    last_id = 0
+    while True:
+        tenders: List[Tender] = db.scalars(
+            base_query.where(Tender.id > last_id).order_by(Tender.id).limit(batch_size)
+        ).all()
+        if not tenders:
+            break
+        last_id = tenders[-1].id
+        stats['checked'] += len(tenders)
+
+        existing = {
+            row.tender_id: row
+            for row in db.scalars(
+                select(TenderWinMatrix).where(TenderWinMatrix.tender_id.in_([t.id for t in tenders]))
+            )
+        }
+        stale = []
+        for tender in tenders:
+            inputs = tender_inputs(tender)
+            if not _is_valid(inputs, loaded):
+                stats['skipped'] += 1
+                continue
+            if force or not is_current(existing.get(tender.id), inputs, loaded.version):
+                stale.append((tender.id, inputs))
+
+        if stale:
+            matrices = compute_matrices([inputs for _, inputs in stale], loaded)
+            _write_matrices(db, [
+                {
+                    'tender_id': tender_id,
+                    'model_version': loaded.version,
+                    'grid_version': GRID_VERSION,
+                    'number_of_tenderers': inputs.number_of_tenderers,
+                    'main_category': inputs.main_category,
+                    'budget_amount': Decimal(str(round(inputs.budget_amount, 2))),
+                    'tender_duration_days': inputs.tender_duration_days,
+                    'probabilities': matrix.astype('<f4').tobytes(),
+                }
+                for (tender_id, inputs), matrix in zip(stale, matrices)
+            ])
+            stats['computed'] += len(stale)
+        db.commit()
+        db.expunge_all()
+
+    if tender_ids is None:
+        pruned = db.execute(
+            delete(TenderWinMatrix).where(
+                TenderWinMatrix.tender_id.not_in(_open_tenders_query().with_only_columns(Tender.id))
+            )
+        )
+        stats['pruned'] = pruned.rowcount or 0
+        db.commit()
+    return stats
+
+
+def interpolate(matrix: np.ndarray, bid_ratio: float, contract_duration_days: float) -> Optional[float]:
+    """Interpolación bilineal sobre la grilla; None si el punto cae fuera de ella."""
+    if not (BID_RATIOS[0] <= bid_ratio <= BID_RATIOS[-1]):
+        return None
+    if not (CONTRACT_DURATIONS[0] <= contract_duration_days <= CONTRACT_DURATIONS[-1]):
+        return None
+
+    def bracket(axis: np.ndarray, value: float):
+        upper = min(int(np.searchsorted(axis, value, side='right')), len(axis) - 1)
+        lower = max(upper - 1, 0)
+        span = axis[upper] - axis[lower]
+        return lower, upper, (value - axis[lower]) / span if span else 0.0
+
+    r0, r1, tr = bracket(BID_RATIOS, bid_ratio)
+    d0, d1, td = bracket(CONTRACT_DURATIONS, contract_duration_days)
+    top = matrix[r0, d0] * (1 - td) + matrix[r0, d1] * td
+    bottom = matrix[r1, d0] * (1 - td) + matrix[r1, d1] * td
+    return float(top * (1 - tr) + bottom * tr)
+
+
+def _signature(inputs: TenderInputs, model_version: str) -> tuple:
+    return (model_version, GRID_VERSION, inputs.number_of_tenderers, inputs.main_category,
+            round(inputs.budget_amount, 2), inputs.tender_duration_days)
+
+
+class MatrixCache:
+    """LRU en proceso de matrices decodificadas (~0.8 KB c/u), validadas por sus entradas."""
+
+    def __init__(self, max_entries: int = 4096):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[int, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, tender_id: int, signature: tuple) -> Optional[np.ndarray]:
+        with self._lock:
+            entry = self._entries.get(tender_id)
+            if entry is None or entry[0] != signature:
+                return None
+            self._entries.move_to_end(tender_id)
+            return entry[1]
+
+    def put(self, tender_id: int, signature: tuple, matrix: np.ndarray) -> None:
+        with self._lock:
+            self._entries[tender_id] = (signature, matrix)
+            self._entries.move_to_end(tender_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+matrix_cache = MatrixCache()
+
+
+def lookup_win_probability(
+    db: Session,
+    tender: Tender,
+    bid_amount: float,
+    contract_duration_days: float,
+) -> Optional[Tuple[float, str]]:
+    """
+    (probabilidad interpolada, versión del modelo de la matriz), o None si no hay matriz
+    vigente o el punto queda fuera de la grilla (en ese caso se debe llamar al modelo).
+    """
+    inputs = tender_inputs(tender)
+    model_version = model_manager.current().version
+    signature = _signature(inputs, model_version)
+    matrix = matrix_cache.get(tender.id, signature)
+    if matrix is None:
+        row = db.get(TenderWinMatrix, tender.id)
+        if row is None or not is_current(row, inputs, model_version):
+            return None
+        matrix = np.frombuffer(row.probabilities, dtype='<f4').reshape(GRID_SHAPE)
+        matrix_cache.put(tender.id, signature, matrix)
+    probability = interpolate(matrix, bid_amount / inputs.budget_amount, contract_duration_days)
+    return None if probability is None else (probability, model_version)
+
+
+class WinMatrixRefresher:
+    """
+    Hilo que recalcula las matrices vencidas: todas al arrancar y cada `interval_seconds`,
+    y las de una licitación concreta en cuanto se pide (p. ej. al editarla).
+    """
+
+    def __init__(self, session_factory=None):
+        self._session_factory = session_factory
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._pending: Set[int] = set()
+        self._lock = threading.Lock()
+        self.last_run: Optional[Dict[str, float]] = None
+        self.last_error: Optional[str] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def run_once(self, tender_ids: Optional[Iterable[int]] = None) -> Dict[str, int]:
+        """
+        Pasada completa (sin `tender_ids`) o de las licitaciones dadas. Si otro proceso ya
+        hace la pasada completa, esta se salta y devuelve {'locked': 1}.
+        """
+        if self._session_factory is None:
+            from core.database import SessionLocal
+            self._session_factory = SessionLocal
+        started = time.perf_counter()
+        db = self._session_factory()
+        try:
+            if tender_ids is not None:
+                stats = refresh_win_matrices(db, tender_ids)
+            else:
+                with full_refresh_lock(db) as acquired:
+                    stats = refresh_win_matrices(db) if acquired else {'locked': 1}
+        finally:
+            db.close()
+        self.last_run = {**stats, 'seconds': round(time.perf_counter() - started, 3), 'at': time.time()}
+        return stats
+
+    def request_refresh(self, tender_id: int) -> None:
+        """Encola una licitación para recalcular (no hace nada si el job no está corriendo)."""
+        if not self.running:
+            return
+        with self._lock:
+            self._pending.add(tender_id)
+        self._wake.set()
+
+    def start(self, interval_seconds: float) -> None:
+        if interval_seconds <= 0 or self.running:
+            return
+        self._stop.clear()
+
+        def loop():
+            full = True
+            while not self._stop.is_set():
+                with self._lock:
+                    pending, self._pending = self._pending, set()
+                try:
+                    if full:
+                        self.run_once()
+                    elif pending:
+                        self.run_once(pending)
+                    self.last_error = None
+                except Exception as e:
+                    self.last_error = str(e)
+                    logger.exception("Error precalculando matrices de probabilidad: %s", e)
+                # Despierta antes si llega una licitación editada; si vence el intervalo, pasada completa
+                full = not self._wake.wait(interval_seconds)
+                self._wake.clear()
+
+        self._thread = threading.Thread(target=loop, name="win-matrix-refresh", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout=30)
+        self._thread = None
+
+
+win_matrix_refresher = WinMatrixRefresher()
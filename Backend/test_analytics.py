@@ -0,0 +1,140 @@
+"""
+Agregados de services.analytics sobre SQLite en memoria: se refrescan las tablas resumen
+y se comparan con lo que da recorrer las filas en Python.
+"""
+import os
+import sys
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+
+TENDERS = [
+    # (status, categoría, publicación, presupuesto, competidores)
+    ("active", "Bienes", datetime(2025, 1, 10), Decimal("500000.00"), 3),
+    ("active", "Bienes", datetime(2025, 1, 20), Decimal("500000.01"), None),
+    ("Abierta", "Obras", datetime(2025, 2, 5), Decimal("7200000.00"), 5),
+    ("complete", "Servicios", datetime(2025, 2, 6), None, 2),
+    ("complete", "Servicios", datetime(2025, 3, 1), Decimal("0"), 4),
+    ("cancelled", None, None, Decimal("1250000.00"), None),
+]
+
+
+@pytest.fixture()
+def db():
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import Session
+
+    import models
+
+    engine = create_engine("sqlite://")
+    models.Base.metadata.create_all(engine)
+    session = Session(bind=engine)
+    _seed(session)
+    try:
+        yield session
+    finally:
+        session.close()
+        engine.dispose()
+
+
+def _seed(db) -> None:
+    from models import Company, Participation, Tender
+
+    # SQLite no valida las claves foráneas: no hace falta sembrar el catálogo geográfico
+    db.add_all([
+        Company(id=i, legal_name=f"Empresa {i}", tax_id=f"{i:013d}", country_id=1, province_id=1, city_id=1)
+        for i in (1, 2, 3)
+    ])
+    db.flush()
+    for i, (status, category, published, budget, tenderers) in enumerate(TENDERS, start=1):
+        db.add(Tender(
+            id=i, external_id=f"T-{i}", title=f"Licitación {i}", status=status, main_category=category,
+            publish_date=published, budget_amount=budget, number_of_tenderers=tenderers,
+            publishing_company_id=3, created_by_user_id=1, created_at=datetime(2025, 4, 15),
+        ))
+    db.flush()
+    db.add_all([
+        Participation(id=1, tender_id=1, company_id=1, participation_status="awarded", predicted_win_prob=Decimal("0.8")),
+        Participation(id=2, tender_id=2, company_id=1, participation_status="submitted", predicted_win_prob=Decimal("0.4")),
+        Participation(id=3, tender_id=3, company_id=1, participation_status="submitted", predicted_win_prob=None),
+        Participation(id=4, tender_id=3, company_id=2, participation_status="rejected", predicted_win_prob=Decimal("0.3")),
+        Participation(id=5, tender_id=4, company_id=1, participation_status="submitted", predicted_win_prob=Decimal("0.6")),
+    ])
+    db.flush()
+    # La licitación 4 la ganó la participación 5 aunque su estado siga en 'submitted'
+    db.get(Tender, 4).winning_participation_id = 5
+    db.commit()
+
+
+def test_refresh_and_overview(db):
+    from services import analytics
+
+    stats = analytics.refresh_summaries(db)
+    assert stats["companies"] == 2
+
+    overview = analytics.overview(db)
+    assert overview["total_tenders"] == len(TENDERS)
+    assert overview["open_tenders"] == 3
+    assert overview["budget_total"] == pytest.approx(float(sum(t[3] or 0 for t in TENDERS)))
+    assert overview["avg_number_of_tenderers"] == pytest.approx((3 + 5 + 2 + 4) / 4)
+    assert overview["refreshed_at"] is not None
+
+
+def test_tenders_by_dimension(db):
+    from services import analytics
+
+    analytics.refresh_summaries(db)
+
+    by_status = {row["key"]: row for row in analytics.tenders_by(db, "status")}
+    assert by_status["active"]["tenders"] == 2
+    assert by_status["active"]["avg_number_of_tenderers"] == 3
+    assert by_status["complete"]["budget_total"] == 0
+
+    # Sin publish_date se usa created_at
+    by_month = analytics.tenders_by(db, "month")
+    assert [(row["key"], row["tenders"]) for row in by_month] == [
+        ("2025-01", 2), ("2025-02", 2), ("2025-03", 1), ("2025-04", 1),
+    ]
+
+    services_only = analytics.tenders_by(db, "month", category_filter="Servicios")
+    assert [row["key"] for row in services_only] == ["2025-02", "2025-03"]
+
+
+def test_budget_distribution(db):
+    from services import analytics
+
+    analytics.refresh_summaries(db)
+    distribution = analytics.budget_distribution(db)
+
+    counts = {bucket["label"]: bucket["tenders"] for bucket in distribution["buckets"]}
+    assert len(counts) == len(analytics.BUDGET_BUCKETS)
+    # Tramos cerrados a la derecha, como pd.cut
+    assert counts["< $500k"] == 1
+    assert counts["$500k - $1M"] == 1
+    assert counts["$1M - $1.5M"] == 1
+    assert counts["> $5M"] == 1
+    assert distribution["without_budget"] == 2
+
+
+def test_company_stats(db):
+    from services import analytics
+
+    analytics.refresh_summaries(db)
+
+    company = analytics.company_stats(db, 1)
+    assert company["participations"] == 4
+    # Ganó la 1 (awarded) y la 5 (ganadora de la licitación); la 2 y la 3 siguen pendientes
+    assert company["won"] == 2
+    assert company["decided"] == 2
+    assert company["win_rate"] == 1.0
+    assert company["avg_predicted_win_probability"] == pytest.approx(0.6)
+
+    rejected = analytics.company_stats(db, 2)
+    assert (rejected["won"], rejected["decided"], rejected["win_rate"]) == (0, 1, 0.0)
+
+    empty = analytics.company_stats(db, 3)
+    assert empty["participations"] == 0 and empty["win_rate"] is None
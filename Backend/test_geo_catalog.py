@@ -0,0 +1,126 @@
+"""
+Catálogos geográficos sobre SQLite: ETag por codificación, 304 con If-None-Match,
+compresión gzip por encima de MIN_COMPRESS_BYTES y subárbol de /geo/tree (404 si no existe).
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture()
+def client(monkeypatch):
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import Session
+
+    import models
+    from api.v1 import catalog, routes_geo, routes_provinces
+    from models import Canton, City, Country, Parish, Province
+    from services.geo_catalog import CATALOGS, GeoCatalog
+
+    engine = create_engine("sqlite://")
+    models.Base.metadata.create_all(engine)
+    db = Session(bind=engine)
+    db.add_all([Country(id=1, name="Ecuador", iso_code="EC"), Country(id=2, name="Perú", iso_code="PE")])
+    db.add(Province(id=100, name="Lima", country_id=2))
+    # Suficientes provincias para que la lista de Ecuador supere MIN_COMPRESS_BYTES
+    for i in range(1, 41):
+        db.add(Province(id=i, name=f"Provincia {i:02d}", country_id=1))
+        db.add(Canton(id=i, name=f"Cantón {i:02d}", province_id=i))
+        db.add(City(id=i, name=f"Ciudad {i:02d}", province_id=i))
+        db.add(Parish(id=i, name=f"Parroquia {i:02d}", canton_id=i))
+    db.commit()
+
+    # Catálogo precargado sin vencimiento: las rutas no abren sesiones propias
+    geo = GeoCatalog(ttl_seconds=0)
+    for name in CATALOGS:
+        geo.load(db, name)
+    db.close()
+    monkeypatch.setattr(catalog, "geo_catalog", geo)
+    monkeypatch.setattr(routes_geo, "geo_catalog", geo)
+
+    app = FastAPI()
+    app.include_router(routes_provinces.router, prefix="/api/v1/provinces")
+    app.include_router(routes_geo.router, prefix="/api/v1/geo")
+    with TestClient(app) as test_client:
+        yield test_client
+    engine.dispose()
+
+
+def test_negotiate_encoding_and_etag_matching():
+    from api.v1.catalog import etag_matches, negotiate_encoding
+    from services.geo_catalog import supported_encodings
+
+    assert negotiate_encoding(None) is None
+    assert negotiate_encoding("gzip") == "gzip"
+    assert negotiate_encoding("gzip;q=0, identity") is None
+    assert negotiate_encoding("br;q=0, gzip;q=0.5") == "gzip"
+    assert negotiate_encoding("*") == supported_encodings()[0]
+    assert negotiate_encoding("*, gzip;q=0, br;q=0") is None
+
+    assert etag_matches('W/"abc", "def"', '"abc"')
+    assert etag_matches("*", '"abc"')
+    assert not etag_matches('"abc-gzip"', '"abc"')
+    assert not etag_matches(None, '"abc"')
+
+
+def test_gzip_body_and_conditional_get(client):
+    response = client.get("/api/v1/provinces/?country_id=1", headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["etag"].endswith('-gzip"')
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert len(response.json()) == 40
+
+    etag = response.headers["etag"]
+    cached = client.get(
+        "/api/v1/provinces/?country_id=1", headers={"Accept-Encoding": "gzip", "If-None-Match": etag}
+    )
+    assert cached.status_code == 304
+    assert cached.content == b""
+    assert cached.headers["etag"] == etag
+
+    # Sin comprimir es otra representación: otro ETag y el de gzip no valida
+    plain = client.get(
+        "/api/v1/provinces/?country_id=1", headers={"Accept-Encoding": "gzip;q=0", "If-None-Match": etag}
+    )
+    assert plain.status_code == 200
+    assert "content-encoding" not in plain.headers
+    assert plain.headers["etag"] != etag
+    assert plain.json() == response.json()
+
+    weak = client.get(
+        "/api/v1/provinces/?country_id=1",
+        headers={"Accept-Encoding": "identity", "If-None-Match": "W/" + plain.headers["etag"]},
+    )
+    assert weak.status_code == 304
+
+
+def test_small_payload_is_not_compressed(client):
+    response = client.get("/api/v1/provinces/?country_id=2", headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert "content-encoding" not in response.headers
+    assert [province["name"] for province in response.json()] == ["Lima"]
+
+
+def test_geo_tree_subtree_and_unknown_country(client):
+    tree = client.get("/api/v1/geo/tree").json()
+    assert [country["name"] for country in tree["countries"]] == ["Ecuador", "Perú"]
+
+    response = client.get("/api/v1/geo/tree?country_id=1")
+    assert response.status_code == 200
+    (country,) = response.json()["countries"]
+    assert country["id"] == 1 and len(country["provinces"]) == 40
+    province = country["provinces"][0]
+    assert province["name"] == "Provincia 01"
+    assert province["cities"] == [{"id": 1, "name": "Ciudad 01"}]
+    assert province["cantons"] == [{"id": 1, "name": "Cantón 01", "parishes": [{"id": 1, "name": "Parroquia 01"}]}]
+
+    cached = client.get("/api/v1/geo/tree?country_id=1", headers={"If-None-Match": response.headers["etag"]})
+    assert cached.status_code == 304
+
+    assert client.get("/api/v1/geo/tree?country_id=999").status_code == 404
@@ -0,0 +1,74 @@
+"""
+Experimentos de modelos sin base de datos: asignación estable al challenger, calibración
+y reporte por versión y rol enlazando predicciones con resultados (rid → pid).
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_challenger_bucket_is_stable():
+    from services.model_experiments import ExperimentConfig, ModelExperiments, challenger_bucket
+
+    # Valores fijos: cambiar el hash reasignaría empresas entre champion y challenger
+    assert challenger_bucket(1, "v2") == 63.82
+    assert challenger_bucket(42, "v2") == 84.58
+    assert challenger_bucket(42, "v3") == 46.35
+
+    experiments = ModelExperiments(ExperimentConfig(challenger_version="v2", challenger_percent=30.0))
+    assigned = [experiments.challenger_for(company_id) for company_id in range(1, 2001)]
+    assert assigned == [experiments.challenger_for(company_id) for company_id in range(1, 2001)]
+    assert set(assigned) == {"v2", None}
+    assert 0.25 < assigned.count("v2") / len(assigned) < 0.35
+    assert experiments.challenger_for(None) is None
+
+
+def test_calibration_metrics():
+    import numpy as np
+    from services.model_experiments import _calibration
+
+    calibration = _calibration(np.array([0.1, 0.4, 0.6, 0.9]), np.array([0.0, 1.0, 0.0, 1.0]), bins=2)
+
+    assert calibration["rows"] == 4
+    assert calibration["brier"] == pytest.approx(0.185)
+    # Cada bucket predice 0.25 / 0.75 y observa 0.5
+    assert calibration["ece"] == pytest.approx(0.25)
+    assert [bucket["count"] for bucket in calibration["buckets"]] == [2, 2]
+    assert [bucket["predicted"] for bucket in calibration["buckets"]] == [0.25, 0.75]
+    assert [bucket["observed"] for bucket in calibration["buckets"]] == [0.5, 0.5]
+
+
+def test_report_by_version_and_role_with_outcomes():
+    from services.model_experiments import build_report
+
+    entries = [
+        {"rid": "a", "r": "champion", "m": "v1", "p": 0.8, "ms": 1.0},
+        {"rid": "a", "r": "shadow", "m": "v2", "p": 0.6, "ms": 3.0},
+        {"rid": "b", "r": "challenger", "m": "v2", "p": 0.3, "ms": 2.0},
+        {"rid": "c", "r": "champion", "m": "v1", "p": 0.5, "ms": 1.0},
+        {"rid": "a", "pid": 10},
+        {"rid": "b", "pid": 11},
+        # Enlace a una participación sin resultado: no entra en la calibración
+        {"rid": "c", "pid": 12},
+    ]
+
+    report = build_report(entries, outcomes={10: 1, 11: 0})
+
+    assert sorted(report) == ["v1:champion", "v2:challenger", "v2:shadow"]
+    challenger, shadow = report["v2:challenger"], report["v2:shadow"]
+    assert (challenger["role"], challenger["predictions"], challenger["mean_probability"]) == ("challenger", 1, 0.3)
+    assert (shadow["role"], shadow["predictions"], shadow["mean_probability"]) == ("shadow", 1, 0.6)
+    assert challenger["latency_ms"]["max"] == 2.0 and shadow["latency_ms"]["max"] == 3.0
+
+    # El shadow se compara con lo servido en la misma petición
+    assert shadow["vs_served"]["pairs"] == 1
+    assert shadow["vs_served"]["mean_abs_diff"] == pytest.approx(0.2)
+    assert "vs_served" not in challenger
+
+    assert report["v1:champion"]["calibration"]["rows"] == 1
+    assert report["v1:champion"]["calibration"]["brier"] == pytest.approx(0.04)
+    assert challenger["calibration"]["brier"] == pytest.approx(0.09)
+    assert shadow["calibration"]["brier"] == pytest.approx(0.16)
@@ -0,0 +1,76 @@
+"""
+Recarga en caliente del ModelManager sobre un registro temporal con el modelo heredado:
+validación antes de activar, versiones inexistentes, recarga sin cambios y caché de versiones.
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture()
+def manager(tmp_path):
+    from services.model_manager import BACKEND_CATBOOST, LEGACY_MODEL_PATH, ModelManager
+    from training.registry import ModelRegistry
+
+    registry = ModelRegistry(tmp_path / "registry")
+    registry.register("v1", LEGACY_MODEL_PATH, {}, activate=True)
+    registry.register("v2", LEGACY_MODEL_PATH, {})
+    # El manifiesto declara una feature que el servicio no calcula: no pasa la validación
+    registry.register("broken", LEGACY_MODEL_PATH, {"features": ["Unknown"]})
+    return ModelManager(registry, backend=BACKEND_CATBOOST)
+
+
+def test_failed_validation_keeps_previous_model(manager):
+    from services.model_manager import ModelValidationError
+
+    previous = manager.current()
+    assert previous.version == "v1"
+
+    with pytest.raises(ModelValidationError):
+        manager.reload(version="broken")
+
+    assert manager.current() is previous
+    assert manager.registry.active_version() == "v1"
+    assert manager.metrics.failures == 1 and manager.metrics.swaps == 0
+
+
+def test_unknown_version_keeps_previous_model(manager):
+    previous = manager.current()
+
+    with pytest.raises(FileNotFoundError):
+        manager.reload(version="missing")
+
+    assert manager.current() is previous
+    assert manager.registry.active_version() == "v1"
+
+
+def test_reload_without_changes_is_noop(manager):
+    previous = manager.current()
+    loads = manager.metrics.loads
+
+    assert manager.reload(force=False) is previous
+    assert manager.metrics.loads == loads and manager.metrics.swaps == 0
+    assert not manager.check_for_updates()
+
+    # Al cambiar ACTIVE sí recarga
+    manager.registry.activate("v2")
+    assert manager.check_for_updates()
+    assert manager.current().version == "v2"
+
+
+def test_get_version_is_cached_until_swap(manager):
+    current = manager.current()
+    assert manager.get_version("v1") is current
+
+    challenger = manager.get_version("v2")
+    assert manager.get_version("v2") is challenger
+
+    swapped = manager.reload(version="v2")
+    assert manager.registry.active_version() == "v2"
+    # La versión en servicio se reutiliza y la caché anterior se descartó
+    assert swapped is not challenger
+    assert manager.get_version("v2") is swapped
+    assert manager.get_version("v1") is not current
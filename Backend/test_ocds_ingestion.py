@@ -0,0 +1,109 @@
+"""
+Ingesta OCDS sobre SQLite en memoria: los releases de adjudicación y contrato (sin title
+ni status) completan la licitación ya cargada sin borrar columnas ni reabrirla.
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+
+TENDER_RELEASE = {
+    "ocid": "ocds-5wno2w-LIC-001",
+    "date": "2024-03-01T10:00:00Z",
+    "tender": {
+        "id": "LIC-001",
+        "title": "Adquisición de equipos",
+        "description": "Equipos de cómputo",
+        "status": "active",
+        "mainProcurementCategory": "goods",
+        "value": {"amount": 120000, "currency": "USD"},
+        "tenderPeriod": {"startDate": "2024-03-01", "endDate": "2024-03-15"},
+        "numberOfTenderers": 4,
+    },
+}
+
+AWARD_RELEASE = {
+    "ocid": "ocds-5wno2w-LIC-001",
+    "date": "2024-04-20T10:00:00Z",
+    "tender": {"status": "complete"},
+    "awards": [{"id": "A-1", "contractPeriod": {"startDate": "2024-05-01", "endDate": "2024-07-30"}}],
+}
+
+CONTRACT_RELEASE = {
+    "ocid": "ocds-5wno2w-LIC-001",
+    "date": "2024-05-01T10:00:00Z",
+    "contracts": [{"id": "C-1", "period": {"startDate": "2024-05-01", "endDate": "2024-08-29"}}],
+}
+
+
+@pytest.fixture()
+def engine(tmp_path):
+    from sqlalchemy import create_engine
+
+    import models
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'ocds.db'}")
+    models.Base.metadata.create_all(engine)
+    try:
+        yield engine
+    finally:
+        engine.dispose()
+
+
+def _ingest(engine, tmp_path, releases, chunk_size=100):
+    import json
+
+    from services.ocds_ingestion import ingest_releases
+
+    path = tmp_path / f"releases_{len(list(tmp_path.iterdir()))}.jsonl"
+    path.write_text("\n".join(json.dumps(release) for release in releases), encoding="utf-8")
+    return ingest_releases(engine, [path], publishing_company_id=1, created_by_user_id=1, chunk_size=chunk_size)
+
+
+def _tender(engine):
+    from sqlalchemy import select
+
+    from models.tender import Tender
+
+    with engine.connect() as conn:
+        return conn.execute(select(Tender.__table__)).one()
+
+
+@pytest.mark.parametrize("chunk_size", [1, 100])
+def test_award_and_contract_releases_update_tender(engine, tmp_path, chunk_size):
+    report = _ingest(engine, tmp_path, [TENDER_RELEASE, AWARD_RELEASE, CONTRACT_RELEASE], chunk_size)
+    assert (report.rows, report.errors, report.skipped) == (3, 0, 0)
+
+    tender = _tender(engine)
+    assert tender.external_id == "LIC-001"
+    assert tender.title == "Adquisición de equipos"
+    assert tender.main_category == "Bienes"
+    assert float(tender.budget_amount) == 120000
+    assert tender.number_of_tenderers == 4
+    assert tender.tender_duration_days == 14
+    assert tender.status == "Cerrada"
+    assert tender.contract_duration_days == 120
+    assert tender.publish_date.date().isoformat() == "2024-03-01"
+
+
+def test_release_without_status_does_not_reopen(engine, tmp_path):
+    _ingest(engine, tmp_path, [TENDER_RELEASE, AWARD_RELEASE])
+
+    # Un release posterior con title pero sin status ni presupuesto no pisa lo guardado
+    amendment = {"ocid": TENDER_RELEASE["ocid"], "tender": {"id": "LIC-001", "title": "Adquisición de equipos (enmienda)"}}
+    report = _ingest(engine, tmp_path, [amendment])
+    assert report.errors == 0
+
+    tender = _tender(engine)
+    assert tender.title == "Adquisición de equipos (enmienda)"
+    assert tender.status == "Cerrada"
+    assert float(tender.budget_amount) == 120000
+    assert tender.contract_duration_days == 90
+
+
+def test_award_for_unknown_tender_is_skipped(engine, tmp_path):
+    report = _ingest(engine, tmp_path, [AWARD_RELEASE])
+    assert (report.upserted, report.errors, report.skipped) == (0, 0, 1)
@@ -8,7 +8,7 @@ import os
 # Agregar directorio padre al path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from services.prediction_service import predict_win_probability, CATEGORY_MAP
+from services.prediction_service import predict_win_probability, predict_win_probability_batch, CATEGORY_MAP
 
 
 def test_prediction():
@@ -125,10 +125,133 @@ def test_validations():
     print("=" * 60)
 
 
+def test_batch_prediction():
+    """Verifica que el lote vectorizado coincida con las predicciones individuales."""
+    
+    print("\n" + "=" * 60)
+    print("TEST: Predicción en lote")
+    print("=" * 60)
+    
+    records = [
+        dict(number_of_tenderers=3, main_category='Servicios', budget=100000.0, bid_amount=85000.0,
+             tender_duration_days=28, contract_duration_days=365),
+        dict(number_of_tenderers=12, main_category='Obras', budget=2965076.05, bid_amount=2900000.0,
+             tender_duration_days=28, contract_duration_days=730),
+        dict(number_of_tenderers=5, main_category='Bienes', budget=50000.0, bid_amount=30000.0,
+             tender_duration_days=21, contract_duration_days=180),
+    ]
+    
+    batch = predict_win_probability_batch(records)
+    for record, prob in zip(records, batch):
+        single = predict_win_probability(**record)
+        assert abs(single - prob) < 1e-9, f"Lote {prob} != individual {single}"
+        print(f"   ✅ {record['main_category']}: {prob:.2%}")
+    
+    # Una fila inválida invalida el lote completo
+    print("\n❌ Test: Fila inválida en el lote")
+    try:
+        predict_win_probability_batch(records + [dict(records[0], budget=0)])
+        print("   FALLÓ: Debería haber lanzado ValueError")
+    except ValueError as e:
+        print(f"   ✅ Validación correcta: {str(e)}")
+    
+    print("\n" + "=" * 60)
+    print("✅ LOTE COMPLETADO")
+    print("=" * 60)
+
+
+def test_numpy_backend_parity():
+    """Verifica que el backend NumPy (catboost_model.npz) dé las mismas probabilidades que CatBoost."""
+    import tempfile
+    import numpy as np
+    from services.model_manager import BACKEND_CATBOOST, BACKEND_NUMPY, ModelManager
+    from training.export import parity_sample
+    from training.registry import ModelRegistry
+    
+    print("\n" + "=" * 60)
+    print("TEST: Paridad backend NumPy vs CatBoost")
+    print("=" * 60)
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        # Registro vacío: ambos cargan el modelo heredado catboost_model.cbm / .npz
+        registry = ModelRegistry(tmp)
+        numpy_loaded = ModelManager(registry, backend=BACKEND_NUMPY).current()
+        catboost_loaded = ModelManager(registry, backend=BACKEND_CATBOOST).current()
+    assert numpy_loaded.backend == BACKEND_NUMPY, "No se cargó catboost_model.npz (python -m training export --legacy)"
+    
+    # Casos de test_prediction más una muestra aleatoria alrededor de los umbrales del modelo
+    cases = np.array([
+        [3, CATEGORY_MAP['Servicios'], 100000.0, 85000.0, 28, 365, 0],
+        [12, CATEGORY_MAP['Obras'], 2965076.05, 2900000.0, 28, 730, 0],
+        [5, CATEGORY_MAP['Bienes'], 50000.0, 30000.0, 21, 180, 0],
+    ])
+    sample = parity_sample(numpy_loaded.model, size=2000)
+    features = np.vstack([numpy_loaded.select_features(cases), sample])
+    assert features.shape[1] == len(numpy_loaded.features) == len(catboost_loaded.features)
+    
+    expected = catboost_loaded.model.predict_proba(features)[:, 1]
+    batch = numpy_loaded.model.predict_proba(features)[:, 1]
+    assert np.max(np.abs(expected - batch)) < 1e-9, f"Lote difiere en {np.max(np.abs(expected - batch))}"
+    for row, probability in zip(features[:50], expected[:50]):
+        single = numpy_loaded.model.predict_proba([row])[0][1]
+        assert abs(single - probability) < 1e-9, f"Fila {row}: {single} != {probability}"
+    print(f"   ✅ {len(features)} filas, diferencia máxima {np.max(np.abs(expected - batch)):.2e}")
+    
+    print("\n" + "=" * 60)
+    print("✅ PARIDAD COMPLETADA")
+    print("=" * 60)
+
+
+def test_win_matrix_interpolate_and_is_current():
+    """Verifica la interpolación bilineal de la grilla y la vigencia de una matriz guardada."""
+    from decimal import Decimal
+    import numpy as np
+    from models.tender_win_matrix import TenderWinMatrix
+    from services.win_matrix import (
+        BID_RATIOS, CONTRACT_DURATIONS, GRID_SHAPE, GRID_VERSION, TenderInputs, interpolate, is_current,
+    )
+    
+    print("\n" + "=" * 60)
+    print("TEST: Interpolación y vigencia de la matriz de probabilidades")
+    print("=" * 60)
+    
+    # Plano lineal en ambos ejes: la interpolación bilineal lo reproduce exactamente
+    ratios, durations = np.meshgrid(BID_RATIOS, CONTRACT_DURATIONS, indexing='ij')
+    matrix = 0.5 * ratios + durations / 10000.0
+    assert matrix.shape == GRID_SHAPE
+    
+    assert interpolate(matrix, BID_RATIOS[0], CONTRACT_DURATIONS[0]) == matrix[0, 0]
+    assert interpolate(matrix, BID_RATIOS[-1], CONTRACT_DURATIONS[-1]) == matrix[-1, -1]
+    ratio = (BID_RATIOS[3] + BID_RATIOS[4]) / 2
+    duration = (CONTRACT_DURATIONS[2] + CONTRACT_DURATIONS[3]) / 2
+    assert abs(interpolate(matrix, ratio, duration) - (0.5 * ratio + duration / 10000.0)) < 1e-12
+    assert interpolate(matrix, BID_RATIOS[0] - 0.01, 365) is None
+    assert interpolate(matrix, 0.9, CONTRACT_DURATIONS[-1] + 1) is None
+    print("   ✅ Esquinas, punto medio y fuera de la grilla")
+    
+    inputs = TenderInputs(number_of_tenderers=3, main_category='Servicios', budget_amount=100000.0,
+                          tender_duration_days=28)
+    row = TenderWinMatrix(tender_id=1, model_version='v1', grid_version=GRID_VERSION, number_of_tenderers=3,
+                          main_category='Servicios', budget_amount=Decimal('100000.00'), tender_duration_days=28)
+    assert is_current(row, inputs, 'v1')
+    assert not is_current(row, inputs, 'v2')
+    assert not is_current(row, TenderInputs(4, 'Servicios', 100000.0, 28), 'v1')
+    assert not is_current(row, TenderInputs(3, 'Servicios', 100000.01, 28), 'v1')
+    assert not is_current(None, inputs, 'v1')
+    print("   ✅ Matriz vigente solo con el mismo modelo, grilla y entradas")
+    
+    print("\n" + "=" * 60)
+    print("✅ MATRIZ COMPLETADA")
+    print("=" * 60)
+
+
 if __name__ == "__main__":
     try:
         test_prediction()
         test_validations()
+        test_batch_prediction()
+        test_numpy_backend_parity()
+        test_win_matrix_interpolate_and_is_current()
     except Exception as e:
         print(f"\n❌ ERROR: {str(e)}")
         import traceback
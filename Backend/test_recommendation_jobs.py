@@ -0,0 +1,220 @@
+"""
+Cola de recomendaciones con el cliente falso de OpenAI sobre SQLite: encolado,
+trabajo completado o fallido, retención de terminados, re-encolado de pendientes
+y trabajos que ya genera otro proceso.
+"""
+import asyncio
+import os
+import sys
+from decimal import Decimal
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture()
+def session_factory(tmp_path):
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+
+    import models
+    from models import Company, Participation, Tender
+
+    # Archivo y no memoria: los workers abren sus propias conexiones desde otros hilos
+    engine = create_engine(f"sqlite:///{tmp_path / 'jobs.db'}")
+    models.Base.metadata.create_all(engine)
+    factory = sessionmaker(bind=engine)
+    db = factory()
+    db.add(Company(id=1, legal_name="Empresa 1", tax_id="0000000000001", country_id=1, province_id=1, city_id=1))
+    db.flush()
+    for i in (1, 2, 3):
+        db.add(Tender(
+            id=i, external_id=f"T-{i}", title=f"Licitación {i}", main_category="Servicios",
+            budget_amount=Decimal("100000"), number_of_tenderers=i + 1,
+            publishing_company_id=1, created_by_user_id=1,
+        ))
+    db.flush()
+    for i in (1, 2, 3):
+        db.add(Participation(
+            id=i, tender_id=i, company_id=1, bid_amount=Decimal("90000"),
+            predicted_win_prob=Decimal("0.4"), participation_status="submitted",
+        ))
+    db.commit()
+    db.close()
+    try:
+        yield factory
+    finally:
+        engine.dispose()
+
+
+@pytest.fixture()
+def fake_gpt(monkeypatch):
+    """Cliente falso y caché solo en memoria (sin la tabla recommendation_cache)."""
+    from services import gpt_service
+    from services.fake_openai import FakeOpenAI
+    from services.recommendation_cache import InMemoryLRUCache, RecommendationCache
+
+    monkeypatch.setattr(gpt_service, "recommendation_cache", RecommendationCache(InMemoryLRUCache()))
+
+    def install(**kwargs):
+        client = FakeOpenAI(latency=0, **kwargs)
+        monkeypatch.setattr(gpt_service, "client", client)
+        return client
+
+    return install
+
+
+def _context(session_factory, participation_id):
+    from models import Participation
+    from services.recommendation_jobs import build_recommendation_context
+
+    db = session_factory()
+    try:
+        participation = db.get(Participation, participation_id)
+        return build_recommendation_context(participation.tender, participation.company, 90000.0, 0.4)
+    finally:
+        db.close()
+
+
+def _recommendation_text(session_factory, participation_id):
+    from models import Participation
+
+    db = session_factory()
+    try:
+        return db.get(Participation, participation_id).recommendation_text
+    finally:
+        db.close()
+
+
+async def _run(queue, participation_ids):
+    """Espera a que terminen los trabajos de las participaciones dadas."""
+    from services.recommendation_jobs import FINAL_STATUSES
+
+    for _ in range(500):
+        jobs = [queue._jobs.get(pid) for pid in participation_ids]
+        if all(job is not None and job.status in FINAL_STATUSES for job in jobs):
+            return jobs
+        await asyncio.sleep(0.01)
+    raise AssertionError("Los trabajos no terminaron")
+
+
+def test_enqueue_completes_and_saves(session_factory, fake_gpt):
+    from services.recommendation_jobs import RecommendationJobQueue, STATUS_COMPLETED, STATUS_QUEUED
+
+    client = fake_gpt(reply="Recomendación de prueba")
+    queue = RecommendationJobQueue(workers=2, session_factory=session_factory)
+
+    async def scenario():
+        await queue.start()
+        try:
+            job = queue.enqueue(1, _context(session_factory, 1))
+            assert job.status == STATUS_QUEUED
+            return await _run(queue, [1])
+        finally:
+            await queue.stop()
+
+    (job,) = asyncio.run(scenario())
+    assert job.status == STATUS_COMPLETED and job.error is None
+    assert job.context == {}
+    assert len(client.calls) == 1
+    assert _recommendation_text(session_factory, 1) == "Recomendación de prueba"
+
+
+def test_gpt_error_marks_job_failed(session_factory, fake_gpt):
+    from services.recommendation_jobs import RecommendationJobQueue, STATUS_FAILED
+
+    fake_gpt(fail_with=RuntimeError("rate limit"))
+    queue = RecommendationJobQueue(workers=1, session_factory=session_factory)
+
+    async def scenario():
+        await queue.start()
+        try:
+            queue.enqueue(2, _context(session_factory, 2))
+            return await _run(queue, [2])
+        finally:
+            await queue.stop()
+
+    (job,) = asyncio.run(scenario())
+    assert job.status == STATUS_FAILED and "rate limit" in job.error
+    # Se guarda la recomendación rápida con la nota del error
+    assert "Error GPT: rate limit" in _recommendation_text(session_factory, 2)
+
+
+def test_finished_jobs_are_pruned(session_factory, fake_gpt):
+    from services.recommendation_jobs import RecommendationJobQueue
+
+    fake_gpt(reply="Listo")
+    queue = RecommendationJobQueue(workers=2, session_factory=session_factory, max_finished=1)
+
+    async def scenario():
+        await queue.start()
+        try:
+            queue.enqueue(1, _context(session_factory, 1))
+            await _run(queue, [1])
+            queue.enqueue(2, _context(session_factory, 2))
+            await _run(queue, [2])
+        finally:
+            await queue.stop()
+
+    asyncio.run(scenario())
+    # Solo se conserva el último terminado
+    assert queue.get(1) is None and queue.get(2) is not None
+
+    queue.finished_ttl_seconds = 0
+    assert queue.get(2) is None
+    assert not queue._jobs and not queue._finished
+
+
+def test_requeue_pending_on_start(session_factory, fake_gpt):
+    from models import Participation
+    from services.recommendation_jobs import RecommendationJobQueue, STATUS_COMPLETED
+
+    client = fake_gpt(reply="Retomada")
+    db = session_factory()
+    db.get(Participation, 1).recommendation_text = "Ya generada"
+    db.commit()
+    db.close()
+    queue = RecommendationJobQueue(workers=2, session_factory=session_factory)
+
+    async def scenario():
+        await queue.start()
+        try:
+            requeued = await queue.requeue_pending()
+            jobs = await _run(queue, [2, 3])
+            return requeued, jobs
+        finally:
+            await queue.stop()
+
+    requeued, jobs = asyncio.run(scenario())
+    assert requeued == 2
+    assert all(job.status == STATUS_COMPLETED for job in jobs)
+    assert len(client.calls) == 2
+    assert _recommendation_text(session_factory, 1) == "Ya generada"
+    assert _recommendation_text(session_factory, 3) == "Retomada"
+
+
+def test_job_claimed_elsewhere_stays_pending(session_factory, fake_gpt, monkeypatch):
+    from services.recommendation_jobs import RecommendationJobQueue, STATUS_PENDING
+
+    client = fake_gpt(reply="No debería generarse")
+    queue = RecommendationJobQueue(workers=1, session_factory=session_factory)
+    # Otro proceso tiene el advisory lock de la participación
+    monkeypatch.setattr(queue, "_claim", lambda participation_id: (False, None))
+
+    async def scenario():
+        await queue.start()
+        try:
+            job = queue.enqueue(1, _context(session_factory, 1))
+            events = queue.events(1)
+            snapshots = [snapshot async for snapshot in events]
+            return job, snapshots
+        finally:
+            await queue.stop()
+
+    job, snapshots = asyncio.run(scenario())
+    assert job.status == STATUS_PENDING and job.context == {}
+    assert snapshots[-1]["status"] == STATUS_PENDING
+    assert queue.get(1) is None
+    assert not client.calls
+    assert _recommendation_text(session_factory, 1) is None
@@ -0,0 +1,41 @@
+"""
+Resaltado de la búsqueda de texto sobre SQLite (FTS5): el HTML de las licitaciones se
+escapa y solo las coincidencias quedan entre <mark></mark>.
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_highlight_escapes_source_html():
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import Session
+
+    import models
+    from models.tender import Tender
+    from services.tender_search import apply_search, ensure_search_index, render_highlight
+
+    engine = create_engine("sqlite://")
+    models.Base.metadata.create_all(engine)
+    ensure_search_index(engine)
+    db = Session(bind=engine)
+    try:
+        db.add(Tender(
+            external_id="T-1", title="<img src=x onerror=alert(1)> Equipos & redes",
+            description="Compra de equipos <b>urgente</b>", publishing_company_id=1, created_by_user_id=1,
+        ))
+        db.commit()
+
+        query, _ = apply_search(db.query(Tender.id), "equipos", "sqlite")
+        row = query.one()
+        assert render_highlight(row.title_highlight) == (
+            "&lt;img src=x onerror=alert(1)&gt; <mark>Equipos</mark> &amp; redes"
+        )
+        assert render_highlight(row.description_highlight) == (
+            "Compra de <mark>equipos</mark> &lt;b&gt;urgente&lt;/b&gt;"
+        )
+        assert render_highlight(None) is None
+    finally:
+        db.close()
+        engine.dispose()
@@ -0,0 +1,15 @@
+"""
+Pipeline reproducible de entrenamiento del modelo de probabilidad de ganar.
+
+Traslada la ingeniería de características de Code.ipynb a código versionado:
+
+- features: carga del dataset, imputación, one-hot de criterios de elegibilidad y
+  codificación de etiquetas
+- train: entrenamiento con CatBoost (thread_count, early stopping) y métricas
+- registry: registro de modelos en disco (modelo + manifiesto) y versión activa
+
+Uso: python -m training --help
+"""
+from training.registry import ModelRegistry, default_registry
+
+__all__ = ["ModelRegistry", "default_registry"]
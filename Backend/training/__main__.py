@@ -0,0 +1,195 @@
+"""
+CLI del pipeline de entrenamiento.
+
+    python -m training train TenderDatosRecolectados.xlsx --thread-count 4 --activate
+    python -m training list
+    python -m training activate catboost_20250101120000_ab12cd34
+    python -m training import-model catboost_model.cbm --version catboost_v1 --activate
+    python -m training export                      # versión activa → model.npz (backend NumPy)
+    python -m training export --legacy             # catboost_model.cbm → catboost_model.npz
+    python -m training report --log prediction_log.jsonl
+"""
+import argparse
+import json
+import sys
+
+from core.logging_config import configure_logging
+from training.export import export_model, export_version
+from training.features import MODEL_FEATURES, TARGET
+from training.registry import default_registry, ModelRegistry
+from training.train import DEFAULT_PARAMS, train_model
+
+
+def _registry(args) -> ModelRegistry:
+    return ModelRegistry(args.registry) if args.registry else default_registry()
+
+
+def cmd_train(args) -> int:
+    params = {
+        'iterations': args.iterations,
+        'learning_rate': args.learning_rate,
+        'depth': args.depth,
+        'early_stopping_rounds': args.early_stopping_rounds,
+        'thread_count': args.thread_count,
+    }
+    manifest = train_model(
+        args.dataset,
+        _registry(args),
+        params=params,
+        test_size=args.test_size,
+        validation_size=args.validation_size,
+        random_state=args.seed,
+        version=args.version,
+        activate=args.activate,
+        sheet=args.sheet,
+    )
+    print(f"✅ Modelo registrado: {manifest['version']}")
+    print(json.dumps(manifest['metrics'], indent=2))
+    return 0
+
+
+def cmd_list(args) -> int:
+    registry = _registry(args)
+    active = registry.active_version()
+    for version in registry.list_versions():
+        metrics = registry.load_manifest(version).get('metrics') or {}
+        test = metrics.get('test') or {}
+        marker = '*' if version == active else ' '
+        print(f"{marker} {version}  auc={test.get('roc_auc')}  f1={test.get('f1_macro')}")
+    return 0
+
+
+def cmd_activate(args) -> int:
+    _registry(args).activate(args.version)
+    print(f"✅ Versión activa: {args.version}")
+    return 0
+
+
+def cmd_import(args) -> int:
+    """Registra un .cbm entrenado fuera del pipeline (p. ej. el del notebook)."""
+    manifest = {
+        'features': MODEL_FEATURES,
+        'target': TARGET,
+        'preprocessing': {'label_encoders': {'MainCategory': ['Bienes', 'Obras', 'Servicios']}},
+        'metrics': None,
+        'data': None,
+        'source': 'imported',
+    }
+    registry = _registry(args)
+    registry.register(args.version, args.model, manifest, activate=False)
+    export_model(registry.model_path(args.version))
+    if args.activate:
+        registry.activate(args.version)
+    print(f"✅ Modelo importado como {args.version}")
+    return 0
+
+
+def cmd_export(args) -> int:
+    """Genera la exportación .npz del backend NumPy y verifica la paridad con CatBoost."""
+    if args.legacy:
+        from services.model_manager import LEGACY_MODEL_PATH
+        result = export_model(LEGACY_MODEL_PATH)
+    else:
+        result = export_version(_registry(args), args.version)
+    print(f"✅ {result['output']}: {result['trees']} árboles, profundidad {result['depth']}, "
+          f"{result['bytes'] / 1024:.1f} KB, diferencia máxima con CatBoost {result['max_abs_diff']:.2e}")
+    return 0
+
+
+def cmd_report(args) -> int:
+    """Compara champion, challenger y shadows a partir del registro de predicciones."""
+    from services.model_experiments import ExperimentConfig, build_report, load_outcomes, read_log
+
+    log_path = args.log or ExperimentConfig.from_settings().log_path
+    if not log_path:
+        raise ValueError("No hay registro de predicciones (usa --log o PREDICTION_LOG_PATH)")
+
+    outcomes = None
+    if not args.no_outcomes:
+        from core.database import SessionLocal
+
+        db = SessionLocal()
+        try:
+            outcomes = load_outcomes(db)
+        finally:
+            db.close()
+
+    report = build_report(read_log(log_path), outcomes, bins=args.bins)
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return 0
+
+    for row in report.values():
+        latency = row['latency_ms']
+        print(f"{row['version']} ({row['role']}): {row['predictions']} predicciones, "
+              f"p media={row['mean_probability']:.4f}, latencia p50={latency['p50']} ms p95={latency['p95']} ms")
+        if 'vs_served' in row:
+            vs = row['vs_served']
+            print(f"    vs servido: {vs['pairs']} pares, |Δp| medio={vs['mean_abs_diff']:.4f}, "
+                  f"acuerdo@0.5={vs['agreement_at_0_5']:.2%}")
+        if 'calibration' in row:
+            calibration = row['calibration']
+            print(f"    calibración: {calibration['rows']} con resultado, brier={calibration['brier']:.4f}, "
+                  f"logloss={calibration['logloss']:.4f}, ece={calibration['ece']:.4f}")
+            for bucket in calibration['buckets']:
+                low, high = bucket['range']
+                print(f"      [{low:.1f}, {high:.1f}) n={bucket['count']:<5} "
+                      f"predicho={bucket['predicted']:.3f} observado={bucket['observed']:.3f}")
+    return 0
+
+
+def main(argv=None) -> int:
+    configure_logging()
+    parser = argparse.ArgumentParser(prog="python -m training", description="Entrenamiento y registro de modelos")
+    parser.add_argument("--registry", default=None, help="Directorio del registro (por defecto MODEL_REGISTRY_DIR)")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    train = sub.add_parser("train", help="Entrenar y registrar un modelo")
+    train.add_argument("dataset", help="Dataset recolectado (.xlsx o .csv)")
+    train.add_argument("--sheet", default=0, help="Hoja del XLSX")
+    train.add_argument("--iterations", type=int, default=DEFAULT_PARAMS['iterations'])
+    train.add_argument("--learning-rate", type=float, default=DEFAULT_PARAMS['learning_rate'])
+    train.add_argument("--depth", type=int, default=DEFAULT_PARAMS['depth'])
+    train.add_argument("--early-stopping-rounds", type=int, default=DEFAULT_PARAMS['early_stopping_rounds'])
+    train.add_argument("--thread-count", type=int, default=DEFAULT_PARAMS['thread_count'], help="-1 = todos los núcleos")
+    train.add_argument("--test-size", type=float, default=0.3)
+    train.add_argument("--validation-size", type=float, default=0.2, help="Fracción del entrenamiento para early stopping")
+    train.add_argument("--seed", type=int, default=2021)
+    train.add_argument("--version", default=None, help="Nombre de la versión (por defecto fecha + hash de datos)")
+    train.add_argument("--activate", action="store_true", help="Marcar como versión activa")
+    train.set_defaults(func=cmd_train)
+
+    sub.add_parser("list", help="Listar versiones registradas").set_defaults(func=cmd_list)
+
+    activate = sub.add_parser("activate", help="Cambiar la versión activa")
+    activate.add_argument("version")
+    activate.set_defaults(func=cmd_activate)
+
+    imported = sub.add_parser("import-model", help="Registrar un .cbm existente")
+    imported.add_argument("model", help="Ruta al .cbm")
+    imported.add_argument("--version", required=True)
+    imported.add_argument("--activate", action="store_true")
+    imported.set_defaults(func=cmd_import)
+
+    export = sub.add_parser("export", help="Exportar al evaluador NumPy (INFERENCE_BACKEND=numpy)")
+    export.add_argument("version", nargs="?", default=None, help="Versión del registro (por defecto la activa)")
+    export.add_argument("--legacy", action="store_true", help="Exportar catboost_model.cbm")
+    export.set_defaults(func=cmd_export)
+
+    report = sub.add_parser("report", help="Comparar calibración y latencia de champion, challenger y shadows")
+    report.add_argument("--log", default=None, help="Registro JSONL (por defecto PREDICTION_LOG_PATH)")
+    report.add_argument("--bins", type=int, default=10, help="Buckets de calibración")
+    report.add_argument("--no-outcomes", action="store_true", help="No cruzar con resultados de la base de datos")
+    report.add_argument("--json", action="store_true", help="Salida en JSON")
+    report.set_defaults(func=cmd_report)
+
+    args = parser.parse_args(argv)
+    try:
+        return args.func(args)
+    except (FileNotFoundError, FileExistsError, ValueError) as e:
+        print(f"❌ Error: {e}")
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,101 @@
+"""
+Exportación de un modelo CatBoost (.cbm) al evaluador NumPy (.npz) de services/tree_model.py.
+
+El .npz queda junto al .cbm (model.npz en el registro, catboost_model.npz para el modelo
+heredado) y guarda el SHA-256 del .cbm de origen, así la API detecta exportaciones viejas.
+"""
+import json
+import tempfile
+from pathlib import Path
+from typing import Dict, Optional
+
+import numpy as np
+
+from services.tree_model import ObliviousTreeModel
+from training.features import file_hash
+
+
+# Muestra aleatoria para comprobar la paridad con CatBoost al exportar
+PARITY_SAMPLE_SIZE = 2000
+PARITY_TOLERANCE = 1e-9
+
+
+def numpy_model_path(cbm_path) -> Path:
+    return Path(cbm_path).with_suffix('.npz')
+
+
+def parity_sample(model, size: int = PARITY_SAMPLE_SIZE, seed: int = 2021) -> np.ndarray:
+    """
+    Filas aleatorias que recorren los umbrales del modelo: cada columna toma valores de sus
+    bordes (también exactamente en el borde) y de su vecindad.
+    """
+    rng = np.random.default_rng(seed)
+    n_features = max(len(model.feature_names), model.split_features.max() + 1)
+    sample = np.empty((size, n_features), dtype=np.float64)
+    for column in range(n_features):
+        borders = np.unique(model.split_borders[model.split_features == column])
+        borders = borders[np.isfinite(borders)].astype(np.float64)
+        if borders.size == 0:
+            sample[:, column] = rng.uniform(0, 1, size)
+            continue
+        low, high = borders.min(), borders.max()
+        spread = max(high - low, abs(high), 1.0)
+        candidates = np.concatenate([borders, rng.uniform(low - 0.1 * spread, high + 0.1 * spread, size)])
+        sample[:, column] = rng.choice(candidates, size)
+    return sample
+
+
+def check_parity(cbm_model, numpy_model: ObliviousTreeModel, features: np.ndarray) -> float:
+    """Máxima diferencia absoluta de probabilidad entre ambos backends."""
+    expected = np.asarray(cbm_model.predict_proba(features))[:, 1]
+    actual = numpy_model.predict_proba(features)[:, 1]
+    return float(np.max(np.abs(expected - actual))) if len(features) else 0.0
+
+
+def export_model(cbm_path, output_path=None, sample_size: int = PARITY_SAMPLE_SIZE) -> Dict:
+    """
+    Convierte el .cbm al formato NumPy y verifica la paridad sobre una muestra aleatoria.
+
+    Returns:
+        {'output', 'trees', 'depth', 'bytes', 'max_abs_diff'}
+
+    Raises:
+        ValueError: Si el modelo no es soportable o la paridad supera PARITY_TOLERANCE
+    """
+    from catboost import CatBoostClassifier
+
+    cbm_path = Path(cbm_path)
+    output_path = Path(output_path) if output_path else numpy_model_path(cbm_path)
+
+    cbm_model = CatBoostClassifier()
+    cbm_model.load_model(str(cbm_path))
+    with tempfile.TemporaryDirectory() as tmp:
+        dump_path = Path(tmp) / 'model.json'
+        cbm_model.save_model(str(dump_path), format='json')
+        dump = json.loads(dump_path.read_text(encoding='utf-8'))
+
+    numpy_model = ObliviousTreeModel.from_catboost_json(dump, source_sha256=file_hash(cbm_path))
+    max_abs_diff = check_parity(cbm_model, numpy_model, parity_sample(numpy_model, sample_size))
+    if max_abs_diff > PARITY_TOLERANCE:
+        raise ValueError(f"El modelo exportado difiere de CatBoost en {max_abs_diff:.3g} (tolerancia {PARITY_TOLERANCE})")
+
+    # Escribir en un temporal y renombrar: un worker que recarga nunca lee un .npz a medias
+    tmp_path = output_path.with_name(f".{output_path.name}.tmp")
+    numpy_model.save(tmp_path)
+    tmp_path.replace(output_path)
+
+    return {
+        'output': str(output_path),
+        'trees': numpy_model.tree_count_,
+        'depth': int(numpy_model.split_features.shape[1]),
+        'bytes': output_path.stat().st_size,
+        'max_abs_diff': max_abs_diff,
+    }
+
+
+def export_version(registry, version: Optional[str] = None) -> Dict:
+    """Exporta una versión del registro (por defecto la activa)."""
+    version = version or registry.active_version()
+    if not version:
+        raise ValueError("No hay versión activa; indica la versión a exportar")
+    return export_model(registry.model_path(version))
@@ -0,0 +1,156 @@
+"""
+Ingeniería de características del modelo (antes en Code.ipynb).
+
+El dataset de entrada es el export recolectado de SERCOP (TenderDatosRecolectados.xlsx
+o un CSV con las mismas columnas), una fila por oferta con la columna `ganador`.
+"""
+import hashlib
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import pandas as pd
+
+from services.tender_ingestion import CATEGORY_MAP as OCDS_CATEGORY_MAP
+
+
+# Columnas del dataset usadas por el modelo
+SOURCE_COLUMNS = [
+    'budget_amount',
+    'mainProcurementCategory',
+    'tenderPeriod_durationInDays',
+    'numberOfTenderers',
+    'amount',
+    'contractPeriod_durationInDays',
+    'ganador',
+    'eligibilityCriteria',
+]
+
+# Columnas imputadas con la mediana en lugar de descartar la fila
+MEDIAN_IMPUTED_COLUMNS = ['contractPeriod_durationInDays']
+
+# Criterios de elegibilidad que se convierten en columnas binarias
+ELIGIBILITY_PARAMETERS = [
+    'Oferta Económica',
+    'Experiencia Específica',
+    'Experiencia General',
+    'Experiencia Personal Técnico',
+    'Otros',
+    'Participación Ecuatoriana',
+    'VAE',
+]
+ELIGIBILITY_ALIASES = {'Otros Parámetros de Calificación': 'Otros'}
+
+LABEL_ENCODED_COLUMNS = ['mainProcurementCategory']
+
+# Valores de `ganador` que cuentan como clase positiva (1); el resto es 0.
+# Con datos 0/1 coincide con el LabelEncoder del notebook y evita invertir la clase
+# si la columna viene como texto (p. ej. "Ganador"/"Perdedor", donde el orden alfabético falla).
+WINNER_POSITIVE_LABELS = {'1', '1.0', 'true', 'si', 'sí', 'ganador', 'winner', 'yes'}
+
+RENAMED_COLUMNS = {
+    'budget_amount': 'Budget',
+    'mainProcurementCategory': 'MainCategory',
+    'tenderPeriod_durationInDays': 'TenderDurationDays',
+    'numberOfTenderers': 'NumberOfTenderers',
+    'amount': 'BidAmount',
+    'contractPeriod_durationInDays': 'ContractDurationDays',
+    'ganador': 'Winner',
+    'Oferta Económica': 'EconomicOffer',
+    'Experiencia Específica': 'SpecificExperience',
+    'Experiencia General': 'GeneralExperience',
+    'Experiencia Personal Técnico': 'TechnicalStaffExperience',
+    'Otros': 'OtherQualificationParameters',
+    'Participación Ecuatoriana': 'EcuadorianParticipation',
+    'VAE': 'EcuadorianAddedValue',
+}
+
+# Features del modelo en el orden que usa services/prediction_service.py
+MODEL_FEATURES = [
+    'NumberOfTenderers',
+    'MainCategory',
+    'Budget',
+    'BidAmount',
+    'TenderDurationDays',
+    'ContractDurationDays',
+]
+TARGET = 'Winner'
+
+
+def file_hash(path, chunk_size: int = 1 << 20) -> str:
+    """SHA-256 del archivo del dataset (identifica los datos de entrenamiento)."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as fp:
+        for chunk in iter(lambda: fp.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def load_dataset(path, sheet=0) -> pd.DataFrame:
+    """Lee el dataset recolectado desde XLSX o CSV."""
+    path = Path(path)
+    if path.suffix.lower() in ('.xlsx', '.xls'):
+        return pd.read_excel(path, sheet_name=sheet)
+    if path.suffix.lower() == '.csv':
+        return pd.read_csv(path)
+    raise ValueError(f"Formato de dataset no soportado: {path.suffix} (usa .xlsx o .csv)")
+
+
+def _label_encode(values: pd.Series) -> Tuple[pd.Series, List]:
+    """Equivalente a sklearn LabelEncoder: clases ordenadas → 0..n-1."""
+    classes = sorted(values.unique().tolist())
+    mapping = {value: index for index, value in enumerate(classes)}
+    return values.map(mapping).astype('int64'), classes
+
+
+def prepare_dataset(raw: pd.DataFrame) -> Tuple[pd.DataFrame, Dict]:
+    """
+    Aplica la preparación del notebook y devuelve (dataset, preprocesamiento).
+
+    `preprocesamiento` incluye los valores imputados y las clases de cada columna
+    codificada, para guardarlos en el manifiesto del modelo.
+    """
+    missing = [column for column in SOURCE_COLUMNS if column not in raw.columns]
+    if missing:
+        raise ValueError(f"Faltan columnas en el dataset: {', '.join(missing)}")
+
+    df = raw[SOURCE_COLUMNS].copy()
+
+    # Imputar con la mediana y descartar las filas incompletas restantes
+    imputed = {}
+    for column in MEDIAN_IMPUTED_COLUMNS:
+        imputed[column] = float(df[column].median())
+        df[column] = df[column].fillna(imputed[column])
+    df = df.dropna().reset_index(drop=True)
+
+    # Las categorías OCDS (goods/works/services) se llevan a las usadas por la API
+    df['mainProcurementCategory'] = df['mainProcurementCategory'].map(
+        lambda value: OCDS_CATEGORY_MAP.get(str(value).strip().lower(), str(value).strip())
+    )
+
+    # One-hot de los criterios de elegibilidad
+    criteria = df['eligibilityCriteria'].astype(str)
+    for alias, name in ELIGIBILITY_ALIASES.items():
+        criteria = criteria.str.replace(alias, name, regex=False)
+    for criterion in ELIGIBILITY_PARAMETERS:
+        df[criterion] = criteria.str.contains(criterion, regex=False).astype('int64')
+    df = df.drop(columns='eligibilityCriteria')
+
+    encoders = {}
+    for column in LABEL_ENCODED_COLUMNS:
+        df[column], classes = _label_encode(df[column])
+        encoders[RENAMED_COLUMNS[column]] = classes
+
+    df['ganador'] = df['ganador'].map(
+        lambda value: int(str(value).strip().lower() in WINNER_POSITIVE_LABELS)
+    ).astype('int64')
+    encoders['Winner'] = [0, 1]
+
+    df = df.rename(columns=RENAMED_COLUMNS)
+
+    preprocessing = {
+        'median_imputation': {RENAMED_COLUMNS[column]: value for column, value in imputed.items()},
+        'label_encoders': encoders,
+        'eligibility_parameters': [RENAMED_COLUMNS[name] for name in ELIGIBILITY_PARAMETERS],
+        'rows': int(len(df)),
+    }
+    return df, preprocessing
@@ -0,0 +1,92 @@
+"""
+Registro de modelos en disco.
+
+Estructura:
+    model_registry/
+        ACTIVE                       # versión activa (una línea)
+        <version>/model.cbm
+        <version>/model.npz          # exportación para el backend NumPy (training/export.py)
+        <version>/manifest.json      # features, encoders, métricas, hash de datos, parámetros
+"""
+import json
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from core.config import settings
+
+
+MODEL_FILENAME = "model.cbm"
+MANIFEST_FILENAME = "manifest.json"
+ACTIVE_FILENAME = "ACTIVE"
+
+DEFAULT_REGISTRY_DIR = Path(__file__).resolve().parent.parent / "model_registry"
+
+
+def _write_atomic(path: Path, content: str) -> None:
+    """Escribe en un temporal y lo renombra: quien lea nunca ve un archivo a medias."""
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as fp:
+            fp.write(content)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+class ModelRegistry:
+    def __init__(self, root):
+        self.root = Path(root)
+
+    def version_dir(self, version: str) -> Path:
+        return self.root / version
+
+    def model_path(self, version: str) -> Path:
+        return self.version_dir(version) / MODEL_FILENAME
+
+    def list_versions(self) -> List[str]:
+        if not self.root.is_dir():
+            return []
+        return sorted(
+            child.name for child in self.root.iterdir()
+            if (child / MANIFEST_FILENAME).is_file()
+        )
+
+    def load_manifest(self, version: str) -> Dict:
+        path = self.version_dir(version) / MANIFEST_FILENAME
+        if not path.is_file():
+            raise FileNotFoundError(f"La versión {version} no existe en {self.root}")
+        return json.loads(path.read_text(encoding="utf-8"))
+
+    def register(self, version: str, model_file, manifest: Dict, activate: bool = False) -> Path:
+        """Copia el modelo al registro junto con su manifiesto."""
+        target = self.version_dir(version)
+        if target.exists():
+            raise FileExistsError(f"La versión {version} ya está registrada")
+        target.mkdir(parents=True)
+        shutil.copyfile(model_file, target / MODEL_FILENAME)
+        manifest = {**manifest, "version": version}
+        _write_atomic(target / MANIFEST_FILENAME, json.dumps(manifest, indent=2, ensure_ascii=False))
+        if activate:
+            self.activate(version)
+        return target
+
+    def activate(self, version: str) -> None:
+        if not self.model_path(version).is_file():
+            raise FileNotFoundError(f"La versión {version} no existe en {self.root}")
+        _write_atomic(self.root / ACTIVE_FILENAME, version + "\n")
+
+    def active_version(self) -> Optional[str]:
+        path = self.root / ACTIVE_FILENAME
+        if not path.is_file():
+            return None
+        version = path.read_text(encoding="utf-8").strip()
+        return version or None
+
+
+def default_registry() -> ModelRegistry:
+    return ModelRegistry(settings.model_registry_dir or DEFAULT_REGISTRY_DIR)
@@ -0,0 +1,157 @@
+"""
+Entrenamiento del CatBoostClassifier y registro del artefacto.
+"""
+import platform
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from training.export import export_model
+from training.features import MODEL_FEATURES, TARGET, file_hash, load_dataset, prepare_dataset
+from training.registry import ModelRegistry
+
+
+DEFAULT_PARAMS = {
+    'iterations': 1000,
+    'learning_rate': 0.1,
+    'depth': 6,
+    'early_stopping_rounds': 50,
+    'thread_count': -1,
+}
+
+
+def split_dataset(
+    df: pd.DataFrame, test_size: float, validation_size: float, random_state: int
+) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+    """Separa entrenamiento / validación (early stopping) / prueba con una semilla fija."""
+    indices = np.random.default_rng(random_state).permutation(len(df))
+    n_test = int(round(len(df) * test_size))
+    n_validation = int(round((len(df) - n_test) * validation_size))
+    test = df.iloc[indices[:n_test]]
+    validation = df.iloc[indices[n_test:n_test + n_validation]]
+    train = df.iloc[indices[n_test + n_validation:]]
+    return train, validation, test
+
+
+def _roc_auc(y_true: np.ndarray, scores: np.ndarray) -> Optional[float]:
+    """AUC por el estadístico de Mann-Whitney (con empates promediados)."""
+    positives = int(y_true.sum())
+    negatives = len(y_true) - positives
+    if positives == 0 or negatives == 0:
+        return None
+    ranks = pd.Series(scores).rank(method='average').to_numpy()
+    return float((ranks[y_true == 1].sum() - positives * (positives + 1) / 2) / (positives * negatives))
+
+
+def _f1_macro(y_true: np.ndarray, y_pred: np.ndarray) -> float:
+    scores = []
+    for label in (0, 1):
+        tp = np.sum((y_pred == label) & (y_true == label))
+        fp = np.sum((y_pred == label) & (y_true != label))
+        fn = np.sum((y_pred != label) & (y_true == label))
+        denominator = 2 * tp + fp + fn
+        scores.append(2 * tp / denominator if denominator else 0.0)
+    return float(np.mean(scores))
+
+
+def evaluate(model, X: pd.DataFrame, y: pd.Series) -> Dict[str, Optional[float]]:
+    y_true = y.to_numpy()
+    probabilities = model.predict_proba(X)[:, 1]
+    y_pred = (probabilities >= 0.5).astype(int)
+    clipped = np.clip(probabilities, 1e-15, 1 - 1e-15)
+    return {
+        'accuracy': float(np.mean(y_pred == y_true)),
+        'f1_macro': _f1_macro(y_true, y_pred),
+        'roc_auc': _roc_auc(y_true, probabilities),
+        'logloss': float(-np.mean(y_true * np.log(clipped) + (1 - y_true) * np.log(1 - clipped))),
+        'rows': int(len(y_true)),
+    }
+
+
+def train_model(
+    dataset_path,
+    registry: ModelRegistry,
+    params: Optional[Dict] = None,
+    test_size: float = 0.3,
+    validation_size: float = 0.2,
+    random_state: int = 2021,
+    version: Optional[str] = None,
+    activate: bool = False,
+    sheet=0,
+) -> Dict:
+    """
+    Entrena el modelo con el dataset dado y lo registra.
+
+    Returns:
+        Manifiesto registrado (incluye la versión)
+    """
+    from catboost import CatBoostClassifier, __version__ as catboost_version
+
+    params = {**DEFAULT_PARAMS, **(params or {})}
+    data_hash = file_hash(dataset_path)
+
+    df, preprocessing = prepare_dataset(load_dataset(dataset_path, sheet=sheet))
+    train, validation, test = split_dataset(df, test_size, validation_size, random_state)
+    if train[TARGET].nunique() < 2:
+        raise ValueError("El conjunto de entrenamiento necesita ejemplos ganadores y perdedores")
+
+    model = CatBoostClassifier(
+        iterations=params['iterations'],
+        learning_rate=params['learning_rate'],
+        depth=params['depth'],
+        thread_count=params['thread_count'],
+        random_seed=random_state,
+        allow_writing_files=False,
+        verbose=0,
+    )
+    started = time.perf_counter()
+    model.fit(
+        train[MODEL_FEATURES],
+        train[TARGET],
+        eval_set=(validation[MODEL_FEATURES], validation[TARGET]) if len(validation) else None,
+        early_stopping_rounds=params['early_stopping_rounds'] if len(validation) else None,
+        use_best_model=bool(len(validation)),
+    )
+    training_seconds = time.perf_counter() - started
+
+    metrics = {
+        'test': evaluate(model, test[MODEL_FEATURES], test[TARGET]) if len(test) else None,
+        'validation': evaluate(model, validation[MODEL_FEATURES], validation[TARGET]) if len(validation) else None,
+        'best_iteration': model.get_best_iteration(),
+        'tree_count': int(model.tree_count_),
+        'training_seconds': round(training_seconds, 3),
+    }
+
+    created_at = datetime.now(timezone.utc)
+    version = version or f"catboost_{created_at:%Y%m%d%H%M%S}_{data_hash[:8]}"
+    manifest = {
+        'created_at': created_at.isoformat(),
+        'features': MODEL_FEATURES,
+        'target': TARGET,
+        'preprocessing': preprocessing,
+        'metrics': metrics,
+        'params': {**params, 'random_seed': random_state, 'test_size': test_size, 'validation_size': validation_size},
+        'data': {
+            'path': Path(dataset_path).name,
+            'sha256': data_hash,
+            'rows': preprocessing['rows'],
+            'split': {'train': len(train), 'validation': len(validation), 'test': len(test)},
+        },
+        'environment': {'catboost': catboost_version, 'python': platform.python_version()},
+    }
+
+    with tempfile.TemporaryDirectory() as tmp:
+        model_file = Path(tmp) / 'model.cbm'
+        model.save_model(str(model_file))
+        registry.register(version, model_file, manifest, activate=False)
+    # Exportación para INFERENCE_BACKEND=numpy, antes de activar para que la API la encuentre
+    export_model(registry.model_path(version))
+    if activate:
+        registry.activate(version)
+
+    return registry.load_manifest(version)